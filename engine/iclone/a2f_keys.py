@@ -0,0 +1,183 @@
+import argparse
+import json
+from pathlib import Path
+
+# Plain Python module (no RLPy): the remote server turns A2F weight matrices into expression keys with it,
+# and it runs outside iClone for previews/tests. numpy is used when iClone's Python has it.
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def _weight(row, idx):
+    try:
+        return float(row[idx])
+    except (TypeError, ValueError, IndexError, KeyError):
+        return 0.0
+
+
+def select_channels(facs_names, mapping: dict, expression_names):
+    """Map A2F facs names onto iClone expressions -> (names, column indexes, missing targets)."""
+    expression_name_set = set(expression_names)
+    names = []
+    indices = []
+    missing = []
+    for idx, name in enumerate(facs_names):
+        target = mapping.get(name, name)
+        if target in expression_name_set:
+            names.append(target)
+            indices.append(idx)
+        else:
+            missing.append(target)
+    return names, indices, missing
+
+
+def weight_rows(weight_mat, indices, strength_scale: float = 1.0, key_step: int = 1,
+                clamp_min=None, clamp_max=None):
+    """Sample every `key_step`-th frame of the mapped columns, scaled and optionally clamped.
+
+    Returns (frame_indexes, rows). Unparsable or missing weights become 0.0, as before.
+    """
+    key_step = max(1, key_step)
+    clamp_min = None if clamp_min is None else float(clamp_min)
+    clamp_max = None if clamp_max is None else float(clamp_max)
+    frames = list(range(0, len(weight_mat), key_step))
+    if not frames or not indices:
+        return frames, [[] for _ in frames]
+    np = _numpy()
+    matrix = None
+    if np is not None:
+        try:
+            matrix = np.asarray(weight_mat, dtype=np.float64)
+        except (TypeError, ValueError):
+            matrix = None
+        if matrix is not None and (matrix.ndim != 2 or matrix.shape[1] <= max(indices)):
+            matrix = None
+    if matrix is not None:
+        values = matrix[::key_step][:, indices] * strength_scale
+        if clamp_min is not None or clamp_max is not None:
+            values = np.clip(values, clamp_min, clamp_max)
+        return frames, values.tolist()
+    rows = []
+    for frame_idx in frames:
+        source = weight_mat[frame_idx]
+        values = [_weight(source, idx) * strength_scale for idx in indices]
+        if clamp_min is not None:
+            values = [max(clamp_min, value) for value in values]
+        if clamp_max is not None:
+            values = [min(clamp_max, value) for value in values]
+        rows.append(values)
+    return frames, rows
+
+
+def _segment_error(frames, rows, start: int, end: int):
+    """Worst (position, deviation) of the frames strictly between start and end from their linear interpolation."""
+    t0 = frames[start]
+    span = frames[end] - t0
+    first = rows[start]
+    last = rows[end]
+    worst = None
+    worst_error = -1.0
+    for pos in range(start + 1, end):
+        ratio = (frames[pos] - t0) / span
+        error = 0.0
+        for a, b, value in zip(first, last, rows[pos]):
+            deviation = abs(a + (b - a) * ratio - value)
+            if not deviation <= error:
+                error = deviation if deviation == deviation else float("inf")
+        if error > worst_error:
+            worst, worst_error = pos, error
+    return worst, worst_error
+
+
+def _segment_error_np(np, times, matrix, start: int, end: int):
+    ratio = (times[start + 1:end] - times[start]) / (times[end] - times[start])
+    interpolated = matrix[start] + (matrix[end] - matrix[start]) * ratio[:, None]
+    errors = np.abs(interpolated - matrix[start + 1:end]).max(axis=1)
+    errors = np.where(np.isnan(errors), np.inf, errors)
+    offset = int(errors.argmax())
+    return start + 1 + offset, float(errors[offset])
+
+
+def reduce_keyframes(frames, rows, tolerance: float) -> list[int]:
+    """Positions of the keys to keep so linear interpolation reproduces every dropped frame within `tolerance`.
+
+    Ramer-Douglas-Peucker over all channels at once, with the per-frame error being the largest absolute
+    deviation of any channel. The first and last frame are always kept; a negative tolerance keeps everything.
+    """
+    count = len(frames)
+    if count <= 2 or tolerance is None or tolerance < 0:
+        return list(range(count))
+    np = _numpy()
+    if np is not None:
+        times = np.asarray(frames, dtype=np.float64)
+        matrix = np.asarray(rows, dtype=np.float64)
+
+        def segment_error(start, end):
+            return _segment_error_np(np, times, matrix, start, end)
+    else:
+        def segment_error(start, end):
+            return _segment_error(frames, rows, start, end)
+
+    keep = [False] * count
+    keep[0] = keep[-1] = True
+    stack = [(0, count - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        pos, error = segment_error(start, end)
+        if error > tolerance:
+            keep[pos] = True
+            stack.append((start, pos))
+            stack.append((pos, end))
+    return [pos for pos, flag in enumerate(keep) if flag]
+
+
+def plan_keys(weight_mat, indices, strength_scale: float = 1.0, key_step: int = 1,
+              clamp_min=None, clamp_max=None, tolerance=None):
+    """Pre-compute the expression keys for an A2F clip -> (frame_indexes, rows) of the keys to emit."""
+    frames, rows = weight_rows(weight_mat, indices, strength_scale, key_step, clamp_min, clamp_max)
+    if tolerance is None:
+        return frames, rows
+    kept = reduce_keyframes(frames, rows, tolerance)
+    return [frames[pos] for pos in kept], [rows[pos] for pos in kept]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Preview A2F expression key reduction (no iClone needed).")
+    parser.add_argument("--json", required=True, help="A2F bsweight JSON export.")
+    parser.add_argument("--mapping-path", help="Optional A2F mapping JSON (facs name -> expression name).")
+    parser.add_argument("--key-step", type=int, default=1)
+    parser.add_argument("--strength-scale", type=float, default=1.0)
+    parser.add_argument("--clamp-min", type=float, default=None)
+    parser.add_argument("--clamp-max", type=float, default=None)
+    parser.add_argument("--tolerance", type=float, default=0.01, help="Max weight deviation of dropped frames.")
+    args = parser.parse_args()
+
+    payload = json.loads(Path(args.json).read_text(encoding="utf-8"))
+    facs_names = payload.get("facsNames") or []
+    mapping = {}
+    if args.mapping_path:
+        data = json.loads(Path(args.mapping_path).read_text(encoding="utf-8"))
+        mapping = data.get("mapping", data) if isinstance(data, dict) else {}
+    # Without iClone every mapped name counts as an expression.
+    targets = [mapping.get(name, name) for name in facs_names]
+    _, indices, _ = select_channels(facs_names, mapping, targets)
+    weight_mat = payload.get("weightMat") or []
+    sampled, _ = weight_rows(weight_mat, indices, args.strength_scale, args.key_step, args.clamp_min, args.clamp_max)
+    frames, _ = plan_keys(
+        weight_mat, indices, args.strength_scale, args.key_step, args.clamp_min, args.clamp_max, args.tolerance
+    )
+    ratio = len(frames) / len(sampled) if sampled else 0.0
+    print(f"Channels: {len(indices)}")
+    print(f"Keys: {len(frames)} of {len(sampled)} sampled frames ({ratio:.1%}) at tolerance {args.tolerance}")
+
+
+if __name__ == "__main__":
+    main()
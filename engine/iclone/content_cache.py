@@ -0,0 +1,191 @@
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+
+# Plain Python module (no RLPy): persistence, filtering and paging for content_indexer.py. The cache file
+# can also be queried outside iClone (see main()).
+
+CACHE_VERSION = 1
+DEFAULT_CACHE_NAME = "iclone_content_cache.json"
+DEFAULT_PAGE_SIZE = 1000
+
+
+def default_cache_path(config_path) -> Path:
+    return Path(config_path).resolve().parent / DEFAULT_CACHE_NAME
+
+
+def empty_cache() -> dict:
+    return {"version": CACHE_VERSION, "roots": {}, "folders": {}}
+
+
+def load_cache(path) -> dict:
+    try:
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return empty_cache()
+    if not isinstance(data, dict) or data.get("version") != CACHE_VERSION:
+        return empty_cache()
+    data.setdefault("roots", {})
+    data.setdefault("folders", {})
+    return data
+
+
+def save_cache(path, data: dict) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def folder_fingerprint(folder: str):
+    """mtime_ns of a content folder on disk, or None when it is not a plain filesystem path."""
+    try:
+        return os.stat(folder).st_mtime_ns
+    except (OSError, TypeError, ValueError):
+        return None
+
+
+def file_fingerprint(path: str):
+    try:
+        stat = os.stat(path)
+    except (OSError, TypeError, ValueError):
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def root_id(root_key: str, scope: str) -> str:
+    return f"{root_key}|{scope}"
+
+
+def walk_tree(root_folder: str, recursive: bool, visit):
+    """Depth-first over content folders like content_indexer's RLPy walk; `visit(folder)` returns its record.
+
+    Yields (folder, record); records carry "files" and, once listed, "subfolders".
+    """
+    visited = set()
+    stack = [root_folder]
+    while stack:
+        folder = stack.pop()
+        if folder in visited:
+            continue
+        visited.add(folder)
+        record = visit(folder)
+        yield folder, record
+        if recursive:
+            for sub in record.get("subfolders") or []:
+                if sub not in visited:
+                    stack.append(sub)
+
+
+def root_entries(cache: dict, rid: str, visit=None) -> list[dict]:
+    """Flat file entries of one cached root (cached records only unless `visit` refreshes them)."""
+    root = cache["roots"].get(rid)
+    if not root:
+        return []
+    folders = cache["folders"]
+    visit = visit or (lambda folder: folders.get(folder) or {})
+    entries = []
+    for folder, record in walk_tree(root["folder"], root.get("recursive", True), visit):
+        for item in record.get("files") or []:
+            entries.append(
+                {
+                    "root_key": root["root_key"],
+                    "scope": root["scope"],
+                    "folder": folder,
+                    "path": item["path"],
+                    "content_id": item.get("content_id"),
+                }
+            )
+    return entries
+
+
+def prune_folders(cache: dict, seen: set, root_folders) -> int:
+    """Drop cached folders below the refreshed roots that the walk no longer reached."""
+    roots = {str(folder).rstrip("/\\") for folder in root_folders if folder}
+    prefixes = tuple(root + sep for root in roots for sep in ("/", "\\"))
+    stale = [
+        folder for folder in cache["folders"]
+        if folder not in seen and (folder in roots or folder.startswith(prefixes))
+    ]
+    for folder in stale:
+        del cache["folders"][folder]
+    return len(stale)
+
+
+def _as_set(value, lower: bool = False):
+    if value is None or value == "" or value == []:
+        return None
+    items = [value] if isinstance(value, str) else list(value)
+    return {str(item).lower() if lower else str(item) for item in items}
+
+
+def filter_entries(entries, root_keys=None, scopes=None, extensions=None, query=None) -> list[dict]:
+    """Filter by root key(s), scope(s) ("default"/"custom"), extension(s) (".imotion" or "imotion") and a
+    case-insensitive path substring."""
+    root_keys = _as_set(root_keys)
+    scopes = _as_set(scopes)
+    extensions = _as_set(extensions, lower=True)
+    if extensions:
+        extensions = {ext if ext.startswith(".") else "." + ext for ext in extensions}
+    query = str(query).lower() if query else None
+    selected = []
+    for entry in entries:
+        if root_keys and entry["root_key"] not in root_keys:
+            continue
+        if scopes and entry["scope"] not in scopes:
+            continue
+        path = str(entry["path"])
+        if extensions and os.path.splitext(path)[1].lower() not in extensions:
+            continue
+        if query and query not in path.lower():
+            continue
+        selected.append(entry)
+    return selected
+
+
+def paginate(entries: list, offset=0, limit=DEFAULT_PAGE_SIZE) -> dict:
+    offset = max(0, int(offset or 0))
+    page = entries[offset:] if not limit else entries[offset:offset + int(limit)]
+    end = offset + len(page)
+    return {
+        "total_files": len(entries),
+        "offset": offset,
+        "limit": limit,
+        "next_offset": end if end < len(entries) else None,
+        "entries": page,
+    }
+
+
+def query_cache(cache_path, root_keys=None, scopes=None, extensions=None, query=None, offset=0,
+                limit=DEFAULT_PAGE_SIZE) -> dict:
+    """Serve a page from the persisted index without iClone (no refresh)."""
+    cache = load_cache(cache_path)
+    entries = [entry for rid in cache["roots"] for entry in root_entries(cache, rid)]
+    result = paginate(filter_entries(entries, root_keys, scopes, extensions, query), offset, limit)
+    result["cache_path"] = str(cache_path)
+    result["refreshed"] = cache.get("refreshed")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the persisted iClone content index (no iClone needed).")
+    parser.add_argument("--cache", required=True, help="iclone_content_cache.json written by content_indexer.py.")
+    parser.add_argument("--root-key", action="append", help="Root key filter (repeatable).")
+    parser.add_argument("--scope", action="append", choices=["default", "custom"])
+    parser.add_argument("--ext", action="append", help="Extension filter (repeatable), e.g. .imotion")
+    parser.add_argument("--query", help="Case-insensitive path substring.")
+    parser.add_argument("--offset", type=int, default=0)
+    parser.add_argument("--limit", type=int, default=DEFAULT_PAGE_SIZE)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    result = query_cache(args.cache, args.root_key, args.scope, args.ext, args.query, args.offset, args.limit)
+    result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
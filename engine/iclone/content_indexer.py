@@ -1,5 +1,6 @@
 import json
 import sys
+import time
 from pathlib import Path
 
 try:
@@ -10,6 +11,11 @@ except ImportError:
 sys.path.append(str(Path(__file__).resolve().parent))
 from iclone_config import load_config  # noqa: E402
 
+import content_cache  # noqa: E402
+
+# Loaded index per cache file, kept warm across list_content requests in the remote server.
+_CACHES = {}
+
 
 def _discover_enum_keys():
     keys = {}
@@ -39,56 +45,89 @@ def _resolve_root_key(name, known_keys):
     return None, None
 
 
-def _walk_folders(root_folder, recursive):
-    visited = set()
-    stack = [root_folder]
-    while stack:
-        folder = stack.pop()
-        if folder in visited:
-            continue
-        visited.add(folder)
-        yield folder
-        if recursive:
+def _list_folder(folder, fingerprint, cached, recursive):
+    """Query one content folder through RLPy; content ids of unchanged files are taken from the cache."""
+    known = {}
+    for item in (cached or {}).get("files") or []:
+        known[item["path"]] = item
+    files = []
+    id_lookups = 0
+    try:
+        paths = RLPy.RApplication.GetContentFilesInFolder(folder)
+    except Exception:
+        paths = []
+    for file_path in paths:
+        stamp = content_cache.file_fingerprint(file_path)
+        previous = known.get(file_path)
+        if previous and stamp is not None and previous.get("stamp") == stamp:
+            content_id = previous.get("content_id")
+        else:
             try:
-                subfolders = RLPy.RApplication.GetContentFoldersInFolder(folder)
-                for sub in subfolders:
-                    if sub not in visited:
-                        stack.append(sub)
+                content_id = RLPy.RApplication.GetContentId(file_path)
             except Exception:
-                pass
-
+                content_id = None
+            id_lookups += 1
+        files.append({"path": file_path, "content_id": content_id, "stamp": stamp})
 
-def _collect_files(root_key, root_folder, scope, recursive, max_files):
-    entries = []
-    for folder in _walk_folders(root_folder, recursive):
+    subfolders = None
+    if recursive:
         try:
-            files = RLPy.RApplication.GetContentFilesInFolder(folder)
+            subfolders = list(RLPy.RApplication.GetContentFoldersInFolder(folder))
         except Exception:
-            continue
-            
-        for file_path in files:
-            content_id = None
-            try:
-                content_id = RLPy.RApplication.GetContentId(file_path)
-            except Exception:
-                content_id = None
-            entries.append(
-                {
-                    "root_key": root_key,
-                    "scope": scope,
-                    "folder": folder,
-                    "path": file_path,
-                    "content_id": content_id,
-                }
-            )
-            if max_files and len(entries) >= max_files:
-                return entries
-    return entries
+            subfolders = []
+    return {"fingerprint": fingerprint, "files": files, "subfolders": subfolders}, id_lookups
+
+
+def _files_changed(record):
+    """True when a cached file was overwritten in place; the folder mtime only covers adds, removes and renames."""
+    return any(
+        content_cache.file_fingerprint(item["path"]) != item.get("stamp") for item in record.get("files") or []
+    )
+
+
+def _refresh_root(cache, root_key, scope, root_folder, recursive, mode, stats, seen):
+    """Walk one content root, re-listing only folders whose mtime or files changed (all of them for mode=full)."""
+    rid = content_cache.root_id(root_key, scope)
+    cache["roots"][rid] = {"root_key": root_key, "scope": scope, "folder": root_folder, "recursive": recursive}
+    folders = cache["folders"]
+
+    def visit(folder):
+        seen.add(folder)
+        cached = folders.get(folder)
+        if cached and mode == "none" and (cached.get("subfolders") is not None or not recursive):
+            stats["reused_folders"] += 1
+            return cached
+        fingerprint = content_cache.folder_fingerprint(folder)
+        if (
+            cached
+            and mode != "full"
+            and fingerprint is not None
+            and cached.get("fingerprint") == fingerprint
+            and (cached.get("subfolders") is not None or not recursive)
+            and not _files_changed(cached)
+        ):
+            stats["reused_folders"] += 1
+            return cached
+        record, id_lookups = _list_folder(folder, fingerprint, cached, recursive)
+        folders[folder] = record
+        stats["listed_folders"] += 1
+        stats["content_id_lookups"] += id_lookups
+        return record
+
+    return content_cache.root_entries(cache, rid, visit=visit)
+
+
+def _load_cache(cache_path):
+    key = str(cache_path)
+    if key not in _CACHES:
+        _CACHES[key] = content_cache.load_cache(cache_path)
+    return _CACHES[key]
 
 
 def get_content_index(config_overrides=None):
     config, config_path = load_config()
-    settings = config.get("content_index", {})
+    # Copy: without a config file this is DEFAULT_CONFIG's dict, and overrides must not leak into later requests.
+    settings = dict(config.get("content_index", {}))
     
     if config_overrides:
         settings.update(config_overrides)
@@ -97,11 +136,18 @@ def get_content_index(config_overrides=None):
     include_default = bool(settings.get("include_default", True))
     include_custom = bool(settings.get("include_custom", True))
     recursive = bool(settings.get("recursive", True))
-    max_files = settings.get("max_files")
-    output_path = settings.get("output_path")
+    # "auto": re-list changed folders only, "none": serve cached roots as they are, "full": re-walk everything.
+    mode = settings.get("refresh") or "auto"
+    cache_path = settings.get("cache_path") or content_cache.default_cache_path(config_path)
+    # max_files is the old per-request cap; it now maps onto the page size.
+    limit = settings.get("limit", settings.get("max_files") or content_cache.DEFAULT_PAGE_SIZE)
 
     known_keys = _discover_enum_keys()
-    
+    cache = _load_cache(cache_path)
+    stats = {"listed_folders": 0, "reused_folders": 0, "content_id_lookups": 0}
+    seen = set()
+    refreshed_roots = []
+
     results = []
     missing_enums = []
     
@@ -115,6 +161,13 @@ def get_content_index(config_overrides=None):
         custom_root = RLPy.RApplication.GetCustomDataPath()
     except: pass
 
+    def collect(name, folder, scope):
+        refreshed_roots.append(folder)
+        if mode == "full":
+            # Only this root's folders: other roots keep their cached listings for query_cache.
+            content_cache.prune_folders(cache, seen, [folder])
+        results.extend(_refresh_root(cache, name, scope, folder, recursive, mode, stats, seen))
+
     for name in root_keys:
         enum_value, resolved_name = _resolve_root_key(name, known_keys)
         
@@ -126,7 +179,7 @@ def get_content_index(config_overrides=None):
                 try:
                     default_folder = RLPy.RApplication.GetDefaultContentFolder(enum_value)
                     if default_folder:
-                        results.extend(_collect_files(name, default_folder, "default", recursive, max_files))
+                        collect(name, default_folder, "default")
                         found_any = True
                 except Exception:
                     pass
@@ -135,7 +188,7 @@ def get_content_index(config_overrides=None):
                 try:
                     custom_folder = RLPy.RApplication.GetCustomContentFolder(enum_value)
                     if custom_folder:
-                        results.extend(_collect_files(name, custom_folder, "custom", recursive, max_files))
+                        collect(name, custom_folder, "custom")
                         found_any = True
                 except Exception:
                     pass
@@ -148,32 +201,49 @@ def get_content_index(config_overrides=None):
             if include_default and template_root:
                 candidate = str(Path(template_root) / name)
                 if Path(candidate).exists():
-                    results.extend(_collect_files(name, candidate, "default", recursive, max_files))
+                    collect(name, candidate, "default")
                     fallback_found = True
             
             if include_custom and custom_root:
                 candidate = str(Path(custom_root) / name)
                 if Path(candidate).exists():
-                    results.extend(_collect_files(name, candidate, "custom", recursive, max_files))
+                    collect(name, candidate, "custom")
                     fallback_found = True
             
             if fallback_found:
                 if name in missing_enums:
                     missing_enums.remove(name)
 
+    if mode != "none" and recursive:
+        stats["pruned_folders"] = content_cache.prune_folders(cache, seen, refreshed_roots)
+    if stats["listed_folders"] or stats.get("pruned_folders"):
+        cache["refreshed"] = time.time()
+        content_cache.save_cache(cache_path, cache)
+
+    selected = content_cache.filter_entries(
+        results,
+        scopes=settings.get("scope"),
+        extensions=settings.get("extensions"),
+        query=settings.get("query"),
+    )
+    page = content_cache.paginate(selected, settings.get("offset"), limit)
+
     return {
         "ok": True,
         "config_path": str(config_path),
+        "cache_path": str(cache_path),
         "root_keys": root_keys,
         "missing_keys": missing_enums,
         "available_enum_keys": list(known_keys.keys()),
-        "total_files": len(results),
-        "entries": results,
+        "index_files": len(results),
+        **page,
+        **stats,
     }
 
 
 def main():
-    payload = get_content_index()
+    # The standalone run writes the whole index, not one page.
+    payload = get_content_index({"limit": 0})
     
     # Check if output_path is defined in the config used
     config, _ = load_config()
@@ -7,6 +7,8 @@ DEFAULT_CONFIG = {
     "remote": {
         "host": "127.0.0.1",
         "port": 8123,
+        "job_pump_ms": 50,
+        "request_timeout_sec": 25,
     },
     "md_probe": {
         "run_command_test": False,
@@ -21,6 +23,8 @@ DEFAULT_CONFIG = {
         "recursive": True,
         "max_files": None,
         "output_path": None,
+        "refresh": "auto",
+        "cache_path": None,
     },
 }
 
@@ -2,7 +2,7 @@ import json
 import os
 import sys
 import threading
-from http.server import BaseHTTPRequestHandler, HTTPServer
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 from typing import Optional
 
@@ -11,13 +11,23 @@ import RLPy
 sys.path.append(str(Path(__file__).resolve().parent))
 from iclone_config import load_config  # noqa: E402
 
+import a2f_keys  # noqa: E402
 import content_indexer  # noqa: E402
+import remote_jobs  # noqa: E402
 
 
 DEFAULT_HOST = "127.0.0.1"
 DEFAULT_PORT = 8123
 DEFAULT_KEY_STEP = 1
 DEFAULT_STRENGTH_SCALE = 1.0
+# Max expression weight deviation of frames dropped by key reduction; None keeps every sampled frame.
+DEFAULT_REDUCE_TOLERANCE = None
+DEFAULT_JOB_PUMP_MS = 50
+# Max seconds a non-async request waits for its job; below the clients' 30 s HTTP timeout. On expiry the
+# request answers with the job ticket (202) instead of holding an HTTP thread while the pump is stalled.
+DEFAULT_REQUEST_TIMEOUT_SEC = 25.0
+# Upper bound for one long-poll / stream heartbeat, so idle clients and proxies see traffic.
+MAX_WAIT_SECONDS = 30.0
 
 EFFECTOR_MAP = {
     "hip": RLPy.EHikEffector_Hip,
@@ -145,6 +155,9 @@ def _apply_a2f_json(
     start_seconds: Optional[float],
     clip_name: Optional[str],
     use_mocap_order: bool,
+    clamp_min: Optional[float] = None,
+    clamp_max: Optional[float] = None,
+    reduce_tolerance: Optional[float] = DEFAULT_REDUCE_TOLERANCE,
 ):
     path = Path(json_path)
     if not path.exists():
@@ -166,17 +179,7 @@ def _apply_a2f_json(
     expression_names = (
         face_component.GetExpressionNames("", True) if use_mocap_order else face_component.GetExpressionNames("")
     )
-    expression_name_set = set(expression_names)
-    mapped_names = []
-    mapped_indices = []
-    missing = []
-    for idx, name in enumerate(facs_names):
-        target = mapping.get(name, name)
-        if target in expression_name_set:
-            mapped_names.append(target)
-            mapped_indices.append(idx)
-        else:
-            missing.append(target)
+    mapped_names, mapped_indices, missing = a2f_keys.select_channels(facs_names, mapping, expression_names)
 
     if not mapped_names:
         return {"ok": False, "error": "No matching expression names found for A2F data.", "missing": missing}
@@ -186,6 +189,18 @@ def _apply_a2f_json(
     start_seconds = start_seconds or 0.0
     clip_name = clip_name or f"A2F_{path.stem}"
     clip_seconds = max(0.0, frame_count / export_fps)
+
+    # Scaling, clamping and key reduction happen once on the whole matrix; the loop below only emits keys.
+    sampled_frames = len(range(0, frame_count, key_step))
+    key_frames, key_values = a2f_keys.plan_keys(
+        weight_mat,
+        mapped_indices,
+        strength_scale=strength_scale,
+        key_step=key_step,
+        clamp_min=clamp_min,
+        clamp_max=clamp_max,
+        tolerance=reduce_tolerance,
+    )
     try:
         face_component.AddClip(_time_from_seconds(start_seconds), clip_name, _time_from_seconds(clip_seconds))
     except Exception:
@@ -194,21 +209,14 @@ def _apply_a2f_json(
     applied = 0
     fps = RLPy.RGlobal.GetFps()
     inv_time = RLPy.IndexedFrameTime(key_step, fps)
+    times = [_time_from_seconds(start_seconds + (frame_idx / export_fps)) for frame_idx in key_frames]
     face_component.BeginKeyEditing()
     try:
-        for frame_idx in range(0, frame_count, key_step):
-            weights = weight_mat[frame_idx]
-            values = []
-            for idx in mapped_indices:
-                try:
-                    value = float(weights[idx]) * strength_scale
-                except (TypeError, ValueError, IndexError):
-                    value = 0.0
-                values.append(value)
-
-            seconds = start_seconds + (frame_idx / export_fps)
-            time = _time_from_seconds(seconds)
-            face_component.AddExpressivenessKey(time, 1.0)
+        # Expressiveness is a constant 1.0: keying the ends of the clip is enough.
+        face_component.AddExpressivenessKey(times[0], 1.0)
+        if len(times) > 1:
+            face_component.AddExpressivenessKey(times[-1], 1.0)
+        for time, values in zip(times, key_values):
             result = face_component.AddExpressionKeys(time, mapped_names, values, inv_time)
             if result.IsError():
                 return {"ok": False, "error": "Failed to set expression keys."}
@@ -219,6 +227,8 @@ def _apply_a2f_json(
     return {
         "ok": True,
         "applied_frames": applied,
+        "sampled_frames": sampled_frames,
+        "reduce_tolerance": reduce_tolerance,
         "export_fps": export_fps,
         "clip_name": clip_name,
         "missing": missing,
@@ -532,6 +542,169 @@ def _load_vocal(avatar, audio_path: str, start_seconds: Optional[float], clip_na
     return {"ok": False, "error": last_error or "LoadVocal failed."}
 
 
+def _dispatch_action(action: str, data: dict):
+    """Run one scene action (main thread only) -> (http_status, result)."""
+    if action == "list_avatars":
+        return 200, {"ok": True, "avatars": _list_avatar_names()}
+
+    if action == "list_cameras":
+        return 200, {"ok": True, "cameras": _list_camera_names()}
+
+    if action == "select_avatar":
+        avatar = _find_avatar(data.get("name"))
+        if not avatar:
+            return 404, {"ok": False, "error": "No avatar found."}
+        RLPy.RScene.SelectObject(avatar)
+        return 200, {"ok": True, "selected": avatar.GetName()}
+
+    if action == "select_camera":
+        camera = _find_camera(data.get("name"))
+        if not camera:
+            return 404, {"ok": False, "error": "No camera found."}
+        RLPy.RScene.SetCurrentCamera(camera)
+        return 200, {"ok": True, "selected": camera.GetName()}
+
+    if action == "load_asset":
+        asset_path = data.get("path")
+        if not asset_path:
+            return 400, {"ok": False, "error": "Missing asset path."}
+        RLPy.RFileIO.LoadObject(asset_path, True)
+        return 200, {"ok": True, "path": asset_path}
+
+    if action == "apply_a2f_json":
+        avatar = _find_avatar(data.get("avatar_name"))
+        if not avatar:
+            return 404, {"ok": False, "error": "No avatar found."}
+        json_path = data.get("path")
+        if not json_path:
+            return 400, {"ok": False, "error": "Missing A2F json path."}
+        key_step = _to_int(data.get("key_step"), DEFAULT_KEY_STEP)
+        strength_scale = _to_float(data.get("strength_scale"), DEFAULT_STRENGTH_SCALE)
+        mapping_path = data.get("mapping_path")
+        start_seconds = data.get("start_seconds")
+        clip_name = data.get("clip_name")
+        use_mocap_order = bool(data.get("use_mocap_order"))
+        clamp_min = _to_float(data.get("clamp_min"), None)
+        clamp_max = _to_float(data.get("clamp_max"), None)
+        reduce_tolerance = _to_float(data.get("reduce_tolerance"), DEFAULT_REDUCE_TOLERANCE)
+        result = _apply_a2f_json(
+            avatar,
+            json_path,
+            mapping_path,
+            key_step,
+            strength_scale,
+            _to_float(start_seconds, None) if start_seconds is not None else None,
+            clip_name,
+            use_mocap_order,
+            clamp_min,
+            clamp_max,
+            reduce_tolerance,
+        )
+        status = 200 if result.get("ok") else 400
+        return status, result
+
+    if action == "save_italk":
+        avatar = _find_avatar(data.get("avatar_name"))
+        if not avatar:
+            return 404, {"ok": False, "error": "No avatar found."}
+        output_path = data.get("output_path")
+        if not output_path:
+            return 400, {"ok": False, "error": "Missing output_path."}
+        start_seconds = data.get("start_seconds")
+        end_seconds = data.get("end_seconds")
+        result = _save_italk(
+            avatar,
+            output_path,
+            _to_float(start_seconds, None) if start_seconds is not None else None,
+            _to_float(end_seconds, None) if end_seconds is not None else None,
+        )
+        status = 200 if result.get("ok") else 400
+        return status, result
+
+    if action == "load_vocal":
+        avatar = _find_avatar(data.get("avatar_name"))
+        if not avatar:
+            return 404, {"ok": False, "error": "No avatar found."}
+        audio_path = data.get("audio_path")
+        if not audio_path:
+            return 400, {"ok": False, "error": "Missing audio_path."}
+        start_seconds = data.get("start_seconds")
+        clip_name = data.get("clip_name")
+        result = _load_vocal(
+            avatar,
+            audio_path,
+            _to_float(start_seconds, None) if start_seconds is not None else None,
+            clip_name,
+        )
+        status = 200 if result.get("ok") else 400
+        return status, result
+
+    if action == "apply_ik_effector_keys":
+        avatar = _find_avatar(data.get("avatar_name"))
+        if not avatar:
+            return 404, {"ok": False, "error": "No avatar found."}
+        effector = data.get("effector")
+        keys = data.get("keys") or []
+        bake_fk_to_ik = bool(data.get("bake_fk_to_ik"))
+        bake_all = bool(data.get("bake_all"))
+        result = _apply_ik_effector_keys(avatar, effector, keys, bake_fk_to_ik, bake_all)
+        status = 200 if result.get("ok") else 400
+        return status, result
+
+    if action == "apply_camera_keys":
+        camera = _find_camera(data.get("camera_name"))
+        if not camera:
+            return 404, {"ok": False, "error": "No camera found."}
+        keys = data.get("keys") or []
+        result = _apply_camera_keys(camera, keys)
+        status = 200 if result.get("ok") else 400
+        return status, result
+
+    if action == "get_camera_info":
+        camera = _find_camera(data.get("camera_name"))
+        if not camera:
+            return 404, {"ok": False, "error": "No camera found."}
+        info = _get_camera_info(camera)
+        return 200, {"ok": True, "info": info}
+
+    if action == "set_camera_params":
+        camera = _find_camera(data.get("camera_name"))
+        if not camera:
+            return 404, {"ok": False, "error": "No camera found."}
+        result = _set_camera_params(camera, data)
+        status = 200 if result.get("ok") else 400
+        return status, result
+
+    if action == "list_content":
+        # Pass payload directly as config overrides
+        result = content_indexer.get_content_index(data)
+        status = 200 if result.get("ok") else 400
+        return status, result
+
+    return 400, {"ok": False, "error": f"Unknown action: {action}"}
+
+
+SCENE_ACTIONS = (
+    "list_avatars",
+    "list_cameras",
+    "select_avatar",
+    "select_camera",
+    "load_asset",
+    "apply_a2f_json",
+    "save_italk",
+    "load_vocal",
+    "apply_ik_effector_keys",
+    "apply_camera_keys",
+    "get_camera_info",
+    "set_camera_params",
+    "list_content",
+)
+JOB_ACTIONS = ("job_status", "job_list", "job_cancel", "job_stream")
+
+JOBS = remote_jobs.JobQueue(_dispatch_action)
+_JOB_PUMP = {}
+
+
 class ICloneRemoteHandler(BaseHTTPRequestHandler):
     def _send_json(self, status: int, payload: dict):
         data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
@@ -555,145 +728,131 @@ class ICloneRemoteHandler(BaseHTTPRequestHandler):
         if action == "ping":
             return self._send_json(200, {"ok": True, "message": "pong"})
 
-        if action == "list_avatars":
-            return self._send_json(200, {"ok": True, "avatars": _list_avatar_names()})
-
-        if action == "list_cameras":
-            return self._send_json(200, {"ok": True, "cameras": _list_camera_names()})
-
-        if action == "select_avatar":
-            avatar = _find_avatar(data.get("name"))
-            if not avatar:
-                return self._send_json(404, {"ok": False, "error": "No avatar found."})
-            RLPy.RScene.SelectObject(avatar)
-            return self._send_json(200, {"ok": True, "selected": avatar.GetName()})
-
-        if action == "select_camera":
-            camera = _find_camera(data.get("name"))
-            if not camera:
-                return self._send_json(404, {"ok": False, "error": "No camera found."})
-            RLPy.RScene.SetCurrentCamera(camera)
-            return self._send_json(200, {"ok": True, "selected": camera.GetName()})
-
-        if action == "load_asset":
-            asset_path = data.get("path")
-            if not asset_path:
-                return self._send_json(400, {"ok": False, "error": "Missing asset path."})
-            RLPy.RFileIO.LoadObject(asset_path, True)
-            return self._send_json(200, {"ok": True, "path": asset_path})
-
-        if action == "apply_a2f_json":
-            avatar = _find_avatar(data.get("avatar_name"))
-            if not avatar:
-                return self._send_json(404, {"ok": False, "error": "No avatar found."})
-            json_path = data.get("path")
-            if not json_path:
-                return self._send_json(400, {"ok": False, "error": "Missing A2F json path."})
-            key_step = _to_int(data.get("key_step"), DEFAULT_KEY_STEP)
-            strength_scale = _to_float(data.get("strength_scale"), DEFAULT_STRENGTH_SCALE)
-            mapping_path = data.get("mapping_path")
-            start_seconds = data.get("start_seconds")
-            clip_name = data.get("clip_name")
-            use_mocap_order = bool(data.get("use_mocap_order"))
-            result = _apply_a2f_json(
-                avatar,
-                json_path,
-                mapping_path,
-                key_step,
-                strength_scale,
-                _to_float(start_seconds, None) if start_seconds is not None else None,
-                clip_name,
-                use_mocap_order,
-            )
-            status = 200 if result.get("ok") else 400
-            return self._send_json(status, result)
-
-        if action == "save_italk":
-            avatar = _find_avatar(data.get("avatar_name"))
-            if not avatar:
-                return self._send_json(404, {"ok": False, "error": "No avatar found."})
-            output_path = data.get("output_path")
-            if not output_path:
-                return self._send_json(400, {"ok": False, "error": "Missing output_path."})
-            start_seconds = data.get("start_seconds")
-            end_seconds = data.get("end_seconds")
-            result = _save_italk(
-                avatar,
-                output_path,
-                _to_float(start_seconds, None) if start_seconds is not None else None,
-                _to_float(end_seconds, None) if end_seconds is not None else None,
-            )
-            status = 200 if result.get("ok") else 400
-            return self._send_json(status, result)
-
-        if action == "load_vocal":
-            avatar = _find_avatar(data.get("avatar_name"))
-            if not avatar:
-                return self._send_json(404, {"ok": False, "error": "No avatar found."})
-            audio_path = data.get("audio_path")
-            if not audio_path:
-                return self._send_json(400, {"ok": False, "error": "Missing audio_path."})
-            start_seconds = data.get("start_seconds")
-            clip_name = data.get("clip_name")
-            result = _load_vocal(
-                avatar,
-                audio_path,
-                _to_float(start_seconds, None) if start_seconds is not None else None,
-                clip_name,
-            )
-            status = 200 if result.get("ok") else 400
-            return self._send_json(status, result)
-
-        if action == "apply_ik_effector_keys":
-            avatar = _find_avatar(data.get("avatar_name"))
-            if not avatar:
-                return self._send_json(404, {"ok": False, "error": "No avatar found."})
-            effector = data.get("effector")
-            keys = data.get("keys") or []
-            bake_fk_to_ik = bool(data.get("bake_fk_to_ik"))
-            bake_all = bool(data.get("bake_all"))
-            result = _apply_ik_effector_keys(avatar, effector, keys, bake_fk_to_ik, bake_all)
-            status = 200 if result.get("ok") else 400
-            return self._send_json(status, result)
-
-        if action == "apply_camera_keys":
-            camera = _find_camera(data.get("camera_name"))
-            if not camera:
-                return self._send_json(404, {"ok": False, "error": "No camera found."})
-            keys = data.get("keys") or []
-            result = _apply_camera_keys(camera, keys)
-            status = 200 if result.get("ok") else 400
-            return self._send_json(status, result)
-
-        if action == "get_camera_info":
-            camera = _find_camera(data.get("camera_name"))
-            if not camera:
-                return self._send_json(404, {"ok": False, "error": "No camera found."})
-            info = _get_camera_info(camera)
-            return self._send_json(200, {"ok": True, "info": info})
-
-        if action == "set_camera_params":
-            camera = _find_camera(data.get("camera_name"))
-            if not camera:
-                return self._send_json(404, {"ok": False, "error": "No camera found."})
-            result = _set_camera_params(camera, data)
-            status = 200 if result.get("ok") else 400
-            return self._send_json(status, result)
-
-        if action == "list_content":
-            # Pass payload directly as config overrides
-            result = content_indexer.get_content_index(data)
-            status = 200 if result.get("ok") else 400
-            return self._send_json(status, result)
-
-        return self._send_json(400, {"ok": False, "error": f"Unknown action: {action}"})
+        if action in JOB_ACTIONS:
+            return self._handle_job_action(action, data)
+
+        if action == "batch":
+            return self._submit_batch(data)
+
+        if action not in SCENE_ACTIONS:
+            return self._send_json(400, {"ok": False, "error": f"Unknown action: {action}"})
+
+        job = JOBS.submit([(action, data)])
+        if payload.get("async"):
+            return self._send_json(202, _job_ticket(job))
+        timeout = getattr(self.server, "request_timeout", DEFAULT_REQUEST_TIMEOUT_SEC)
+        job = JOBS.wait_finished(job.id, timeout=timeout) or job
+        if not job.is_finished:
+            return self._send_json(202, _job_ticket(job))
+        if not job.results:
+            return self._send_json(409, {"ok": False, "error": job.error or "Job cancelled.", "job_id": job.id})
+        return self._send_json(job.http_status or 200, job.results[0])
+
+    def _submit_batch(self, data: dict):
+        steps = []
+        for idx, step in enumerate(data.get("steps") or []):
+            action = step.get("action") if isinstance(step, dict) else None
+            if action not in SCENE_ACTIONS:
+                return self._send_json(400, {"ok": False, "error": f"Step {idx}: unsupported action {action!r}."})
+            steps.append((action, step.get("payload") or {}, step.get("group")))
+        if not steps:
+            return self._send_json(400, {"ok": False, "error": "Batch has no steps."})
+        job = JOBS.submit(
+            steps,
+            kind="batch",
+            stop_on_error=bool(data.get("stop_on_error", True)),
+            label=data.get("label"),
+        )
+        return self._send_json(202, _job_ticket(job))
+
+    def _handle_job_action(self, action: str, data: dict):
+        if action == "job_list":
+            return self._send_json(200, {"ok": True, "jobs": JOBS.list()})
+
+        job_id = data.get("job_id")
+        if JOBS.get(job_id) is None:
+            return self._send_json(404, {"ok": False, "error": f"Unknown job: {job_id}"})
+
+        if action == "job_cancel":
+            cancelled = JOBS.cancel(job_id)
+            return self._send_json(200 if cancelled else 409, {"ok": cancelled, "job": JOBS.get(job_id).snapshot()})
+
+        wait_seconds = min(max(0.0, _to_float(data.get("wait_seconds"), 0.0)), MAX_WAIT_SECONDS)
+        if action == "job_stream":
+            return self._stream_job(job_id, wait_seconds or MAX_WAIT_SECONDS)
+
+        since_version = _to_int(data.get("since_version"), -1)
+        job = JOBS.wait(job_id, since_version, timeout=wait_seconds) if wait_seconds else JOBS.get(job_id)
+        return self._send_json(200, {"ok": True, "job": job.snapshot()})
+
+    def _stream_job(self, job_id: str, heartbeat_seconds: float):
+        """NDJSON: one job snapshot per change (or heartbeat) until the job finishes; results on the last line."""
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        version = -1
+        try:
+            while True:
+                job = JOBS.wait(job_id, version, timeout=heartbeat_seconds)
+                if job is None:
+                    return
+                line = json.dumps(job.snapshot(include_results=job.is_finished), ensure_ascii=False) + "\n"
+                self.wfile.write(line.encode("utf-8"))
+                self.wfile.flush()
+                version = job.version
+                if job.is_finished:
+                    return
+        except (BrokenPipeError, ConnectionResetError):
+            return
 
     def log_message(self, format, *args):
         return
 
 
-def start_server(host=DEFAULT_HOST, port=DEFAULT_PORT):
-    server = HTTPServer((host, port), ICloneRemoteHandler)
+def _job_ticket(job) -> dict:
+    return {
+        "ok": True,
+        "job_id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "steps_total": len(job.steps),
+        "position": JOBS.position(job),
+    }
+
+
+class _JobPumpCallback(RLPy.RPyTimerCallback):
+    """Runs queued actions on iClone's main thread (RLPy is not safe to call from HTTP threads)."""
+
+    def __init__(self):
+        RLPy.RPyTimerCallback.__init__(self)
+
+    def Timeout(self):
+        JOBS.run_step()
+
+
+def start_job_pump(interval_ms: int = DEFAULT_JOB_PUMP_MS):
+    if "timer" in _JOB_PUMP:
+        return _JOB_PUMP["timer"]
+    timer = RLPy.RPyTimer()
+    callback = _JobPumpCallback()
+    timer.SetInterval(max(1, interval_ms))
+    timer.RegisterPyTimerCallback(callback)
+    timer.Start()
+    # Both must stay referenced or iClone drops the callback.
+    _JOB_PUMP.update(timer=timer, callback=callback)
+    return timer
+
+
+def start_server(
+    host=DEFAULT_HOST, port=DEFAULT_PORT, job_pump_ms=DEFAULT_JOB_PUMP_MS, request_timeout=DEFAULT_REQUEST_TIMEOUT_SEC
+):
+    start_job_pump(job_pump_ms)
+    server = ThreadingHTTPServer((host, port), ICloneRemoteHandler)
+    server.daemon_threads = True
+    server.request_timeout = request_timeout
     thread = threading.Thread(target=server.serve_forever, daemon=True)
     thread.start()
     return server, thread
@@ -704,7 +863,9 @@ def main():
     remote_cfg = config.get("remote", {})
     host = os.environ.get("ICLONE_REMOTE_HOST", remote_cfg.get("host", DEFAULT_HOST))
     port = _to_int(os.environ.get("ICLONE_REMOTE_PORT", remote_cfg.get("port", DEFAULT_PORT)), DEFAULT_PORT)
-    server, thread = start_server(host, port)
+    job_pump_ms = _to_int(remote_cfg.get("job_pump_ms"), DEFAULT_JOB_PUMP_MS)
+    request_timeout = _to_float(remote_cfg.get("request_timeout_sec"), DEFAULT_REQUEST_TIMEOUT_SEC)
+    server, thread = start_server(host, port, job_pump_ms, request_timeout)
     print(f"[iClone Remote] Listening on http://{host}:{port} (config: {config_path})")
     return server, thread
 
@@ -0,0 +1,190 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict
+
+# Plain Python module (no RLPy): the remote server queues actions here and a pump on iClone's
+# main thread executes them one step at a time, so HTTP threads never touch the scene directly.
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+FINISHED_STATES = (JOB_DONE, JOB_FAILED, JOB_CANCELLED)
+
+# Finished jobs kept for status queries; older ones are dropped first.
+MAX_FINISHED_JOBS = 200
+
+
+class Job:
+    """An ordered list of (action, payload[, group]) steps run on the main thread, one step per pump tick.
+
+    Without stop_on_error a failed step only skips the remaining steps of its group (e.g. one scene of a batch).
+    """
+
+    def __init__(self, job_id: str, kind: str, steps: list, stop_on_error: bool = True, label=None):
+        self.id = job_id
+        self.kind = kind
+        self.steps = steps
+        self.stop_on_error = stop_on_error
+        self.label = label
+        self.status = JOB_PENDING
+        self.results = []
+        self.failed_groups = set()
+        self.http_status = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        # Bumped on every change; long-poll and stream clients wait for it to move.
+        self.version = 0
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    def snapshot(self, include_results: bool = True) -> dict:
+        data = {
+            "job_id": self.id,
+            "kind": self.kind,
+            "label": self.label,
+            "status": self.status,
+            "version": self.version,
+            "steps_total": len(self.steps),
+            "steps_done": len(self.results),
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "error": self.error,
+        }
+        if include_results:
+            if self.kind == "action":
+                data["result"] = self.results[0] if self.results else None
+            else:
+                data["results"] = [
+                    {"action": step[0], "result": result}
+                    for step, result in zip(self.steps, self.results)
+                ]
+        return data
+
+
+class JobQueue:
+    """FIFO of jobs shared by HTTP handler threads (submit/poll) and the main-thread pump (run_step).
+
+    `execute(action, payload)` returns (http_status, result_dict) and is only ever called by the pump.
+    """
+
+    def __init__(self, execute, max_finished: int = MAX_FINISHED_JOBS):
+        self.execute = execute
+        self.max_finished = max_finished
+        self.jobs = OrderedDict()
+        self.pending = []
+        self.condition = threading.Condition()
+        self._ids = itertools.count(1)
+
+    def submit(self, steps: list, kind: str = "action", stop_on_error: bool = True, label=None) -> Job:
+        with self.condition:
+            job = Job(f"job-{next(self._ids):05d}", kind, list(steps), stop_on_error=stop_on_error, label=label)
+            self.jobs[job.id] = job
+            self.pending.append(job)
+            self._prune()
+            self.condition.notify_all()
+            return job
+
+    def get(self, job_id: str):
+        with self.condition:
+            return self.jobs.get(job_id)
+
+    def position(self, job: Job) -> int:
+        """0 for the running/next job, n for n jobs ahead of it, -1 when it is no longer queued."""
+        with self.condition:
+            return self.pending.index(job) if job in self.pending else -1
+
+    def list(self) -> list[dict]:
+        with self.condition:
+            return [job.snapshot(include_results=False) for job in self.jobs.values()]
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a job that has not started yet (a running step cannot be interrupted)."""
+        with self.condition:
+            job = self.jobs.get(job_id)
+            if job is None or job.status != JOB_PENDING:
+                return False
+            self.pending.remove(job)
+            self._finish(job, JOB_CANCELLED)
+            return True
+
+    def run_step(self) -> bool:
+        """Execute one step of the head job; call from iClone's main thread. True if work was done."""
+        with self.condition:
+            if not self.pending:
+                return False
+            job = self.pending[0]
+            if job.status == JOB_PENDING:
+                job.status = JOB_RUNNING
+                job.started = time.time()
+                self._changed(job)
+            step = job.steps[len(job.results)]
+        action, payload = step[0], step[1]
+        group = step[2] if len(step) > 2 else None
+        if group is not None and group in job.failed_groups:
+            status, result = 424, {"ok": False, "skipped": True, "error": "Skipped after a failed step."}
+        else:
+            try:
+                status, result = self.execute(action, payload)
+            except Exception as exc:  # pylint: disable=broad-except
+                status, result = 500, {"ok": False, "error": f"{type(exc).__name__}: {exc}"}
+        with self.condition:
+            job.results.append(result)
+            job.http_status = status
+            failed = not result.get("ok", False)
+            if failed and group is not None:
+                job.failed_groups.add(group)
+            if failed and job.error is None:
+                job.error = result.get("error") or f"{action} failed."
+            if len(job.results) == len(job.steps) or (failed and job.stop_on_error):
+                self.pending.remove(job)
+                self._finish(job, JOB_FAILED if job.error else JOB_DONE)
+            else:
+                self._changed(job)
+        return True
+
+    def wait(self, job_id: str, since_version: int = -1, timeout=None):
+        """Block until the job changed past `since_version` or finished (long-poll); None if unknown."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.condition:
+            while True:
+                job = self.jobs.get(job_id)
+                if job is None or job.version > since_version or job.is_finished:
+                    return job
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return job
+                self.condition.wait(remaining)
+
+    def wait_finished(self, job_id: str, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.condition:
+            while True:
+                job = self.jobs.get(job_id)
+                if job is None or job.is_finished:
+                    return job
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return job
+                self.condition.wait(remaining)
+
+    def _changed(self, job: Job) -> None:
+        job.version += 1
+        self.condition.notify_all()
+
+    def _finish(self, job: Job, status: str) -> None:
+        job.status = status
+        job.finished = time.time()
+        self._changed(job)
+
+    def _prune(self) -> None:
+        finished = [job_id for job_id, job in self.jobs.items() if job.is_finished]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self.jobs[job_id]
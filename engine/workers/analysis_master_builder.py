@@ -5,10 +5,11 @@ import json
 import re
 from pathlib import Path
 
+from filmsets_catalog import filter_entries, load_catalog, story_cache_path
+from json_blocks import extract_json_values
 from visionexe_paths import ensure_dir, load_story_config, resolve_path
 
 
-JSON_BLOCK_RE = re.compile(r"```(?:json)?\s*([\[{].*?[\]}])\s*```", re.DOTALL | re.IGNORECASE)
 CHAPTER_RE = re.compile(r"chapter_(\d+)", re.IGNORECASE)
 VERSE_RE = re.compile(r"verse_(\d+)", re.IGNORECASE)
 SEGMENT_RE = re.compile(r"segment_(\d+)", re.IGNORECASE)
@@ -25,39 +26,6 @@ def parse_int(value):
         return None
 
 
-def extract_json_blocks(text):
-    blocks = []
-    if not text:
-        return blocks
-    for match in JSON_BLOCK_RE.finditer(text):
-        raw = match.group(1)
-        try:
-            blocks.append(json.loads(raw))
-        except json.JSONDecodeError:
-            continue
-    if blocks:
-        return blocks
-    stripped = text.strip()
-    if not stripped:
-        return blocks
-    try:
-        blocks.append(json.loads(stripped))
-        return blocks
-    except json.JSONDecodeError:
-        pass
-    decoder = json.JSONDecoder()
-    for idx, ch in enumerate(stripped):
-        if ch not in "{[":
-            continue
-        try:
-            payload, _ = decoder.raw_decode(stripped[idx:])
-            blocks.append(payload)
-            return blocks
-        except json.JSONDecodeError:
-            continue
-    return blocks
-
-
 def extract_from_path(source_path):
     if not source_path:
         return None, None, None, None
@@ -98,11 +66,12 @@ def build_source_id(source_path, row_index, mode):
     return f"row_{row_index}"
 
 
-def scan_analysis_files(root: Path):
+def scan_analysis_files(root: Path, cache_path: Path | None = None):
     index = {}
     if not root or not root.exists():
         return index
-    for path in root.rglob("analysis_llm.*"):
+    for entry in filter_entries(load_catalog(root, cache_path=cache_path), pattern="analysis_llm.*"):
+        path = entry["path"]
         chapter, segment_index, segment_type, _scene_index = extract_from_path(str(path))
         if chapter is None:
             continue
@@ -159,7 +128,7 @@ def main():
     analysis_index = {}
     if analysis_dir:
         analysis_dir_path = resolve_path(analysis_dir, repo_root)
-        analysis_index = scan_analysis_files(analysis_dir_path)
+        analysis_index = scan_analysis_files(analysis_dir_path, story_cache_path(story_config, repo_root, analysis_dir_path))
 
     with csv_path.open("r", encoding="utf-8") as f, output_path.open("w", encoding="utf-8") as out:
         reader = csv.DictReader(f)
@@ -205,7 +174,7 @@ def main():
             }
 
             if not args.no_extract_json and raw_content:
-                record["analysis_blocks"] = extract_json_blocks(raw_content)
+                record["analysis_blocks"] = extract_json_values(raw_content)
 
             if args.include_raw:
                 record["raw_content"] = raw_content
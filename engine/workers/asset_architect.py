@@ -3,12 +3,24 @@ import subprocess
 import argparse
 import json
 import csv
+import hashlib
+import re
 import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # --- CONFIGURATION ---
 ROOT_PATH = r"C:\Users\sasch\henoch"
 EXPORT_FILE = os.path.join(ROOT_PATH, "henoch_full_export.csv")
 OUTPUT_FILE = os.path.join(ROOT_PATH, "ASSET_BIBLE.md")
+DEFAULT_CACHE_DIR = os.path.join(ROOT_PATH, ".asset_architect_cache")
+CHUNK_SIZE = 15000
+# Share of --chunk-size the screenplay context appended to each chunk may take; the rest is source text.
+SCREENPLAY_SHARE = 0.5
+DEFAULT_WORKERS = 4
+
+ASSET_HEADER_RE = re.compile(r"^##\s+\[(?P<category>.*?)\]\s+(?P<name>.*?)(?:\s+\(ID:\s*(?P<id>.*?)\))?\s*$")
+# Emphasis the model wraps around header parts, e.g. "## **[PROP] Obsidian Tablet** (ID: ...)".
+HEADER_MARKUP_RE = re.compile(r"[*`]+")
 
 # --- PROMPTS ---
 
@@ -119,86 +131,291 @@ def call_ai_agent(prompt, label="AI Task"):
         print(f"Error calling AI: {e}")
         return None
 
-def load_csv_content(filepath):
-    content = []
+def chapter_key(source_path):
+    """'filmsets/chapter_001/analysis_linguistik/chapter.txt' -> 'chapter_001' (other sources -> 'global')."""
+    path_parts = source_path.replace("\\", "/").split("/")
+    if len(path_parts) >= 2 and path_parts[0] == "filmsets":
+        return path_parts[1]
+    return "global"
+
+def load_chapter_sources(filepath, limit=0):
+    """Export rows grouped by chapter (export order); each chapter's screenplay is read once."""
+    chapters = {}
     if not os.path.exists(filepath):
         print(f"CSV not found: {filepath}")
-        return ""
-    
+        return chapters
+
+    total = 0
     try:
         with open(filepath, 'r', encoding='utf-8') as f:
             reader = csv.reader(f)
             next(reader, None) # Skip header
             for row in reader:
-                if len(row) >= 2:
-                    # Add source path as context
-                    content.append(f"--- SOURCE: {row[0]} ---\n{row[1]}\n")
-                    
-                    # Try to find associated screenplay
-                    # Assuming row[0] is like "filmsets/chapter_001/analysis_linguistik/chapter.txt"
-                    # We want "filmsets/chapter_001/DREHBUCH_HOLLYWOOD.md"
-                    try:
-                        path_parts = row[0].split('/')
-                        if len(path_parts) >= 2 and path_parts[0] == 'filmsets':
-                            chapter_dir = os.path.join(ROOT_PATH, path_parts[0], path_parts[1])
-                            drehbuch_path = os.path.join(chapter_dir, "DREHBUCH_HOLLYWOOD.md")
-                            
-                            if os.path.exists(drehbuch_path):
-                                with open(drehbuch_path, 'r', encoding='utf-8') as db_file:
-                                    db_content = db_file.read()
-                                    content.append(f"\n--- SCREENPLAY CONTEXT ({path_parts[1]}) ---\n{db_content}\n--- END SCREENPLAY ---\n")
-                    except Exception as db_err:
-                        # Ignore screenplay errors, just continue with main text
-                        pass
-                        
+                if len(row) < 2:
+                    continue
+                if limit > 0 and total >= limit:
+                    print(f"Text auf {limit} Zeichen begrenzt.")
+                    break
+                text = row[1] if limit <= 0 else row[1][:limit - total]
+                total += len(text)
+                key = chapter_key(row[0])
+                group = chapters.get(key)
+                if group is None:
+                    group = {"chapter": key, "sources": [], "screenplay": None}
+                    drehbuch_path = os.path.join(ROOT_PATH, "filmsets", key, "DREHBUCH_HOLLYWOOD.md")
+                    if key != "global" and os.path.exists(drehbuch_path):
+                        try:
+                            with open(drehbuch_path, 'r', encoding='utf-8') as db_file:
+                                group["screenplay"] = db_file.read()
+                        except OSError:
+                            # Ignore screenplay errors, just continue with main text
+                            pass
+                    chapters[key] = group
+                group["sources"].append((row[0], text))
     except Exception as e:
         print(f"Error reading CSV: {e}")
-    
-    return "\n".join(content)
+
+    return chapters
+
+def screenplay_context(group, budget):
+    """Screenplay block appended to each chunk of a chapter, cut to `budget` characters."""
+    screenplay = group.get("screenplay")
+    if not screenplay:
+        return ""
+    head = f"\n--- SCREENPLAY CONTEXT ({group['chapter']}) ---\n"
+    tail = "\n--- END SCREENPLAY ---\n"
+    marker = "\n[... gekürzt]"
+    room = budget - len(head) - len(tail)
+    if len(screenplay) > room:
+        screenplay = screenplay[:max(0, room - len(marker))] + marker
+    return f"{head}{screenplay}{tail}"
+
+def chapter_chunks(group, chunk_size=CHUNK_SIZE):
+    """Chunks of one chapter cut at source boundaries (a single oversized source is split by characters).
+
+    The screenplay context is appended to every chunk of its chapter, so chunks never span chapters. It counts
+    against `chunk_size` and is cut to SCREENPLAY_SHARE of it, so every chunk keeps room for source text.
+    """
+    context = screenplay_context(group, int(chunk_size * SCREENPLAY_SHARE))
+    chunk_size = max(1, chunk_size - len(context))
+    pieces = []
+    for source, text in group["sources"]:
+        block = f"--- SOURCE: {source} ---\n{text}\n"
+        pieces.extend(block[i:i + chunk_size] for i in range(0, len(block), chunk_size))
+
+    bodies = []
+    buffer = ""
+    for piece in pieces:
+        if buffer and len(buffer) + 1 + len(piece) > chunk_size:
+            bodies.append(buffer)
+            buffer = ""
+        buffer = f"{buffer}\n{piece}" if buffer else piece
+    if buffer:
+        bodies.append(buffer)
+    return [body + context for body in bodies]
+
+def chunk_cache_path(cache_dir, prompt):
+    digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir, f"{digest}.md")
+
+def map_chunk(prompt, label, cache_dir=None):
+    """One extraction call; results are cached by the hash of the full prompt (template + chunk)."""
+    cache_path = chunk_cache_path(cache_dir, prompt) if cache_dir else None
+    if cache_path and os.path.exists(cache_path):
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return f.read(), True
+    result = call_ai_agent(prompt, label=label)
+    if result and cache_path:
+        tmp_path = cache_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(result)
+        os.replace(tmp_path, cache_path)
+    return result, False
+
+# --- REDUCE ---
+
+def normalize_asset_id(value):
+    return re.sub(r"[^A-Z0-9]+", "_", value.upper()).strip("_")
+
+def normalize_line(line):
+    return " ".join(line.lower().split())
+
+def match_header(line):
+    return ASSET_HEADER_RE.match(HEADER_MARKUP_RE.sub("", line).strip())
+
+def parse_asset_cards(text):
+    """Asset cards of one map result: header fields, preamble lines and '###' sections (list of lines)."""
+    cards = []
+    card = None
+    section = None
+    for line in (text or "").splitlines():
+        header = match_header(line)
+        if header:
+            asset_id = normalize_asset_id(header.group("id") or header.group("name"))
+            card = {
+                "category": header.group("category").strip().upper(),
+                "name": header.group("name").strip(),
+                "id": asset_id,
+                "preamble": [],
+                "sections": {},
+            }
+            section = None
+            if asset_id:
+                cards.append(card)
+            continue
+        if card is None:
+            continue
+        stripped = line.rstrip()
+        if stripped.startswith("## ") or stripped.strip() == "---":
+            # Anything outside a card (separators, chatter) ends it.
+            card = None
+            continue
+        if stripped.startswith("### "):
+            section = stripped
+            card["sections"].setdefault(section, [])
+            continue
+        if not stripped.strip():
+            continue
+        (card["sections"][section] if section else card["preamble"]).append(stripped)
+    return cards
+
+def section_key(heading):
+    return normalize_line(re.sub(r"^###\s*(\d+\.)?\s*", "", heading))
+
+def merge_lines(target, lines):
+    seen = {normalize_line(line) for line in target}
+    for line in lines:
+        key = normalize_line(line)
+        if key not in seen:
+            seen.add(key)
+            target.append(line)
+
+def reduce_assets(mapped):
+    """Merge map results ([(chapter, text), ...] in chapter order) by normalized asset ID.
+
+    Deterministic: the first card of an ID keeps its header, description and section order; later cards
+    only add tags and lines that are not there yet. Returns (assets, unparsed): results without a single
+    recognizable card are passed through as (chapter, text) instead of being dropped.
+    """
+    assets = {}
+    unparsed = []
+    for chapter, text in mapped:
+        cards = parse_asset_cards(text)
+        if not cards:
+            unparsed.append((chapter, text))
+        for card in cards:
+            merged = assets.get(card["id"])
+            if merged is None:
+                merged = {
+                    "category": card["category"],
+                    "name": card["name"],
+                    "id": card["id"],
+                    "description": None,
+                    "tags": [],
+                    "preamble": [],
+                    "sections": {},
+                    "chapters": [],
+                }
+                assets[card["id"]] = merged
+            if chapter not in merged["chapters"]:
+                merged["chapters"].append(chapter)
+            for line in card["preamble"]:
+                lowered = line.lower()
+                if lowered.startswith("**description:**"):
+                    merged["description"] = merged["description"] or line
+                elif lowered.startswith("**tags:**"):
+                    merge_lines(merged["tags"], re.findall(r"#[\w\-]+", line))
+                else:
+                    merge_lines(merged["preamble"], [line])
+            for heading, lines in card["sections"].items():
+                key = section_key(heading)
+                entry = merged["sections"].setdefault(key, {"heading": heading, "lines": []})
+                merge_lines(entry["lines"], lines)
+    return list(assets.values()), unparsed
+
+def chapter_numbers(chapters):
+    numbers = [str(int(c.split("_", 1)[1])) for c in chapters if re.fullmatch(r"chapter_\d+", c)]
+    return ", ".join(numbers)
+
+def render_asset_bible(assets, unparsed=()):
+    blocks = []
+    for asset in assets:
+        lines = [f"## [{asset['category']}] {asset['name']} (ID: {asset['id']})"]
+        if asset["description"]:
+            lines.append(asset["description"])
+        if asset["tags"]:
+            lines.append("**Tags:** " + " ".join(asset["tags"]))
+        numbers = chapter_numbers(asset["chapters"])
+        if numbers:
+            lines.append(f"**Chapters:** {numbers}")
+        lines.extend(asset["preamble"])
+        for entry in asset["sections"].values():
+            lines.append("")
+            lines.append(entry["heading"])
+            lines.extend(entry["lines"])
+        blocks.append("\n".join(lines))
+    for chapter, text in unparsed:
+        # No "[CATEGORY]" in the heading: downstream header parsers must not take it for an asset card.
+        blocks.append(f"## UNPARSED EXTRACTION ({chapter})\n\n{text.strip()}")
+    return "# EXEGET:OS ASSET BIBLE (AUTO-GENERATED)\n\n" + "\n\n---\n\n".join(blocks) + "\n"
 
 def main():
     parser = argparse.ArgumentParser(description="Exeget:OS Asset Architect")
     parser.add_argument("--limit", type=int, default=0, help="Limit characters to analyze (0 = all)")
+    parser.add_argument("--export", default=EXPORT_FILE, help="Analysis export CSV.")
+    parser.add_argument("--output", default=OUTPUT_FILE, help="ASSET_BIBLE.md path.")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Max characters per map call (sources + screenplay context).")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Parallel extraction calls.")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Per-chunk result cache.")
+    parser.add_argument("--no-cache", action="store_true", help="Re-extract every chunk.")
     args = parser.parse_args()
 
     print("Lade Analyse-Daten...")
-    full_text = load_csv_content(EXPORT_FILE)
-    
-    if not full_text:
+    chapters = load_chapter_sources(args.export, limit=args.limit)
+
+    if not chapters:
         print("Keine Daten gefunden.")
         return
 
-    if args.limit > 0:
-        full_text = full_text[:args.limit]
-        print(f"Text auf {args.limit} Zeichen begrenzt.")
-
-    print(f"Analysiere {len(full_text)} Zeichen Text...")
-
-    # Split text into chunks if too large (simple splitting for now)
-    # Gemini Pro has a large context window, but let's be safe or process in passes if needed.
-    # For now, we'll try sending it all if it fits, or split by chapters if we had that logic.
-    # Given the CSV structure, we can just send it. If it's huge, we might need to chunk.
-    # Let's try a reasonable chunk size.
-    
-    CHUNK_SIZE = 15000
-    chunks = [full_text[i:i+CHUNK_SIZE] for i in range(0, len(full_text), CHUNK_SIZE)]
-    
-    all_assets = []
-
-    for i, chunk in enumerate(chunks):
-        print(f"Verarbeite Chunk {i+1}/{len(chunks)}...")
-        prompt = ASSET_EXTRACTION_PROMPT.format(text_chunk=chunk)
-        result = call_ai_agent(prompt, label=f"Asset Extraction Chunk {i+1}")
-        if result:
-            all_assets.append(result)
-
-    # Combine and Save
-    final_output = "# EXEGET:OS ASSET BIBLE (AUTO-GENERATED)\n\n" + "\n\n---\n\n".join(all_assets)
-    
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
+    jobs = []
+    for group in chapters.values():
+        for part, chunk in enumerate(chapter_chunks(group, args.chunk_size), 1):
+            jobs.append((group["chapter"], part, ASSET_EXTRACTION_PROMPT.format(text_chunk=chunk)))
+    print(f"Analysiere {len(chapters)} Kapitel in {len(jobs)} Chunks ({args.workers} parallel)...")
+
+    cache_dir = None if args.no_cache else args.cache_dir
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+
+    # --- MAP ---
+    results = [None] * len(jobs)
+    cached = 0
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = {
+            pool.submit(map_chunk, prompt, f"Asset Extraction {chapter} #{part}", cache_dir): idx
+            for idx, (chapter, part, prompt) in enumerate(jobs)
+        }
+        for future in as_completed(futures):
+            idx = futures[future]
+            results[idx], was_cached = future.result()
+            cached += was_cached
+
+    failed = [f"{jobs[idx][0]} #{jobs[idx][1]}" for idx, result in enumerate(results) if not result]
+    print(f"Chunks: {len(jobs) - len(failed)} ok ({cached} aus Cache), {len(failed)} fehlgeschlagen.")
+    for label in failed:
+        print(f"  Fehler: {label} (erneut starten extrahiert nur diese Chunks)")
+
+    # --- REDUCE ---
+    mapped = [(jobs[idx][0], result) for idx, result in enumerate(results) if result]
+    assets, unparsed = reduce_assets(mapped)
+    for chapter, _ in unparsed:
+        print(f"  Warnung: keine Asset-Karte erkannt in {chapter}, Rohtext wird unverändert angehängt.")
+    final_output = render_asset_bible(assets, unparsed)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
         f.write(final_output)
-    
-    print(f"\nAsset Bible gespeichert: {OUTPUT_FILE}")
+
+    print(f"\nAsset Bible gespeichert: {args.output} ({len(assets)} Assets)")
 
 if __name__ == "__main__":
     main()
@@ -4,6 +4,9 @@ import os
 import re
 import time
 
+import lora_catalog
+from substring_index import SubstringIndex
+
 ROOT_PATH = os.path.abspath(os.path.dirname(__file__))
 DEFAULT_ASSET_BIBLE = os.path.join(ROOT_PATH, "ASSET_BIBLE.md")
 DEFAULT_ASSET_BIBLE_DIR = os.path.join(ROOT_PATH, "produced_assets", "asset_bible")
@@ -168,39 +171,49 @@ def scan_lora_files(lora_root):
     loras = []
     if not lora_root or not os.path.isdir(lora_root):
         return loras
-    for root, _, filenames in os.walk(lora_root):
-        for filename in filenames:
-            if not filename.lower().endswith(".safetensors"):
-                continue
-            full_path = os.path.join(root, filename)
-            rel_path = os.path.relpath(full_path, ROOT_PATH)
-            loras.append({
-                "path": full_path,
-                "path_rel": rel_path,
-                "slug": normalize_token(filename),
-            })
+    for item in lora_catalog.load_catalog([lora_root]).entries:
+        if not item["valid"]:
+            print(f"[WARN] Invalid LoRA skipped: {item['path']} ({item['error']})")
+            continue
+        loras.append({
+            "path": item["path"],
+            "path_rel": os.path.relpath(item["path"], ROOT_PATH),
+            "slug": normalize_token(os.path.basename(item["path"])),
+            "base_model": item["base_model"],
+            "trigger_words": item["trigger_words"],
+        })
     return loras
 
 
-def find_lora_matches(entry, loras, category):
+def build_lora_matcher(loras):
+    return SubstringIndex((item["slug"], item) for item in loras)
+
+
+def find_lora_matches(entry, loras, category, matcher=None):
     tokens = {
         normalize_token(entry.get("id")),
         normalize_token(entry.get("name")),
         normalize_token(entry.get("asset_id")),
     }
     tokens = {t for t in tokens if t}
+    matcher = matcher or build_lora_matcher(loras)
     matches = []
-    for item in loras:
-        slug = item["slug"]
-        if category == "environments" and "env__" not in slug and "environment" not in slug:
-            continue
-        if category == "characters" and "env__" in slug:
-            continue
-        if any(token in slug for token in tokens):
+    for token in tokens:
+        for item in matcher.payloads(matcher.containing(token)):
+            slug = item["slug"]
+            if category == "environments" and "env__" not in slug and "environment" not in slug:
+                continue
+            if category == "characters" and "env__" in slug:
+                continue
             matches.append(item["path_rel"])
     return sorted(set(matches))
 
 
+def index_asset_tokens(index, asset):
+    for token in (normalize_token(asset.get("name")), normalize_token(asset.get("id"))):
+        index.setdefault(token, asset)
+
+
 def build_actor_training_map(training_queue):
     mapping = {}
     for item in training_queue:
@@ -254,33 +267,32 @@ def load_env_assets(path):
     return envs
 
 
-def match_env_geo(entry, env_assets):
+def build_env_matcher(env_assets):
+    matcher = SubstringIndex()
+    for idx, env in enumerate(env_assets):
+        for option in (env.get("key"), env.get("folder"), env.get("tag")):
+            matcher.add(normalize_token(option), idx)
+    return matcher
+
+
+def match_env_geo(entry, env_assets, matcher=None):
     tokens = {
         normalize_token(entry.get("id")),
         normalize_token(entry.get("name")),
     }
     tokens = {t for t in tokens if t}
-    best = None
-    best_score = 0
-    candidates = []
-    for env in env_assets:
-        options = [
-            normalize_token(env.get("key")),
-            normalize_token(env.get("folder")),
-            normalize_token(env.get("tag")),
-        ]
-        options = [o for o in options if o]
-        score = 0
-        for token in tokens:
-            for option in options:
-                if token in option or option in token:
-                    score = max(score, len(option))
-        if score:
-            candidates.append(env)
-        if score > best_score:
-            best_score = score
-            best = env
-    return best, candidates
+    matcher = matcher or build_env_matcher(env_assets)
+    scores = {}
+    for token in tokens:
+        for key_id in matcher.related(token):
+            option_len = len(matcher.keys[key_id])
+            for idx in matcher.values[key_id]:
+                scores[idx] = max(scores.get(idx, 0), option_len)
+    if not scores:
+        return None, []
+    order = sorted(scores)
+    best = max(order, key=lambda idx: scores[idx])
+    return env_assets[best], [env_assets[idx] for idx in order]
 
 
 def ensure_dir(path):
@@ -407,12 +419,11 @@ def main():
         if queue_entries:
             target["training"]["actor_queue"] = queue_entries
 
+    assets_by_token = {}
+    for asset in registry.values():
+        index_asset_tokens(assets_by_token, asset)
     for prop_norm, entries in prop_training.items():
-        target = None
-        for asset in registry.values():
-            if normalize_token(asset.get("name")) == prop_norm or normalize_token(asset.get("id")) == prop_norm:
-                target = asset
-                break
+        target = assets_by_token.get(prop_norm)
         if not target:
             asset_id = f"PROP_{prop_norm.upper()}" if prop_norm else f"PROP_{len(registry)+1}"
             target = registry.setdefault(asset_id, {
@@ -427,16 +438,18 @@ def main():
                 "training": {},
                 "env_geo": {},
             })
+            index_asset_tokens(assets_by_token, target)
         target["training"]["prop_queue"] = entries
         if args.create_dirs:
             for entry in entries:
                 ensure_dir(entry.get("output_dir"))
 
     env_bridge = []
+    env_matcher = build_env_matcher(env_assets)
     for asset in registry.values():
         if normalize_token(asset.get("category_slug")) != "environments":
             continue
-        best, candidates = match_env_geo(asset, env_assets)
+        best, candidates = match_env_geo(asset, env_assets, matcher=env_matcher)
         asset["env_geo"] = {
             "best_match": best,
             "candidates": candidates,
@@ -452,9 +465,10 @@ def main():
                 "match_reason": "slug",
             })
 
+    lora_matcher = build_lora_matcher(loras)
     for asset in registry.values():
         category = normalize_token(asset.get("category_slug"))
-        asset["lora_files"] = find_lora_matches(asset, loras, category)
+        asset["lora_files"] = find_lora_matches(asset, loras, category, matcher=lora_matcher)
 
     registry_payload = {
         "generated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
@@ -9,6 +9,8 @@ import urllib.request
 import urllib.error
 import sys
 
+import prompt_context
+
 DEFAULT_BASE_PATH = r"C:\Users\sasch\henoch\filmsets"
 DEFAULT_VOICE_PROFILES = os.path.join(
     os.path.dirname(os.path.abspath(__file__)),
@@ -720,6 +722,7 @@ def run(
     dry_run,
     skip_existing,
     no_monologue,
+    context_budget=False,
 ):
     chapter_folder = f"chapter_{chapter_num:03d}"
     chapter_path = os.path.join(base_path, chapter_folder)
@@ -746,6 +749,8 @@ def run(
     chapter_excerpt = " ".join(chapter_text.split())
     if len(chapter_excerpt) > 1200:
         chapter_excerpt = chapter_excerpt[:1200].rstrip() + "..."
+    # With a context budget each scene gets the concept/chapter passages that match it instead of the head.
+    assembler = prompt_context.ContextAssembler() if context_budget else None
 
     profiles, tts_defaults = load_voice_profiles(voice_profiles_path)
     registry_map = load_speaker_registry(speaker_registry_path)
@@ -819,14 +824,19 @@ def run(
             print(f"Skip monologue (no plan entry): {slug}")
             continue
         else:
+            scene_concept, scene_chapter = concept_excerpt, chapter_excerpt
+            if assembler:
+                scene_query = " ".join([scene.get("title", ""), action_text, dialog_text, json.dumps(regie or {})])
+                scene_concept = " ".join(assembler.select("concept_excerpt", concept_text, scene_query).split())
+                scene_chapter = " ".join(assembler.select("chapter_excerpt", chapter_text, scene_query).split())
             prompt = build_monologue_prompt(
                 scene,
                 action_text,
                 dialog_text,
                 actor_key,
                 regie,
-                concept_excerpt,
-                chapter_excerpt,
+                scene_concept,
+                scene_chapter,
                 max_words,
             )
             monologue = call_gemini(prompt, model=gemini_model)
@@ -1004,6 +1014,11 @@ if __name__ == "__main__":
     parser.add_argument("--skip-existing", action="store_true")
     parser.add_argument("--no-monologue", action="store_true")
     parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument(
+        "--context-budget",
+        action="store_true",
+        help="Per-scene concept/chapter excerpts (most relevant passages) instead of the first 1200 chars.",
+    )
     args = parser.parse_args()
 
     ok = run(
@@ -1026,6 +1041,7 @@ if __name__ == "__main__":
         dry_run=args.dry_run,
         skip_existing=args.skip_existing,
         no_monologue=args.no_monologue,
+        context_budget=args.context_budget,
     )
     if not ok:
         sys.exit(1)
@@ -4,13 +4,15 @@ import os
 import re
 import time
 
+from fs_snapshot import FsSnapshot
+
 ROOT_PATH = os.path.dirname(os.path.abspath(__file__))
 FILMSETS_PATH = os.path.join(ROOT_PATH, "filmsets")
 DEFAULT_CONFIG = os.path.join(ROOT_PATH, "audio_audit_config.json")
 
 
-def load_json(path):
-    if not os.path.exists(path):
+def load_json(path, fs=None):
+    if not (fs.exists(path) if fs else os.path.exists(path)):
         return None
     try:
         with open(path, "r", encoding="utf-8") as handle:
@@ -94,16 +96,18 @@ def read_text(path):
         return ""
 
 
-def parse_narrator_present(script_path):
-    if not os.path.exists(script_path):
+def parse_narrator_present(script_path, fs=None):
+    fs = fs or FsSnapshot()
+    if not fs.exists(script_path):
         return False
     content = read_text(script_path)
     return "NARRATOR_TEXT:" in content
 
 
-def check_file(label, path_value, required, chapter_path, media_dir):
+def check_file(label, path_value, required, chapter_path, media_dir, fs=None):
+    fs = fs or FsSnapshot()
     resolved = resolve_path(chapter_path, media_dir, path_value)
-    exists = bool(resolved and os.path.exists(resolved))
+    exists = bool(resolved and fs.exists(resolved))
     return {
         "label": label,
         "path": resolved,
@@ -112,7 +116,8 @@ def check_file(label, path_value, required, chapter_path, media_dir):
     }
 
 
-def build_scene_checks(meta_path, meta, config, chapter_path, audio_dir, media_dir):
+def build_scene_checks(meta_path, meta, config, chapter_path, audio_dir, media_dir, fs=None):
+    fs = fs or FsSnapshot()
     scene_tag = detect_scene_from_filename(meta_path)
     scene_dot, scene_tag = normalize_scene_tag(scene_tag)
     regie = meta.get("regie", {}) if isinstance(meta, dict) else {}
@@ -128,15 +133,15 @@ def build_scene_checks(meta_path, meta, config, chapter_path, audio_dir, media_d
 
     voice_json_path = os.path.join(audio_dir, f"{scene_tag}_voice.json") if scene_tag else ""
     monologue_path = os.path.join(audio_dir, f"{scene_tag}_monologue.txt") if scene_tag else ""
-    if voice_json_path and os.path.exists(voice_json_path):
-        payload = load_json(voice_json_path) or {}
+    if voice_json_path and fs.exists(voice_json_path):
+        payload = load_json(voice_json_path, fs) or {}
         monologue_path = payload.get("monologue_file") or monologue_path
 
     if config.get("require_voice_json"):
         item = {
             "label": "voice_json",
             "path": voice_json_path,
-            "exists": bool(voice_json_path and os.path.exists(voice_json_path)),
+            "exists": bool(voice_json_path and fs.exists(voice_json_path)),
             "required": True
         }
         checks.append(item)
@@ -147,7 +152,7 @@ def build_scene_checks(meta_path, meta, config, chapter_path, audio_dir, media_d
         item = {
             "label": "monologue",
             "path": monologue_path,
-            "exists": bool(monologue_path and os.path.exists(monologue_path)),
+            "exists": bool(monologue_path and fs.exists(monologue_path)),
             "required": True
         }
         checks.append(item)
@@ -222,7 +227,8 @@ def build_scene_checks(meta_path, meta, config, chapter_path, audio_dir, media_d
     }
 
 
-def audit_chapter(chapter, config):
+def audit_chapter(chapter, config, fs=None):
+    fs = fs or FsSnapshot()
     chapter_path = os.path.join(FILMSETS_PATH, chapter)
     audio_dir = os.path.join(chapter_path, config["audio_dir"])
     media_dir = os.path.join(chapter_path, config["media_dir"])
@@ -234,24 +240,24 @@ def audit_chapter(chapter, config):
     }
 
     script_path = os.path.join(chapter_path, "DREHBUCH_HOLLYWOOD.md")
-    narrator_present = parse_narrator_present(script_path)
+    narrator_present = parse_narrator_present(script_path, fs)
     if narrator_present and config.get("require_narration_if_present"):
         narration_path = os.path.join(audio_dir, f"{chapter}_narration.txt")
         narration = {
             "required": True,
             "path": narration_path,
-            "exists": os.path.exists(narration_path)
+            "exists": fs.exists(narration_path)
         }
 
-    if not os.path.isdir(audio_dir):
+    if not fs.isdir(audio_dir):
         return results, narration
 
-    for name in sorted(os.listdir(audio_dir)):
+    for name in sorted(fs.listdir(audio_dir)):
         if not name.endswith("_audio_meta.json"):
             continue
         meta_path = os.path.join(audio_dir, name)
-        meta = load_json(meta_path) or {}
-        results.append(build_scene_checks(meta_path, meta, config, chapter_path, audio_dir, media_dir))
+        meta = load_json(meta_path, fs) or {}
+        results.append(build_scene_checks(meta_path, meta, config, chapter_path, audio_dir, media_dir, fs))
 
     return results, narration
 
@@ -288,10 +294,11 @@ def main():
 
     config = load_config(args.config)
     chapters = get_chapters(args.chapter)
+    fs = FsSnapshot()
 
     for chapter in chapters:
         chapter_path = os.path.join(FILMSETS_PATH, chapter)
-        results, narration = audit_chapter(chapter, config)
+        results, narration = audit_chapter(chapter, config, fs)
         if args.dry_run:
             print(f"{chapter}: {len(results)} scenes audited")
             continue
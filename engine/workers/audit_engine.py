@@ -0,0 +1,131 @@
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import audio_audit_worker
+import env_audit_worker
+import lora_audit_worker
+import prop_audit_worker
+import scene_audit_worker
+from fs_snapshot import FsSnapshot
+
+# Runs the audio/scene/env/prop/LoRA audits in one process against one shared FsSnapshot: every directory is
+# listed once per run however many rules look at it. Chapter audits run per chapter in a thread pool; outputs
+# are the same files the single workers write.
+
+ROOT_PATH = os.path.dirname(os.path.abspath(__file__))
+CHAPTER_AUDITS = ("audio", "scene")
+GLOBAL_AUDITS = ("env", "prop", "lora")
+ALL_AUDITS = CHAPTER_AUDITS + GLOBAL_AUDITS
+DEFAULT_WORKERS = min(8, (os.cpu_count() or 1) * 2)
+
+
+def run_audio(config, chapter, fs, dry_run):
+    results, narration = audio_audit_worker.audit_chapter(chapter, config, fs)
+    if not dry_run:
+        audio_audit_worker.write_outputs(os.path.join(audio_audit_worker.FILMSETS_PATH, chapter), results, narration)
+    return f"{chapter}: audio {len(results)} scenes"
+
+
+def run_scene(config, chapter, fs, dry_run):
+    results = scene_audit_worker.audit_chapter(chapter, config, fs)
+    if results is None:
+        return f"{chapter}: scene skipped (no screenplay)"
+    if not dry_run:
+        scene_audit_worker.write_outputs(os.path.join(scene_audit_worker.FILMSETS_PATH, chapter), results)
+    return f"{chapter}: scene {len(results)} scenes"
+
+
+def run_env(config, fs, dry_run):
+    results = env_audit_worker.build_audit(config, fs)
+    if not dry_run:
+        env_audit_worker.write_outputs(
+            results, os.path.join(ROOT_PATH, "env_audit.json"), os.path.join(ROOT_PATH, "env_audit_summary.md")
+        )
+    return f"env: {len(results)} items"
+
+
+def run_prop(config, fs, dry_run):
+    queue_path = os.path.join(ROOT_PATH, config["queue_path"])
+    queue = prop_audit_worker.load_json(queue_path)
+    if queue is None:
+        raise RuntimeError(f"Missing queue file: {queue_path}")
+    results = prop_audit_worker.build_audit(config, queue, fs)
+    if not dry_run:
+        prop_audit_worker.write_outputs(
+            results, os.path.join(ROOT_PATH, "prop_audit.json"), os.path.join(ROOT_PATH, "prop_audit_summary.md")
+        )
+    return f"prop: {len(results)} items"
+
+
+def run_lora(config, fs, dry_run):
+    lora_set = lora_audit_worker.load_json(lora_audit_worker.LORA_SET_PATH)
+    if not lora_set:
+        raise RuntimeError("LORA_TRAINING_SET.json not found or invalid.")
+    lora_queue = lora_audit_worker.load_json(lora_audit_worker.LORA_QUEUE_PATH)
+    results = lora_audit_worker.build_audit(config, lora_set, lora_queue, fs)
+    if not dry_run:
+        lora_audit_worker.write_outputs(
+            results, os.path.join(ROOT_PATH, "lora_audit.json"), os.path.join(ROOT_PATH, "lora_audit_summary.md")
+        )
+    return f"lora: {len(results)} items"
+
+
+CHAPTER_RUNNERS = {"audio": run_audio, "scene": run_scene}
+GLOBAL_RUNNERS = {"env": run_env, "prop": run_prop, "lora": run_lora}
+MODULES = {
+    "audio": audio_audit_worker,
+    "scene": scene_audit_worker,
+    "env": env_audit_worker,
+    "prop": prop_audit_worker,
+    "lora": lora_audit_worker,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run all filesystem audits against one shared directory snapshot.")
+    parser.add_argument("--audits", default=",".join(ALL_AUDITS), help=f"Comma-separated subset of {', '.join(ALL_AUDITS)}")
+    parser.add_argument("--chapter", default="all", help="Chapter number(s) for audio/scene audits, e.g. 1, 1-5, all")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Parallel audit tasks")
+    parser.add_argument("--dry-run", action="store_true", help="Audit without writing outputs")
+    for name in ALL_AUDITS:
+        parser.add_argument(f"--{name}-config", default=MODULES[name].DEFAULT_CONFIG, help=f"{name} audit config JSON path")
+    args = parser.parse_args()
+
+    audits = [name.strip() for name in args.audits.split(",") if name.strip()]
+    unknown = [name for name in audits if name not in ALL_AUDITS]
+    if unknown:
+        raise SystemExit(f"Unknown audits: {', '.join(unknown)}")
+
+    configs = {name: MODULES[name].load_config(getattr(args, f"{name}_config")) for name in audits}
+    fs = FsSnapshot()
+    tasks = []
+    if any(name in CHAPTER_RUNNERS for name in audits):
+        for chapter in scene_audit_worker.get_chapters(args.chapter):
+            for name in audits:
+                if name in CHAPTER_RUNNERS:
+                    tasks.append((f"{name} {chapter}", CHAPTER_RUNNERS[name], (configs[name], chapter, fs, args.dry_run)))
+    for name in audits:
+        if name in GLOBAL_RUNNERS:
+            tasks.append((name, GLOBAL_RUNNERS[name], (configs[name], fs, args.dry_run)))
+
+    started = time.perf_counter()
+    failed = []
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = {pool.submit(func, *func_args): label for label, func, func_args in tasks}
+        for future in as_completed(futures):
+            label = futures[future]
+            try:
+                print(future.result())
+            except Exception as exc:  # pylint: disable=broad-except
+                failed.append(label)
+                print(f"{label}: failed ({type(exc).__name__}: {exc})")
+
+    print(f"{len(tasks) - len(failed)}/{len(tasks)} audits in {time.perf_counter() - started:.1f}s, {fs.scans} directory scans.")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -159,22 +159,20 @@ def validate_scene_inputs(
     return missing
 
 
-def convert_bodytrack_to_pose(source_path, output_path, fps):
+def convert_bodytrack_to_pose(source_path, output_path, fps, write_npz=False):
     if not pose_adapter:
         print("Warnung: maxine_pose_adapter.py nicht gefunden.")
         return False
     try:
-        lines = pose_adapter.load_bodytrack_txt(source_path)
-        frames = pose_adapter.parse_frame_lines(lines)
-        payload = pose_adapter.build_payload(source_path, fps, frames)
-    except (OSError, ValueError) as exc:
+        written = pose_adapter.convert_bodytrack(
+            source_path, output_path, fps, output_format="both" if write_npz else "json"
+        )
+    except (OSError, ValueError, RuntimeError) as exc:
         print(f"Warnung: BodyTrack Konvertierung fehlgeschlagen: {exc}")
         return False
 
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(payload, f, indent=2, ensure_ascii=True)
-    print(f"Wrote: {output_path}")
+    for path in written:
+        print(f"Wrote: {path}")
     return True
 
 
@@ -194,6 +192,7 @@ def run(
     convert_bodytrack,
     strict,
     dry_run,
+    bodytrack_npz=False,
 ):
     chapter_folder = f"chapter_{chapter_num:03d}"
     chapter_path = os.path.join(base_path, chapter_folder)
@@ -255,7 +254,7 @@ def run(
 
         if convert_bodytrack and pose_source and os.path.exists(pose_source):
             if not os.path.exists(body_pose):
-                convert_bodytrack_to_pose(pose_source, body_pose, fps)
+                convert_bodytrack_to_pose(pose_source, body_pose, fps, write_npz=bodytrack_npz)
 
         require_audio = bool(facesync.get("enabled"))
         effective_require_head_pose = require_head_pose or bool(facesync.get("enabled"))
@@ -347,6 +346,11 @@ if __name__ == "__main__":
     parser.add_argument("--no-require-pose", action="store_false", dest="require_pose")
     parser.add_argument("--require-head-pose", action="store_true", default=False)
     parser.add_argument("--convert-bodytrack", action="store_true", help="Convert BodyTrackApp txt to body_pose.json if missing")
+    parser.add_argument(
+        "--bodytrack-npz",
+        action="store_true",
+        help="With --convert-bodytrack also write a binary <slug>_body_pose.npz sidecar (NumPy arrays)",
+    )
     parser.add_argument("--strict", action="store_true")
     parser.add_argument("--dry-run", action="store_true")
     args = parser.parse_args()
@@ -367,6 +371,7 @@ if __name__ == "__main__":
         require_pose=args.require_pose,
         require_head_pose=args.require_head_pose,
         convert_bodytrack=args.convert_bodytrack,
+        bodytrack_npz=args.bodytrack_npz,
         strict=args.strict,
         dry_run=args.dry_run,
     )
@@ -0,0 +1,120 @@
+import argparse
+import csv
+import time
+from pathlib import Path
+
+from json_blocks import extract_json_values
+from regie_context_injector import build_asset_matcher, find_asset_matches, normalize_token
+from visionexe_paths import resolve_repo_root
+
+DEFAULT_CSV = "stories/template/data/analysis/first_analysis_progress_python.csv"
+
+
+def legacy_find_asset_matches(block_text, regie_data, assets):
+    """The per-asset substring loop find_asset_matches used before the shared index.
+
+    Includes the one behavioural fix: an empty name_norm (non-ASCII names) no longer matches every token.
+    """
+    matches = []
+    scene_text = block_text.lower()
+    props = regie_data.get("props") or []
+    env_name = regie_data.get("environment") or ""
+    focus_norms = [normalize_token(t) for t in [p for p in props if p] + ([env_name] if env_name else [])]
+    for asset in assets:
+        name = asset["name"].lower()
+        asset_id = asset["id"].lower()
+        if asset_id and asset_id in scene_text:
+            matches.append(asset)
+            continue
+        if name and name in scene_text:
+            matches.append(asset)
+            continue
+        for token_norm in focus_norms:
+            if token_norm and asset["name_norm"] and (
+                token_norm in asset["name_norm"] or asset["name_norm"] in token_norm
+            ):
+                matches.append(asset)
+                break
+    unique = {}
+    for asset in matches:
+        unique[asset["id"]] = asset
+    return list(unique.values())
+
+
+def load_scenes(csv_path: Path) -> tuple[list, list]:
+    """Return (scenes, names): scene texts with props/environment and every entity name in the CSV."""
+    csv.field_size_limit(1 << 30)
+    scenes = []
+    names = set()
+    with csv_path.open("r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            raw = row.get("RawContent") or ""
+            for block in extract_json_values(raw):
+                if not isinstance(block, dict):
+                    continue
+                entities = {}
+                for key in ("actors", "props", "environments"):
+                    entities[key] = [item.get("name") for item in block.get(key) or [] if isinstance(item, dict) and item.get("name")]
+                    names.update(entities[key])
+                scenes.append((raw, {
+                    "props": entities["props"],
+                    "environment": entities["environments"][0] if entities["environments"] else "",
+                }))
+    return scenes, sorted(names)
+
+
+def synth_assets(names: list, size: int) -> list[dict]:
+    assets = []
+    for idx in range(size):
+        base = names[idx % len(names)]
+        name = base if idx < len(names) else f"{base} variant {idx // len(names)}"
+        asset_id = f"ASSET_{idx:05d}"
+        assets.append({"id": asset_id, "name": name, "name_norm": normalize_token(name), "id_norm": normalize_token(asset_id)})
+    return assets
+
+
+def best_of(label: str, repeat: int, func):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    print(f"{label:<44} {best * 1000:9.2f} ms")
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark scene/asset matching against growing asset bibles.")
+    parser.add_argument("--csv", default=DEFAULT_CSV, help="Analysis CSV used for scene text and entity names.")
+    parser.add_argument("--sizes", default="100,1000,5000,20000", help="Comma-separated asset bible sizes.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (best is reported).")
+    args = parser.parse_args()
+
+    csv_path = Path(args.csv)
+    if not csv_path.is_absolute():
+        csv_path = resolve_repo_root() / csv_path
+    scenes, names = load_scenes(csv_path)
+    if not scenes or not names:
+        raise SystemExit(f"No scenes/entity names found in: {csv_path}")
+    print(f"Corpus: {len(scenes)} scenes, {len(names)} distinct entity names")
+
+    for size in [int(part) for part in args.sizes.split(",") if part.strip()]:
+        assets = synth_assets(names, size)
+        legacy_time, legacy = best_of(
+            f"{size:>6} assets: nested loops", args.repeat,
+            lambda: [legacy_find_asset_matches(text, regie, assets) for text, regie in scenes],
+        )
+        build_time, matcher = best_of(f"{size:>6} assets: build index", 1, lambda: build_asset_matcher(assets))
+        index_time, indexed = best_of(
+            f"{size:>6} assets: n-gram index", args.repeat,
+            lambda: [find_asset_matches(text, regie, assets, matcher=matcher) for text, regie in scenes],
+        )
+        if legacy != indexed:
+            raise SystemExit(f"Match mismatch at {size} assets.")
+        print(f"  speedup x{legacy_time / index_time:.1f} (index build {build_time * 1000:.1f} ms, paid once)")
+
+
+if __name__ == "__main__":
+    main()
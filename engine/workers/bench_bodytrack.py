@@ -0,0 +1,98 @@
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+import maxine_pose_adapter as adapter
+
+
+def write_export(path: str, frames: int, seed: int) -> None:
+    """Synthetic BodyTrackApp export: header flags line + data line per frame, 1-2 people, 34 keypoints."""
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("// BodyTrackApp synthetic export\n")
+        for _ in range(frames):
+            people = rng.choice((1, 1, 1, 2))
+            values = [str(people)]
+            for _ in range(people):
+                values.extend(f"{rng.uniform(0, 1920):.3f}" for _ in range(4))
+            values.append(str(len(adapter.KEYPOINT_NAMES)))
+            values.extend(f"{rng.uniform(0, 1920):.4f}" for _ in range(len(adapter.KEYPOINT_NAMES) * 2))
+            f.write("1,1,\n")
+            f.write(",".join(values) + ",\n")
+
+
+def measure(label: str, func, trace_memory: bool = False):
+    """Time one run; with trace_memory a second, traced run reports the peak Python allocation."""
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    line = f"{label:<36} {elapsed * 1000:9.1f} ms"
+    if trace_memory:
+        tracemalloc.start()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        line += f"   peak {peak / 1e6:7.1f} MB"
+    print(line)
+    return elapsed, result
+
+
+def legacy_convert(source: str, output: str, fps: int) -> None:
+    """avatar_worker.convert_bodytrack_to_pose before the array parser."""
+    frames = adapter.parse_frame_lines(adapter.load_bodytrack_txt(source))
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(adapter.build_payload(source, fps, frames), f, indent=2, ensure_ascii=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark BodyTrackApp txt conversion (JSON vs NumPy arrays/.npz).")
+    parser.add_argument("--seconds", type=int, default=300, help="Take length in seconds.")
+    parser.add_argument("--fps", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    frames = args.seconds * args.fps
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "take_bodytrack.txt")
+        write_export(source, frames, args.seed)
+        print(f"Export: {frames} frames, {os.path.getsize(source) / 1e6:.1f} MB")
+
+        legacy_json = os.path.join(tmp, "legacy_body_pose.json")
+        new_json = os.path.join(tmp, "take_body_pose.json")
+        parse_time, legacy_frames = measure(
+            "parse: line list + nested lists", lambda: adapter.parse_frame_lines(adapter.load_bodytrack_txt(source)),
+            trace_memory=True,
+        )
+        array_time, arrays = measure(
+            "parse: streaming arrays", lambda: adapter.parse_bodytrack_arrays(source), trace_memory=True
+        )
+        if list(adapter.iter_frames_from_arrays(arrays)) != legacy_frames:
+            raise SystemExit("Parsed frames differ.")
+        print(f"  speedup x{parse_time / array_time:.1f}")
+
+        legacy_time, _ = measure("convert: legacy JSON", lambda: legacy_convert(source, legacy_json, args.fps))
+        json_time, _ = measure("convert: arrays -> JSON", lambda: adapter.convert_bodytrack(source, new_json, args.fps))
+        with open(legacy_json, "rb") as a, open(new_json, "rb") as b:
+            if a.read() != b.read():
+                raise SystemExit("JSON output differs.")
+        npz_time, written = measure(
+            "convert: arrays -> .npz only", lambda: adapter.convert_bodytrack(source, new_json, args.fps, "npz")
+        )
+        print(
+            f"  JSON x{legacy_time / json_time:.1f}, npz x{legacy_time / npz_time:.1f}; "
+            f"sizes: json {os.path.getsize(legacy_json) / 1e6:.1f} MB, npz {os.path.getsize(written[0]) / 1e6:.1f} MB"
+        )
+
+        def read_back():
+            with adapter.BodyTrackReader(written[0]) as reader:
+                return len(reader), reader.keypoints[frames // 2].copy()
+
+        measure("read: lazy npz (len + one frame)", read_back)
+
+
+if __name__ == "__main__":
+    main()
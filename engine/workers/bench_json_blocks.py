@@ -0,0 +1,176 @@
+import argparse
+import csv
+import json
+import re
+import time
+from pathlib import Path
+
+from json_blocks import extract_json_values, first_json_value
+from visionexe_paths import resolve_repo_root
+
+DEFAULT_CSV = "stories/template/data/analysis/first_analysis_progress_python.csv"
+LEGACY_BLOCK_RE = re.compile(r"```(?:json)?\s*([\[{].*?[\]}])\s*```", re.DOTALL | re.IGNORECASE)
+
+
+def legacy_extract_json_blocks(text):
+    """The regex + raw_decode retry loop previously copied into the builders."""
+    blocks = []
+    if not text:
+        return blocks
+    for match in LEGACY_BLOCK_RE.finditer(text):
+        try:
+            blocks.append(json.loads(match.group(1)))
+        except json.JSONDecodeError:
+            continue
+    if blocks:
+        return blocks
+    stripped = text.strip()
+    if not stripped:
+        return blocks
+    try:
+        blocks.append(json.loads(stripped))
+        return blocks
+    except json.JSONDecodeError:
+        pass
+    decoder = json.JSONDecoder()
+    for idx, ch in enumerate(stripped):
+        if ch not in "{[":
+            continue
+        try:
+            payload, _ = decoder.raw_decode(stripped[idx:])
+            blocks.append(payload)
+            return blocks
+        except json.JSONDecodeError:
+            continue
+    return blocks
+
+
+def legacy_find_balanced(text, start_idx):
+    depth = 0
+    in_string = False
+    escape = False
+    for i in range(start_idx, len(text)):
+        c = text[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif c == "\\":
+                escape = True
+            elif c == "\"":
+                in_string = False
+            continue
+        if c == "\"":
+            in_string = True
+        elif c == "{":
+            depth += 1
+        elif c == "}":
+            depth -= 1
+            if depth == 0:
+                return i
+    return None
+
+
+def legacy_extract_balanced(text):
+    """The per-character balanced scan retried from every "{" in the harvest workers."""
+    for i, ch in enumerate(text):
+        if ch != "{":
+            continue
+        end_idx = legacy_find_balanced(text, i)
+        if end_idx is None:
+            continue
+        try:
+            return json.loads(text[i:end_idx + 1])
+        except json.JSONDecodeError:
+            continue
+    return None
+
+
+def load_corpus(csv_path: Path) -> list[str]:
+    csv.field_size_limit(1 << 30)
+    with csv_path.open("r", encoding="utf-8", newline="") as f:
+        return [row.get("RawContent") or "" for row in csv.DictReader(f)]
+
+
+def damage(text: str) -> str:
+    """Unfenced, truncated response with a trailing comma: the worst case for retry loops."""
+    body = text.replace("```json", "").replace("```", "").strip()
+    body = body.replace("\n  ]", ",\n  ]", 1)
+    return "Analysis follows.\n" + body[: max(1, len(body) * 3 // 4)]
+
+
+def best_of(label: str, repeat: int, func):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    print(f"{label:<40} {best * 1000:9.2f} ms")
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark LLM JSON block extraction on the bundled analysis CSV.")
+    parser.add_argument("--csv", default=DEFAULT_CSV, help="CSV with a RawContent column.")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement (best is reported).")
+    parser.add_argument("--long-copies", type=int, default=20, help="Rows concatenated into each long response.")
+    args = parser.parse_args()
+
+    repo_root = resolve_repo_root()
+    csv_path = Path(args.csv)
+    if not csv_path.is_absolute():
+        csv_path = repo_root / csv_path
+    rows = [row for row in load_corpus(csv_path) if row.strip()]
+    if not rows:
+        raise SystemExit(f"No RawContent rows found in: {csv_path}")
+    print(f"Corpus: {csv_path} ({len(rows)} rows, {sum(map(len, rows))} chars)")
+
+    legacy_time, legacy_blocks = best_of(
+        "rows: regex + raw_decode", args.repeat, lambda: [legacy_extract_json_blocks(row) for row in rows]
+    )
+    scan_time, scan_blocks = best_of(
+        "rows: single-pass scan", args.repeat, lambda: [extract_json_values(row, repair=False) for row in rows]
+    )
+    mismatched = sum(1 for old, new in zip(legacy_blocks, scan_blocks) if old != new)
+    print(f"  speedup x{legacy_time / scan_time:.1f}, {mismatched} rows differ")
+
+    chunk = max(1, args.long_copies)
+    long_rows = ["\n\nNext part:\n".join(rows[i:i + chunk]) for i in range(0, len(rows), chunk)]
+    legacy_time, _ = best_of(
+        f"long ({chunk} rows each): regex + raw_decode", args.repeat,
+        lambda: [legacy_extract_json_blocks(row) for row in long_rows],
+    )
+    scan_time, _ = best_of(
+        f"long ({chunk} rows each): single-pass scan", args.repeat,
+        lambda: [extract_json_values(row, repair=False) for row in long_rows],
+    )
+    print(f"  speedup x{legacy_time / scan_time:.1f}")
+
+    damaged = [damage(row) for row in rows]
+    legacy_time, legacy_values = best_of(
+        "truncated: balanced scan per '{'", args.repeat, lambda: [legacy_extract_balanced(row) for row in damaged]
+    )
+    scan_time, scan_values = best_of(
+        "truncated: scan + repair", args.repeat, lambda: [first_json_value(row) for row in damaged]
+    )
+    print(
+        f"  speedup x{legacy_time / scan_time:.1f}; top-level object recovered: "
+        f"legacy {count_top_level(legacy_values)}, repaired {count_top_level(scan_values)} of {len(damaged)}"
+    )
+
+    # One long cut-off reply: every "{" rescans to the end of the text before giving up.
+    long_damaged = "\n".join(damaged[:chunk])
+    legacy_time, _ = best_of(
+        f"long truncated ({len(long_damaged)} chars): legacy", 1, lambda: legacy_extract_balanced(long_damaged)
+    )
+    scan_time, _ = best_of("long truncated: scan + repair", args.repeat, lambda: first_json_value(long_damaged))
+    print(f"  speedup x{legacy_time / scan_time:.1f}")
+
+
+def count_top_level(values: list) -> int:
+    return sum(1 for value in values if isinstance(value, dict) and "actors" in value)
+
+
+if __name__ == "__main__":
+    main()
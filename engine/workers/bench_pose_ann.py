@@ -0,0 +1,79 @@
+import argparse
+import time
+
+import numpy as np
+
+import pose_ann
+import pose_library
+
+
+def synth_library(size: int, families: int, seed: int) -> pose_library.PoseLibrary:
+    """Clustered poses (mocap-like families of variations) with ~10% low-confidence joints, normalized."""
+    rng = np.random.default_rng(seed)
+    joints = pose_library.KEYPOINT_COUNT
+    bases = rng.uniform(-1.0, 1.0, size=(families, joints, 3))
+    family = rng.integers(0, families, size=size)
+    points = np.empty((size, joints, 4))
+    points[:, :, :3] = bases[family] + rng.normal(0.0, 0.2, size=(size, joints, 3))
+    points[:, :, :3] *= rng.uniform(0.6, 1.6, size=(size, 1, 1))
+    points[:, :, 3] = np.where(rng.random((size, joints)) < 0.1, rng.random((size, joints)), rng.uniform(0.5, 1.0, (size, joints)))
+    keypoints = pose_library.normalize_batch(points).astype(np.float32)
+    return pose_library.PoseLibrary(keypoints, [f"POSE_{idx:07d}" for idx in range(size)], [[]] * size, fingerprint=[size])
+
+
+def synth_queries(library: pose_library.PoseLibrary, count: int, seed: int):
+    """Perturbed library poses, so each query has a genuine near neighbour."""
+    rng = np.random.default_rng(seed + 1)
+    picks = rng.integers(0, len(library), size=count)
+    queries = np.array(library.keypoints[picks], dtype=np.float32)
+    queries[:, :, :3] += rng.normal(0.0, 0.1, size=queries[:, :, :3].shape)
+    return queries
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def recall(exact: list, approx: list) -> float:
+    hits = 0
+    total = 0
+    for truth, found in zip(exact, approx):
+        truth_ids = {idx for _, idx in truth}
+        hits += len(truth_ids & {idx for _, idx in found})
+        total += len(truth_ids)
+    return hits / total if total else 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall/latency of the IVF pose index against the exact matcher.")
+    parser.add_argument("--sizes", default="50000,200000", help="Comma-separated catalog sizes.")
+    parser.add_argument("--families", type=int, default=2000, help="Pose families (clusters) in the synthetic catalog.")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--nprobe", default="1,4,8,16,32", help="Comma-separated probe counts.")
+    parser.add_argument("--lists", type=int, default=None, help="IVF lists (default: pose_ann.default_lists).")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    for size in [int(part) for part in args.sizes.split(",") if part.strip()]:
+        library = synth_library(size, args.families, args.seed)
+        queries = synth_queries(library, args.queries, args.seed)
+        build_time, index = timed(lambda: pose_ann.build_index(library, lists=args.lists))
+        exact_time, exact = timed(lambda: [library.top_k([query], args.top_k)[0] for query in queries])
+        exact_ms = exact_time / len(queries) * 1000
+        print(f"{size:>7} poses, {index.lists} lists (build {build_time:.1f} s): exact {exact_ms:.3f} ms/query")
+        for nprobe in [int(part) for part in args.nprobe.split(",") if part.strip()]:
+            ann_time, approx = timed(
+                lambda: [index.top_k(library, [query], args.top_k, nprobe=nprobe)[0] for query in queries]
+            )
+            ann_ms = ann_time / len(queries) * 1000
+            print(
+                f"  nprobe {nprobe:>3}: {ann_ms:7.3f} ms/query, recall@{args.top_k} {recall(exact, approx):.3f}, "
+                f"speedup x{exact_ms / ann_ms:.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
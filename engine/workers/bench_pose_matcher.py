@@ -0,0 +1,101 @@
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+import pose_library
+from pose_matcher import KEYPOINTS_34, match_keypoints, normalize_points
+
+
+def synth_pose(rng: random.Random, base: list) -> list:
+    """A jittered, shifted, scaled copy of the base skeleton with a few low-confidence joints."""
+    scale = rng.uniform(0.6, 1.6)
+    shift = [rng.uniform(-2.0, 2.0) for _ in range(3)]
+    pose = []
+    for x, y, z in base:
+        conf = rng.random() if rng.random() < 0.1 else rng.uniform(0.5, 1.0)
+        pose.append([
+            (x + rng.gauss(0.0, 0.15)) * scale + shift[0],
+            (y + rng.gauss(0.0, 0.15)) * scale + shift[1],
+            (z + rng.gauss(0.0, 0.15)) * scale + shift[2],
+            conf,
+        ])
+    return pose
+
+
+def write_catalog(path: str, size: int, rng: random.Random, base: list) -> None:
+    poses = [
+        {"pose_id": f"POSE_{idx:06d}", "tags": ["front"], "keypoints": synth_pose(rng, base)}
+        for idx in range(size)
+    ]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"schema_version": "pose_catalog_v1", "poses": poses}, f)
+
+
+def best_of(label: str, repeat: int, func):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    print(f"{label:<44} {best * 1000:9.3f} ms")
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark keypoint pose matching: Python loop vs compiled .npy library.")
+    parser.add_argument("--sizes", default="1000,10000,50000", help="Comma-separated catalog sizes.")
+    parser.add_argument("--queries", type=int, default=20, help="Query frames per size.")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--min-conf", type=float, default=0.15)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (best is reported).")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    base = [(rng.uniform(-1.0, 1.0), rng.uniform(-1.0, 1.0), rng.uniform(-0.3, 0.3)) for _ in KEYPOINTS_34]
+    queries = [normalize_points(synth_pose(rng, base), args.min_conf)[0] for _ in range(args.queries)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in [int(part) for part in args.sizes.split(",") if part.strip()]:
+            catalog_path = os.path.join(tmp, f"pose_catalog_{size}.json")
+            write_catalog(catalog_path, size, rng, base)
+            with open(catalog_path, "r", encoding="utf-8") as f:
+                poses = json.load(f)["poses"]
+
+            legacy_time, legacy = best_of(
+                f"{size:>6} poses: Python loop (1 query)", 1,
+                lambda: match_keypoints(queries[0], poses, args.min_conf, args.top_k),
+            )
+            compile_time, _ = best_of(
+                f"{size:>6} poses: compile .npy", 1,
+                lambda: pose_library.compile_library(catalog_path, min_conf=args.min_conf),
+            )
+            load_time, library = best_of(
+                f"{size:>6} poses: mmap load", 1,
+                lambda: pose_library.load_library(catalog_path, min_conf=args.min_conf),
+            )
+            single_time, ranked = best_of(
+                f"{size:>6} poses: vectorized ({args.queries} x 1 query)", args.repeat,
+                lambda: [library.top_k([query], args.top_k)[0] for query in queries],
+            )
+            batch_time, batched = best_of(
+                f"{size:>6} poses: vectorized ({args.queries} queries batched)", args.repeat,
+                lambda: library.top_k(queries, args.top_k),
+            )
+            expected = [pose_id for _, pose_id, _ in legacy]
+            if [library.pose_ids[idx] for _, idx in ranked[0]] != expected or ranked != batched:
+                raise SystemExit(f"Top-{args.top_k} mismatch at {size} poses.")
+            per_query = single_time / len(queries)
+            print(
+                f"  {per_query * 1000:.3f} ms/query single, {batch_time / len(queries) * 1000:.3f} ms/query batched; "
+                f"speedup x{legacy_time / per_query:.0f} (compile {compile_time * 1000:.0f} ms, paid once per catalog)"
+            )
+
+
+if __name__ == "__main__":
+    main()
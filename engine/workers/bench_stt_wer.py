@@ -0,0 +1,79 @@
+import argparse
+import random
+import time
+import tracemalloc
+
+import stt_worker
+
+
+def legacy_levenshtein_distance(ref_words, hyp_words):
+    """The full (n + 1) x (m + 1) matrix stt_worker used before."""
+    rows = len(ref_words) + 1
+    cols = len(hyp_words) + 1
+    matrix = [[0] * cols for _ in range(rows)]
+    for i in range(rows):
+        matrix[i][0] = i
+    for j in range(cols):
+        matrix[0][j] = j
+    for i in range(1, rows):
+        for j in range(1, cols):
+            cost = 0 if ref_words[i - 1] == hyp_words[j - 1] else 1
+            matrix[i][j] = min(matrix[i - 1][j] + 1, matrix[i][j - 1] + 1, matrix[i - 1][j - 1] + cost)
+    return matrix[-1][-1]
+
+
+def synth_pair(words: int, error_rate: float, rng: random.Random) -> tuple[list, list]:
+    """A reference of `words` words and a hypothesis with substitutions, drops and insertions."""
+    vocab = [f"wort{idx}" for idx in range(2000)]
+    ref = [rng.choice(vocab) for _ in range(words)]
+    hyp = []
+    for word in ref:
+        roll = rng.random()
+        if roll < error_rate / 3:
+            continue
+        if roll < 2 * error_rate / 3:
+            hyp.append(rng.choice(vocab))
+        else:
+            hyp.append(word)
+        if rng.random() < error_rate / 3:
+            hyp.append(rng.choice(vocab))
+    return ref, hyp
+
+
+def measure(label: str, func, repeat: int):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    best = min(timings)
+    print(f"{label:<36} {best * 1000:9.1f} ms  peak {peak / 1e6:7.2f} MB")
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark word-level WER edit distance (full matrix vs stt_worker).")
+    parser.add_argument("--sizes", default="500,2000", help="Comma-separated reference lengths in words.")
+    parser.add_argument("--error-rate", type=float, default=0.15)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (best is reported).")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    backend = "rapidfuzz" if stt_worker._rf_levenshtein is not None else "bit-parallel Python"
+    print(f"stt_worker backend: {backend}")
+    for size in [int(part) for part in args.sizes.split(",") if part.strip()]:
+        ref, hyp = synth_pair(size, args.error_rate, rng)
+        legacy_time, legacy = measure(f"{size:>6} words: full matrix", lambda: legacy_levenshtein_distance(ref, hyp), args.repeat)
+        new_time, distance = measure(f"{size:>6} words: {backend}", lambda: stt_worker.levenshtein_distance(ref, hyp), args.repeat)
+        if legacy != distance:
+            raise SystemExit(f"Distance mismatch at {size} words: {legacy} != {distance}")
+        print(f"  distance {distance}, speedup x{legacy_time / new_time:.1f}")
+
+
+if __name__ == "__main__":
+    main()
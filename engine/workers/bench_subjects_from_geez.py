@@ -0,0 +1,124 @@
+import argparse
+import json
+import time
+from pathlib import Path
+
+from subjects_from_geez import (
+    aggregate_verses,
+    is_ethiopic_letter,
+    iter_chapter_results,
+    merge_stats,
+    new_stats,
+    scan_verse_file,
+    tokenize,
+)
+from visionexe_paths import resolve_repo_root
+
+DEFAULT_CORPUS = "engine/scripts/ethiopic_1enoch_p"
+
+
+def legacy_iter_tokens(text: str, min_len: int):
+    buffer = []
+    for ch in text:
+        if is_ethiopic_letter(ch):
+            buffer.append(ch)
+            continue
+        if len(buffer) >= min_len:
+            yield "".join(buffer)
+        buffer = []
+    if len(buffer) >= min_len:
+        yield "".join(buffer)
+
+
+def legacy_aggregate(verses: list[tuple], max_samples: int, max_sample_chars: int) -> dict:
+    candidate_map = {}
+    for verse_chapter, verse_number, verse_text, _, kept in verses:
+        for _, token in kept:
+            data = candidate_map.setdefault(token, {"count": 0, "chapters": set(), "verses": set(), "samples": []})
+            data["count"] += 1
+            if verse_chapter:
+                data["chapters"].add(int(verse_chapter))
+            if verse_chapter and verse_number:
+                data["verses"].add(f"{int(verse_chapter)}:{int(verse_number)}")
+            if len(data["samples"]) < max_samples:
+                sample_text = verse_text
+                if max_sample_chars and len(sample_text) > max_sample_chars:
+                    sample_text = sample_text[:max_sample_chars].rstrip() + "..."
+                data["samples"].append(sample_text)
+    return candidate_map
+
+
+def load_texts(verse_files: list[Path]) -> list[str]:
+    texts = []
+    for verse_path in verse_files:
+        with verse_path.open("r", encoding="utf-8") as handle:
+            for line in handle:
+                line = line.strip()
+                if line:
+                    texts.append(json.loads(line).get("text", ""))
+    return texts
+
+
+def best_of(label: str, repeat: int, func):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    print(f"{label:<34} {best * 1000:9.2f} ms")
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark the Ge'ez tokenizer and candidate aggregation.")
+    parser.add_argument("--geez-root", default=DEFAULT_CORPUS, help="Folder with chapter_###_verses.jsonl.")
+    parser.add_argument("--min-len", type=int, default=2, help="Minimum token length.")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement (best is reported).")
+    parser.add_argument("--workers", type=int, default=4, help="Process pool size for the pooled scan.")
+    args = parser.parse_args()
+
+    repo_root = resolve_repo_root()
+    geez_root = Path(args.geez_root)
+    if not geez_root.is_absolute():
+        geez_root = repo_root / geez_root
+    verse_files = sorted(geez_root.glob("chapter_*_verses.jsonl"))
+    if not verse_files:
+        raise SystemExit(f"No verse files found under: {geez_root}")
+
+    texts = load_texts(verse_files)
+    print(f"Corpus: {geez_root} ({len(verse_files)} files, {len(texts)} verses, {sum(map(len, texts))} chars)")
+
+    legacy_time, legacy_tokens = best_of(
+        "tokenize (char loop)", args.repeat,
+        lambda: [list(legacy_iter_tokens(text, args.min_len)) for text in texts],
+    )
+    regex_time, regex_tokens = best_of(
+        "tokenize (precompiled regex)", args.repeat,
+        lambda: [tokenize(text, args.min_len) for text in texts],
+    )
+    if legacy_tokens != regex_tokens:
+        raise SystemExit("Tokenizer mismatch between legacy and regex implementations.")
+    print(f"  speedup x{legacy_time / regex_time:.1f}, {sum(map(len, regex_tokens))} tokens")
+
+    verses = [entry for path in verse_files for entry in scan_verse_file(path, args.min_len, set())]
+    agg_legacy, _ = best_of("aggregate (per-token dicts)", args.repeat, lambda: legacy_aggregate(verses, 4, 240))
+    agg_batched, _ = best_of("aggregate (batched Counter)", args.repeat, lambda: aggregate_verses(verses, 4, 240))
+    print(f"  speedup x{agg_legacy / agg_batched:.1f}")
+
+    def scan(workers):
+        stats = new_stats()
+        for _, _, chapter_stats in iter_chapter_results(verse_files, args.min_len, set(), 4, 240, workers):
+            merge_stats(stats, chapter_stats, 4)
+        return stats
+
+    serial_time, serial_stats = best_of("scan+aggregate (serial)", args.repeat, lambda: scan(0))
+    pooled_time, pooled_stats = best_of(f"scan+aggregate ({args.workers} processes)", args.repeat, lambda: scan(args.workers))
+    if serial_stats["counts"] != pooled_stats["counts"]:
+        raise SystemExit("Pooled counts differ from serial counts.")
+    print(f"  speedup x{serial_time / pooled_time:.1f} (pool startup dominates on small corpora)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,129 @@
 import argparse
 import json
+import os
+import shutil
+import subprocess
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from filmsets_catalog import DEFAULT_WORKERS, SKIP_DIRS, load_catalog
 from visionexe_paths import ensure_dir, load_story_config, resolve_path
 
 
 VIDEO_EXTS = {".mp4", ".mov", ".mkv", ".webm", ".avi"}
 AUDIO_EXTS = {".wav", ".mp3", ".flac", ".m4a", ".ogg"}
+PROBE_CACHE_VERSION = 1
+PROBE_TIMEOUT = 60
 
 
-def iter_media(root: Path, exts: set[str]):
+def iter_media(
+    root: Path, exts: set[str], manifest_path: Path | None = None, workers: int = 1, verify_files: bool = False
+):
+    """Media files under `root` in path order, listed through the shared incremental scandir manifest.
+
+    `verify_files` re-stats files in unchanged directories, so clips overwritten in place get fresh size/mtime.
+    """
     if not root.exists():
         return []
-    items = []
-    for path in sorted(root.rglob("*")):
-        if not path.is_file():
-            continue
-        if path.suffix.lower() in exts:
-            items.append(path)
-    return items
+    catalog = load_catalog(
+        root, cache_path=manifest_path, skip_dirs=SKIP_DIRS, verify_files=verify_files, use_memo=False, workers=workers
+    )
+    media = [entry for entry in catalog if os.path.splitext(entry["name"])[1].lower() in exts]
+    media.sort(key=lambda entry: entry["rel_path"].split("/"))
+    return media
+
+
+def load_probe_cache(path: Path | None) -> dict:
+    if not path or not path.exists():
+        return {}
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {}
+    if payload.get("version") != PROBE_CACHE_VERSION:
+        return {}
+    return payload.get("items") or {}
+
+
+def write_probe_cache(path: Path, items: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(
+        json.dumps({"version": PROBE_CACHE_VERSION, "items": items}, ensure_ascii=False, separators=(",", ":")),
+        encoding="utf-8",
+    )
+    os.replace(tmp_path, path)
+
+
+def parse_rate(value: str | None) -> float | None:
+    if not value or value in ("0/0", "0"):
+        return None
+    num, _, den = value.partition("/")
+    try:
+        rate = float(num) / float(den or 1)
+    except (ValueError, ZeroDivisionError):
+        return None
+    return round(rate, 3) if rate > 0 else None
+
+
+def probe_media(path: str, ffprobe: str) -> dict:
+    """Duration/fps/resolution (and audio sample rate) via ffprobe; {"error": ...} on failure."""
+    cmd = [ffprobe, "-v", "error", "-print_format", "json", "-show_format", "-show_streams", path]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=PROBE_TIMEOUT)
+    except (OSError, subprocess.TimeoutExpired) as exc:
+        return {"error": str(exc)}
+    if result.returncode != 0:
+        return {"error": (result.stderr or "").strip()[:200] or f"ffprobe exit {result.returncode}"}
+    try:
+        data = json.loads(result.stdout or "{}")
+    except json.JSONDecodeError:
+        return {"error": "ffprobe returned invalid JSON"}
+    streams = data.get("streams") or []
+    video = next((s for s in streams if s.get("codec_type") == "video"), None)
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), None)
+    duration = (data.get("format") or {}).get("duration") or (video or audio or {}).get("duration")
+    info = {"duration": round(float(duration), 3) if duration else None}
+    if video:
+        info.update({
+            "fps": parse_rate(video.get("avg_frame_rate")) or parse_rate(video.get("r_frame_rate")),
+            "width": video.get("width"),
+            "height": video.get("height"),
+            "video_codec": video.get("codec_name"),
+        })
+    if audio:
+        info.update({
+            "sample_rate": int(audio["sample_rate"]) if audio.get("sample_rate") else None,
+            "channels": audio.get("channels"),
+        })
+    return info
+
+
+def enrich_with_probe(media: list[dict], cache_path: Path | None, workers: int) -> dict:
+    """Attach ffprobe info per file, reusing cached results keyed by (rel_path, size, mtime)."""
+    ffprobe = shutil.which("ffprobe")
+    cached = load_probe_cache(cache_path)
+    probes = {}
+    pending = []
+    for entry in media:
+        hit = cached.get(entry["path"])
+        if hit and hit.get("size") == entry["size"] and hit.get("mtime") == entry["mtime"]:
+            probes[entry["path"]] = hit
+        else:
+            pending.append(entry)
+    if pending and not ffprobe:
+        print(f"ffprobe not found; {len(pending)} clips left without media info.")
+        pending = []
+    if pending:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            results = pool.map(lambda entry: probe_media(entry["path"], ffprobe), pending)
+            for entry, info in zip(pending, results):
+                probes[entry["path"]] = {"size": entry["size"], "mtime": entry["mtime"], "media": info}
+    if cache_path and (pending or set(probes) != set(cached)):
+        write_probe_cache(cache_path, probes)
+    print(f"Probed {len(pending)} clips ({len(media) - len(pending)} cached).")
+    return {path: item["media"] for path, item in probes.items()}
 
 
 def to_relpath(path: Path, repo_root: Path) -> str:
@@ -29,8 +133,9 @@ def to_relpath(path: Path, repo_root: Path) -> str:
         return str(path).replace("\\", "/")
 
 
-def build_entry(path: Path, category: str, repo_root: Path):
-    return {
+def build_entry(media: dict, category: str, repo_root: Path, probe: dict | None = None):
+    path = Path(media["path"])
+    entry = {
         "id": path.stem,
         "label": path.stem.replace("_", " "),
         "path": to_relpath(path, repo_root),
@@ -39,6 +144,9 @@ def build_entry(path: Path, category: str, repo_root: Path):
         "notes": "",
         "tags": [],
     }
+    if probe is not None:
+        entry["media"] = probe
+    return entry
 
 
 def build_payload(items, story_config, capture_root: Path, category: str):
@@ -52,6 +160,16 @@ def build_payload(items, story_config, capture_root: Path, category: str):
     }
 
 
+def write_jsonl(path: Path, payload: dict) -> None:
+    header = {key: value for key, value in payload.items() if key != "items"}
+    tmp_path = path.with_name(path.name + ".tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
+        f.write(json.dumps(header, ensure_ascii=False) + "\n")
+        for item in payload["items"]:
+            f.write(json.dumps(item, ensure_ascii=False) + "\n")
+    os.replace(tmp_path, path)
+
+
 def main():
     parser = argparse.ArgumentParser(description="Index capture media into pose/viseme libraries.")
     parser.add_argument("--story-root", help="Story root path (defaults to engine_config default_story_root).")
@@ -59,6 +177,12 @@ def main():
     parser.add_argument("--capture-root", help="Override capture root.")
     parser.add_argument("--poses-out", help="Output pose library JSON path.")
     parser.add_argument("--visemes-out", help="Output viseme library JSON path.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Threads for listing and probing (1 = serial).")
+    parser.add_argument("--probe", action="store_true", help="Add duration/fps/resolution via ffprobe (cached per file).")
+    parser.add_argument(
+        "--verify-files", action="store_true", help="Re-stat files in unchanged directories (always on with --probe)."
+    )
+    parser.add_argument("--jsonl", action="store_true", help="Also write <library>.jsonl (header line + one clip per line).")
     args = parser.parse_args()
 
     story_config, _, repo_root = load_story_config(
@@ -84,25 +208,31 @@ def main():
 
     poses_root = capture_root / "poses"
     phonemes_root = capture_root / "phonemes"
+    cache_dir = data_root / "cache"
 
-    pose_files = iter_media(poses_root, VIDEO_EXTS | AUDIO_EXTS)
-    viseme_files = iter_media(phonemes_root, VIDEO_EXTS | AUDIO_EXTS)
-
-    pose_items = [build_entry(path, "pose", repo_root) for path in pose_files]
-    viseme_items = [build_entry(path, "phoneme", repo_root) for path in viseme_files]
-
-    poses_out.write_text(
-        json.dumps(build_payload(pose_items, story_config, capture_root, "pose"), ensure_ascii=False, indent=2) + "\n",
-        encoding="utf-8",
+    # Probe results are keyed by size/mtime, so they need current stats, not the manifest's cached ones.
+    verify_files = args.verify_files or args.probe
+    pose_files = iter_media(
+        poses_root, VIDEO_EXTS | AUDIO_EXTS, cache_dir / "capture_poses_manifest.json", args.workers, verify_files
     )
-    visemes_out.write_text(
-        json.dumps(build_payload(viseme_items, story_config, capture_root, "phoneme"), ensure_ascii=False, indent=2) + "\n",
-        encoding="utf-8",
+    viseme_files = iter_media(
+        phonemes_root, VIDEO_EXTS | AUDIO_EXTS, cache_dir / "capture_phonemes_manifest.json", args.workers, verify_files
     )
 
+    probes = {}
+    if args.probe:
+        probes = enrich_with_probe(pose_files + viseme_files, cache_dir / "capture_probe_cache.json", args.workers)
+    pose_items = [build_entry(media, "pose", repo_root, probes.get(media["path"])) for media in pose_files]
+    viseme_items = [build_entry(media, "phoneme", repo_root, probes.get(media["path"])) for media in viseme_files]
+
+    for out_path, items, category in ((poses_out, pose_items, "pose"), (visemes_out, viseme_items, "phoneme")):
+        payload = build_payload(items, story_config, capture_root, category)
+        out_path.write_text(json.dumps(payload, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        if args.jsonl:
+            write_jsonl(out_path.with_suffix(".jsonl"), payload)
+
     print(f"Wrote pose library: {poses_out}")
     print(f"Wrote viseme library: {visemes_out}")
 
-
 if __name__ == "__main__":
     main()
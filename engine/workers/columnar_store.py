@@ -0,0 +1,230 @@
+import json
+from pathlib import Path
+
+PARQUET_SUFFIXES = (".parquet", ".pq")
+ARROW_SUFFIXES = (".arrow", ".feather", ".ipc")
+DEFAULT_BATCH_ROWS = 50000
+
+# Column kinds: "dict" = dictionary-encoded string, "str" = plain string, "int" = int32.
+GEEZ_OCCURRENCE_COLUMNS = {
+    "token": "dict",
+    "chapter": "int",
+    "verse": "int",
+    "token_index": "int",
+    "token_count": "int",
+    "source_id": "dict",
+    "source_path": "dict",
+    "verse_text": "dict",
+    "language": "dict",
+}
+
+SUBJECT_OCCURRENCE_COLUMNS = {
+    "subject_id": "dict",
+    "source_id": "dict",
+    "chapter": "int",
+    "segment_label": "dict",
+    "segment_type": "dict",
+    "scene_label": "dict",
+    "source_path": "dict",
+}
+
+
+def require_pyarrow():
+    try:
+        import pyarrow
+    except ImportError as exc:
+        raise RuntimeError("pyarrow is not installed. pip install pyarrow") from exc
+    return pyarrow
+
+
+def detect_format(path: Path) -> str:
+    suffix = Path(path).suffix.lower()
+    if suffix in PARQUET_SUFFIXES:
+        return "parquet"
+    if suffix in ARROW_SUFFIXES:
+        return "arrow"
+    raise ValueError(f"Unsupported columnar suffix (use .parquet or .arrow): {path}")
+
+
+def build_schema(columns: dict):
+    pa = require_pyarrow()
+    fields = []
+    for name, kind in columns.items():
+        if kind == "dict":
+            fields.append(pa.field(name, pa.dictionary(pa.int32(), pa.string())))
+        elif kind == "int":
+            fields.append(pa.field(name, pa.int32()))
+        else:
+            fields.append(pa.field(name, pa.string()))
+    return pa.schema(fields)
+
+
+def coerce_int(value):
+    if value in ("", None):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def coerce_str(value):
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False)
+
+
+class ColumnarWriter:
+    """Buffers row dicts and writes them as dictionary-encoded Parquet row groups or Arrow IPC batches."""
+
+    def __init__(self, path: Path, columns: dict, batch_rows: int = DEFAULT_BATCH_ROWS):
+        self.path = Path(path)
+        self.columns = dict(columns)
+        self.batch_rows = max(1, int(batch_rows))
+        self.format = detect_format(self.path)
+        self.schema = build_schema(self.columns)
+        self.buffer = {name: [] for name in self.columns}
+        # Arrow IPC files need one growing dictionary per column (written as deltas);
+        # Parquet re-encodes per row group, so a per-batch dictionary keeps it small.
+        self.global_dictionaries = self.format == "arrow"
+        self.dictionaries = {name: {} for name, kind in self.columns.items() if kind == "dict"}
+        self.buffered = 0
+        self.row_count = 0
+        self._writer = None
+        self._sink = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def write(self, row: dict):
+        for name, kind in self.columns.items():
+            value = row.get(name)
+            if kind == "int":
+                self.buffer[name].append(coerce_int(value))
+            elif kind == "dict" and self.global_dictionaries:
+                value = coerce_str(value)
+                if value is None:
+                    self.buffer[name].append(None)
+                else:
+                    lookup = self.dictionaries[name]
+                    self.buffer[name].append(lookup.setdefault(value, len(lookup)))
+            else:
+                self.buffer[name].append(coerce_str(value))
+        self.buffered += 1
+        if self.buffered >= self.batch_rows:
+            self.flush()
+
+    def write_many(self, rows):
+        for row in rows:
+            self.write(row)
+
+    def flush(self):
+        if not self.buffered:
+            return
+        pa = require_pyarrow()
+        arrays = []
+        for field in self.schema:
+            values = self.buffer[field.name]
+            if pa.types.is_dictionary(field.type) and not self.global_dictionaries:
+                arrays.append(pa.array(values, type=pa.string()).dictionary_encode().cast(field.type))
+            elif pa.types.is_dictionary(field.type):
+                arrays.append(pa.DictionaryArray.from_arrays(
+                    pa.array(values, type=pa.int32()),
+                    pa.array(list(self.dictionaries[field.name]), type=pa.string()),
+                ))
+            else:
+                arrays.append(pa.array(values, type=field.type))
+        batch = pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+        self._ensure_writer()
+        self._writer.write_batch(batch)
+        self.row_count += self.buffered
+        self.buffer = {name: [] for name in self.columns}
+        self.buffered = 0
+
+    def _ensure_writer(self):
+        if self._writer is not None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.format == "parquet":
+            import pyarrow.parquet as pq
+            dict_columns = [name for name, kind in self.columns.items() if kind == "dict"]
+            self._writer = pq.ParquetWriter(
+                str(self.path),
+                self.schema,
+                compression="zstd",
+                use_dictionary=dict_columns or False,
+            )
+        else:
+            pa = require_pyarrow()
+            self._sink = pa.OSFile(str(self.path), "wb")
+            self._writer = pa.ipc.new_file(
+                self._sink,
+                self.schema,
+                options=pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True),
+            )
+
+    def close(self):
+        self.flush()
+        if self._writer is None:
+            # Keep an empty but readable file so consumers do not need a special case.
+            self._ensure_writer()
+        self._writer.close()
+        if self._sink is not None:
+            self._sink.close()
+            self._sink = None
+
+
+def write_columnar(path: Path, rows, columns: dict, batch_rows: int = DEFAULT_BATCH_ROWS) -> int:
+    with ColumnarWriter(path, columns, batch_rows=batch_rows) as writer:
+        writer.write_many(rows)
+    return writer.row_count
+
+
+def build_filter(filters: dict | None):
+    if not filters:
+        return None
+    import pyarrow.dataset as ds
+    expression = None
+    for name, value in filters.items():
+        field = ds.field(name)
+        if isinstance(value, (list, tuple, set)):
+            clause = field.isin(list(value))
+        else:
+            clause = field == value
+        expression = clause if expression is None else expression & clause
+    return expression
+
+
+def read_columnar(path: Path, columns: list | None = None, filters: dict | None = None):
+    """Load a columnar store as a pyarrow Table.
+
+    `filters` maps column -> value (or list of values). For Parquet the filter is pushed
+    down, so row-group statistics let chapter filters skip unrelated chapters entirely.
+    """
+    pa = require_pyarrow()
+    import pyarrow.dataset as ds
+    path = Path(path)
+    expression = build_filter(filters)
+    if detect_format(path) == "parquet":
+        dataset = ds.dataset(str(path), format="parquet")
+        return dataset.to_table(columns=columns, filter=expression)
+    # Arrow IPC has no row-group statistics; memory-map it and filter in place.
+    with pa.memory_map(str(path), "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+    if expression is not None:
+        table = table.filter(expression)
+    if columns:
+        table = table.select(columns)
+    return table
+
+
+def iter_columnar_records(path: Path, columns: list | None = None, filters: dict | None = None):
+    table = read_columnar(path, columns=columns, filters=filters)
+    for batch in table.to_batches():
+        yield from batch.to_pylist()
@@ -9,6 +9,7 @@ from pathlib import Path
 
 import requests
 
+import comfy_preflight
 from visionexe_paths import (
     load_engine_config,
     load_story_config,
@@ -27,6 +28,7 @@ OUTPUT_BASE = None
 QUEUE_FILE = None
 UPLOAD_CACHE_ROOT = None
 WORKFLOW_INDEX = {}
+PREFLIGHT = None
 
 # WSL Bridge Path (default; overridden by workspaces.json if present)
 WSL_OUTPUT_PATH = r"\\wsl.localhost\Ubuntu24Old\root\ComfyUI_Py314\output"
@@ -266,6 +268,15 @@ def get_job_id(job):
         return str(entity)
     return "job"
 
+def preflight_rejects(workflow, job_id, required_titles):
+    """True (and a report) when the workflow can't run on this ComfyUI backend."""
+    if PREFLIGHT is None:
+        return False
+    errors = PREFLIGHT.check(workflow, required_titles)
+    if errors:
+        comfy_preflight.report(errors, job_id)
+    return bool(errors)
+
 def queue_prompt(prompt_workflow):
     """Sends a workflow prompt to the ComfyUI API."""
     p = {"prompt": prompt_workflow}
@@ -394,6 +405,9 @@ def run_job_genesis(job, workflow_override=None, allowed_types=("actor",), repea
             # Fallback: set SaveImage prefix directly
             set_saveimage_prefix(wf, prefix)
 
+        if preflight_rejects(wf, job_id, ("MASTER_PROMPT",)):
+            return any_success
+
         res = queue_prompt(wf)
         if not res:
             print("  [ERR] ComfyUI connection failed.")
@@ -553,6 +567,9 @@ def run_job_environment(job, workflow_override=None, output_in_place=False, repe
             if not set_saveimage_prefix(wf, run_prefix):
                 print("  [WARN] SaveImage node not found in workflow.")
 
+        if preflight_rejects(wf, job_id, ("MASTER_IMAGE",)):
+            return any_success
+
         # Queue Job
         res = queue_prompt(wf)
         if not res:
@@ -611,6 +628,8 @@ def main():
     parser.add_argument("--batch-repeats", action="store_true", help="Use repeats as batch_size (single run)")
     parser.add_argument("--move-outputs", action="store_true", help="Move outputs from WSL instead of copying (default is copy)")
     parser.add_argument("--no-skip-existing", action="store_true", help="Always queue jobs even if outputs already exist")
+    parser.add_argument("--no-preflight", action="store_true", help="Queue jobs without validating them against /object_info")
+    parser.add_argument("--refresh-object-info", action="store_true", help="Refetch /object_info instead of using the cache")
     args = parser.parse_args()
 
     engine_config = load_engine_config(ENGINE_ROOT)
@@ -622,7 +641,7 @@ def main():
     workspaces_config = load_workspaces(engine_config, repo_root)
     workspace = select_workspace(workspaces_config.get("workspaces", []), args.comfy_workspace)
 
-    global COMFY_URL, WORKFLOW_DIR, OUTPUT_BASE, QUEUE_FILE, WSL_OUTPUT_PATH, UPLOAD_CACHE_ROOT, WORKFLOW_INDEX
+    global COMFY_URL, WORKFLOW_DIR, OUTPUT_BASE, QUEUE_FILE, WSL_OUTPUT_PATH, UPLOAD_CACHE_ROOT, WORKFLOW_INDEX, PREFLIGHT
 
     comfy_url = resolve_workspace_api(workspace, "comfyui")
     if comfy_url:
@@ -633,6 +652,9 @@ def main():
         if output_path:
             WSL_OUTPUT_PATH = output_path
 
+    if not args.no_preflight:
+        PREFLIGHT = comfy_preflight.Preflight(COMFY_URL, refresh=args.refresh_object_info)
+
     workflow_dir = ENGINE_ROOT / "workflows"
     WORKFLOW_DIR = workflow_dir if workflow_dir.exists() else None
 
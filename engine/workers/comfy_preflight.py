@@ -0,0 +1,208 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import time
+import urllib.request
+
+# Preflight for ComfyUI jobs: validates an API-format workflow against the backend's /object_info before it is
+# queued (node classes installed, enum inputs such as ckpt/lora/vae names available, required inputs and links
+# present, title slots such as MASTER_PROMPT present). /object_info is cached per backend on disk, so per-job
+# processes (generate.py) don't refetch it; a job that fails against a cached copy is re-checked once against
+# a fresh fetch before it is rejected.
+
+ROOT_PATH = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CACHE_DIR = os.path.join(ROOT_PATH, "data", "cache", "comfy_object_info")
+DEFAULT_TTL_SEC = 900
+FETCH_TIMEOUT_SEC = 30
+# Inputs filled with freshly uploaded files; the cached enum can't know them yet.
+UPLOAD_INPUTS = {"image", "video", "audio", "upload"}
+UPLOAD_FLAGS = ("image_upload", "video_upload", "audio_upload", "upload")
+
+_MEMO = {}
+
+
+def normalize_title(value):
+    # Same matching as comfy_orchestrator.set_text_node_by_title.
+    return re.sub(r"[^a-z0-9]", "", str(value or "").lower())
+
+
+def cache_path_for(base_url: str, cache_dir: str) -> str:
+    digest = hashlib.sha256(base_url.rstrip("/").encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{digest}.json")
+
+
+def fetch_object_info(base_url: str) -> dict:
+    with urllib.request.urlopen(f"{base_url.rstrip('/')}/object_info", timeout=FETCH_TIMEOUT_SEC) as response:
+        return json.loads(response.read())
+
+
+def enum_options(spec):
+    """Allowed values of an input spec, or None when it isn't an enum (old list form and new COMBO form)."""
+    if not isinstance(spec, (list, tuple)) or not spec:
+        return None
+    if isinstance(spec[0], list):
+        return spec[0]
+    if spec[0] == "COMBO" and len(spec) > 1 and isinstance(spec[1], dict):
+        return spec[1].get("options")
+    return None
+
+
+def is_upload_input(name, spec) -> bool:
+    options = spec[1] if isinstance(spec, (list, tuple)) and len(spec) > 1 and isinstance(spec[1], dict) else {}
+    return name in UPLOAD_INPUTS or any(options.get(flag) for flag in UPLOAD_FLAGS)
+
+
+def validate_workflow(workflow, object_info: dict, required_titles=()) -> list[str]:
+    """Problems that would make ComfyUI reject or fail this API-format workflow (empty list = OK)."""
+    if not isinstance(workflow, dict):
+        return ["workflow is not a JSON object"]
+    if "nodes" in workflow and "links" in workflow:
+        return ["workflow is in UI format (export it via Save -> API Format)"]
+    errors = []
+    titles = set()
+    for node_id, node in workflow.items():
+        if not isinstance(node, dict):
+            continue
+        class_type = node.get("class_type")
+        title = node.get("_meta", {}).get("title") or node.get("title")
+        titles.add(normalize_title(title))
+        label = f"{class_type} #{node_id}"
+        definition = object_info.get(class_type)
+        if definition is None:
+            errors.append(f"{label}: node class not installed")
+            continue
+        spec_inputs = definition.get("input") or {}
+        required = spec_inputs.get("required") or {}
+        optional = spec_inputs.get("optional") or {}
+        inputs = node.get("inputs") or {}
+        for name in required:
+            if name not in inputs:
+                errors.append(f"{label}: required input '{name}' missing")
+        for name, value in inputs.items():
+            if isinstance(value, list):
+                if len(value) == 2 and str(value[0]) not in workflow:
+                    errors.append(f"{label}: input '{name}' links to missing node {value[0]}")
+                continue
+            spec = required.get(name) or optional.get(name)
+            options = enum_options(spec)
+            if options is None or is_upload_input(name, spec):
+                continue
+            if value not in options:
+                errors.append(f"{label}: {name} '{value}' not available on the server")
+    for title in required_titles:
+        if normalize_title(title) not in titles:
+            errors.append(f"title slot '{title}' missing")
+    return errors
+
+
+class Preflight:
+    """Cached /object_info of one ComfyUI backend plus workflow validation against it."""
+
+    def __init__(self, base_url: str, cache_dir: str = DEFAULT_CACHE_DIR, ttl_sec: float = DEFAULT_TTL_SEC, refresh: bool = False):
+        self.base_url = base_url.rstrip("/")
+        self.cache_path = cache_path_for(self.base_url, cache_dir)
+        self.ttl_sec = ttl_sec
+        self.object_info = None
+        self.fresh = False
+        if refresh:
+            self.refresh()
+
+    def refresh(self) -> dict | None:
+        """Fetch /object_info from the server (memoized per process) and store it in the cache."""
+        memo = _MEMO.get(self.base_url)
+        if memo is not None:
+            self.object_info, self.fresh = memo, True
+            return memo
+        try:
+            info = fetch_object_info(self.base_url)
+        except Exception as e:  # pylint: disable=broad-except
+            print(f"[PREFLIGHT] /object_info not reachable at {self.base_url}: {e}")
+            return None
+        _MEMO[self.base_url] = info
+        self.object_info, self.fresh = info, True
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"base_url": self.base_url, "fetched_at": time.time(), "object_info": info}, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            print(f"[PREFLIGHT] object_info not cached ({self.cache_path}): {e}")
+        return info
+
+    def load(self) -> dict | None:
+        """object_info from memory, the disk cache (within the TTL) or the server; a stale cache is the last resort."""
+        if self.object_info is not None:
+            return self.object_info
+        cached = None
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            pass
+        if cached and time.time() - cached.get("fetched_at", 0) < self.ttl_sec:
+            self.object_info = cached.get("object_info") or {}
+            return self.object_info
+        if self.refresh() is not None:
+            return self.object_info
+        if cached:
+            print("[PREFLIGHT] Using stale object_info cache.")
+            self.object_info = cached.get("object_info") or {}
+        return self.object_info
+
+    def check(self, workflow, required_titles=()) -> list[str]:
+        """Validation errors for a workflow; [] when it is fine or no object_info is available at all."""
+        info = self.load()
+        if info is None:
+            return []
+        errors = validate_workflow(workflow, info, required_titles)
+        if errors and not self.fresh and self.refresh() is not None:
+            # Models or custom nodes may have been added since the cache was written.
+            errors = validate_workflow(workflow, self.object_info, required_titles)
+        return errors
+
+    def enum_values(self, class_type: str, input_name: str) -> list:
+        definition = (self.load() or {}).get(class_type) or {}
+        spec_inputs = definition.get("input") or {}
+        spec = (spec_inputs.get("required") or {}).get(input_name) or (spec_inputs.get("optional") or {}).get(input_name)
+        return enum_options(spec) or []
+
+
+def report(errors: list[str], label: str) -> None:
+    print(f"[REJECT] {label}: {len(errors)} preflight error(s)")
+    for error in errors[:10]:
+        print(f"    - {error}")
+    if len(errors) > 10:
+        print(f"    ... {len(errors) - 10} more")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate ComfyUI API workflows against the server's /object_info.")
+    parser.add_argument("workflows", nargs="+", help="API-format workflow JSON files")
+    parser.add_argument("--url", default="http://127.0.0.1:8188", help="ComfyUI base URL")
+    parser.add_argument("--require", action="append", default=[], help="Title slot that must exist (repeatable)")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="object_info cache directory")
+    parser.add_argument("--refresh", action="store_true", help="Refetch /object_info")
+    args = parser.parse_args()
+
+    preflight = Preflight(args.url, cache_dir=args.cache_dir, refresh=args.refresh)
+    if preflight.load() is None:
+        raise SystemExit("No /object_info available (server down and no cache).")
+    failed = 0
+    for path in args.workflows:
+        with open(path, "r", encoding="utf-8") as f:
+            workflow = json.load(f)
+        errors = preflight.check(workflow, args.require)
+        if errors:
+            failed += 1
+            report(errors, path)
+        else:
+            print(f"[OK] {path}")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
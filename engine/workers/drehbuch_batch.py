@@ -0,0 +1,270 @@
+import argparse
+import hashlib
+import heapq
+import importlib
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import prompt_context
+
+# Multi-chapter runner for drehbuch.py / drehbuch_gemini.py: the knowledge base is loaded once and the three
+# LLM stages run as a pipeline across chapters (concept of chapter N+1 overlaps structure/production of N).
+
+STAGES = ("concept", "structure", "production")
+BACKENDS = {"copilot": "drehbuch", "gemini": "drehbuch_gemini"}
+STATE_NAME = "pipeline_state.json"
+STRUCTURE_NAME = "script_structure.txt"
+DEFAULT_CONCURRENCY = 3
+
+
+def parse_chapters(spec: str) -> list[int]:
+    """'2-13,20,22' -> [2, ..., 13, 20, 22] (sorted, unique)."""
+    chapters = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-", 1)
+            chapters.update(range(int(start), int(end) + 1))
+        else:
+            chapters.add(int(part))
+    return sorted(chapters)
+
+
+def text_digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def write_text(path: str, text: str) -> None:
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+class ChapterRun:
+    """Paths, checkpoint state and stage outputs of one chapter.
+
+    A stage counts as done when the state file records it with the digest of its output file and of the
+    stage before it; everything after the first invalid stage is regenerated.
+    """
+
+    def __init__(self, chapter: int, base_path: str, settings: dict):
+        self.chapter = chapter
+        self.chapter_path = os.path.join(base_path, f"chapter_{chapter:03d}")
+        self.concept_dir = os.path.join(self.chapter_path, "concept_engine")
+        self.state_path = os.path.join(self.concept_dir, STATE_NAME)
+        self.paths = {
+            "concept": os.path.join(self.concept_dir, "mechanic_concept.txt"),
+            "structure": os.path.join(self.concept_dir, STRUCTURE_NAME),
+            "production": os.path.join(self.chapter_path, "DREHBUCH_HOLLYWOOD.md"),
+        }
+        self.settings = settings
+        self.state = {"settings": settings, "stages": {}}
+        self.outputs = {}
+        self.data = None
+        self.failed_stage = None
+
+    def load_checkpoints(self) -> int:
+        """Restore valid stage outputs; returns the index of the first stage still to run."""
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        if not isinstance(state, dict) or state.get("settings") != self.settings:
+            return 0
+        stages = state.get("stages") or {}
+        previous = None
+        for idx, stage in enumerate(STAGES):
+            entry = stages.get(stage) or {}
+            path = self.paths[stage]
+            if not os.path.exists(path):
+                return idx
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+            if entry.get("sha256") != text_digest(text) or entry.get("input_sha256") != previous:
+                return idx
+            self.outputs[stage] = text
+            self.state["stages"][stage] = entry
+            previous = entry["sha256"]
+        return len(STAGES)
+
+    def save_stage(self, stage: str, text: str, seconds: float) -> None:
+        idx = STAGES.index(stage)
+        previous = self.state["stages"].get(STAGES[idx - 1], {}).get("sha256") if idx else None
+        write_text(self.paths[stage], text)
+        self.outputs[stage] = text
+        self.state["stages"][stage] = {
+            "sha256": text_digest(text),
+            "input_sha256": previous,
+            "finished": time.time(),
+            "seconds": round(seconds, 1),
+        }
+        for later in STAGES[idx + 1:]:
+            self.state["stages"].pop(later, None)
+        write_text(self.state_path, json.dumps(self.state, indent=2))
+
+
+def run_stage(backend, kb: dict, run: ChapterRun, stage: str, args, assembler=None) -> bool:
+    if run.data is None:
+        run.data = backend.get_chapter_data(run.chapter_path, include_wave=args.include_wave)
+    data = run.data
+    if stage == "concept":
+        old_concept = backend.load_existing_content(run.paths["concept"])
+        inputs = prompt_context.stage_inputs(assembler, stage, data, kb, existing=old_concept)
+        prompt = backend.build_concept_prompt(
+            inputs["data"], inputs["kb"], run.chapter, inputs["existing"], strict_source=args.strict_source
+        )
+        label = "Visionary Concept Generation"
+    elif stage == "structure":
+        inputs = prompt_context.stage_inputs(assembler, stage, data, kb, concept=run.outputs["concept"])
+        prompt = backend.build_script_structure_prompt(
+            inputs["data"], inputs["kb"], run.outputs["concept"], run.chapter, strict_source=args.strict_source
+        )
+        label = "Script Structure Generation"
+    else:
+        old_script = backend.load_existing_content(run.paths["production"])
+        inputs = prompt_context.stage_inputs(
+            assembler,
+            stage,
+            data,
+            kb,
+            concept=run.outputs["concept"],
+            structure=run.outputs["structure"],
+            existing=old_script,
+        )
+        prompt = backend.build_production_prompt(
+            inputs["data"],
+            inputs["kb"],
+            inputs["concept"],
+            inputs["structure"],
+            run.chapter,
+            inputs["existing"],
+            strict_source=args.strict_source,
+        )
+        label = "Final Asset Generation"
+    if assembler:
+        assembler.save()
+
+    for attempt in range(args.retries + 1):
+        if attempt:
+            print(f"[Kapitel {run.chapter}] Wiederhole {stage} ({attempt}/{args.retries})...")
+            time.sleep(args.retry_delay)
+        started = time.perf_counter()
+        text = backend.call_ai_agent(prompt, f"Kapitel {run.chapter}: {label}", model=args.model)
+        if text:
+            run.save_stage(stage, text, time.perf_counter() - started)
+            return True
+    return False
+
+
+def run_pipeline(runs: list, execute, concurrency: int) -> None:
+    """Run every chapter's remaining stages with at most `concurrency` LLM calls in flight.
+
+    Later stages are preferred over new concepts, so finished chapters appear in order while the next
+    chapters' concepts fill the free slots.
+    """
+    ready = []
+    for order, (run, first_stage) in enumerate(runs):
+        if first_stage < len(STAGES):
+            heapq.heappush(ready, (-first_stage, order, first_stage, run))
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        in_flight = {}
+        while ready or in_flight:
+            while ready and len(in_flight) < concurrency:
+                _, order, idx, run = heapq.heappop(ready)
+                in_flight[pool.submit(execute, run, STAGES[idx])] = (order, idx, run)
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                order, idx, run = in_flight.pop(future)
+                try:
+                    ok = future.result()
+                except Exception as exc:  # pylint: disable=broad-except
+                    print(f"[Kapitel {run.chapter}] Fehler in {STAGES[idx]}: {type(exc).__name__}: {exc}")
+                    ok = False
+                if not ok:
+                    run.failed_stage = STAGES[idx]
+                elif idx + 1 < len(STAGES):
+                    heapq.heappush(ready, (-(idx + 1), order, idx + 1, run))
+                else:
+                    print(f"[Kapitel {run.chapter}] Drehbuch erstellt: {run.paths['production']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exeget:OS Double-Think Script Generator (multi-chapter pipeline)")
+    parser.add_argument("chapters", help="Kapitel, z.B. '2-108' oder '1,4,7-9'.")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="copilot", help="LLM CLI (drehbuch.py or drehbuch_gemini.py).")
+    parser.add_argument(
+        "--model",
+        default=os.environ.get("GEMINI_MODEL", ""),
+        help="Gemini model name (e.g. gemini-3-pro-preview).",
+    )
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Max parallel LLM calls.")
+    parser.add_argument("--retries", type=int, default=1, help="Retries per failed stage.")
+    parser.add_argument("--retry-delay", type=float, default=5.0, help="Seconds before a retry.")
+    parser.add_argument("--fresh", action="store_true", help="Ignore checkpoints and regenerate every stage.")
+    parser.add_argument("--base-path", default=r"C:\Users\sasch\henoch\filmsets", help="filmsets folder.")
+    parser.add_argument("--root-path", default=r"C:\Users\sasch\henoch", help="Folder with the knowledge base files.")
+    parser.add_argument(
+        "--include-wave",
+        action="store_true",
+        help="Include Integration in WAVE sections in inputs (default: exclude).",
+    )
+    parser.add_argument("--strict-source", dest="strict_source", action="store_true", help="Strict source-of-truth mode (default).")
+    parser.add_argument("--loose-source", dest="strict_source", action="store_false", help="Allow extrapolation beyond the chapter text.")
+    parser.set_defaults(strict_source=True)
+    prompt_context.add_arguments(parser)
+    args = parser.parse_args()
+
+    backend = importlib.import_module(BACKENDS[args.backend])
+    base_path = os.path.abspath(args.base_path)
+    # Checkpoints from a run with other inputs are not reused.
+    settings = {
+        "backend": args.backend,
+        "model": args.model,
+        "include_wave": args.include_wave,
+        "strict_source": args.strict_source,
+    }
+    context = prompt_context.context_settings(args)
+    if context:
+        settings["context"] = context
+
+    runs = []
+    for chapter in parse_chapters(args.chapters):
+        run = ChapterRun(chapter, base_path, settings)
+        if not os.path.exists(run.chapter_path):
+            print(f"SKIPPING: Ordner {run.chapter_path} nicht gefunden.")
+            continue
+        os.makedirs(run.concept_dir, exist_ok=True)
+        first_stage = 0 if args.fresh else run.load_checkpoints()
+        if first_stage == len(STAGES):
+            print(f"[Kapitel {chapter}] Bereits fertig (Checkpoint).")
+        elif first_stage:
+            print(f"[Kapitel {chapter}] Setze fort ab {STAGES[first_stage]}.")
+        runs.append((run, first_stage))
+
+    print("Lade globale Knowledge Base...")
+    kb = backend.load_knowledge_base(os.path.abspath(args.root_path))
+    assembler = prompt_context.assembler_from_args(args, os.path.abspath(args.root_path))
+
+    started = time.perf_counter()
+    run_pipeline(runs, lambda run, stage: run_stage(backend, kb, run, stage, args, assembler), max(1, args.concurrency))
+    elapsed = time.perf_counter() - started
+
+    failed = [run for run, _ in runs if run.failed_stage]
+    print(f"\n--- {len(runs) - len(failed)}/{len(runs)} Kapitel fertig in {elapsed:.0f}s ---")
+    if assembler and assembler.stats["sections"]:
+        stats = assembler.stats
+        print(f"Kontext: {stats['tokens_in']} -> {stats['tokens_out']} Tokens in {stats['sections']} Abschnitten ({stats['cached']} aus Cache)")
+    for run in failed:
+        print(f"!!! FEHLER in Kapitel {run.chapter} ({run.failed_stage}) - erneut starten setzt dort fort.")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
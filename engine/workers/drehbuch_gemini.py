@@ -6,6 +6,8 @@ import shutil
 import json
 import re
 
+import prompt_context
+
 # --- KONSTANTEN & REGELWERKE ---
 
 RULE_OF_MECHANISM = """
@@ -499,6 +501,7 @@ def main():
         help="Allow extrapolation beyond the chapter text.",
     )
     parser.set_defaults(strict_source=True)
+    prompt_context.add_arguments(parser)
     args = parser.parse_args()
 
     base_path = os.path.abspath(r"C:\Users\sasch\henoch\filmsets")
@@ -519,13 +522,17 @@ def main():
     # Globale Knowledge Base laden
     print("Lade globale Knowledge Base...")
     kb = load_knowledge_base(root_path)
+    assembler = prompt_context.assembler_from_args(args, root_path)
 
     # --- SCHRITT 1: KONZEPT ---
     concept_file = os.path.join(concept_dir, "mechanic_concept.txt")
     old_concept = load_existing_content(concept_file)
     
     print(f"Generiere/Verbessere Konzept für Kapitel {args.chapter}...")
-    concept_prompt = build_concept_prompt(data, kb, args.chapter, old_concept, strict_source=args.strict_source)
+    inputs = prompt_context.stage_inputs(assembler, "concept", data, kb, existing=old_concept)
+    concept_prompt = build_concept_prompt(
+        inputs["data"], inputs["kb"], args.chapter, inputs["existing"], strict_source=args.strict_source
+    )
     concept_text = call_ai_agent(concept_prompt, "Visionary Concept Generation", model=args.model)
     
     if concept_text:
@@ -538,7 +545,10 @@ def main():
 
     # --- SCHRITT 2: DREHBUCH STRUKTUR (DRAFT) ---
     print("Erstelle Drehbuch-Struktur (12-18 Szenen)...")
-    script_structure_prompt = build_script_structure_prompt(data, kb, concept_text, args.chapter, strict_source=args.strict_source)
+    inputs = prompt_context.stage_inputs(assembler, "structure", data, kb, concept=concept_text)
+    script_structure_prompt = build_script_structure_prompt(
+        inputs["data"], inputs["kb"], concept_text, args.chapter, strict_source=args.strict_source
+    )
     script_structure_text = call_ai_agent(script_structure_prompt, "Script Structure Generation", model=args.model)
 
     if not script_structure_text:
@@ -550,15 +560,20 @@ def main():
     old_script = load_existing_content(output_path)
     
     print("Generiere/Verbessere finale Production Assets (Image + Video + Audio Prompts)...")
+    inputs = prompt_context.stage_inputs(
+        assembler, "production", data, kb, concept=concept_text, structure=script_structure_text, existing=old_script
+    )
     production_prompt = build_production_prompt(
-        data,
-        kb,
-        concept_text,
-        script_structure_text,
+        inputs["data"],
+        inputs["kb"],
+        inputs["concept"],
+        inputs["structure"],
         args.chapter,
-        old_script,
+        inputs["existing"],
         strict_source=args.strict_source,
     )
+    if assembler:
+        assembler.save()
     final_script_text = call_ai_agent(production_prompt, "Final Asset Generation", model=args.model)
 
     if final_script_text:
@@ -4,6 +4,8 @@ import json
 import os
 import time
 
+from fs_snapshot import FsSnapshot
+
 ROOT_PATH = os.path.dirname(os.path.abspath(__file__))
 DEFAULT_CONFIG = os.path.join(ROOT_PATH, "env_audit_config.json")
 
@@ -28,11 +30,12 @@ def load_config(path):
     }
 
 
-def count_images(folder, prefix, exts):
-    if not os.path.isdir(folder):
+def count_images(folder, prefix, exts, fs=None):
+    fs = fs or FsSnapshot()
+    if not fs.isdir(folder):
         return 0
     count = 0
-    for name in os.listdir(folder):
+    for name in fs.listdir(folder):
         if not name.lower().endswith(tuple(exts)):
             continue
         if prefix and not name.startswith(prefix):
@@ -41,7 +44,8 @@ def count_images(folder, prefix, exts):
     return count
 
 
-def build_audit(config):
+def build_audit(config, fs=None):
+    fs = fs or FsSnapshot()
     mapping_path = os.path.join(ROOT_PATH, config["mapping_csv"])
     if not os.path.exists(mapping_path):
         raise RuntimeError(f"Missing mapping file: {mapping_path}")
@@ -58,8 +62,8 @@ def build_audit(config):
             prefix = f"Env_{target}_{stem}_MV"
             output_dir = os.path.join(ROOT_PATH, config["output_root"], target)
             fallback_dir = os.path.join(ROOT_PATH, config["fallback_env_root"], target)
-            output_count = count_images(output_dir, prefix, config["image_exts"])
-            fallback_count = count_images(fallback_dir, prefix, config["image_exts"])
+            output_count = count_images(output_dir, prefix, config["image_exts"], fs)
+            fallback_count = count_images(fallback_dir, prefix, config["image_exts"], fs)
             total = output_count + fallback_count
             status = "ok" if total > 0 else "missing"
             results.append({
@@ -18,6 +18,8 @@ import sys
 from pathlib import Path
 from typing import Any, Dict, List
 
+from filmsets_catalog import find_files
+
 
 def main() -> None:
     base = Path(sys.argv[1]) if len(sys.argv) > 1 else Path("filmsets")
@@ -27,7 +29,7 @@ def main() -> None:
     verse_rows: List[Dict[str, Any]] = []
     actor_rows: List[Dict[str, Any]] = []
 
-    for meta_file in base.rglob("metadata.json"):
+    for meta_file in map(Path, find_files(base, name="metadata.json")):
         data = load_json(meta_file)
         if not data:
             continue
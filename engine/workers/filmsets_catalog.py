@@ -0,0 +1,369 @@
+import argparse
+import fnmatch
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from visionexe_paths import load_story_config, resolve_path, resolve_repo_root
+
+CATALOG_VERSION = 1
+# Manifest name older versions wrote inside the scanned root; still ignored when listing.
+DEFAULT_CACHE_NAME = ".filmsets_catalog.json"
+SKIP_DIRS = {"__pycache__", ".git"}
+DEFAULT_WORKERS = min(8, (os.cpu_count() or 1) * 2)
+
+PATH_PARTS = {
+    "chapter": re.compile(r"^chapter_(\d+)$", re.IGNORECASE),
+    "segment": re.compile(r"^(?:segment|verse)_(\d+)$", re.IGNORECASE),
+    "scene": re.compile(r"^scene_(\d+)$", re.IGNORECASE),
+    "timeline": re.compile(r"^timeline_(\d+)$", re.IGNORECASE),
+}
+
+KIND_BY_NAME = {
+    "DREHBUCH_HOLLYWOOD.md": "screenplay",
+    "metadata.json": "metadata",
+    "segment.txt": "segment_text",
+    "story.txt": "story_text",
+    "mechanic_concept.txt": "concept",
+}
+
+KIND_BY_EXT = {
+    ".png": "image",
+    ".jpg": "image",
+    ".jpeg": "image",
+    ".webp": "image",
+    ".wav": "audio",
+    ".mp3": "audio",
+    ".flac": "audio",
+    ".ogg": "audio",
+    ".m4a": "audio",
+    ".mp4": "video",
+    ".mov": "video",
+    ".webm": "video",
+    ".mkv": "video",
+    ".json": "json",
+    ".jsonl": "json",
+    ".md": "text",
+    ".txt": "text",
+}
+
+_CATALOG_MEMO = {}
+
+
+def classify(name: str) -> str:
+    if name in KIND_BY_NAME:
+        return KIND_BY_NAME[name]
+    if name.startswith("analysis_llm."):
+        return "analysis"
+    return KIND_BY_EXT.get(os.path.splitext(name)[1].lower(), "other")
+
+
+def parse_location(rel_dir: str) -> dict:
+    location = {"chapter": None, "segment": None, "scene": None, "timeline": None}
+    if not rel_dir:
+        return location
+    for part in rel_dir.split("/"):
+        for key, pattern in PATH_PARTS.items():
+            match = pattern.match(part)
+            if match and location[key] is None:
+                location[key] = int(match.group(1))
+    return location
+
+
+def cache_name(root: Path) -> str:
+    digest = hashlib.sha256(os.path.normcase(str(Path(root).resolve())).encode("utf-8")).hexdigest()[:12]
+    return f"filmsets_catalog_{digest}.json"
+
+
+def default_cache_dir() -> Path:
+    """The default story's `<data_root>/cache` (repo `data/cache` when no story config loads)."""
+    try:
+        story_config, _, repo_root = load_story_config()
+        data_root = resolve_path(story_config.get("data_root"), repo_root)
+    except (OSError, ValueError):
+        data_root = None
+    return data_root / "cache" if data_root else resolve_repo_root() / "data" / "cache"
+
+
+def default_cache_path(root: Path) -> Path:
+    """Per-root manifest in the default story's `<data_root>/cache`, never inside the scanned tree.
+
+    Writing into the root would change its mtime and force a rescan on every run.
+    """
+    return default_cache_dir() / cache_name(root)
+
+
+def story_cache_path(story_config: dict, repo_root: Path, root: Path | None = None) -> Path | None:
+    """Manifest path for `root` (default: the story's filmsets root) under `<data_root>/cache`.
+
+    Manifests are bound to one root, so every other root gets its own file.
+    """
+    data_root = resolve_path(story_config.get("data_root"), repo_root)
+    if not data_root:
+        return None
+    filmsets_root = resolve_path(story_config.get("filmsets_root"), repo_root)
+    if root is None or (filmsets_root and Path(root).resolve() == filmsets_root.resolve()):
+        return data_root / "cache" / "filmsets_catalog.json"
+    return data_root / "cache" / cache_name(root)
+
+
+def scan_directory(path: str, skip_dirs: set) -> tuple[list, list]:
+    files = []
+    subdirs = []
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in skip_dirs:
+                        subdirs.append(entry.name)
+                    continue
+                if entry.name == DEFAULT_CACHE_NAME:
+                    continue
+                # DirEntry.stat() is served from the directory listing on Windows, one syscall elsewhere.
+                stat = entry.stat()
+            except OSError:
+                continue
+            files.append([entry.name, stat.st_size, stat.st_mtime])
+    files.sort()
+    subdirs.sort()
+    return files, subdirs
+
+
+def load_manifest(cache_path: Path, root: Path, skip_dirs: set | None = None) -> dict:
+    if not cache_path or not cache_path.exists():
+        return {}
+    try:
+        with cache_path.open("r", encoding="utf-8") as f:
+            payload = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+    if payload.get("version") != CATALOG_VERSION or payload.get("root") != str(root):
+        return {}
+    # Cached subdir lists of a manifest built with other skip_dirs would bring pruned trees back (or miss some).
+    if skip_dirs is not None and payload.get("skip_dirs") != sorted(skip_dirs):
+        return {}
+    return payload.get("dirs") or {}
+
+
+def write_manifest(cache_path: Path, root: Path, dirs: dict, skip_dirs: set | None = None):
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        "version": CATALOG_VERSION,
+        "root": str(root),
+        "skip_dirs": sorted(SKIP_DIRS if skip_dirs is None else skip_dirs),
+        "generated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "dirs": dirs,
+    }
+    tmp_path = cache_path.with_name(cache_path.name + ".tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, cache_path)
+
+
+def refresh_directory(root, rel_dir: str, cached: dict, skip_dirs: set, verify_files: bool):
+    """Refresh one directory: reuse its cached listing when the mtime is unchanged, else scandir it.
+
+    Returns (info, rescanned) or (None, False) when the directory is gone or unreadable.
+    """
+    abs_dir = os.path.join(root, *rel_dir.split("/")) if rel_dir else str(root)
+    try:
+        mtime_ns = os.stat(abs_dir).st_mtime_ns
+    except OSError:
+        return None, False
+    previous = cached.get(rel_dir)
+    if previous and previous.get("mtime_ns") == mtime_ns:
+        files = previous.get("files") or []
+        if verify_files:
+            files = restat_files(abs_dir, files)
+        return {"mtime_ns": mtime_ns, "files": files, "subdirs": previous.get("subdirs") or []}, False
+    try:
+        files, subdirs = scan_directory(abs_dir, skip_dirs)
+    except OSError:
+        return None, False
+    return {"mtime_ns": mtime_ns, "files": files, "subdirs": subdirs}, True
+
+
+def refresh_manifest(
+    root: Path, cached: dict, skip_dirs: set, verify_files: bool = False, workers: int = 1
+) -> tuple[dict, dict]:
+    """Walk `root` reusing cached listings for directories whose mtime is unchanged.
+
+    Directory mtimes change when entries are added, removed or renamed; in-place edits of
+    a file do not touch them, so pass `verify_files=True` to re-stat files in unchanged dirs.
+    With `workers > 1` each directory level is listed by a thread pool (scandir/stat release
+    the GIL, so large trees on slow or network disks list several directories at once).
+    """
+    dirs = {}
+    stats = {"dirs": 0, "rescanned": 0, "files": 0}
+    pool = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        level = [""]
+        while level:
+            if pool and len(level) > 1:
+                results = pool.map(lambda rel: refresh_directory(root, rel, cached, skip_dirs, verify_files), level)
+            else:
+                results = (refresh_directory(root, rel, cached, skip_dirs, verify_files) for rel in level)
+            next_level = []
+            for rel_dir, (info, rescanned) in zip(level, results):
+                if info is None:
+                    continue
+                stats["dirs"] += 1
+                stats["rescanned"] += rescanned
+                stats["files"] += len(info["files"])
+                dirs[rel_dir] = info
+                next_level.extend(f"{rel_dir}/{name}" if rel_dir else name for name in info["subdirs"])
+            level = next_level
+    finally:
+        if pool:
+            pool.shutdown()
+    return dirs, stats
+
+
+def restat_files(abs_dir: str, files: list) -> list:
+    refreshed = []
+    for name, size, mtime in files:
+        try:
+            stat = os.stat(os.path.join(abs_dir, name))
+        except OSError:
+            continue
+        refreshed.append([name, stat.st_size, stat.st_mtime])
+    return refreshed
+
+
+def build_entries(root: Path, dirs: dict) -> list[dict]:
+    entries = []
+    for rel_dir in sorted(dirs):
+        info = dirs[rel_dir]
+        location = parse_location(rel_dir)
+        abs_dir = os.path.join(root, *rel_dir.split("/")) if rel_dir else str(root)
+        for name, size, mtime in info.get("files") or []:
+            entries.append({
+                "path": os.path.join(abs_dir, name),
+                "rel_path": f"{rel_dir}/{name}" if rel_dir else name,
+                "rel_dir": rel_dir,
+                "name": name,
+                "kind": classify(name),
+                "chapter": location["chapter"],
+                "segment": location["segment"],
+                "scene": location["scene"],
+                "timeline": location["timeline"],
+                "size": size,
+                "mtime": mtime,
+            })
+    return entries
+
+
+def load_catalog(
+    root: Path,
+    cache_path: Path | None = None,
+    skip_dirs: set | None = None,
+    verify_files: bool = False,
+    use_memo: bool = True,
+    workers: int = 1,
+) -> list[dict]:
+    """Return the manifest entries for a filmsets tree, refreshing the on-disk cache incrementally."""
+    root = Path(root).resolve()
+    cache_path = Path(cache_path) if cache_path else default_cache_path(root)
+    skip_dirs = set(SKIP_DIRS if skip_dirs is None else skip_dirs)
+    memo_key = (str(root), str(cache_path), tuple(sorted(skip_dirs)), verify_files)
+    if use_memo and memo_key in _CATALOG_MEMO:
+        return _CATALOG_MEMO[memo_key]
+    if not root.exists():
+        return []
+    cached = load_manifest(cache_path, root, skip_dirs)
+    dirs, stats = refresh_manifest(root, cached, skip_dirs, verify_files=verify_files, workers=workers)
+    if stats["rescanned"] or set(dirs) != set(cached):
+        try:
+            write_manifest(cache_path, root, dirs, skip_dirs)
+        except OSError as exc:
+            print(f"Filmsets catalog not cached ({cache_path}): {exc}")
+    entries = build_entries(root, dirs)
+    _CATALOG_MEMO[memo_key] = entries
+    return entries
+
+
+def filter_entries(
+    entries: list[dict],
+    name: str | None = None,
+    pattern: str | None = None,
+    kind: str | None = None,
+    chapter: int | None = None,
+    under: str | None = None,
+    exclude_dirs: set | None = None,
+) -> list[dict]:
+    results = []
+    under = under.strip("/") if under else ""
+    for entry in entries:
+        if name and entry["name"] != name:
+            continue
+        if pattern and not fnmatch.fnmatchcase(entry["name"], pattern):
+            continue
+        if kind and entry["kind"] != kind:
+            continue
+        if chapter is not None and entry["chapter"] != chapter:
+            continue
+        if under and entry["rel_dir"] != under and not entry["rel_dir"].startswith(under + "/"):
+            continue
+        if exclude_dirs and any(part in exclude_dirs for part in entry["rel_dir"].split("/")):
+            continue
+        results.append(entry)
+    return results
+
+
+def find_files(root: Path, cache_path: Path | None = None, skip_dirs: set | None = None, **filters) -> list[str]:
+    """Paths of catalog entries matching `filters`; `skip_dirs` are pruned while scanning."""
+    catalog = load_catalog(root, cache_path=cache_path, skip_dirs=skip_dirs)
+    return [entry["path"] for entry in filter_entries(catalog, **filters)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh and query the cached filmsets file manifest.")
+    parser.add_argument("--story-root", help="Story root path (defaults to engine_config default_story_root).")
+    parser.add_argument("--story-config", help="Path to story_config.json (overrides story-root).")
+    parser.add_argument("--filmsets-root", help="Optional filmsets root path override.")
+    parser.add_argument("--cache", help="Manifest path (default: <data_root>/cache/filmsets_catalog.json).")
+    parser.add_argument("--verify-files", action="store_true", help="Re-stat files in unchanged directories.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Threads listing directories (1 = serial).")
+    parser.add_argument("--kind", help="List entries of this kind (analysis, screenplay, metadata, image, ...).")
+    parser.add_argument("--name", help="List entries with this exact file name.")
+    parser.add_argument("--chapter", type=int, help="Limit listing to a chapter number.")
+    args = parser.parse_args()
+
+    story_config, _, repo_root = load_story_config(
+        story_root=args.story_root,
+        story_config_path=args.story_config,
+    )
+    root = resolve_path(args.filmsets_root or story_config.get("filmsets_root"), repo_root)
+    cache_path = resolve_path(args.cache, repo_root) if args.cache else story_cache_path(story_config, repo_root, root)
+
+    start = time.perf_counter()
+    cache_path = cache_path or default_cache_path(root)
+    cached = load_manifest(cache_path, root.resolve(), SKIP_DIRS)
+    dirs, stats = refresh_manifest(
+        root.resolve(), cached, SKIP_DIRS, verify_files=args.verify_files, workers=args.workers
+    )
+    if stats["rescanned"] or set(dirs) != set(cached):
+        write_manifest(cache_path, root.resolve(), dirs, SKIP_DIRS)
+    elapsed = time.perf_counter() - start
+    print(
+        f"Filmsets catalog: {stats['files']} files in {stats['dirs']} dirs "
+        f"({stats['rescanned']} rescanned) in {elapsed * 1000:.1f} ms"
+    )
+
+    if args.kind or args.name or args.chapter is not None:
+        entries = filter_entries(
+            build_entries(root.resolve(), dirs),
+            name=args.name,
+            kind=args.kind,
+            chapter=args.chapter,
+        )
+        for entry in entries:
+            print(entry["rel_path"])
+
+
+if __name__ == "__main__":
+    main()
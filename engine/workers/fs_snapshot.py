@@ -0,0 +1,105 @@
+import fnmatch
+import glob as _glob
+import os
+import threading
+
+# In-memory filesystem snapshot for the audit workers: every directory is listed at most once per run (one
+# os.scandir), and exists/isdir/listdir/glob are answered from those listings. On SMB/WSL shares this replaces
+# thousands of stat calls with one listing per directory. Lookups follow os.path.normcase, so they stay
+# case-insensitive on Windows like os.path.exists.
+
+
+def _key(path) -> str:
+    return os.path.normcase(os.path.abspath(path))
+
+
+class FsSnapshot:
+    """Lazily populated, thread-safe directory listing cache (read-only view; create one per run)."""
+
+    def __init__(self):
+        self._dirs = {}
+        self._lock = threading.Lock()
+        self.scans = 0
+
+    def _listing(self, path):
+        """normcase(name) -> (name, is_dir) for a directory, None if it is missing or unreadable."""
+        key = _key(path)
+        with self._lock:
+            if key in self._dirs:
+                return self._dirs[key]
+        entries = None
+        try:
+            with os.scandir(path) as it:
+                entries = {}
+                for entry in it:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    entries[os.path.normcase(entry.name)] = (entry.name, is_dir)
+        except OSError:
+            entries = None
+        with self._lock:
+            self.scans += 1
+            return self._dirs.setdefault(key, entries)
+
+    def _entry(self, path):
+        if not path:
+            return None
+        parent, name = os.path.split(os.path.abspath(path))
+        if not name:
+            # A drive/filesystem root.
+            return (parent, True) if os.path.isdir(parent) else None
+        listing = self._listing(parent)
+        if listing is None:
+            return None
+        return listing.get(os.path.normcase(name))
+
+    def exists(self, path) -> bool:
+        return self._entry(path) is not None
+
+    def isdir(self, path) -> bool:
+        entry = self._entry(path)
+        return bool(entry and entry[1])
+
+    def isfile(self, path) -> bool:
+        entry = self._entry(path)
+        return bool(entry and not entry[1])
+
+    def listdir(self, path) -> list:
+        """Like os.listdir (names in on-disk spelling); raises FileNotFoundError for a missing directory."""
+        listing = self._listing(path)
+        if listing is None:
+            raise FileNotFoundError(path)
+        return [name for name, _ in listing.values()]
+
+    def glob(self, pattern) -> list:
+        """glob.glob(pattern) (non-recursive) served from the snapshot; hidden names need an explicit '.'."""
+        dirname, basename = os.path.split(pattern)
+        if not _glob.has_magic(pattern):
+            if basename:
+                return [pattern] if self.exists(pattern) else []
+            return [pattern] if self.isdir(dirname) else []
+        if not dirname:
+            dirs = [""]
+        elif dirname != pattern and _glob.has_magic(dirname):
+            dirs = self.glob(dirname)
+        else:
+            dirs = [dirname]
+        results = []
+        for folder in dirs:
+            if _glob.has_magic(basename):
+                listing = self._listing(folder or os.curdir)
+                if listing is None:
+                    continue
+                names = [name for name, _ in listing.values()]
+                if not basename.startswith("."):
+                    names = [name for name in names if not name.startswith(".")]
+                results.extend(os.path.join(folder, name) for name in fnmatch.filter(names, basename))
+            elif basename:
+                candidate = os.path.join(folder, basename)
+                if self.exists(candidate):
+                    results.append(candidate)
+            elif self.isdir(folder):
+                results.append(os.path.join(folder, basename))
+        return results
@@ -6,6 +6,8 @@ import uuid
 import argparse
 from pathlib import Path
 
+import comfy_preflight
+
 # --- KONFIGURATION ---
 COMFY_BASE_URL = "http://127.0.0.1:8188"
 COMFY_PROMPT_URL = f"{COMFY_BASE_URL}/prompt"
@@ -83,6 +85,7 @@ def main():
     parser.add_argument("-f", "--filename", help="Dateiname für MASTER_FILENAME")
     parser.add_argument("-i", "--images", nargs='*', help="Pfade zu Bildern für MASTER_IMAGE_1, 2, ...")
     parser.add_argument("--lora", action="append", help="LoRA name[:strength] (repeatable)")
+    parser.add_argument("--no-preflight", action="store_true", help="Ohne Prüfung gegen /object_info absenden")
     
     args = parser.parse_args()
 
@@ -159,7 +162,15 @@ def main():
             if len(lora_entries) > len(slots):
                 print(f"[WARN] {len(lora_entries) - len(slots)} LoRA(s) ignoriert (max {len(slots)}).")
 
-    # 6. Absenden
+    # 6. Preflight gegen /object_info (Node-Klassen, Modell-/LoRA-Namen, Titel-Slots)
+    if not args.no_preflight:
+        required_titles = ["MASTER_PROMPT"] if args.prompt else []
+        errors = comfy_preflight.Preflight(COMFY_BASE_URL).check(workflow_json, required_titles)
+        if errors:
+            comfy_preflight.report(errors, args.filename or fname)
+            sys.exit(1)
+
+    # 7. Absenden
     send_to_comfy(workflow_json)
 
 if __name__ == "__main__":
@@ -6,6 +6,8 @@ import subprocess
 import time
 import unicodedata
 
+import lora_catalog
+
 # Configuration
 ROOT_PATH = os.path.dirname(os.path.abspath(__file__))
 FILMSETS_PATH = os.path.join(ROOT_PATH, "filmsets")
@@ -183,23 +185,21 @@ def phase_for_chapter(phase_index, actor_name, chapter_num):
     return None
 
 
-def build_lora_index(roots):
+def build_lora_index(roots, base_model=None):
+    """LoRA entries from the safetensors header catalog; broken files and other base models are left out."""
+    catalog = lora_catalog.load_catalog(roots)
     index = []
-    for root in roots:
-        if not root or not os.path.exists(root):
+    for entry in catalog.entries:
+        reason = lora_catalog.check_lora(entry, base_model)
+        if reason:
+            print(f"[LoRA] skip {entry['rel']}: {reason}")
             continue
-        for dirpath, _, filenames in os.walk(root):
-            for name in filenames:
-                if not name.lower().endswith(".safetensors"):
-                    continue
-                full_path = os.path.join(dirpath, name)
-                rel = os.path.relpath(full_path, root).replace(os.sep, "/")
-                index.append({
-                    "root": root,
-                    "path": full_path,
-                    "rel": rel,
-                    "norm": normalize_key(rel),
-                })
+        index.append({
+            "root": entry["root"],
+            "path": entry["path"],
+            "rel": entry["rel"],
+            "norm": normalize_key(entry["rel"]),
+        })
     return index
 
 
@@ -496,6 +496,7 @@ def main():
     parser.add_argument("--dry-run", action="store_true", help="Only list what would be generated")
     parser.add_argument("--lora-root", action="append", help="Additional LoRA search root (repeatable)")
     parser.add_argument("--no-lora", action="store_true", help="Disable LoRA injection")
+    parser.add_argument("--lora-base-model", help="Skip LoRAs trained for another base model (e.g. flux, sdxl)")
     parser.add_argument("--image-workflow", default=WORKFLOW_IMAGE, help="Workflow for image prompts")
     parser.add_argument("--video-workflow", default=WORKFLOW_VIDEO, help="Workflow for video prompts")
     parser.add_argument("--timeline", help="Timeline tag (e.g. 1 or r01) appended to output filename")
@@ -506,7 +507,7 @@ def main():
     phase_aliases = load_phase_aliases()
     phase_index = load_phase_index()
     lora_roots = args.lora_root or LORA_DEFAULT_ROOTS
-    lora_index = [] if args.no_lora else build_lora_index(lora_roots)
+    lora_index = [] if args.no_lora else build_lora_index(lora_roots, args.lora_base_model)
 
     chapters = get_chapters(args.chapter)
     print(f"Scanning {len(chapters)} chapters...")
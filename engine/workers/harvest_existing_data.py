@@ -3,6 +3,8 @@ import json
 import os
 import re
 
+from json_blocks import extract_json, find_json_spans
+
 
 def parse_args():
     parser = argparse.ArgumentParser(
@@ -87,51 +89,13 @@ def extract_chapter_and_type(path):
     return int(match.group(1)), match.group(2)
 
 
-def find_balanced_json(text, start_idx):
-    depth = 0
-    in_string = False
-    escape = False
-    for i in range(start_idx, len(text)):
-        c = text[i]
-        if in_string:
-            if escape:
-                escape = False
-            elif c == "\\":
-                escape = True
-            elif c == "\"":
-                in_string = False
-            continue
-        if c == "\"":
-            in_string = True
-        elif c == "{":
-            depth += 1
-        elif c == "}":
-            depth -= 1
-            if depth == 0:
-                return i
-    return None
-
-
 def extract_json_block(text):
-    fenced = re.search(r"```json\s*({.*?})\s*```", text, re.DOTALL)
-    if fenced:
-        return fenced.group(1)
-    fenced = re.search(r"```\s*({.*?})\s*```", text, re.DOTALL)
+    fenced = [span for span in find_json_spans(text, fenced_only=True) if span["text"].startswith("{")]
     if fenced:
-        return fenced.group(1)
-
-    for i, ch in enumerate(text):
-        if ch != "{":
-            continue
-        end_idx = find_balanced_json(text, i)
-        if end_idx is None:
-            continue
-        candidate = text[i : end_idx + 1]
-        try:
-            json.loads(candidate)
-            return candidate
-        except json.JSONDecodeError:
-            continue
+        return min(fenced, key=lambda span: span["tag"] != "json")["text"]
+    for block in extract_json(text, repair=False):
+        if isinstance(block["value"], dict):
+            return block["text"]
     return None
 
 
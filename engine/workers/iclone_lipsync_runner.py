@@ -1,18 +1,103 @@
 import argparse
 import json
 import urllib.error
-import urllib.request
 
+from iclone_remote_client import print_progress, submit_job, wait_for_job
 
-def post_json(url: str, payload: dict):
-    data = json.dumps(payload).encode("utf-8")
-    req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
-    with urllib.request.urlopen(req, timeout=60) as resp:
-        return json.loads(resp.read().decode("utf-8"))
+# Per-scene keys in a --batch-file entry; missing ones fall back to the CLI values.
+SCENE_KEYS = (
+    "avatar",
+    "audio",
+    "output",
+    "start_seconds",
+    "end_seconds",
+    "clip_name",
+    "a2f_json",
+    "mapping_path",
+    "key_step",
+    "strength_scale",
+    "reduce_tolerance",
+    "clamp_min",
+    "clamp_max",
+    "use_mocap_order",
+)
 
 
-def send_action(url: str, action: str, payload: dict):
-    return post_json(url, {"action": action, "payload": payload})
+def scene_steps(scene: dict) -> list[dict]:
+    """select_avatar (optional) -> apply_a2f_json or load_vocal -> save_italk for one scene."""
+    steps = []
+    if scene.get("avatar"):
+        steps.append({"action": "select_avatar", "payload": {"name": scene["avatar"]}})
+    if scene.get("a2f_json"):
+        steps.append({
+            "action": "apply_a2f_json",
+            "payload": {
+                "avatar_name": scene.get("avatar"),
+                "path": scene["a2f_json"],
+                "mapping_path": scene.get("mapping_path"),
+                "key_step": scene.get("key_step"),
+                "strength_scale": scene.get("strength_scale"),
+                "reduce_tolerance": scene.get("reduce_tolerance"),
+                "clamp_min": scene.get("clamp_min"),
+                "clamp_max": scene.get("clamp_max"),
+                "start_seconds": scene.get("start_seconds"),
+                "clip_name": scene.get("clip_name"),
+                "use_mocap_order": scene.get("use_mocap_order"),
+            },
+        })
+    else:
+        steps.append({
+            "action": "load_vocal",
+            "payload": {
+                "avatar_name": scene.get("avatar"),
+                "audio_path": scene["audio"],
+                "start_seconds": scene.get("start_seconds"),
+                "clip_name": scene.get("clip_name"),
+            },
+        })
+    steps.append({
+        "action": "save_italk",
+        "payload": {
+            "avatar_name": scene.get("avatar"),
+            "output_path": scene["output"],
+            "start_seconds": scene.get("start_seconds"),
+            "end_seconds": scene.get("end_seconds"),
+        },
+    })
+    return steps
+
+
+def load_scenes(path: str) -> list[dict]:
+    """Scenes from a JSON list (or {"scenes": [...]}) or a JSONL file."""
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    if isinstance(data, dict):
+        data = data.get("scenes") or []
+    return list(data)
+
+
+def scene_results(scenes: list[dict], step_counts: list[int], job: dict) -> list[dict]:
+    """Split the batch's step results back into one summary per scene."""
+    results = job.get("results") or []
+    summaries = []
+    offset = 0
+    for scene, count in zip(scenes, step_counts):
+        steps = results[offset:offset + count]
+        offset += count
+        ok = len(steps) == count and all(step["result"].get("ok") for step in steps)
+        errors = [step["result"].get("error") for step in steps if not step["result"].get("ok")]
+        # The first error is the cause; later steps of the scene were skipped.
+        summaries.append({
+            "ok": ok,
+            "output": scene.get("output"),
+            "error": errors[0] if errors else (None if ok else "Not run."),
+            "steps": steps,
+        })
+    return summaries
 
 
 def main():
@@ -20,8 +105,8 @@ def main():
     parser.add_argument("--host", default="127.0.0.1", help="iClone remote host.")
     parser.add_argument("--port", type=int, default=8123, help="iClone remote port.")
     parser.add_argument("--avatar", help="Avatar name (optional).")
-    parser.add_argument("--audio", required=True, help="Audio file for lip sync.")
-    parser.add_argument("--output", required=True, help="Output iTalk file path.")
+    parser.add_argument("--audio", help="Audio file for lip sync.")
+    parser.add_argument("--output", help="Output iTalk file path.")
     parser.add_argument("--start-seconds", type=float, help="Clip start time in seconds.")
     parser.add_argument("--end-seconds", type=float, help="Clip end time in seconds.")
     parser.add_argument("--clip-name", help="Clip name for LoadVocal.")
@@ -29,64 +114,74 @@ def main():
     parser.add_argument("--mapping-path", help="Optional A2F mapping JSON path.")
     parser.add_argument("--key-step", type=int, default=1, help="Frame step for A2F JSON sampling.")
     parser.add_argument("--strength-scale", type=float, default=1.0, help="Scale for A2F weights.")
+    parser.add_argument(
+        "--reduce-tolerance",
+        type=float,
+        default=None,
+        help="Drop A2F frames that linear interpolation reproduces within this weight deviation (e.g. 0.01).",
+    )
+    parser.add_argument("--clamp-min", type=float, default=None, help="Clamp scaled A2F weights from below.")
+    parser.add_argument("--clamp-max", type=float, default=None, help="Clamp scaled A2F weights from above.")
     parser.add_argument("--use-mocap-order", action="store_true", help="Use mocap-ordered expression names.")
+    parser.add_argument(
+        "--batch-file",
+        help="JSON/JSONL list of scenes (audio, output, avatar, a2f_json, ...) run as one queued batch; CLI values are defaults.",
+    )
+    parser.add_argument("--label", help="Batch label shown in job status (e.g. chapter_001).")
+    parser.add_argument("--stop-on-error", action="store_true", help="Stop the batch at the first failed step.")
+    parser.add_argument("--timeout", type=float, default=None, help="Max seconds to wait for the batch.")
     args = parser.parse_args()
 
     url = f"http://{args.host}:{args.port}"
 
-    if args.avatar:
-        response = send_action(url, "select_avatar", {"name": args.avatar})
-        if not response.get("ok"):
-            raise SystemExit(f"Failed to select avatar: {response}")
-
-    if args.a2f_json:
-        response = send_action(
-            url,
-            "apply_a2f_json",
-            {
-                "avatar_name": args.avatar,
-                "path": args.a2f_json,
-                "mapping_path": args.mapping_path,
-                "key_step": args.key_step,
-                "strength_scale": args.strength_scale,
-                "start_seconds": args.start_seconds,
-                "clip_name": args.clip_name,
-                "use_mocap_order": args.use_mocap_order,
-            },
-        )
+    defaults = {key: getattr(args, key) for key in SCENE_KEYS if key not in ("audio", "output")}
+    if args.batch_file:
+        scenes = [{**defaults, **{k: v for k, v in scene.items() if v is not None}} for scene in load_scenes(args.batch_file)]
+    elif args.audio and args.output:
+        scenes = [{**defaults, "audio": args.audio, "output": args.output}]
     else:
-        response = send_action(
-            url,
-            "load_vocal",
-            {
-                "avatar_name": args.avatar,
-                "audio_path": args.audio,
-                "start_seconds": args.start_seconds,
-                "clip_name": args.clip_name,
-            },
-        )
-
-    if not response.get("ok"):
-        raise SystemExit(f"Lip sync failed: {response}")
+        parser.error("--audio and --output are required without --batch-file.")
+    for idx, scene in enumerate(scenes):
+        if not scene.get("output") or not (scene.get("audio") or scene.get("a2f_json")):
+            raise SystemExit(f"Scene {idx}: needs output and audio (or a2f_json).")
 
-    response = send_action(
+    # All scenes go to the server as one queued batch: it runs step by step on iClone's main thread
+    # while we long-poll, so long clips no longer hit HTTP timeouts.
+    steps_per_scene = [scene_steps(scene) for scene in scenes]
+    ticket = submit_job(
         url,
-        "save_italk",
+        "batch",
         {
-            "avatar_name": args.avatar,
-            "output_path": args.output,
-            "start_seconds": args.start_seconds,
-            "end_seconds": args.end_seconds,
+            "label": args.label,
+            "stop_on_error": args.stop_on_error or len(scenes) == 1,
+            "steps": [
+                {**step, "group": idx} for idx, steps in enumerate(steps_per_scene) for step in steps
+            ],
         },
     )
-    if not response.get("ok"):
-        raise SystemExit(f"iTalk export failed: {response}")
+    if not ticket.get("ok"):
+        raise SystemExit(f"Batch submit failed: {ticket}")
+    job = wait_for_job(url, ticket["job_id"], timeout=args.timeout, on_update=print_progress)
+    summaries = scene_results(scenes, [len(steps) for steps in steps_per_scene], job)
 
-    print(json.dumps(response, indent=2, ensure_ascii=False))
+    if len(scenes) == 1:
+        summary = summaries[0]
+        if not summary["ok"]:
+            raise SystemExit(f"Lip sync failed: {summary}")
+        print(json.dumps(summary["steps"][-1]["result"], indent=2, ensure_ascii=False))
+        return
 
+    failed = [summary for summary in summaries if not summary["ok"]]
+    for summary in summaries:
+        print(f"{'ok  ' if summary['ok'] else 'FAIL'} {summary['output']}" + (f" ({summary['error']})" if summary["error"] else ""))
+    print(f"Scenes: {len(summaries) - len(failed)}/{len(summaries)} ok (job {job['job_id']}, {job['status']})")
+    if failed:
+        raise SystemExit(1)
 
 if __name__ == "__main__":
     try:
         main()
     except urllib.error.URLError as exc:
         raise SystemExit(f"Failed to reach iClone remote server: {exc}") from exc
+    except TimeoutError as exc:
+        raise SystemExit(str(exc)) from exc
@@ -1,14 +1,62 @@
 import argparse
 import json
+import time
 import urllib.error
 import urllib.request
 
+# Server-side long-poll per status request; the HTTP timeout adds slack on top.
+POLL_WAIT_SECONDS = 25.0
 
-def post_json(url: str, payload: dict):
+
+def post_json(url: str, payload: dict, timeout: float = 30):
     data = json.dumps(payload).encode("utf-8")
     req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
-    with urllib.request.urlopen(req, timeout=30) as resp:
-        return json.loads(resp.read().decode("utf-8"))
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return json.loads(resp.read().decode("utf-8"))
+    except urllib.error.HTTPError as exc:
+        # Job tickets (202) and action errors (4xx) carry JSON bodies too.
+        body = exc.read().decode("utf-8")
+        try:
+            return json.loads(body)
+        except json.JSONDecodeError:
+            raise exc from None
+
+
+def submit_job(url: str, action: str, payload: dict) -> dict:
+    """Queue an action (or a `batch`) on the server and return its ticket (job_id, position)."""
+    body = {"action": action, "payload": payload, "async": True}
+    return post_json(url, body)
+
+
+def wait_for_job(url: str, job_id: str, timeout: float | None = None, on_update=None) -> dict:
+    """Long-poll `job_status` until the job finished; returns the final job snapshot."""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    version = -1
+    while True:
+        wait = POLL_WAIT_SECONDS
+        if deadline is not None:
+            wait = max(0.0, min(wait, deadline - time.monotonic()))
+        response = post_json(
+            url,
+            {"action": "job_status", "payload": {"job_id": job_id, "wait_seconds": wait, "since_version": version}},
+            timeout=wait + 30,
+        )
+        if not response.get("ok"):
+            raise RuntimeError(f"Job status failed: {response}")
+        job = response["job"]
+        if job["version"] != version and on_update:
+            on_update(job)
+        version = job["version"]
+        if job["status"] in ("done", "failed", "cancelled"):
+            return job
+        if deadline is not None and time.monotonic() >= deadline:
+            raise TimeoutError(f"Job {job_id} still {job['status']} after {timeout} s.")
+
+
+def print_progress(job: dict) -> None:
+    label = f" {job['label']}" if job.get("label") else ""
+    print(f"[{job['job_id']}{label}] {job['status']} {job['steps_done']}/{job['steps_total']}", flush=True)
 
 
 def main():
@@ -18,6 +66,9 @@ def main():
     parser.add_argument("--action", required=True, help="Action to send.")
     parser.add_argument("--payload", help="JSON payload string.")
     parser.add_argument("--payload-file", help="Path to JSON payload file.")
+    parser.add_argument("--async", dest="run_async", action="store_true", help="Queue the action and print its job id.")
+    parser.add_argument("--wait", action="store_true", help="Poll until the job finished (async, batch, or a request that timed out).")
+    parser.add_argument("--timeout", type=float, default=None, help="Max seconds to wait for a queued job.")
     args = parser.parse_args()
 
     payload = {}
@@ -28,11 +79,20 @@ def main():
         payload = json.loads(args.payload)
 
     url = f"http://{args.host}:{args.port}"
-    body = {"action": args.action, "payload": payload}
     try:
-        response = post_json(url, body)
+        if args.run_async or args.action == "batch":
+            response = submit_job(url, args.action, payload)
+            if args.wait and response.get("ok"):
+                response = wait_for_job(url, response["job_id"], timeout=args.timeout, on_update=print_progress)
+        else:
+            response = post_json(url, {"action": args.action, "payload": payload})
+            # The server answers with a job ticket when the job did not finish within its request timeout.
+            if args.wait and response.get("job_id") and "steps_total" in response:
+                response = wait_for_job(url, response["job_id"], timeout=args.timeout, on_update=print_progress)
     except urllib.error.URLError as exc:
         raise SystemExit(f"Failed to reach iClone remote server: {exc}") from exc
+    except TimeoutError as exc:
+        raise SystemExit(str(exc)) from exc
 
     print(json.dumps(response, indent=2, ensure_ascii=False))
 
@@ -0,0 +1,291 @@
+import json
+import re
+
+FENCE = "```"
+FENCE_TAG_RE = re.compile(r"[A-Za-z0-9_+\-]*")
+# Outside a span only openers matter; inside, the next bracket is found past any string literals
+# in one regex call. Both are "unrolled loops": every repetition starts with a character the
+# previous run cannot match, so a failed match backtracks linearly.
+OPENER_RE = re.compile(r"[{\[]")
+STRING_BODY = r'"[^"\\]*(?:\\.[^"\\]*)*"'
+NEXT_BRACKET_RE = re.compile(r'[^"{}\[\]]*(?:' + STRING_BODY + r'[^"{}\[\]]*)*([{}\[\]])', re.DOTALL)
+STRINGS_RE = re.compile(r'[^"]*(?:' + STRING_BODY + r'[^"]*)*', re.DOTALL)
+SMART_QUOTE_RE = re.compile("[\u201c\u201d\u201e\u2018\u2019\ufeff]")
+BRACKET_PAIRS = {"{": "}", "[": "]"}
+TRUNCATION_RETRIES = 3
+SMART_QUOTES = str.maketrans({
+    "\u201c": '"',
+    "\u201d": '"',
+    "\u201e": '"',
+    "\u2018": "'",
+    "\u2019": "'",
+    "\ufeff": None,
+})
+
+
+def iter_fences(text: str):
+    """Yield (tag, content_start, content_end) for each ``` fence; an unclosed fence runs to the end."""
+    text = text or ""
+    pos = 0
+    while True:
+        open_idx = text.find(FENCE, pos)
+        if open_idx == -1:
+            return
+        tag_match = FENCE_TAG_RE.match(text, open_idx + len(FENCE))
+        content_start = tag_match.end()
+        close_idx = text.find(FENCE, content_start)
+        if close_idx == -1:
+            yield tag_match.group().lower(), content_start, len(text)
+            return
+        yield tag_match.group().lower(), content_start, close_idx
+        pos = close_idx + len(FENCE)
+
+
+def iter_regions(text: str, start: int = 0, fenced_only: bool = False):
+    """Split text into (start, end, tag) regions; tag is None outside fences."""
+    pos = start
+    for tag, content_start, content_end in iter_fences(text):
+        if content_end <= start:
+            continue
+        fence_start = content_start - len(tag) - len(FENCE)
+        if not fenced_only and fence_start > pos:
+            yield pos, fence_start, None
+        yield max(content_start, start), content_end, tag
+        pos = content_end + len(FENCE)
+    if not fenced_only and pos < len(text):
+        yield pos, len(text), None
+
+
+def scan_pairs(text: str, start: int = 0, end: int | None = None, limit: int | None = None) -> list[list]:
+    """Match brackets in one pass, skipping string contents.
+
+    Returns [open, close_end, depth, complete] in document order (parents before children).
+    A closer of the wrong kind still closes the innermost opener, which is what LLM typos
+    like `{"a": [1, 2}` need; unclosed openers run to `end` with complete=False.
+    `limit` stops after that many top-level spans.
+    """
+    end = len(text) if end is None else end
+    pairs = []
+    stack = []
+    top_level = 0
+    pos = start
+    while pos < end:
+        if not stack:
+            if limit and top_level >= limit:
+                break
+            match = OPENER_RE.search(text, pos, end)
+            if not match:
+                break
+            top_level += 1
+            stack.append(len(pairs))
+            pairs.append([match.start(), end, 0, False])
+            pos = match.end()
+            continue
+        match = NEXT_BRACKET_RE.match(text, pos, end)
+        if not match:
+            # Only an unterminated string remains; the open spans run to `end`.
+            break
+        ch = match.group(1)
+        pos = match.end()
+        if ch in BRACKET_PAIRS:
+            stack.append(len(pairs))
+            pairs.append([match.start(1), end, len(stack) - 1, False])
+        else:
+            pair = pairs[stack.pop()]
+            pair[1] = pos
+            pair[3] = True
+    return pairs
+
+
+def find_json_spans(
+    text: str,
+    start: int = 0,
+    fenced_only: bool = False,
+    limit: int | None = None,
+) -> list[dict]:
+    """Return top-level bracket spans with offsets, without parsing them."""
+    spans = []
+    if not text:
+        return spans
+    for region_start, region_end, tag in iter_regions(text, start=start, fenced_only=fenced_only):
+        for span_start, span_end, depth, complete in scan_pairs(text, region_start, region_end):
+            if depth:
+                continue
+            spans.append({
+                "start": span_start,
+                "end": span_end,
+                "text": text[span_start:span_end],
+                "fenced": tag is not None,
+                "tag": tag,
+                "complete": complete,
+            })
+            if limit and len(spans) >= limit:
+                return spans
+    return spans
+
+
+def repair_json_text(text: str) -> tuple[str, list]:
+    """Fix common LLM defects: BOM, smart quotes, trailing commas, wrong or missing closers.
+
+    Returns (cleaned, bracket_changes) where each change is {"pos", "from", "to"}; closers
+    appended to truncated output are reported with an empty "from".
+    """
+    cleaned = text.strip()
+    if SMART_QUOTE_RE.search(cleaned):
+        cleaned = cleaned.translate(SMART_QUOTES)
+    pieces = []
+    stack = []
+    changes = []
+    pos = 0
+    while True:
+        match = NEXT_BRACKET_RE.match(cleaned, pos)
+        if not match:
+            break
+        ch = match.group(1)
+        piece = cleaned[pos:match.start(1)]
+        pos = match.end()
+        if ch in BRACKET_PAIRS:
+            stack.append(ch)
+            pieces.extend((piece, ch))
+            continue
+        if not stack:
+            # Stray closer with nothing open: drop it.
+            pieces.append(piece)
+            continue
+        expected = BRACKET_PAIRS[stack.pop()]
+        if ch != expected:
+            changes.append({"pos": match.start(1), "from": ch, "to": expected})
+        pieces.extend((_drop_trailing_comma(piece), expected))
+    tail = cleaned[pos:]
+    if stack:
+        complete = STRINGS_RE.match(tail).end()
+        if complete < len(tail):
+            unterminated = tail[complete:]
+            if (len(unterminated) - len(unterminated.rstrip("\\"))) % 2:
+                unterminated = unterminated[:-1]
+            tail = tail[:complete] + unterminated + '"'
+        tail = _drop_trailing_comma(tail)
+    pieces.append(tail)
+    while stack:
+        closer = BRACKET_PAIRS[stack.pop()]
+        changes.append({"pos": len(cleaned), "from": "", "to": closer})
+        pieces.append(closer)
+    return "".join(pieces), changes
+
+
+def _drop_trailing_comma(piece: str) -> str:
+    stripped = piece.rstrip()
+    return stripped[:-1] if stripped.endswith(",") else piece
+
+
+def parse_json_text(text: str, repair: bool = True):
+    """Parse text, falling back to repair_json_text. Returns (value, changes or None if unrepaired).
+
+    Raises json.JSONDecodeError when the text cannot be recovered.
+    """
+    try:
+        return json.loads(text), None
+    except json.JSONDecodeError:
+        if not repair:
+            raise
+    repaired, changes = repair_json_text(text)
+    return json.loads(repaired), changes
+
+
+def parse_truncated_json(text: str, retries: int = TRUNCATION_RETRIES):
+    """Close a cut-off response; if the last member is itself incomplete, drop it and retry."""
+    candidate = text
+    while True:
+        repaired, changes = repair_json_text(candidate)
+        try:
+            return json.loads(repaired), changes
+        except json.JSONDecodeError:
+            cut = candidate.rfind(",")
+            if retries <= 0 or cut <= 0:
+                raise
+            retries -= 1
+            candidate = candidate[:cut]
+
+
+def extract_json(
+    text: str,
+    repair: bool = True,
+    fenced_only: bool = False,
+    prefer_fenced: bool = True,
+) -> list[dict]:
+    """Extract parsed JSON values from LLM output in document order.
+
+    Each block is {"value", "start", "end", "text", "fenced", "tag", "repaired", "repairs"}.
+    Fenced blocks win when any parse (unless prefer_fenced=False). Unfenced spans that fail
+    to parse are descended into, so a stray "[" in prose cannot hide the JSON behind it.
+    """
+    fenced_blocks = []
+    loose_blocks = []
+    if not text:
+        return fenced_blocks
+    for region_start, region_end, tag in iter_regions(text, fenced_only=fenced_only):
+        target = loose_blocks if tag is None else fenced_blocks
+        block = _parse_whole_region(text, region_start, region_end, tag)
+        if block:
+            # Well-formed regions (the common case) never reach the Python-level scan.
+            target.append(block)
+            continue
+        accepted_end = -1
+        truncated_tried = False
+        for span_start, span_end, depth, complete in scan_pairs(text, region_start, region_end):
+            if span_start < accepted_end or (depth and tag is not None):
+                continue
+            raw = text[span_start:span_end]
+            try:
+                if complete:
+                    value, changes = parse_json_text(raw, repair=repair)
+                elif repair and not truncated_tried:
+                    # Nested unclosed spans share the same cut-off tail; repairing each would be quadratic.
+                    truncated_tried = True
+                    value, changes = parse_truncated_json(raw)
+                else:
+                    continue
+            except json.JSONDecodeError:
+                continue
+            target.append(_block(value, span_start, span_end, raw, tag, changes))
+            accepted_end = span_end
+    if fenced_blocks and prefer_fenced:
+        return fenced_blocks
+    return sorted(fenced_blocks + loose_blocks, key=lambda block: block["start"])
+
+
+def _block(value, start: int, end: int, raw: str, tag: str | None, changes: list | None) -> dict:
+    return {
+        "value": value,
+        "start": start,
+        "end": end,
+        "text": raw,
+        "fenced": tag is not None,
+        "tag": tag,
+        "repaired": changes is not None,
+        "repairs": changes or [],
+    }
+
+
+def _parse_whole_region(text: str, start: int, end: int, tag: str | None) -> dict | None:
+    region = text[start:end]
+    body = region.strip()
+    if body[:1] not in ("{", "["):
+        return None
+    try:
+        value = json.loads(body)
+    except json.JSONDecodeError:
+        return None
+    body_start = start + len(region) - len(region.lstrip())
+    return _block(value, body_start, body_start + len(body), body, tag, None)
+
+
+def extract_json_values(text: str, repair: bool = True) -> list:
+    return [block["value"] for block in extract_json(text, repair=repair)]
+
+
+def first_json_value(text: str, repair: bool = True, types: tuple = (dict,)):
+    for block in extract_json(text, repair=repair):
+        if isinstance(block["value"], types):
+            return block["value"]
+    return None
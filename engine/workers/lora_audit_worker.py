@@ -4,6 +4,9 @@ import os
 import unicodedata
 import time
 
+from fs_snapshot import FsSnapshot
+from substring_index import SubstringIndex
+
 ROOT_PATH = os.path.dirname(os.path.abspath(__file__))
 DEFAULT_CONFIG = os.path.join(ROOT_PATH, "lora_audit_config.json")
 LORA_SET_PATH = os.path.join(ROOT_PATH, "LORA_TRAINING_SET.json")
@@ -56,11 +59,12 @@ def ascii_label(value):
     return unicodedata.normalize("NFKD", str(value or "")).encode("ascii", "ignore").decode("ascii")
 
 
-def count_images(folder, exts):
-    if not os.path.isdir(folder):
+def count_images(folder, exts, fs=None):
+    fs = fs or FsSnapshot()
+    if not fs.isdir(folder):
         return 0
     count = 0
-    for name in os.listdir(folder):
+    for name in fs.listdir(folder):
         if os.path.splitext(name)[1].lower() in exts:
             count += 1
     return count
@@ -82,24 +86,36 @@ def load_queue_index(queue_data):
     return index
 
 
-def find_lora_matches(lora_root, actor_name, phase_name):
-    matches = []
-    if not os.path.isdir(lora_root):
-        return matches
-    actor_key = normalize_key(actor_name)
-    phase_key = normalize_key(phase_name)
-    for name in os.listdir(lora_root):
-        if not name.lower().endswith(".safetensors"):
-            continue
-        norm = normalize_key(name)
-        if actor_key and actor_key in norm and (not phase_key or phase_key in norm):
-            matches.append(os.path.join(lora_root, name))
-    return sorted(matches)
+def build_lora_index(lora_root, fs=None):
+    fs = fs or FsSnapshot()
+    index = SubstringIndex()
+    if not fs.isdir(lora_root):
+        return index
+    for name in fs.listdir(lora_root):
+        if name.lower().endswith(".safetensors"):
+            index.add(normalize_key(name), os.path.join(lora_root, name))
+    return index
 
 
-def build_audit(config, lora_set, lora_queue):
+def find_lora_matches(lora_root, actor_name, phase_name, lora_index=None, fs=None):
+    actor_key = normalize_key(actor_name)
+    phase_key = normalize_key(phase_name)
+    if not actor_key:
+        return []
+    if lora_index is None:
+        lora_index = build_lora_index(lora_root, fs)
+    key_ids = lora_index.containing(actor_key)
+    if phase_key:
+        key_ids = sorted(set(key_ids) & set(lora_index.containing(phase_key)))
+    return sorted(lora_index.payloads(key_ids))
+
+
+def build_audit(config, lora_set, lora_queue, fs=None):
+    fs = fs or FsSnapshot()
     actors = lora_set.get("actors", {}) if isinstance(lora_set, dict) else {}
     queue_index = load_queue_index(lora_queue)
+    lora_root = os.path.join(ROOT_PATH, config["lora_root"])
+    lora_index = build_lora_index(lora_root, fs)
     results = []
     for actor_name, info in actors.items():
         phases = info.get("phases", []) if isinstance(info, dict) else []
@@ -109,11 +125,11 @@ def build_audit(config, lora_set, lora_queue):
             phase_slug = slugify(phase_name)
             image_dir = os.path.join(ROOT_PATH, config["actor_image_root"], actor_slug, phase_slug)
             training_dir = os.path.join(ROOT_PATH, config["training_data_root"], actor_slug, phase_slug)
-            image_count = count_images(image_dir, config["image_exts"])
+            image_count = count_images(image_dir, config["image_exts"], fs)
             expected_images = queue_index.get((normalize_key(actor_name), normalize_key(phase_name)), 0)
             if expected_images <= 0:
                 expected_images = config["min_images_per_phase"]
-            lora_matches = find_lora_matches(os.path.join(ROOT_PATH, config["lora_root"]), actor_name, phase_name)
+            lora_matches = find_lora_matches(lora_root, actor_name, phase_name, lora_index=lora_index)
 
             image_status = "ok" if image_count >= expected_images else "missing"
             lora_status = "ok" if lora_matches else "missing"
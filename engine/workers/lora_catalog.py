@@ -0,0 +1,368 @@
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from filmsets_catalog import load_catalog as load_dir_catalog
+
+# LoRA catalog built from safetensors headers: each file's JSON header is read through mmap (tensor data is never
+# touched) for base model, rank, trigger words and training metadata. Entries are cached by (path, size, mtime) in
+# one JSON file, directories are listed through the incremental scandir manifest of filmsets_catalog, so re-runs
+# only parse new or changed files. LoraCatalog resolves names/paths with dict lookups and rejects broken or
+# incompatible files before a GPU job is queued.
+
+ROOT_PATH = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_ROOTS = [
+    os.path.join(ROOT_PATH, "produced_assets", "lora_training", "loras"),
+    os.path.join(ROOT_PATH, "produced_assets", "lora_training", "actors"),
+]
+DEFAULT_CATALOG = os.path.join(ROOT_PATH, "data", "cache", "lora_catalog.json")
+CATALOG_VERSION = 1
+DEFAULT_WORKERS = min(8, (os.cpu_count() or 1) * 2)
+MAX_HEADER_BYTES = 100 * 1024 * 1024
+MAX_TRIGGER_WORDS = 10
+
+# Checked in order against metadata strings (lowercased); first hit wins.
+BASE_MODEL_HINTS = (
+    ("flux", "flux"),
+    ("qwen", "qwen_image"),
+    ("wan", "wan"),
+    ("sd3", "sd3"),
+    ("sdxl", "sdxl"),
+    ("-xl-", "sdxl"),
+    ("pony", "sdxl"),
+    ("v2", "sd2"),
+    ("sd_v1", "sd1"),
+    ("v1", "sd1"),
+)
+BASE_MODEL_KEYS = ("ss_base_model_version", "modelspec.architecture", "base_model", "ss_sd_model_name")
+TRIGGER_KEYS = ("modelspec.trigger_phrase", "trigger_words", "ss_trigger_words", "activation_text")
+TRAINING_KEYS = (
+    "ss_output_name",
+    "ss_network_module",
+    "ss_network_alpha",
+    "ss_num_train_images",
+    "ss_max_train_steps",
+    "ss_epoch",
+    "ss_learning_rate",
+    "ss_resolution",
+    "ss_seed",
+    "ss_sd_model_name",
+    "ss_training_started_at",
+    "ss_training_finished_at",
+    "modelspec.title",
+    "modelspec.date",
+)
+
+
+def read_safetensors_header(path: str) -> dict:
+    """Parse the JSON header of a .safetensors file via mmap; raises ValueError for a malformed file.
+
+    Tensor offsets are checked against the file size, so truncated downloads are caught without reading the data.
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < 8:
+            raise ValueError("file too small")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            (length,) = struct.unpack("<Q", mm[:8])
+            if length > MAX_HEADER_BYTES or 8 + length > size:
+                raise ValueError(f"header length {length} out of range")
+            try:
+                header = json.loads(mm[8:8 + length].decode("utf-8"))
+            except (UnicodeDecodeError, json.JSONDecodeError) as exc:
+                raise ValueError(f"header is not JSON: {exc}") from None
+    if not isinstance(header, dict):
+        raise ValueError("header is not an object")
+    data_size = size - 8 - length
+    data_end = 0
+    for name, info in header.items():
+        if name == "__metadata__":
+            continue
+        offsets = info.get("data_offsets") if isinstance(info, dict) else None
+        if not offsets or len(offsets) != 2 or not 0 <= offsets[0] <= offsets[1]:
+            raise ValueError(f"bad data_offsets for {name}")
+        data_end = max(data_end, offsets[1])
+    if data_end != data_size:
+        raise ValueError(f"tensor data ends at {data_end}, file has {data_size} bytes (truncated?)")
+    return header
+
+
+def normalize_base_model(value) -> str | None:
+    text = str(value or "").lower()
+    for hint, family in BASE_MODEL_HINTS:
+        if hint in text:
+            return family
+    return None
+
+
+def guess_architecture(tensor_names: list[str]) -> str | None:
+    """Base model family from LoRA key names (used when the metadata doesn't say)."""
+    joined = "\n".join(tensor_names[:2000])
+    if "double_blocks" in joined or "single_blocks" in joined or "single_transformer_blocks" in joined:
+        return "flux"
+    if "transformer_blocks" in joined and ("img_mlp" in joined or "img_mod" in joined or "txt_mlp" in joined):
+        return "qwen_image"
+    if "cross_attn" in joined and "self_attn" in joined and "ffn" in joined:
+        return "wan"
+    if "lora_te2_" in joined or "lora_te1_" in joined or "text_encoder_2" in joined:
+        return "sdxl"
+    if "lora_unet_" in joined or "lora_te_" in joined:
+        return "sd1"
+    return None
+
+
+def parse_trigger_words(metadata: dict) -> list[str]:
+    for key in TRIGGER_KEYS:
+        value = metadata.get(key)
+        if value:
+            words = [word.strip() for word in str(value).split(",") if word.strip()]
+            return words[:MAX_TRIGGER_WORDS]
+    # kohya-ss: {"dataset_dir": {"tag": count}} -> most frequent tags.
+    try:
+        frequency = json.loads(metadata.get("ss_tag_frequency") or "{}")
+    except json.JSONDecodeError:
+        return []
+    counts = {}
+    for tags in frequency.values() if isinstance(frequency, dict) else []:
+        if isinstance(tags, dict):
+            for tag, count in tags.items():
+                tag = tag.strip()
+                if tag and isinstance(count, int):
+                    counts[tag] = counts.get(tag, 0) + count
+    return [tag for tag, _ in sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:MAX_TRIGGER_WORDS]]
+
+
+def parse_rank(metadata: dict, header: dict) -> int | None:
+    try:
+        return int(metadata["ss_network_dim"])
+    except (KeyError, TypeError, ValueError):
+        pass
+    for name, info in header.items():
+        if name.endswith(("lora_down.weight", "lora_A.weight", "lora.down.weight")) and isinstance(info, dict):
+            shape = info.get("shape") or []
+            if shape:
+                return int(shape[0])
+    return None
+
+
+def describe_header(header: dict) -> dict:
+    metadata = header.get("__metadata__") or {}
+    if not isinstance(metadata, dict):
+        metadata = {}
+    tensor_names = [name for name in header if name != "__metadata__"]
+    base_model = None
+    for key in BASE_MODEL_KEYS:
+        base_model = normalize_base_model(metadata.get(key))
+        if base_model:
+            break
+    return {
+        "base_model": base_model or guess_architecture(tensor_names),
+        "rank": parse_rank(metadata, header),
+        "trigger_words": parse_trigger_words(metadata),
+        "tensor_count": len(tensor_names),
+        "dtypes": sorted({info.get("dtype") for name, info in header.items() if name != "__metadata__" and isinstance(info, dict)} - {None}),
+        "training": {key: metadata[key] for key in TRAINING_KEYS if metadata.get(key)},
+    }
+
+
+def inspect_file(path: str, size: int, mtime: float) -> dict:
+    entry = {
+        "path": path,
+        "name": os.path.splitext(os.path.basename(path))[0],
+        "size": size,
+        "mtime": mtime,
+        "valid": True,
+        "error": None,
+        "base_model": None,
+        "rank": None,
+        "trigger_words": [],
+        "tensor_count": 0,
+        "dtypes": [],
+        "training": {},
+    }
+    try:
+        entry.update(describe_header(read_safetensors_header(path)))
+    except (OSError, ValueError) as exc:
+        entry.update({"valid": False, "error": str(exc)})
+    return entry
+
+
+def normalize_name(value: str) -> str:
+    return "".join(ch for ch in str(value or "").lower() if ch.isalnum())
+
+
+def manifest_path_for(catalog_path: str, root: str) -> Path:
+    digest = hashlib.sha256(os.path.normcase(root).encode("utf-8")).hexdigest()[:12]
+    return Path(catalog_path).with_name(f".lora_manifest_{digest}.json")
+
+
+class LoraCatalog:
+    """Catalog entries with dict lookups by path, root-relative path and normalized file name."""
+
+    def __init__(self, entries: list[dict]):
+        self.entries = entries
+        self.by_path = {}
+        self.by_rel = {}
+        self.by_name = {}
+        for entry in entries:
+            self.by_path[os.path.normcase(entry["path"])] = entry
+            self.by_rel.setdefault(entry["rel"].lower(), entry)
+            self.by_name.setdefault(normalize_name(entry["name"]), []).append(entry)
+
+    def resolve(self, ref: str) -> dict | None:
+        """Entry for an absolute path, a root-relative path ('actor/a__b.safetensors') or a bare file name."""
+        if not ref:
+            return None
+        entry = self.by_path.get(os.path.normcase(os.path.abspath(ref))) if os.path.isabs(ref) else None
+        if entry:
+            return entry
+        entry = self.by_rel.get(ref.replace("\\", "/").lower())
+        if entry:
+            return entry
+        stem = ref.replace("\\", "/").rsplit("/", 1)[-1]
+        if stem.lower().endswith(".safetensors"):
+            stem = stem[: -len(".safetensors")]
+        matches = self.by_name.get(normalize_name(stem)) or []
+        return matches[0] if matches else None
+
+    def usable(self, base_model: str | None = None) -> list[dict]:
+        return [entry for entry in self.entries if check_lora(entry, base_model) is None]
+
+
+def check_lora(entry: dict | None, base_model: str | None = None) -> str | None:
+    """Reason a LoRA can't be used (missing, broken, other base model), or None when it is fine.
+
+    LoRAs whose base model is unknown pass.
+    """
+    if entry is None:
+        return "not in catalog"
+    if not entry.get("valid"):
+        return f"invalid safetensors ({entry.get('error')})"
+    wanted = normalize_base_model(base_model) or base_model
+    if wanted and entry.get("base_model") and entry["base_model"] != wanted:
+        return f"base model {entry['base_model']}, expected {wanted}"
+    return None
+
+
+def load_json(path: str) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def write_catalog(path: str, items: list[dict]) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    payload = {
+        "version": CATALOG_VERSION,
+        "generated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "items": items,
+    }
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+
+def load_catalog(
+    roots: list[str] | None = None,
+    catalog_path: str = DEFAULT_CATALOG,
+    workers: int = DEFAULT_WORKERS,
+    stats: dict | None = None,
+) -> LoraCatalog:
+    """Refresh and return the catalog for `roots`; only new or changed files (size/mtime) are parsed.
+
+    The cache file is keyed by file path and shared by all callers, whatever roots they ask for.
+    """
+    # Same spelling as the filmsets catalog paths (Path.resolve).
+    roots = [os.path.realpath(root) for root in (roots or DEFAULT_ROOTS)]
+    cached = load_json(catalog_path)
+    items = {}
+    if cached.get("version") == CATALOG_VERSION:
+        items = {item["path"]: item for item in cached.get("items") or []}
+
+    found = []
+    pending = {}
+    for root in roots:
+        if not os.path.isdir(root):
+            continue
+        # verify_files: a retrained LoRA copied over the old file leaves the directory mtime unchanged.
+        listing = load_dir_catalog(
+            Path(root),
+            cache_path=manifest_path_for(catalog_path, root),
+            verify_files=True,
+            use_memo=False,
+            workers=workers,
+        )
+        for item in listing:
+            if not item["name"].lower().endswith(".safetensors"):
+                continue
+            found.append((item["path"], root, item["rel_path"]))
+            known = items.get(item["path"])
+            if not known or known.get("size") != item["size"] or known.get("mtime") != item["mtime"]:
+                pending[item["path"]] = (item["path"], item["size"], item["mtime"])
+
+    if pending:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            for entry in pool.map(lambda args: inspect_file(*args), pending.values()):
+                items[entry["path"]] = entry
+    # Files that vanished from the scanned roots drop out of the cache.
+    seen = {path for path, _, _ in found}
+    prefixes = tuple(os.path.join(root, "") for root in roots)
+    removed = [path for path in items if path.startswith(prefixes) and path not in seen]
+    for path in removed:
+        del items[path]
+
+    if pending or removed:
+        try:
+            write_catalog(catalog_path, sorted(items.values(), key=lambda item: item["path"]))
+        except OSError as exc:
+            print(f"LoRA catalog not cached ({catalog_path}): {exc}")
+    entries = [dict(items[path], root=root, rel=rel) for path, root, rel in found]
+    if stats is not None:
+        stats.update({"files": len(entries), "parsed": len(pending), "invalid": sum(not e["valid"] for e in entries)})
+    return LoraCatalog(entries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build/refresh the LoRA catalog from safetensors headers.")
+    parser.add_argument("--root", action="append", help="LoRA root (repeatable; default: produced_assets/lora_training)")
+    parser.add_argument("--catalog", default=DEFAULT_CATALOG, help="Catalog JSON path")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Threads listing directories / reading headers")
+    parser.add_argument("--base-model", help="Report LoRAs incompatible with this base model (flux, sdxl, qwen_image, ...)")
+    parser.add_argument("--check", nargs="*", default=[], help="Resolve and check these LoRA names/paths")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    stats = {}
+    catalog = load_catalog(args.root, args.catalog, args.workers, stats)
+    print(
+        f"LoRA catalog: {stats['files']} files, {stats['parsed']} headers read, {stats['invalid']} invalid "
+        f"({time.perf_counter() - start:.1f} s) -> {args.catalog}"
+    )
+    for entry in catalog.entries:
+        reason = check_lora(entry, args.base_model)
+        if reason:
+            print(f"  [REJECT] {entry['rel']}: {reason}")
+    failed = False
+    for ref in args.check:
+        entry = catalog.resolve(ref)
+        reason = check_lora(entry, args.base_model)
+        failed = failed or reason is not None
+        if reason:
+            print(f"{ref}: {reason}")
+        else:
+            print(f"{ref}: {entry['rel']} ({entry['base_model'] or '?'}, rank {entry['rank'] or '?'}, triggers: {', '.join(entry['trigger_words']) or '-'})")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
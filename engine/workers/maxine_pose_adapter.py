@@ -1,6 +1,7 @@
 import os
 import json
 import argparse
+import warnings
 
 DEFAULT_BASE_PATH = r"C:\Users\sasch\henoch\filmsets"
 DEFAULT_FPS = 24
@@ -56,26 +57,40 @@ def parse_scene_selector(value):
     return None
 
 
-def load_bodytrack_txt(path):
-    lines = []
+NPZ_SCHEMA = "maxine_bodytrack_npz_v1"
+INITIAL_FRAMES = 1024
+# Data lines converted per np.fromstring call.
+BLOCK_FRAMES = 2048
+
+
+def require_numpy():
+    try:
+        import numpy
+    except ImportError as exc:
+        raise RuntimeError("numpy is not installed. pip install numpy") from exc
+    return numpy
+
+
+def iter_bodytrack_lines(path):
     with open(path, "r", encoding="utf-8") as f:
         for raw in f:
             line = raw.strip()
             if not line or line.startswith("//"):
                 continue
-            lines.append(line)
-    return lines
+            yield line
 
 
-def parse_frame_lines(lines):
-    frames = []
-    i = 0
-    frame_idx = 0
-    while i + 1 < len(lines):
-        header = lines[i]
-        data = lines[i + 1]
-        i += 2
+def load_bodytrack_txt(path):
+    return list(iter_bodytrack_lines(path))
+
 
+def iter_frame_pairs(lines):
+    """Pair header/data lines and parse the header flags; skips frames with bad headers or empty data."""
+    lines = iter(lines)
+    for header in lines:
+        data = next(lines, None)
+        if data is None:
+            return
         header_tokens = [t for t in header.split(",") if t != ""]
         if len(header_tokens) < 2:
             continue
@@ -84,51 +99,59 @@ def parse_frame_lines(lines):
             keypoint_detect_on = int(float(header_tokens[1])) == 1
         except ValueError:
             continue
-
-        tokens = [t for t in data.split(",") if t != ""]
-        if not tokens:
+        if not data.strip(","):
             continue
+        yield body_detect_on, keypoint_detect_on, data
+
+
+def parse_frame_tokens(tokens):
+    """Token-by-token parse of one data line -> (bboxes, keypoints); stops at the first bad value."""
+    try:
+        num_people = int(float(tokens[0]))
+    except ValueError:
+        num_people = 0
+    idx = 1
+
+    bboxes = []
+    for _ in range(num_people):
+        if idx + 3 >= len(tokens):
+            break
+        try:
+            x = float(tokens[idx])
+            y = float(tokens[idx + 1])
+            w = float(tokens[idx + 2])
+            h = float(tokens[idx + 3])
+        except ValueError:
+            break
+        bboxes.append([x, y, w, h])
+        idx += 4
+
+    num_keypoints = 0
+    if idx < len(tokens):
+        try:
+            num_keypoints = int(float(tokens[idx]))
+        except ValueError:
+            num_keypoints = 0
+    idx += 1
 
+    keypoints = []
+    for _ in range(num_keypoints):
+        if idx + 1 >= len(tokens):
+            break
         try:
-            num_people = int(float(tokens[0]))
+            x = float(tokens[idx])
+            y = float(tokens[idx + 1])
         except ValueError:
-            num_people = 0
-        idx = 1
-
-        bboxes = []
-        for _ in range(num_people):
-            if idx + 3 >= len(tokens):
-                break
-            try:
-                x = float(tokens[idx])
-                y = float(tokens[idx + 1])
-                w = float(tokens[idx + 2])
-                h = float(tokens[idx + 3])
-            except ValueError:
-                break
-            bboxes.append([x, y, w, h])
-            idx += 4
-
-        num_keypoints = 0
-        if idx < len(tokens):
-            try:
-                num_keypoints = int(float(tokens[idx]))
-            except ValueError:
-                num_keypoints = 0
-        idx += 1
-
-        keypoints = []
-        for _ in range(num_keypoints):
-            if idx + 1 >= len(tokens):
-                break
-            try:
-                x = float(tokens[idx])
-                y = float(tokens[idx + 1])
-            except ValueError:
-                break
-            keypoints.append([x, y])
-            idx += 2
+            break
+        keypoints.append([x, y])
+        idx += 2
+    return bboxes, keypoints
 
+
+def parse_frame_lines(lines):
+    frames = []
+    for frame_idx, (body_detect_on, keypoint_detect_on, data) in enumerate(iter_frame_pairs(lines)):
+        bboxes, keypoints = parse_frame_tokens([t for t in data.split(",") if t != ""])
         frames.append({
             "frame": frame_idx,
             "body_detect_on": body_detect_on,
@@ -139,10 +162,289 @@ def parse_frame_lines(lines):
                 "keypoints_2d": keypoints,
             },
         })
-        frame_idx += 1
     return frames
 
 
+class FrameArrays:
+    """Growable, preallocated frame storage: flags, CSR bboxes and NaN-padded (frames, K, 2) keypoints."""
+
+    def __init__(self, np, keypoint_slots=len(KEYPOINT_NAMES)):
+        self.np = np
+        self.count = 0
+        self.flags = np.zeros((INITIAL_FRAMES, 2), dtype=bool)
+        self.keypoint_counts = np.zeros(INITIAL_FRAMES, dtype=np.int32)
+        self.keypoints = np.full((INITIAL_FRAMES, keypoint_slots, 2), np.nan)
+        self.bbox_offsets = np.zeros(INITIAL_FRAMES + 1, dtype=np.int64)
+        self.bboxes = np.zeros((INITIAL_FRAMES, 4))
+
+    def reserve(self, frames, joints, boxes):
+        np = self.np
+        while self.count + frames > len(self.flags):
+            size = len(self.flags)
+            self.flags = np.concatenate([self.flags, np.zeros_like(self.flags)])
+            self.keypoint_counts = np.concatenate([self.keypoint_counts, np.zeros_like(self.keypoint_counts)])
+            self.keypoints = np.concatenate([self.keypoints, np.full_like(self.keypoints, np.nan)])
+            self.bbox_offsets = np.concatenate([self.bbox_offsets, np.zeros(size, dtype=np.int64)])
+        if joints > self.keypoints.shape[1]:
+            pad = np.full((len(self.keypoints), joints - self.keypoints.shape[1], 2), np.nan)
+            self.keypoints = np.concatenate([self.keypoints, pad], axis=1)
+        needed = self.bbox_offsets[self.count] + boxes
+        if needed > len(self.bboxes):
+            self.bboxes = np.concatenate([self.bboxes, np.zeros((max(needed, len(self.bboxes)), 4))])
+
+    def append(self, body_detect_on, keypoint_detect_on, bboxes, keypoints):
+        """Store one frame parsed by parse_frame_tokens."""
+        np = self.np
+        self.reserve(1, len(keypoints), len(bboxes))
+        frame = self.count
+        self.flags[frame] = (body_detect_on, keypoint_detect_on)
+        start = self.bbox_offsets[frame]
+        if bboxes:
+            self.bboxes[start:start + len(bboxes)] = bboxes
+        self.bbox_offsets[frame + 1] = start + len(bboxes)
+        if keypoints:
+            self.keypoints[frame, :len(keypoints)] = np.asarray(keypoints, dtype=np.float64)
+        self.keypoint_counts[frame] = len(keypoints)
+        self.count += 1
+
+    def extend(self, flags, values, starts, widths):
+        """Store a block of numeric data lines given as one flat array plus per-line starts/widths.
+
+        Mirrors parse_frame_tokens: a non-numeric (NaN) person/keypoint count means 0, and bboxes or
+        keypoints that don't fully fit the line are dropped.
+        """
+        np = self.np
+        frames = len(starts)
+        people_raw = values[starts]
+        people = np.clip(np.nan_to_num(people_raw, nan=0.0), 0, (widths - 1) // 4).astype(np.int64)
+        count_col = 1 + people * 4
+        has_count = count_col < widths
+        count_raw = values[np.where(has_count, starts + count_col, 0)]
+        count_raw = np.where(has_count, np.nan_to_num(count_raw, nan=0.0), 0.0)
+        kp_start = count_col + 1
+        joints = np.clip(count_raw, 0, np.maximum(widths - kp_start, 0) // 2).astype(np.int64)
+        max_joints = int(joints.max()) if frames else 0
+        total_boxes = int(people.sum())
+        self.reserve(frames, max_joints, total_boxes)
+
+        first, stop = self.count, self.count + frames
+        self.flags[first:stop] = flags
+        self.keypoint_counts[first:stop] = joints
+        if max_joints:
+            slots = np.arange(max_joints)
+            mask = slots[None, :] < joints[:, None]
+            x_idx = np.where(mask, (starts + kp_start)[:, None] + slots[None, :] * 2, 0)
+            y_idx = np.where(mask, x_idx + 1, 0)
+            self.keypoints[first:stop, :max_joints, 0] = np.where(mask, values[x_idx], np.nan)
+            self.keypoints[first:stop, :max_joints, 1] = np.where(mask, values[y_idx], np.nan)
+        box_base = self.bbox_offsets[first]
+        if total_boxes:
+            row_of = np.repeat(np.arange(frames), people)
+            within = np.arange(total_boxes) - np.repeat(np.cumsum(people) - people, people)
+            src = starts[row_of] + 1 + within * 4
+            self.bboxes[box_base:box_base + total_boxes] = values[src[:, None] + np.arange(4)[None, :]]
+        self.bbox_offsets[first + 1:stop + 1] = box_base + np.cumsum(people)
+        self.count = stop
+
+    def arrays(self) -> dict:
+        count = self.count
+        return {
+            "body_detect_on": self.flags[:count, 0].copy(),
+            "keypoint_detect_on": self.flags[:count, 1].copy(),
+            "keypoint_counts": self.keypoint_counts[:count].copy(),
+            "keypoints": self.keypoints[:count].copy(),
+            "bbox_offsets": self.bbox_offsets[:count + 1].copy(),
+            "bboxes": self.bboxes[:self.bbox_offsets[count]].copy(),
+        }
+
+
+def parse_numbers(np, lines):
+    """One np.fromstring pass over comma-separated lines -> (values, starts, widths), or None when any
+    token is empty or not a number (those lines take the token-by-token path)."""
+    lines = [line.rstrip(",") for line in lines]
+    if any(",," in line or line.startswith(",") for line in lines):
+        return None
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", DeprecationWarning)
+        try:
+            values = np.fromstring(",".join(lines), sep=",")
+        except (ValueError, DeprecationWarning):
+            return None
+    widths = np.array([line.count(",") + 1 for line in lines], dtype=np.int64)
+    if len(values) != widths.sum():
+        return None
+    return values, np.cumsum(widths) - widths, widths
+
+
+def parse_block(np, store, block):
+    flags = [(body, keypoint) for body, keypoint, _ in block]
+    parsed = parse_numbers(np, [data for _, _, data in block])
+    if parsed is not None:
+        store.extend(flags, *parsed)
+        return
+    for (body_detect_on, keypoint_detect_on, data), flag in zip(block, flags):
+        parsed = parse_numbers(np, [data])
+        if parsed is not None:
+            store.extend([flag], *parsed)
+        else:
+            bboxes, keypoints = parse_frame_tokens([t for t in data.split(",") if t != ""])
+            store.append(body_detect_on, keypoint_detect_on, bboxes, keypoints)
+
+
+def parse_bodytrack_arrays(path) -> dict:
+    """Stream a BodyTrackApp export into NumPy arrays (see FrameArrays), BLOCK_FRAMES lines at a time."""
+    np = require_numpy()
+    store = FrameArrays(np)
+    block = []
+    for pair in iter_frame_pairs(iter_bodytrack_lines(path)):
+        block.append(pair)
+        if len(block) >= BLOCK_FRAMES:
+            parse_block(np, store, block)
+            block = []
+    if block:
+        parse_block(np, store, block)
+    return store.arrays()
+
+
+def iter_frames_from_arrays(arrays, start=0, stop=None):
+    """Yield frames in the parse_frame_lines dict layout from parsed or loaded arrays."""
+    counts = arrays["keypoint_counts"]
+    stop = len(counts) if stop is None else min(stop, len(counts))
+    offsets = arrays["bbox_offsets"]
+    bboxes = arrays["bboxes"]
+    keypoints = arrays["keypoints"]
+    body = arrays["body_detect_on"]
+    keypoint_on = arrays["keypoint_detect_on"]
+    for frame in range(start, stop):
+        frame_bboxes = bboxes[offsets[frame]:offsets[frame + 1]].tolist()
+        yield {
+            "frame": frame,
+            "body_detect_on": bool(body[frame]),
+            "keypoint_detect_on": bool(keypoint_on[frame]),
+            "people": [{"bbox": bbox} for bbox in frame_bboxes],
+            "primary": {
+                "bbox": frame_bboxes[0] if frame_bboxes else None,
+                "keypoints_2d": keypoints[frame, :counts[frame]].tolist(),
+            },
+        }
+
+
+def npz_path_for(output_path):
+    return os.path.splitext(output_path)[0] + ".npz"
+
+
+def write_bodytrack_npz(path, arrays, source_path, fps, compress=False):
+    """Binary sidecar: float32 coordinates plus fps/source/keypoint names."""
+    np = require_numpy()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    save = np.savez_compressed if compress else np.savez
+    tmp_path = path + ".tmp.npz"
+    save(
+        tmp_path,
+        schema=np.array(NPZ_SCHEMA),
+        source_path=np.array(source_path),
+        fps=np.array(fps),
+        keypoint_names=np.array(KEYPOINT_NAMES),
+        body_detect_on=arrays["body_detect_on"],
+        keypoint_detect_on=arrays["keypoint_detect_on"],
+        keypoint_counts=arrays["keypoint_counts"],
+        keypoints=arrays["keypoints"].astype(np.float32),
+        bbox_offsets=arrays["bbox_offsets"],
+        bboxes=arrays["bboxes"].astype(np.float32),
+    )
+    os.replace(tmp_path, path)
+
+
+class BodyTrackReader:
+    """Lazy reader for the .npz sidecar: each array is read on first access.
+
+    `reader.keypoints` is (frames, K, 2) float32 (NaN beyond `keypoint_counts`), `reader.frame(i)`
+    and iteration give the JSON frame layout.
+    """
+
+    def __init__(self, path):
+        np = require_numpy()
+        self.path = path
+        self._npz = np.load(path)
+        self._cache = {}
+        if str(self._npz["schema"]) != NPZ_SCHEMA:
+            raise ValueError(f"Unexpected BodyTrack schema in {path}: {self._npz['schema']}")
+        self.fps = self._npz["fps"].item()
+        self.source_path = str(self._npz["source_path"])
+        self.keypoint_names = self._npz["keypoint_names"].tolist()
+
+    def __getitem__(self, name):
+        if name not in self._cache:
+            self._cache[name] = self._npz[name]
+        return self._cache[name]
+
+    def __len__(self):
+        return len(self["keypoint_counts"])
+
+    def __iter__(self):
+        return iter_frames_from_arrays(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._npz.close()
+
+    @property
+    def keypoints(self):
+        return self["keypoints"]
+
+    @property
+    def keypoint_counts(self):
+        return self["keypoint_counts"]
+
+    def bboxes(self, frame):
+        offsets = self["bbox_offsets"]
+        return self["bboxes"][offsets[frame]:offsets[frame + 1]]
+
+    def frame(self, frame):
+        if frame < 0:
+            frame += len(self)
+        if not 0 <= frame < len(self):
+            raise IndexError(frame)
+        return next(iter_frames_from_arrays(self, frame, frame + 1))
+
+
+def convert_bodytrack(input_path, output_path, fps, output_format="json"):
+    """Parse a BodyTrackApp export once and write JSON, the .npz sidecar, or both; returns written paths.
+
+    JSON-only output uses the stdlib parser, so numpy is only required for the sidecar; with "both" and no
+    numpy the JSON is still written.
+    """
+    arrays = None
+    written = []
+    if output_format in ("npz", "both"):
+        try:
+            arrays = parse_bodytrack_arrays(input_path)
+        except RuntimeError as exc:
+            if output_format == "npz":
+                raise
+            print(f"{exc}; writing JSON without the .npz sidecar.")
+    if arrays is not None:
+        npz_path = npz_path_for(output_path)
+        write_bodytrack_npz(npz_path, arrays, input_path, fps)
+        written.append(npz_path)
+    if output_format in ("json", "both"):
+        if arrays is not None:
+            frames = list(iter_frames_from_arrays(arrays))
+        else:
+            frames = parse_frame_lines(load_bodytrack_txt(input_path))
+        payload = build_payload(input_path, fps, frames)
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2, ensure_ascii=True)
+        written.append(output_path)
+    return written
+
+
 def build_payload(source_path, fps, frames):
     return {
         "source": {
@@ -167,7 +469,7 @@ def resolve_output_path(chapter_path, slug, output_path):
     return os.path.join(media_dir, f"{slug}_body_pose.json")
 
 
-def run(input_path, chapter_num, scene_selector, output_path, fps, dry_run):
+def run(input_path, chapter_num, scene_selector, output_path, fps, dry_run, output_format="json"):
     if not os.path.exists(input_path):
         print(f"Fehler: Input nicht gefunden: {input_path}")
         return
@@ -182,20 +484,16 @@ def run(input_path, chapter_num, scene_selector, output_path, fps, dry_run):
         chapter_folder = f"chapter_{chapter_num:03d}"
         chapter_path = os.path.join(DEFAULT_BASE_PATH, chapter_folder)
 
-    lines = load_bodytrack_txt(input_path)
-    frames = parse_frame_lines(lines)
-    payload = build_payload(input_path, fps, frames)
-
     output_path = resolve_output_path(chapter_path, slug, output_path) if chapter_path else output_path
     if dry_run:
+        frames = parse_frame_lines(load_bodytrack_txt(input_path))
+        payload = build_payload(input_path, fps, frames)
         print(json.dumps(payload, indent=2))
         print(f"Output: {output_path}")
         return
 
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(payload, f, indent=2, ensure_ascii=True)
-    print(f"Wrote: {output_path}")
+    for path in convert_bodytrack(input_path, output_path, fps, output_format=output_format):
+        print(f"Wrote: {path}")
 
 
 if __name__ == "__main__":
@@ -205,6 +503,12 @@ if __name__ == "__main__":
     parser.add_argument("--scene", default=None, help="Scene id (e.g. 1.1 or scene_01_01)")
     parser.add_argument("--output", default=None, help="Explicit output JSON path")
     parser.add_argument("--fps", type=int, default=DEFAULT_FPS)
+    parser.add_argument(
+        "--format",
+        choices=["json", "npz", "both"],
+        default="json",
+        help="json (pose JSON), npz (binary sidecar with NumPy arrays) or both",
+    )
     parser.add_argument("--dry-run", action="store_true")
     args = parser.parse_args()
 
@@ -215,4 +519,5 @@ if __name__ == "__main__":
         output_path=args.output,
         fps=args.fps,
         dry_run=args.dry_run,
+        output_format=args.format,
     )
@@ -3,10 +3,11 @@
 # preserving CSV row order and block order. No JSON parsing is used for output.
 
 import csv
-import re
 import json
 from pathlib import Path
 
+from json_blocks import iter_fences
+
 # --- CONFIG ---
 INPUT_CSV = r"C:\Users\sasch\henoch\first_analysis_progress_python.csv"
 RAW_COLUMN = "RawContent"
@@ -17,13 +18,10 @@ STATUS_COLUMN = "Status"
 OUTPUT_TXT_NAME = "extracted_json_blocks_in_order.txt"
 VALIDATION_LOG_NAME = "json_validation_log.txt"
 
-# Regex to capture contents between ```json and ```
-JSON_FENCE_RE = re.compile(r"```json\s*(.*?)\s*```", re.DOTALL | re.IGNORECASE)
-
-
 def extract_json_blocks_in_order(raw: str) -> list[str]:
     """Return JSON fence contents in the order they appear."""
-    return JSON_FENCE_RE.findall(raw or "")
+    raw = raw or ""
+    return [raw[start:end].strip() for tag, start, end in iter_fences(raw) if tag == "json"]
 
 
 def unescape_csv_doubled_quotes(s: str) -> str:
@@ -0,0 +1,179 @@
+import argparse
+import math
+import os
+
+import pose_library
+
+INDEX_VERSION = 1
+DEFAULT_NPROBE = 8
+KMEANS_ITERATIONS = 12
+# Training sample per list; k-means on the full catalog adds little and costs minutes.
+TRAIN_PER_LIST = 32
+ASSIGN_CHUNK = 8192
+
+_INDEX_MEMO = {}
+
+
+def index_path(catalog_path: str) -> str:
+    """The IVF index lives next to the catalog: <stem>.ivf.npz."""
+    return os.path.splitext(catalog_path)[0] + ".ivf.npz"
+
+
+def default_lists(count: int) -> int:
+    return max(1, min(count, int(round(2 * math.sqrt(count)))))
+
+
+def pose_vectors(library):
+    """Masked xyz per pose (invalid joints at the pelvis origin) -> (N, K * 3) float32."""
+    return library.design[:, library.keypoints.shape[1]:library.keypoints.shape[1] * 4]
+
+
+def nearest_centroids(np, vectors, centroids):
+    """Index of the nearest centroid (euclidean) for each row, computed in chunks."""
+    c_sq = np.einsum("lc,lc->l", centroids, centroids)
+    labels = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), ASSIGN_CHUNK):
+        chunk = vectors[start:start + ASSIGN_CHUNK]
+        labels[start:start + len(chunk)] = (c_sq - 2.0 * (chunk @ centroids.T)).argmin(axis=1)
+    return labels
+
+
+def kmeans(vectors, lists: int, iterations: int = KMEANS_ITERATIONS, seed: int = 0):
+    np = pose_library.require_numpy()
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(vectors), lists * TRAIN_PER_LIST)
+    sample = np.asarray(vectors[rng.choice(len(vectors), sample_size, replace=False)], dtype=np.float32)
+    centroids = sample[rng.choice(sample_size, lists, replace=False)].copy()
+    for _ in range(iterations):
+        labels = nearest_centroids(np, sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, sample)
+        counts = np.bincount(labels, minlength=lists)
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+        # Reseed empty lists from random sample points so every list stays useful.
+        empty = np.flatnonzero(~filled)
+        if len(empty):
+            centroids[empty] = sample[rng.choice(sample_size, len(empty), replace=False)]
+    return centroids
+
+
+class PoseIVF:
+    """Inverted-file index over normalized pose vectors.
+
+    Poses are clustered with k-means on their masked xyz; a query probes the `nprobe` lists whose
+    centroids are closest under the same confidence-masked metric as the exact matcher, and only
+    those poses are scored (exact rerank included), so results are a subset-search of PoseLibrary.top_k.
+    """
+
+    def __init__(self, centroids, order, offsets, fingerprint=None):
+        np = pose_library.require_numpy()
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+        self.order = np.asarray(order, dtype=np.int64)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.fingerprint = fingerprint
+        lists, width = self.centroids.shape
+        joints = width // 3
+        # Centroids as fully confident poses (conf 1 vs. a 0.5 cut, queries are mapped to 1/0):
+        # probing then reuses the masked distance code.
+        keypoints = np.ones((lists, joints, 4), dtype=np.float32)
+        keypoints[:, :, :3] = self.centroids.reshape(lists, joints, 3)
+        self.coarse = pose_library.PoseLibrary(keypoints, list(range(lists)), [[]] * lists, min_conf=0.5)
+
+    @property
+    def lists(self) -> int:
+        return len(self.centroids)
+
+    def probe(self, queries, nprobe: int = DEFAULT_NPROBE, min_conf: float = pose_library.DEFAULT_MIN_CONF):
+        """Candidate pose indexes for each normalized query (F, K, 4)."""
+        np = pose_library.require_numpy()
+        queries = np.array(queries, dtype=np.float32)
+        if queries.ndim == 2:
+            queries = queries[None]
+        # Joints below min_conf are ignored by the matcher, so hide them from the coarse search too.
+        queries[:, :, 3] = np.where(queries[:, :, 3] >= min_conf, 1.0, 0.0)
+        nprobe = max(1, min(nprobe, self.lists))
+        dist = self.coarse.distances(queries)
+        candidates = []
+        for row in dist:
+            nearest = np.argpartition(row, nprobe - 1)[:nprobe] if nprobe < self.lists else np.arange(self.lists)
+            candidates.append(np.concatenate([self.order[self.offsets[l]:self.offsets[l + 1]] for l in nearest]))
+        return candidates
+
+    def top_k(self, library, queries, k: int, nprobe: int = DEFAULT_NPROBE):
+        return library.top_k(queries, k, candidates=self.probe(queries, nprobe, min_conf=library.min_conf))
+
+
+def build_index(library, lists: int | None = None, iterations: int = KMEANS_ITERATIONS, seed: int = 0) -> PoseIVF:
+    np = pose_library.require_numpy()
+    if not len(library):
+        raise ValueError("Pose library is empty; import keypoints first.")
+    lists = min(len(library), lists or default_lists(len(library)))
+    vectors = pose_vectors(library)
+    centroids = kmeans(vectors, lists, iterations=iterations, seed=seed)
+    labels = nearest_centroids(np, vectors, centroids)
+    order = np.argsort(labels, kind="stable")
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(labels, minlength=lists))])
+    return PoseIVF(centroids, order, offsets, fingerprint=index_fingerprint(library))
+
+
+def index_fingerprint(library) -> list:
+    return [INDEX_VERSION, library.fingerprint, library.min_conf, len(library)]
+
+
+def save_index(index: PoseIVF, path: str) -> None:
+    np = pose_library.require_numpy()
+    tmp_path = path + ".tmp.npz"
+    np.savez(
+        tmp_path,
+        centroids=index.centroids,
+        order=index.order,
+        offsets=index.offsets,
+        fingerprint=np.array(repr(index.fingerprint)),
+    )
+    os.replace(tmp_path, path)
+
+
+def load_index(catalog_path: str, library, rebuild: bool = False, lists: int | None = None) -> PoseIVF:
+    """Load the persisted IVF index for a catalog, rebuilding it when the compiled library changed."""
+    np = pose_library.require_numpy()
+    path = index_path(os.path.abspath(catalog_path))
+    expected = index_fingerprint(library)
+    memo = _INDEX_MEMO.get(path)
+    if memo and not rebuild and memo.fingerprint == expected:
+        return memo
+    index = None
+    if not rebuild and os.path.exists(path):
+        with np.load(path) as data:
+            if str(data["fingerprint"]) == repr(expected):
+                index = PoseIVF(data["centroids"], data["order"], data["offsets"], fingerprint=expected)
+    if index is None:
+        index = build_index(library, lists=lists)
+        save_index(index, path)
+        print(f"Wrote: {path} ({index.lists} lists)")
+    _INDEX_MEMO[path] = index
+    return index
+
+
+def build_for_catalog(catalog_path: str, min_conf: float = pose_library.DEFAULT_MIN_CONF,
+                      lists: int | None = None) -> PoseIVF | None:
+    """Compile the catalog library and (re)build its IVF index; None when no pose has keypoints yet."""
+    library = pose_library.load_library(catalog_path, min_conf=min_conf)
+    if not len(library):
+        print(f"No poses with {pose_library.KEYPOINT_COUNT} keypoints yet; skipping ANN index.")
+        return None
+    return load_index(catalog_path, library, rebuild=True, lists=lists)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the IVF (approximate nearest neighbour) index for a pose catalog.")
+    parser.add_argument("--catalog", required=True, help="Pose catalog JSON.")
+    parser.add_argument("--min-conf", type=float, default=pose_library.DEFAULT_MIN_CONF)
+    parser.add_argument("--lists", type=int, default=None, help="Number of IVF lists (default: 2 * sqrt(poses)).")
+    args = parser.parse_args()
+
+    build_for_catalog(args.catalog, min_conf=args.min_conf, lists=args.lists)
+
+
+if __name__ == "__main__":
+    main()
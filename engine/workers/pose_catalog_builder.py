@@ -3,6 +3,8 @@ import json
 import os
 import re
 
+import pose_ann
+
 ROOT_PATH = r"C:\Users\sasch\henoch"
 DEFAULT_OUTPUT = os.path.join(ROOT_PATH, "pose_catalog.json")
 DEFAULT_ROOTS = [
@@ -114,10 +116,18 @@ def main():
     parser = argparse.ArgumentParser(description="Build a pose catalog from animation assets.")
     parser.add_argument("--root", action="append", help="Root folder to scan for poses.")
     parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Output catalog JSON path.")
+    parser.add_argument(
+        "--ann",
+        action="store_true",
+        help="Also compile the keypoint library and IVF index next to the catalog (needs numpy).",
+    )
+    parser.add_argument("--ann-lists", type=int, default=None, help="IVF lists (default: 2 * sqrt(poses)).")
     args = parser.parse_args()
 
     roots = args.root or DEFAULT_ROOTS
     build_catalog(roots, args.output)
+    if args.ann:
+        pose_ann.build_for_catalog(args.output, lists=args.ann_lists)
 
 
 if __name__ == "__main__":
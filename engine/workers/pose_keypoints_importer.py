@@ -2,6 +2,8 @@ import argparse
 import json
 import os
 
+import pose_ann
+
 DEFAULT_CATALOG = r"C:\Users\sasch\henoch\pose_catalog.json"
 
 
@@ -114,10 +116,14 @@ def main():
     parser.add_argument("--input", required=True, help="JSON file or folder with pose keypoints")
     parser.add_argument("--allow-new", action="store_true", help="Add pose IDs not in catalog")
     parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--ann", action="store_true", help="Rebuild the keypoint library and IVF index after importing.")
+    parser.add_argument("--ann-lists", type=int, default=None, help="IVF lists (default: 2 * sqrt(poses)).")
     args = parser.parse_args()
 
     inputs = collect_inputs(args.input)
     update_catalog(args.catalog, inputs, args.allow_new, args.dry_run)
+    if args.ann and not args.dry_run:
+        pose_ann.build_for_catalog(args.catalog, lists=args.ann_lists)
 
 
 if __name__ == "__main__":
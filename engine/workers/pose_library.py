@@ -0,0 +1,270 @@
+import argparse
+import json
+import os
+
+LIBRARY_VERSION = 1
+KEYPOINT_COUNT = 34
+DEFAULT_MIN_CONF = 0.15
+# Candidates re-scored exactly (float64, direct differences) per requested match.
+RERANK_FACTOR = 4
+
+PELVIS_IDX = 0
+LEFT_HIP_IDX = 1
+RIGHT_HIP_IDX = 2
+LEFT_SHOULDER_IDX = 20
+RIGHT_SHOULDER_IDX = 21
+
+_LIBRARY_MEMO = {}
+
+
+def require_numpy():
+    try:
+        import numpy
+    except ImportError as exc:
+        raise RuntimeError("numpy is not installed. pip install numpy") from exc
+    return numpy
+
+
+def library_paths(catalog_path: str) -> tuple[str, str]:
+    """Compiled keypoints live next to the catalog: <stem>.keypoints.npy + <stem>.keypoints.json."""
+    stem = os.path.splitext(catalog_path)[0]
+    return stem + ".keypoints.npy", stem + ".keypoints.json"
+
+
+def catalog_fingerprint(catalog_path: str) -> list:
+    stat = os.stat(catalog_path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def normalize_batch(points, min_conf: float = DEFAULT_MIN_CONF):
+    """Vectorized pose_matcher.normalize_points for an (N, K, 4) array (x, y, z, conf).
+
+    Centers on the pelvis (or the most confident point when the pelvis is unreliable) and
+    scales by hip width, falling back to shoulder width, then 1.0.
+    """
+    np = require_numpy()
+    points = np.asarray(points, dtype=np.float64)
+    if points.ndim != 3 or points.shape[1] <= RIGHT_HIP_IDX:
+        return points
+    conf = points[:, :, 3]
+    rows = np.arange(points.shape[0])
+    pelvis_idx = np.where(conf[:, PELVIS_IDX] < min_conf, conf.argmax(axis=1), PELVIS_IDX)
+    pelvis = points[rows, pelvis_idx, :3]
+    xyz = points[:, :, :3] - pelvis[:, None, :]
+
+    def width(a, b):
+        ok = (conf[:, a] >= min_conf) & (conf[:, b] >= min_conf)
+        return np.where(ok, np.linalg.norm(points[:, a, :3] - points[:, b, :3], axis=1), 0.0)
+
+    scale = width(LEFT_HIP_IDX, RIGHT_HIP_IDX)
+    if points.shape[1] > RIGHT_SHOULDER_IDX:
+        scale = np.where(scale == 0.0, width(LEFT_SHOULDER_IDX, RIGHT_SHOULDER_IDX), scale)
+    scale = np.where(scale <= 1e-6, 1.0, scale)
+    normalized = np.empty_like(points)
+    normalized[:, :, :3] = xyz / scale[:, None, None]
+    normalized[:, :, 3] = conf
+    return normalized
+
+
+def compile_library(catalog_path: str, min_conf: float = DEFAULT_MIN_CONF) -> dict:
+    """Normalize every catalog pose with KEYPOINT_COUNT keypoints into one float32 (N, 34, 4) .npy."""
+    np = require_numpy()
+    npy_path, meta_path = library_paths(catalog_path)
+    fingerprint = catalog_fingerprint(catalog_path)
+    with open(catalog_path, "r", encoding="utf-8") as f:
+        catalog = json.load(f)
+    pose_ids = []
+    tags = []
+    rows = []
+    skipped = 0
+    for pose in catalog.get("poses", []):
+        kp = pose.get("keypoints")
+        if not kp:
+            continue
+        if len(kp) != KEYPOINT_COUNT or any(len(point) != 4 for point in kp):
+            skipped += 1
+            continue
+        pose_ids.append(pose.get("pose_id"))
+        tags.append(pose.get("tags") or [])
+        rows.append(kp)
+    raw = np.asarray(rows, dtype=np.float64).reshape(len(rows), KEYPOINT_COUNT, 4)
+    keypoints = normalize_batch(raw, min_conf=min_conf).astype(np.float32)
+
+    tmp_npy = npy_path + ".tmp.npy"
+    np.save(tmp_npy, keypoints)
+    os.replace(tmp_npy, npy_path)
+    meta = {
+        "version": LIBRARY_VERSION,
+        "catalog": os.path.abspath(catalog_path),
+        "catalog_fingerprint": fingerprint,
+        "min_conf": min_conf,
+        "pose_count": len(pose_ids),
+        "skipped": skipped,
+        "pose_ids": pose_ids,
+        "tags": tags,
+    }
+    tmp_meta = meta_path + ".tmp"
+    with open(tmp_meta, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=True)
+    os.replace(tmp_meta, meta_path)
+    return meta
+
+
+def load_meta(meta_path: str) -> dict:
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def is_stale(meta: dict, catalog_path: str, min_conf: float) -> bool:
+    return (
+        meta.get("version") != LIBRARY_VERSION
+        or meta.get("catalog_fingerprint") != catalog_fingerprint(catalog_path)
+        or meta.get("min_conf") != min_conf
+    )
+
+
+class PoseLibrary:
+    """Memory-mapped normalized poses plus one design matrix for one-shot distances.
+
+    For library pose l and query q with joint masks v (library) and m (query):
+        sum_k v_k m_k |l_k - q_k|^2 = (v|l|^2)·m - 2 (v l)·(m q) + v·(m|q|^2)
+    so the masked totals to all N poses are a single product of the (N, 5K) matrix
+    [v|l|^2, v l, v] with a 5K query vector (a matrix of F vectors for a clip).
+    """
+
+    def __init__(self, keypoints, pose_ids: list, tags: list, min_conf: float = DEFAULT_MIN_CONF,
+                 fingerprint=None):
+        np = require_numpy()
+        self.keypoints = keypoints
+        self.fingerprint = fingerprint
+        self.pose_ids = pose_ids
+        self.tags = tags
+        self.min_conf = min_conf
+        count, joints = keypoints.shape[:2]
+        valid = (keypoints[:, :, 3] >= min_conf).astype(np.float32)
+        xyz = keypoints[:, :, :3] * valid[:, :, None]
+        design = np.empty((count, joints * 5), dtype=np.float32)
+        design[:, :joints] = np.einsum("nkc,nkc->nk", xyz, xyz)
+        design[:, joints:joints * 4] = xyz.reshape(count, -1)
+        design[:, joints * 4:] = valid
+        self.design = design
+        self.valid = valid
+        self.valid_counts = valid.sum(axis=1)
+
+    def __len__(self):
+        return len(self.pose_ids)
+
+    def distances(self, queries, indexes=None):
+        """Mean masked squared distance from each normalized query (F, K, 4) to every pose -> (F, N).
+
+        With `indexes` only those poses are scored (-> (F, len(indexes))). Pairs without a shared
+        confident joint get +inf (pose_matcher skipped them).
+        """
+        np = require_numpy()
+        queries = np.asarray(queries, dtype=np.float32)
+        if queries.ndim == 2:
+            queries = queries[None]
+        frames, joints = queries.shape[:2]
+        mask = (queries[:, :, 3] >= self.min_conf).astype(np.float32)
+        q_xyz = queries[:, :, :3] * mask[:, :, None]
+        vectors = np.empty((frames, joints * 5), dtype=np.float32)
+        vectors[:, :joints] = mask
+        vectors[:, joints:joints * 4] = -2.0 * q_xyz.reshape(frames, -1)
+        vectors[:, joints * 4:] = np.einsum("fkc,fkc->fk", q_xyz, q_xyz)
+        design = self.design if indexes is None else self.design[indexes]
+        total = vectors @ design.T
+        if mask.all():
+            counts = self.valid_counts if indexes is None else self.valid_counts[indexes]
+            count = np.broadcast_to(counts, total.shape)
+        else:
+            count = mask @ (self.valid if indexes is None else self.valid[indexes]).T
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(count > 0, np.maximum(total, 0.0) / count, np.inf)
+
+    def exact_distances(self, query, indexes):
+        """Float64 direct-difference distances for a few candidates (used to rerank the top-k)."""
+        np = require_numpy()
+        query = np.asarray(query, dtype=np.float64)
+        lib = np.asarray(self.keypoints[indexes], dtype=np.float64)
+        mask = (lib[:, :, 3] >= self.min_conf) & (query[None, :, 3] >= self.min_conf)
+        sq = ((lib[:, :, :3] - query[None, :, :3]) ** 2).sum(axis=2)
+        count = mask.sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(count > 0, (sq * mask).sum(axis=1) / count, np.inf)
+
+    def top_k(self, queries, k: int, candidates=None) -> list[list[tuple[float, int]]]:
+        """Return [(distance, pose_index), ...] sorted ascending for each query frame.
+
+        `candidates` optionally restricts each query to its own array of pose indexes (ANN probes).
+        """
+        np = require_numpy()
+        queries = np.asarray(queries, dtype=np.float32)
+        if queries.ndim == 2:
+            queries = queries[None]
+        if not len(self) or k <= 0:
+            return [[] for _ in range(len(queries))]
+        if candidates is None:
+            rows = zip(queries, self.distances(queries), [None] * len(queries))
+        else:
+            rows = (
+                (frame, self.distances(frame, subset)[0], subset)
+                for frame, subset in zip(queries, candidates)
+            )
+        results = []
+        for frame, row, subset in rows:
+            pool = min(len(row), max(k, k * RERANK_FACTOR))
+            if pool < len(row):
+                picked = np.argpartition(row, pool - 1)[:pool]
+            else:
+                picked = np.arange(len(row))
+            picked = picked[np.isfinite(row[picked])]
+            picked = np.sort(picked if subset is None else np.asarray(subset)[picked])
+            exact = self.exact_distances(frame, picked)
+            # Ties keep catalog order, like the stable sort in pose_matcher.
+            order = np.lexsort((picked, exact))[:k]
+            results.append([(float(exact[i]), int(picked[i])) for i in order if np.isfinite(exact[i])])
+        return results
+
+
+def load_library(catalog_path: str, min_conf: float = DEFAULT_MIN_CONF, rebuild: bool = False) -> PoseLibrary:
+    """Load the compiled library for a catalog, recompiling when the catalog or min_conf changed."""
+    np = require_numpy()
+    catalog_path = os.path.abspath(catalog_path)
+    npy_path, meta_path = library_paths(catalog_path)
+    fingerprint = catalog_fingerprint(catalog_path)
+    memo_key = (catalog_path, min_conf)
+    memo = _LIBRARY_MEMO.get(memo_key)
+    if memo and not rebuild and memo[0] == fingerprint:
+        return memo[1]
+    meta = {} if rebuild else load_meta(meta_path)
+    if not meta or not os.path.exists(npy_path) or is_stale(meta, catalog_path, min_conf):
+        meta = compile_library(catalog_path, min_conf=min_conf)
+    keypoints = np.load(npy_path, mmap_mode="r")
+    library = PoseLibrary(
+        keypoints,
+        meta.get("pose_ids") or [],
+        meta.get("tags") or [],
+        min_conf=min_conf,
+        fingerprint=meta.get("catalog_fingerprint"),
+    )
+    _LIBRARY_MEMO[memo_key] = (fingerprint, library)
+    return library
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile pose_catalog.json keypoints into a normalized .npy matrix.")
+    parser.add_argument("--catalog", required=True, help="Pose catalog JSON.")
+    parser.add_argument("--min-conf", type=float, default=DEFAULT_MIN_CONF)
+    args = parser.parse_args()
+
+    meta = compile_library(args.catalog, min_conf=args.min_conf)
+    npy_path, _ = library_paths(args.catalog)
+    print(f"Wrote: {npy_path}")
+    print(f"Poses: {meta['pose_count']} (skipped {meta['skipped']} without {KEYPOINT_COUNT} keypoints)")
+
+
+if __name__ == "__main__":
+    main()
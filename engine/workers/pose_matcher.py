@@ -4,8 +4,14 @@ import math
 import os
 import re
 
+import pose_ann
+import pose_library
+
 DEFAULT_LIBRARY = r"C:\Users\sasch\henoch\pose_catalog.json"
 DEFAULT_OUTPUT = r"C:\Users\sasch\henoch\pose_match.json"
+DEFAULT_CLIP_OUTPUT = r"C:\Users\sasch\henoch\pose_track.jsonl"
+STREAM_CHUNK = 1 << 20
+CLIP_BATCH = 256
 
 KEYPOINTS_34 = [
     "pelvis",
@@ -50,16 +56,73 @@ def load_json(path):
         return json.load(f)
 
 
+def iter_json_entries(path, chunk_size=STREAM_CHUNK):
+    """Stream DeepStream entries from a JSON array, a single object or JSONL without loading the file."""
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buf = f.read(chunk_size).lstrip("\ufeff")
+        pos = 0
+        eof = not buf
+        in_array = False
+        while True:
+            while True:
+                while pos < len(buf) and (buf[pos].isspace() or (in_array and buf[pos] == ",")):
+                    pos += 1
+                if pos < len(buf) or eof:
+                    break
+                buf, pos = f.read(chunk_size), 0
+                eof = not buf
+            if pos >= len(buf):
+                return
+            if buf[pos] == "[" and not in_array:
+                in_array = True
+                pos += 1
+                continue
+            if buf[pos] == "]" and in_array:
+                return
+            read_size = chunk_size
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buf, pos)
+                    break
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    more = f.read(read_size)
+                    read_size *= 2
+                    eof = not more
+                    buf = buf[pos:] + more
+                    pos = 0
+            pos = end
+            if isinstance(value, list):
+                yield from value
+            else:
+                yield value
+
+
+def iter_frames(entries):
+    """Group DeepStream objects by batch: yields (frame_num, [objects])."""
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        for batch in entry.get("batches", []):
+            yield batch.get("frame_num"), batch.get("objects", [])
+
+
 def iter_objects(data):
+    """Yield (frame_num, object) from loaded DeepStream JSON or a stream of entries."""
     if isinstance(data, dict):
         data = [data]
-    if not isinstance(data, list):
-        return
-    for entry in data:
-        for batch in entry.get("batches", []):
-            frame_num = batch.get("frame_num")
-            for obj in batch.get("objects", []):
-                yield frame_num, obj
+    for frame_num, objects in iter_frames(data):
+        for obj in objects:
+            yield frame_num, obj
+
+
+def mean_confidence(pose):
+    confidences = pose[3::4]
+    if not confidences:
+        return None
+    return sum(confidences) / len(confidences)
 
 
 def select_object(data, object_id=None):
@@ -68,14 +131,8 @@ def select_object(data, object_id=None):
     for frame_num, obj in iter_objects(data):
         if object_id is not None and obj.get("object_id") != object_id:
             continue
-        pose = obj.get("pose3d") or obj.get("pose25d")
-        if not pose:
-            continue
-        confidences = pose[3::4]
-        if not confidences:
-            continue
-        score = sum(confidences) / len(confidences)
-        if score > best_score:
+        score = mean_confidence(obj.get("pose3d") or obj.get("pose25d") or [])
+        if score is not None and score > best_score:
             best_score = score
             best = (frame_num, obj)
     return best
@@ -188,7 +245,177 @@ def match_by_tags(poses, desired_tags):
     return matches
 
 
-def run(pose_json, library_path, output_path, pose_type, object_id, min_conf, top_k):
+def match_keypoints(points, poses, min_conf, top_k):
+    """Pure-Python scan: normalize every catalog pose and compare (fallback without numpy)."""
+    scored = []
+    for pose in poses:
+        kp = pose.get("keypoints")
+        if not kp:
+            continue
+        pose_points = [(float(x), float(y), float(z), float(conf)) for x, y, z, conf in kp]
+        pose_points, _ = normalize_points(pose_points, min_conf=min_conf)
+        dist = pose_distance(points, pose_points, min_conf=min_conf)
+        if dist is None:
+            continue
+        scored.append((dist, pose["pose_id"], pose.get("tags", [])))
+    scored.sort(key=lambda item: item[0])
+    return scored[:top_k]
+
+
+def rank_poses(library, queries, k, catalog_path, nprobe=0, rebuild=False):
+    """Top-k per normalized query: exact scan, or the IVF index when nprobe > 0."""
+    if nprobe > 0 and len(library):
+        index = pose_ann.load_index(catalog_path, library, rebuild=rebuild)
+        return index.top_k(library, queries, k, nprobe=nprobe)
+    return library.top_k(queries, k)
+
+
+def match_keypoints_npy(points, library_path, min_conf, top_k, rebuild=False, nprobe=0):
+    """Match against the compiled, memory-mapped catalog; None when numpy is unavailable."""
+    try:
+        library = pose_library.load_library(library_path, min_conf=min_conf, rebuild=rebuild)
+    except RuntimeError as exc:
+        print(f"{exc}; falling back to the Python keypoint scan.")
+        return None
+    if len(points) != pose_library.KEYPOINT_COUNT:
+        return []
+    ranked = rank_poses(library, [points], top_k, library_path, nprobe=nprobe, rebuild=rebuild)[0]
+    return [(dist, library.pose_ids[idx], library.tags[idx]) for dist, idx in ranked]
+
+
+def smooth_track(frames, switch_penalty):
+    """Viterbi over per-frame candidates: minimize sum of distances + switch_penalty per pose change.
+
+    `frames` is a list of [(distance, pose_id), ...]; returns the chosen index per frame (None when a
+    frame has no candidates; such frames don't break the track).
+    """
+    path = [None] * len(frames)
+    back = []
+    prev = None
+    prev_frame = None
+    for t, candidates in enumerate(frames):
+        if not candidates:
+            back.append(None)
+            continue
+        if prev is None:
+            costs = [dist for dist, _ in candidates]
+            pointers = [None] * len(candidates)
+        else:
+            best_idx = min(range(len(prev)), key=prev.__getitem__)
+            switch_cost = prev[best_idx] + switch_penalty
+            same = {}
+            for idx, (_, pose_id) in enumerate(frames[prev_frame]):
+                if pose_id not in same or prev[idx] < prev[same[pose_id]]:
+                    same[pose_id] = idx
+            costs = []
+            pointers = []
+            for dist, pose_id in candidates:
+                stay = same.get(pose_id)
+                if stay is not None and prev[stay] <= switch_cost:
+                    costs.append(dist + prev[stay])
+                    pointers.append(stay)
+                else:
+                    costs.append(dist + switch_cost)
+                    pointers.append(best_idx)
+        back.append((prev_frame, pointers))
+        prev = costs
+        prev_frame = t
+    if prev is None:
+        return path
+    idx = min(range(len(prev)), key=prev.__getitem__)
+    t = prev_frame
+    while t is not None:
+        path[t] = idx
+        origin, pointers = back[t]
+        idx = pointers[idx]
+        t = origin
+    return path
+
+
+def run_clip(pose_json, library_path, output_path, pose_type, object_id, min_conf, candidates, stride,
+             switch_penalty, rebuild=False, nprobe=0):
+    """Match every `stride`-th frame against the library in batches and write a smoothed pose-ID track."""
+    if not os.path.exists(pose_json):
+        print(f"Pose JSON not found: {pose_json}")
+        return
+    if not os.path.exists(library_path):
+        print(f"Pose library not found: {library_path}")
+        return
+    try:
+        library = pose_library.load_library(library_path, min_conf=min_conf, rebuild=rebuild)
+    except RuntimeError as exc:
+        print(f"Clip mode needs the compiled library: {exc}")
+        return
+    if not len(library):
+        print(f"No poses with {pose_library.KEYPOINT_COUNT} keypoints in: {library_path}")
+        return
+    if nprobe > 0:
+        pose_ann.load_index(library_path, library, rebuild=rebuild)
+    np = pose_library.require_numpy()
+    stride = max(1, stride)
+
+    rows = []
+    frames = []
+    batch = []
+
+    def flush():
+        if not batch:
+            return
+        raw = np.asarray([points for _, points in batch], dtype=np.float64)
+        queries = pose_library.normalize_batch(raw, min_conf=min_conf)
+        ranked = rank_poses(library, queries, candidates, library_path, nprobe=nprobe)
+        for (row_idx, _), matches in zip(batch, ranked):
+            frames[row_idx] = [(dist, library.pose_ids[idx]) for dist, idx in matches]
+        batch.clear()
+
+    for position, (frame_num, objects) in enumerate(iter_frames(iter_json_entries(pose_json))):
+        if position % stride:
+            continue
+        best = None
+        best_score = -1.0
+        for obj in objects:
+            if object_id is not None and obj.get("object_id") != object_id:
+                continue
+            score = mean_confidence(obj.get(pose_type) or [])
+            if score is not None and score > best_score:
+                best_score = score
+                best = obj
+        rows.append({"frame_num": frame_num, "object_id": best.get("object_id") if best else None})
+        frames.append([])
+        points = extract_pose(best, pose_type) if best else None
+        if points and len(points) == pose_library.KEYPOINT_COUNT:
+            batch.append((len(rows) - 1, points))
+            if len(batch) >= CLIP_BATCH:
+                flush()
+    flush()
+
+    path = smooth_track(frames, switch_penalty)
+    switches = 0
+    previous = None
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        for row, candidates_row, choice in zip(rows, frames, path):
+            if choice is None:
+                row.update({"pose_id": None, "score": None, "raw_pose_id": None, "raw_score": None, "switch": False})
+            else:
+                score, pose_id = candidates_row[choice]
+                row.update({
+                    "pose_id": pose_id,
+                    "score": score,
+                    "raw_pose_id": candidates_row[0][1],
+                    "raw_score": candidates_row[0][0],
+                    "switch": previous is not None and pose_id != previous,
+                })
+                switches += row["switch"]
+                previous = pose_id
+            f.write(json.dumps(row, ensure_ascii=True) + "\n")
+    matched = sum(1 for choice in path if choice is not None)
+    print(f"Wrote: {output_path}")
+    print(f"Frames: {len(rows)} (matched {matched}), pose switches: {switches}")
+
+
+def run(pose_json, library_path, output_path, pose_type, object_id, min_conf, top_k, use_npy=True, rebuild=False,
+        nprobe=0):
     if not os.path.exists(pose_json):
         print(f"Pose JSON not found: {pose_json}")
         return
@@ -196,8 +423,7 @@ def run(pose_json, library_path, output_path, pose_type, object_id, min_conf, to
         print(f"Pose library not found: {library_path}")
         return
 
-    data = load_json(pose_json)
-    selected = select_object(data, object_id)
+    selected = select_object(iter_json_entries(pose_json), object_id)
     if not selected:
         print("No pose object found.")
         return
@@ -211,31 +437,15 @@ def run(pose_json, library_path, output_path, pose_type, object_id, min_conf, to
     points, _ = normalize_points(points, min_conf=min_conf)
     derived_tags = derive_tags(points, min_conf=min_conf)
 
-    library = load_json(library_path)
-    poses = library.get("poses", [])
-    scored = []
-    used_keypoints = False
-    for pose in poses:
-        kp = pose.get("keypoints")
-        if not kp:
-            continue
-        used_keypoints = True
-        pose_points = [(float(x), float(y), float(z), float(conf)) for x, y, z, conf in kp]
-        pose_points, _ = normalize_points(pose_points, min_conf=min_conf)
-        dist = pose_distance(points, pose_points, min_conf=min_conf)
-        if dist is None:
-            continue
-        scored.append((dist, pose))
+    scored = match_keypoints_npy(points, library_path, min_conf, top_k, rebuild, nprobe) if use_npy else None
+    if scored is None:
+        scored = match_keypoints(points, load_json(library_path).get("poses", []), min_conf, top_k)
 
-    if used_keypoints and scored:
-        scored.sort(key=lambda item: item[0])
-        top = scored[:top_k]
-        matches = [
-            {"pose_id": item[1]["pose_id"], "score": item[0], "tags": item[1].get("tags", [])}
-            for item in top
-        ]
+    if scored:
+        matches = [{"pose_id": pose_id, "score": score, "tags": tags} for score, pose_id, tags in scored]
         method = "keypoint"
     else:
+        poses = load_json(library_path).get("poses", [])
         tag_matches = match_by_tags(poses, derived_tags)
         top = tag_matches[:top_k]
         matches = [
@@ -266,21 +476,57 @@ def main():
     parser = argparse.ArgumentParser(description="Match a DeepStream pose to a pose catalog.")
     parser.add_argument("--pose-json", required=True, help="DeepStream pose JSON (pose25d/pose3d).")
     parser.add_argument("--library", default=DEFAULT_LIBRARY, help="Pose catalog JSON.")
-    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Output match JSON.")
+    parser.add_argument("--output", default=None, help="Output match JSON (clip mode: track JSONL).")
     parser.add_argument("--pose-type", default="pose3d", choices=["pose3d", "pose25d"])
     parser.add_argument("--object-id", type=int, default=None)
     parser.add_argument("--min-conf", type=float, default=0.15)
     parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--no-npy", action="store_true", help="Skip the compiled .npy library (pure-Python scan).")
+    parser.add_argument("--rebuild", action="store_true", help="Recompile the .npy library before matching.")
+    parser.add_argument(
+        "--ann",
+        action="store_true",
+        help="Search the IVF index (<catalog>.ivf.npz, built on demand) instead of scanning every pose.",
+    )
+    parser.add_argument("--nprobe", type=int, default=pose_ann.DEFAULT_NPROBE, help="IVF lists probed per query.")
+    parser.add_argument("--clip", action="store_true", help="Match every frame and write a smoothed pose-ID track (JSONL).")
+    parser.add_argument("--stride", type=int, default=1, help="Clip mode: match every Nth frame.")
+    parser.add_argument("--candidates", type=int, default=20, help="Clip mode: candidate poses kept per frame.")
+    parser.add_argument(
+        "--switch-penalty",
+        type=float,
+        default=0.05,
+        help="Clip mode: cost of changing pose between matched frames (same units as the match score).",
+    )
     args = parser.parse_args()
 
+    if args.clip:
+        run_clip(
+            pose_json=args.pose_json,
+            library_path=args.library,
+            output_path=args.output or DEFAULT_CLIP_OUTPUT,
+            pose_type=args.pose_type,
+            object_id=args.object_id,
+            min_conf=args.min_conf,
+            candidates=args.candidates,
+            stride=args.stride,
+            switch_penalty=args.switch_penalty,
+            rebuild=args.rebuild,
+            nprobe=args.nprobe if args.ann else 0,
+        )
+        return
+
     run(
         pose_json=args.pose_json,
         library_path=args.library,
-        output_path=args.output,
+        output_path=args.output or DEFAULT_OUTPUT,
         pose_type=args.pose_type,
         object_id=args.object_id,
         min_conf=args.min_conf,
         top_k=args.top_k,
+        use_npy=not args.no_npy,
+        rebuild=args.rebuild,
+        nprobe=args.nprobe if args.ann else 0,
     )
 
 
@@ -0,0 +1,352 @@
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+
+# Token-budgeted prompt context for drehbuch*.py and audio_agent.py: instead of inlining every knowledge base
+# file, each section keeps only the passages that best match the chapter (BM25 over paragraphs, or the RAG
+# collection when a config is given), in their original order. Assembled sections are cached by content digest.
+
+CHARS_PER_TOKEN = 4
+DEFAULT_PASSAGE_CHARS = 800
+MIN_TERM_LENGTH = 3
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Section -> token budget (None keeps the section whole). KB keys match load_knowledge_base().
+DEFAULT_BUDGETS = {
+    "TECH_STACK": 500,
+    "LOCATIONS": 1200,
+    "HENOCH_EVO": 900,
+    "ACTOR_DB": 1500,
+    "AUDIO_SPECS": 800,
+    "SERIES_BIBLE": 1200,
+    "AZAZEL_SPECS": 600,
+    "FORMAT_TEMPLATE": None,
+    "analysis": 1500,
+    "concept": 2000,
+    "structure": None,
+    "existing_script": 4000,
+    "concept_excerpt": 300,
+    "chapter_excerpt": 300,
+}
+
+# KB key -> file name, as indexed by rag_indexer.py (kind "repo_doc", payload "source").
+KB_SOURCES = {
+    "AUDIO_SPECS": "audiomapping.md",
+    "ACTOR_DB": "main-actors.md",
+    "HENOCH_EVO": "Henochs_evolution.md",
+    "SERIES_BIBLE": "Henoch_Series_Bible.md",
+    "AZAZEL_SPECS": "azazeh.md",
+    "LOCATIONS": "environments.md",
+    "TECH_STACK": "schematische zusammenfassung für alle funktionsgruppen.md",
+    "FORMAT_TEMPLATE": "adobe_drehbuch.md",
+}
+
+ANALYSIS_KEYS = ("analysis_linguistik", "tech_hypothesen", "visual_abc", "einleitung", "integration_wave")
+TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def estimate_tokens(text) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN if text else 0
+
+
+def text_digest(text) -> str:
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+def terms(text) -> list[str]:
+    return [term for term in TERM_RE.findall((text or "").lower()) if len(term) >= MIN_TERM_LENGTH and not term.isdigit()]
+
+
+def split_passages(text, max_chars: int = DEFAULT_PASSAGE_CHARS) -> list[str]:
+    """Paragraphs (blank-line separated) merged up to `max_chars`; a new markdown heading always starts a passage."""
+    passages = []
+    buffer = ""
+    for paragraph in (part.strip() for part in re.split(r"\n\s*\n", text or "")):
+        if not paragraph:
+            continue
+        if buffer and not paragraph.startswith("#") and len(buffer) + 2 + len(paragraph) <= max_chars:
+            buffer = f"{buffer}\n\n{paragraph}"
+            continue
+        if buffer:
+            passages.append(buffer)
+        buffer = paragraph
+    if buffer:
+        passages.append(buffer)
+    # Oversized paragraphs are cut on line breaks so a single huge block cannot eat a whole budget.
+    result = []
+    for passage in passages:
+        if len(passage) <= max_chars * 2:
+            result.append(passage)
+            continue
+        chunk = ""
+        for line in passage.splitlines():
+            if chunk and len(chunk) + 1 + len(line) > max_chars:
+                result.append(chunk)
+                chunk = line
+            else:
+                chunk = f"{chunk}\n{line}" if chunk else line
+        if chunk:
+            result.append(chunk)
+    return result
+
+
+class LexicalIndex:
+    """BM25 over the passages of one document."""
+
+    def __init__(self, passages: list[str]):
+        self.passages = passages
+        self.lengths = []
+        self.postings = {}
+        for pid, passage in enumerate(passages):
+            counts = Counter(terms(passage))
+            self.lengths.append(sum(counts.values()))
+            for term, count in counts.items():
+                self.postings.setdefault(term, []).append((pid, count))
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+
+    def scores(self, query) -> list[float]:
+        """BM25 score per passage; repeated query terms weigh log-scaled."""
+        scores = [0.0] * len(self.passages)
+        count = len(self.passages)
+        if not count or not self.avg_length:
+            return scores
+        for term, query_count in Counter(terms(query)).items():
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1.0 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            weight = idf * (1.0 + math.log(query_count))
+            for pid, tf in postings:
+                norm = BM25_K1 * (1.0 - BM25_B + BM25_B * self.lengths[pid] / self.avg_length)
+                scores[pid] += weight * tf * (BM25_K1 + 1.0) / (tf + norm)
+        return scores
+
+
+def pack_passages(passages: list[str], ranking: list[int], budget: int) -> str:
+    """Take passages in `ranking` order while they fit `budget` tokens, then restore document order."""
+    chosen = []
+    used = 0
+    for pid in ranking:
+        cost = estimate_tokens(passages[pid]) + 1
+        if used + cost > budget:
+            continue
+        chosen.append(pid)
+        used += cost
+    if not chosen and ranking:
+        # Nothing fits whole: cut the best passage instead of returning an empty section.
+        return passages[ranking[0]][:budget * CHARS_PER_TOKEN].rstrip() + " ..."
+    return "\n\n".join(passages[pid] for pid in sorted(chosen))
+
+
+def rag_retriever(config_path, limit: int = 24):
+    """query -> [(source file name, text), ...] from the Qdrant collection built by rag_indexer.py."""
+    from rag_query import search
+    from rag_utils import load_config
+
+    config = load_config(config_path)
+
+    def retrieve(query):
+        hits = search(config, query, "", "", "repo_doc", limit)
+        return [
+            ((hit.get("payload") or {}).get("source", ""), (hit.get("payload") or {}).get("text", ""))
+            for hit in hits
+        ]
+
+    return retrieve
+
+
+def parse_budgets(spec) -> dict:
+    """'ACTOR_DB=800,existing_script=none' -> overrides for DEFAULT_BUDGETS."""
+    budgets = {}
+    for part in (spec or "").split(","):
+        if not part.strip():
+            continue
+        key, _, value = part.partition("=")
+        value = value.strip().lower()
+        budgets[key.strip()] = None if value in ("", "none", "full") else int(value)
+    return budgets
+
+
+class ContextAssembler:
+    """Budgets prompt sections; thread-safe so drehbuch_batch.py can share one across chapters."""
+
+    def __init__(self, budgets=None, retriever=None, cache_path=None, passage_chars: int = DEFAULT_PASSAGE_CHARS):
+        self.budgets = dict(DEFAULT_BUDGETS)
+        self.budgets.update(budgets or {})
+        self.retriever = retriever
+        self.passage_chars = passage_chars
+        self.cache_path = cache_path
+        self.cache = {}
+        self.dirty = False
+        self.indexes = {}
+        self.lock = threading.Lock()
+        self.stats = {"sections": 0, "cached": 0, "tokens_in": 0, "tokens_out": 0}
+        if cache_path and os.path.exists(cache_path):
+            try:
+                with open(cache_path, "r", encoding="utf-8") as f:
+                    self.cache = json.load(f)
+            except (OSError, ValueError):
+                self.cache = {}
+
+    def budget(self, name):
+        return self.budgets.get(name)
+
+    def _index(self, text) -> LexicalIndex:
+        key = text_digest(text)
+        with self.lock:
+            index = self.indexes.get(key)
+        if index is None:
+            index = LexicalIndex(split_passages(text, self.passage_chars))
+            with self.lock:
+                self.indexes[key] = index
+        return index
+
+    def _retrieved(self, name, query):
+        """Texts the RAG collection returned for this KB section, best first (empty without a retriever)."""
+        source = KB_SOURCES.get(name)
+        if not self.retriever or not source:
+            return []
+        try:
+            hits = self.retriever(query[:4000])
+        except Exception as exc:  # pylint: disable=broad-except
+            print(f"RAG nicht erreichbar ({type(exc).__name__}: {exc}), nutze lokalen Index.")
+            self.retriever = None
+            return []
+        return [text for hit_source, text in hits if hit_source == source and text]
+
+    def select(self, name, text, query, budget="default") -> str:
+        """The passages of `text` most relevant to `query` within the section budget (whole text if it fits)."""
+        budget = self.budget(name) if budget == "default" else budget
+        if not text or budget is None or estimate_tokens(text) <= budget:
+            return text
+        key = text_digest("\x1f".join([name, str(budget), text_digest(text), text_digest(query), str(bool(self.retriever))]))
+        with self.lock:
+            self.stats["sections"] += 1
+            self.stats["tokens_in"] += estimate_tokens(text)
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.stats["cached"] += 1
+                self.stats["tokens_out"] += estimate_tokens(cached)
+                return cached
+        retrieved = self._retrieved(name, query)
+        if retrieved:
+            selected = pack_passages(retrieved, list(range(len(retrieved))), budget)
+        else:
+            index = self._index(text)
+            scores = index.scores(query)
+            # Unmatched passages keep document order, so a query without hits degrades to a head excerpt.
+            ranking = sorted(range(len(scores)), key=lambda pid: (-scores[pid], pid))
+            selected = pack_passages(index.passages, ranking, budget)
+        with self.lock:
+            self.cache[key] = selected
+            self.dirty = True
+            self.stats["tokens_out"] += estimate_tokens(selected)
+        return selected
+
+    def kb_view(self, kb: dict, query) -> dict:
+        return {key: self.select(key, value, query) for key, value in kb.items()}
+
+    def data_view(self, data: dict, query) -> dict:
+        """Chapter data with the analysis texts budgeted; chapter text and verses stay whole (source of truth)."""
+        view = dict(data)
+        for key in ANALYSIS_KEYS:
+            if view.get(key):
+                view[key] = self.select("analysis", view[key], query)
+        return view
+
+    def save(self) -> None:
+        if not self.cache_path or not self.dirty:
+            return
+        # Write and replace under the lock: drehbuch_batch.py saves from several threads through one tmp path.
+        with self.lock:
+            payload = json.dumps(self.cache, ensure_ascii=False)
+            self.dirty = False
+            os.makedirs(os.path.dirname(os.path.abspath(self.cache_path)), exist_ok=True)
+            tmp_path = self.cache_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(payload)
+            os.replace(tmp_path, self.cache_path)
+
+
+def chapter_query(data: dict) -> str:
+    """Retrieval query for a chapter: its text, verses and analyses."""
+    parts = [data.get("raw_text", "")]
+    parts.extend((data.get("verses") or {}).values())
+    parts.extend(data.get(key, "") for key in ANALYSIS_KEYS)
+    return "\n".join(part for part in parts if part)
+
+
+def stage_inputs(assembler, stage, data, kb, concept=None, structure=None, existing=None) -> dict:
+    """Budgeted inputs for one drehbuch stage ("concept", "structure" or "production").
+
+    The chapter text drives KB retrieval for concept/structure; production retrieves against the structure,
+    which names the actors, locations and sounds the final prompts need.
+    """
+    if assembler is None:
+        return {"data": data, "kb": kb, "concept": concept, "structure": structure, "existing": existing}
+    query = chapter_query(data)
+    if stage == "structure" and concept:
+        query = f"{concept}\n{query}"
+    elif stage == "production" and structure:
+        query = structure
+    return {
+        "data": assembler.data_view(data, query),
+        "kb": assembler.kb_view(kb, query),
+        "concept": assembler.select("concept", concept, query) if stage == "production" else concept,
+        "structure": assembler.select("structure", structure, query),
+        "existing": assembler.select("concept" if stage == "concept" else "existing_script", existing, query),
+    }
+
+
+def add_arguments(parser) -> None:
+    """The --context-budget flags shared by drehbuch*.py and drehbuch_batch.py."""
+    parser.add_argument("--context-budget", action="store_true", help="Budget KB/analysis sections (relevant passages only).")
+    parser.add_argument("--budgets", default="", help="Overrides, e.g. 'ACTOR_DB=800,existing_script=none' (tokens).")
+    parser.add_argument("--rag-config", default="", help="Retrieve KB passages from the RAG collection (rag_config.json).")
+    parser.add_argument("--context-cache", default="", help="Assembled context cache JSON (default: <root>/.prompt_context_cache.json).")
+
+
+def context_settings(args):
+    """The --context-budget flags as checkpoint settings; None when budgeting is off."""
+    if not args.context_budget:
+        return None
+    return {
+        "budgets": parse_budgets(args.budgets),
+        "rag_config": os.path.abspath(args.rag_config) if args.rag_config else "",
+    }
+
+
+def assembler_from_args(args, root_path):
+    if not args.context_budget:
+        return None
+    retriever = rag_retriever(args.rag_config) if args.rag_config else None
+    cache_path = args.context_cache or os.path.join(root_path, ".prompt_context_cache.json")
+    return ContextAssembler(parse_budgets(args.budgets), retriever=retriever, cache_path=cache_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Preview a budgeted KB section for a query (no LLM call).")
+    parser.add_argument("file", help="Knowledge base file (markdown/text).")
+    parser.add_argument("--query", required=True, help="Query text, or @path to read it from a file.")
+    parser.add_argument("--budget", type=int, default=800, help="Token budget.")
+    args = parser.parse_args()
+
+    with open(args.file, "r", encoding="utf-8") as f:
+        text = f.read()
+    query = args.query
+    if query.startswith("@"):
+        with open(query[1:], "r", encoding="utf-8") as f:
+            query = f.read()
+    selected = ContextAssembler().select("preview", text, query, budget=args.budget)
+    print(selected)
+    print(f"\n--- {estimate_tokens(text)} -> {estimate_tokens(selected)} tokens ---")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,8 @@ import os
 import unicodedata
 import time
 
+from fs_snapshot import FsSnapshot
+
 ROOT_PATH = os.path.dirname(os.path.abspath(__file__))
 DEFAULT_CONFIG = os.path.join(ROOT_PATH, "prop_audit_config.json")
 
@@ -51,11 +53,12 @@ def ascii_label(value):
     return unicodedata.normalize("NFKD", str(value or "")).encode("ascii", "ignore").decode("ascii")
 
 
-def count_images(folder, prefix, exts):
-    if not os.path.isdir(folder):
+def count_images(folder, prefix, exts, fs=None):
+    fs = fs or FsSnapshot()
+    if not fs.isdir(folder):
         return 0
     count = 0
-    for name in os.listdir(folder):
+    for name in fs.listdir(folder):
         if not name.lower().endswith(tuple(exts)):
             continue
         if prefix and not name.startswith(prefix):
@@ -64,7 +67,8 @@ def count_images(folder, prefix, exts):
     return count
 
 
-def build_audit(config, queue):
+def build_audit(config, queue, fs=None):
+    fs = fs or FsSnapshot()
     groups = {}
     for item in queue or []:
         if not isinstance(item, dict):
@@ -91,7 +95,7 @@ def build_audit(config, queue):
             ROOT_PATH, "produced_assets", "lora_training", "actors", actor_slug, "props", prop_slug
         )
         prefix = f"prop__{prop_slug}__{actor_slug}"
-        image_count = count_images(output_dir, prefix, config["image_exts"])
+        image_count = count_images(output_dir, prefix, config["image_exts"], fs)
         status = "ok" if image_count >= entry["expected_images"] else "missing"
         results.append({
             "actor": entry["actor"],
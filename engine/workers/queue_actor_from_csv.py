@@ -10,12 +10,14 @@ from pathlib import Path
 
 import requests
 
+import comfy_preflight
+from json_blocks import find_json_spans
+
 ROOT = Path(__file__).resolve().parent
 DEFAULT_CSV = ROOT / "first_analysis_progress_python.csv"
 DEFAULT_WORKFLOW = ROOT / "workflows" / "flux_schnell.json"
 DEFAULT_COMFY_URL = "http://127.0.0.1:8188"
 
-JSON_BLOCK_RE = re.compile(r"```(?:json)?\s*([\[{].*?[\]}])\s*```", re.DOTALL | re.IGNORECASE)
 
 
 def find_node_by_title(workflow_json, title):
@@ -60,7 +62,11 @@ def load_workflow(path):
 
 
 def extract_json_blocks(text):
-    return [match.group(1) for match in JSON_BLOCK_RE.finditer(text or "")]
+    return [
+        span["text"]
+        for span in find_json_spans(text, fenced_only=True)
+        if span["tag"] in ("", "json")
+    ]
 
 
 def normalize_list(value):
@@ -215,6 +221,7 @@ def main():
     parser.add_argument("--sleep", type=float, default=0.2, help="Pause between queue calls")
     parser.add_argument("--dry-run", action="store_true", help="Print prompts without queueing")
     parser.add_argument("--out", default="", help="Optional JSON report path")
+    parser.add_argument("--no-preflight", action="store_true", help="Skip validating the workflow against /object_info")
     args = parser.parse_args()
 
     csv_path = Path(args.csv)
@@ -223,6 +230,12 @@ def main():
 
     workflow_path = resolve_workflow_path(args.workflow)
     base_workflow = load_workflow(workflow_path)
+    # Every job is the same workflow with other texts: one check before anything is queued.
+    if not args.dry_run and not args.no_preflight:
+        preflight_errors = comfy_preflight.Preflight(args.comfy_url).check(base_workflow, ["MASTER_PROMPT"])
+        if preflight_errors:
+            comfy_preflight.report(preflight_errors, str(workflow_path))
+            raise SystemExit(1)
 
     chapter_filter = parse_chapter_filter(args.chapter)
     status_filter = None if args.status.strip().lower() == "all" else args.status.strip().lower()
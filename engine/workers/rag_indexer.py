@@ -6,6 +6,7 @@ import re
 import time
 import uuid
 
+from filmsets_catalog import find_files
 from rag_utils import load_config, embed_texts, request_json, qdrant_headers
 
 ROOT_PATH = os.path.dirname(os.path.abspath(__file__))
@@ -127,10 +128,12 @@ def parse_script_scenes(content):
 
 
 def find_analysis_files(chapter_path):
-    for dirpath, dirnames, filenames in os.walk(chapter_path):
-        dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
-        if "analysis_llm.txt" in filenames:
-            yield os.path.join(dirpath, "analysis_llm.txt")
+    yield from find_files(
+        FILMSETS_PATH,
+        name="analysis_llm.txt",
+        under=os.path.relpath(chapter_path, FILMSETS_PATH).replace(os.sep, "/"),
+        skip_dirs=SKIP_DIRS,
+    )
 
 
 def detect_scene_from_filename(filename):
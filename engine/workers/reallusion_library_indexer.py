@@ -4,6 +4,8 @@ import os
 import time
 from pathlib import Path
 
+from filmsets_catalog import DEFAULT_WORKERS, SKIP_DIRS, default_cache_dir, default_cache_path, load_catalog
+
 
 DEFAULT_LIBRARY_ROOT = Path(
     os.environ.get("REALLUSION_LIBRARY_ROOT", r"C:\Users\Public\Documents\Reallusion")
@@ -38,42 +40,63 @@ def normalize_extensions(raw: str | None) -> set[str] | None:
     return items or None
 
 
-def iter_assets(root: Path, include_unknown: bool, extensions: set[str] | None):
+def split_suffix(name: str) -> tuple[str, str]:
+    """(stem, suffix) with pathlib semantics, without building a Path per file."""
+    idx = name.rfind(".")
+    if 0 < idx < len(name) - 1:
+        return name[:idx], name[idx:]
+    return name, ""
+
+
+def iter_assets(
+    root: Path,
+    include_unknown: bool,
+    extensions: set[str] | None,
+    manifest_path: Path | None = None,
+    workers: int = 1,
+    verify_files: bool = False,
+):
+    """Catalog entries (rel_path, rel_dir, name, size, mtime) of indexable assets under `root`.
+
+    The tree is listed through the shared scandir manifest, so re-runs only rescan directories
+    whose mtime changed and every file is stat'ed once; `verify_files` re-stats files in
+    unchanged directories so assets overwritten in place get fresh size/mtime.
+    """
     if not root.exists():
         return []
     items = []
-    for path in sorted(root.rglob("*")):
-        if not path.is_file():
-            continue
-        ext = path.suffix.lower()
+    catalog = load_catalog(
+        root, cache_path=manifest_path, skip_dirs=SKIP_DIRS, verify_files=verify_files, use_memo=False, workers=workers
+    )
+    for entry in catalog:
+        ext = split_suffix(entry["name"])[1].lower()
         if extensions is not None:
             if ext not in extensions:
                 continue
         elif ext not in EXTENSION_MAP:
             if not include_unknown or not ext.startswith(".i"):
                 continue
-        items.append(path)
+        items.append(entry)
     return items
 
 
-def build_entry(path: Path, root: Path):
-    rel = path.relative_to(root)
-    ext = path.suffix.lower()
+def build_entry(asset: dict):
+    rel_path = asset["rel_path"]
+    stem, ext = split_suffix(asset["name"])
+    ext = ext.lower()
     meta = EXTENSION_MAP.get(ext, {"category": "unknown", "asset_type": "unknown"})
-    folder = "/".join(rel.parts[:-1])
-    collection = rel.parts[0] if rel.parts else ""
     return {
-        "id": rel.as_posix(),
-        "name": path.stem,
-        "label": path.stem.replace("_", " "),
-        "path": rel.as_posix(),
+        "id": rel_path,
+        "name": stem,
+        "label": stem.replace("_", " "),
+        "path": rel_path,
         "ext": ext,
         "category": meta["category"],
         "asset_type": meta["asset_type"],
-        "collection": collection,
-        "folder": folder,
-        "size_bytes": path.stat().st_size,
-        "modified_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(path.stat().st_mtime)),
+        "collection": rel_path.split("/", 1)[0],
+        "folder": asset["rel_dir"],
+        "size_bytes": asset["size"],
+        "modified_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(asset["mtime"])),
         "tags": [],
     }
 
@@ -86,39 +109,67 @@ def summarize(entries):
     return counts
 
 
+def write_jsonl(path: Path, header: dict, entries) -> None:
+    """Header line (counts, roots) followed by one asset per line; written via a temp file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
+        f.write(json.dumps(header, ensure_ascii=False) + "\n")
+        for entry in entries:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    os.replace(tmp_path, path)
+
+
 def main():
     parser = argparse.ArgumentParser(description="Index Reallusion library assets into a JSON catalog.")
     parser.add_argument("--library-root", help="Reallusion library root path.")
-    parser.add_argument("--output", help="Output JSON path.")
+    parser.add_argument("--output", help=f"Output JSON path (default: <data_root>/cache/{DEFAULT_INDEX_NAME}).")
     parser.add_argument(
         "--extensions",
         help="Comma-separated extensions to include (overrides defaults). Example: imd,imddata,italk",
     )
     parser.add_argument("--include-unknown", action="store_true", help="Include unknown .i* extensions.")
+    parser.add_argument(
+        "--manifest",
+        help="Directory manifest for incremental re-runs (default: per-root manifest in <data_root>/cache).",
+    )
+    parser.add_argument(
+        "--verify-files", action="store_true", help="Re-stat files in unchanged directories (assets overwritten in place)."
+    )
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Threads listing directories (1 = serial).")
+    parser.add_argument("--jsonl", action="store_true", help="Write JSONL (header line + one asset per line).")
     args = parser.parse_args()
 
     library_root = Path(args.library_root) if args.library_root else DEFAULT_LIBRARY_ROOT
-    output_path = Path(args.output) if args.output else library_root / DEFAULT_INDEX_NAME
+    default_name = DEFAULT_INDEX_NAME if not args.jsonl else DEFAULT_INDEX_NAME.replace(".json", ".jsonl")
+    # Nothing is written into the library tree: that would change its mtime and force a full rescan every run.
+    output_path = Path(args.output) if args.output else default_cache_dir() / default_name
+    manifest_path = Path(args.manifest) if args.manifest else default_cache_path(library_root)
     extensions = normalize_extensions(args.extensions)
 
     if not library_root.exists():
         raise SystemExit(f"Library root not found: {library_root}")
 
-    assets = iter_assets(library_root, args.include_unknown, extensions)
-    entries = [build_entry(path, library_root) for path in assets]
+    start = time.perf_counter()
+    assets = iter_assets(
+        library_root, args.include_unknown, extensions, manifest_path, workers=args.workers, verify_files=args.verify_files
+    )
+    entries = [build_entry(asset) for asset in assets]
     entries.sort(key=lambda item: item["id"])
 
-    payload = {
+    header = {
         "generated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
         "library_root": str(library_root),
         "index_root": str(output_path.parent),
         "counts": summarize(entries),
-        "items": entries,
     }
-
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    output_path.write_text(json.dumps(payload, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
-    print(f"Wrote Reallusion library index: {output_path}")
+    if args.jsonl:
+        write_jsonl(output_path, header, entries)
+    else:
+        payload = dict(header, items=entries)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path.write_text(json.dumps(payload, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    print(f"Wrote Reallusion library index: {output_path} ({len(entries)} assets, {time.perf_counter() - start:.1f} s)")
 
 
 if __name__ == "__main__":
@@ -3,6 +3,8 @@ import json
 import os
 import re
 
+from substring_index import SubstringIndex
+
 ROOT_PATH = os.path.abspath(os.path.dirname(__file__))
 DEFAULT_SCRIPT = os.path.join(ROOT_PATH, "filmsets")
 ASSET_BIBLE_PATH = os.path.join(ROOT_PATH, "ASSET_BIBLE.md")
@@ -236,40 +238,45 @@ def parse_regie_json(block):
     return regie_line, None
 
 
-def find_asset_matches(block_text, regie_data, assets):
-    matches = []
+def build_asset_matcher(assets):
+    """Index asset ids/names once so each scene is matched without looping over every asset."""
+    text_index = SubstringIndex()
+    norm_index = SubstringIndex()
+    for idx, asset in enumerate(assets or []):
+        text_index.add(asset["id"].lower(), idx)
+        text_index.add(asset["name"].lower(), idx)
+        norm_index.add(asset["name_norm"], idx)
+    return {"text": text_index, "norm": norm_index}
+
+
+def build_folder_matcher(folder_index):
+    return SubstringIndex((slug, slug) for slug in folder_index or {})
+
+
+def find_asset_matches(block_text, regie_data, assets, matcher=None):
     if not assets:
-        return matches
-    scene_text = block_text.lower()
+        return []
+    matcher = matcher or build_asset_matcher(assets)
     props = regie_data.get("props") or []
     env_name = regie_data.get("environment") or ""
     focus_tokens = [p for p in props if p] + ([env_name] if env_name else [])
     focus_norms = [normalize_token(t) for t in focus_tokens if t]
 
-    for asset in assets:
-        name = asset["name"].lower()
-        asset_id = asset["id"].lower()
-        if asset_id and asset_id in scene_text:
-            matches.append(asset)
-            continue
-        if name and name in scene_text:
-            matches.append(asset)
-            continue
-        for token_norm in focus_norms:
-            if not token_norm:
-                continue
-            if token_norm in asset["name_norm"] or asset["name_norm"] in token_norm:
-                matches.append(asset)
-                break
+    text_index = matcher["text"]
+    norm_index = matcher["norm"]
+    hits = set(text_index.payloads(text_index.occurring_in(block_text.lower())))
+    for token_norm in focus_norms:
+        hits.update(norm_index.payloads(norm_index.related(token_norm)))
     unique = {}
-    for asset in matches:
-        unique[asset["id"]] = asset
+    for idx in sorted(hits):
+        unique[assets[idx]["id"]] = assets[idx]
     return list(unique.values())
 
 
-def match_folder_assets(regie_data, folder_index):
+def match_folder_assets(regie_data, folder_index, matcher=None):
     if not folder_index:
         return []
+    matcher = matcher or build_folder_matcher(folder_index)
     tokens = []
     for name in extract_actor_names(regie_data):
         tokens.append(normalize_token(name))
@@ -279,18 +286,15 @@ def match_folder_assets(regie_data, folder_index):
     env_name = regie_data.get("environment") or ""
     tokens.append(normalize_token(env_name))
     tokens = [t for t in tokens if t]
-    matches = []
-    for token in tokens:
-        for slug, entry in folder_index.items():
-            if token in slug or slug in token:
-                matches.append({
-                    "slug": slug,
-                    "categories": sorted(entry["categories"]),
-                    "ids": sorted(entry["ids"]),
-                })
     unique = {}
-    for match in matches:
-        unique[match["slug"]] = match
+    for token in tokens:
+        for slug in matcher.payloads(matcher.related(token)):
+            entry = folder_index[slug]
+            unique[slug] = {
+                "slug": slug,
+                "categories": sorted(entry["categories"]),
+                "ids": sorted(entry["ids"]),
+            }
     return list(unique.values())
 
 def extract_actor_names(regie_data):
@@ -490,12 +494,14 @@ def update_block(
     max_actions=6,
     max_snippets=4,
     snippet_chars=500,
+    asset_matcher=None,
+    folder_matcher=None,
 ):
     regie_line, regie_data = parse_regie_json(block)
     if not regie_line or not regie_data:
         return block, False
-    matches = find_asset_matches(block, regie_data, assets)
-    folder_matches = match_folder_assets(regie_data, folder_index)
+    matches = find_asset_matches(block, regie_data, assets, matcher=asset_matcher)
+    folder_matches = match_folder_assets(regie_data, folder_index, matcher=folder_matcher)
     regie_data, changed = merge_context(
         regie_data,
         matches,
@@ -549,7 +555,11 @@ def process_script(
     max_actions=6,
     max_snippets=4,
     snippet_chars=500,
+    asset_matcher=None,
+    folder_matcher=None,
 ):
+    asset_matcher = asset_matcher or build_asset_matcher(assets)
+    folder_matcher = folder_matcher or build_folder_matcher(folder_index)
     blocks = script_text.split("\n---")
     updated_blocks = []
     changed = 0
@@ -571,6 +581,8 @@ def process_script(
             max_actions=max_actions,
             max_snippets=max_snippets,
             snippet_chars=snippet_chars,
+            asset_matcher=asset_matcher,
+            folder_matcher=folder_matcher,
         )
         if updated:
             changed += 1
@@ -605,6 +617,8 @@ def main():
     actor_map = load_full_actor_db(args.full_actor_db)
     scene_index = load_scene_master_db(args.scene_master_db)
     export_map = load_full_export_csv(args.full_export)
+    asset_matcher = build_asset_matcher(assets)
+    folder_matcher = build_folder_matcher(folder_index)
 
     chapters = list_chapters(args.base_path, args.chapters)
     for chapter in chapters:
@@ -628,6 +642,8 @@ def main():
             max_actions=args.max_scene_actions,
             max_snippets=args.max_snippets,
             snippet_chars=args.snippet_chars,
+            asset_matcher=asset_matcher,
+            folder_matcher=folder_matcher,
         )
         if args.dry_run:
             print(f"[DRY] {chapter}: {changed} scene(s) would be updated.")
@@ -4,6 +4,8 @@ import json
 import os
 import re
 
+from json_blocks import find_json_spans, repair_json_text
+
 
 def parse_args():
     parser = argparse.ArgumentParser(
@@ -40,101 +42,11 @@ def parse_args():
 
 
 def extract_json_block(text):
-    fenced = extract_fenced_block(text, "json") or extract_fenced_block(text, None)
+    spans = [span for span in find_json_spans(text) if span["text"].startswith("{")]
+    fenced = [span for span in spans if span["fenced"]]
     if fenced:
-        return fenced.strip() or None
-    return extract_balanced_from_text(text)
-
-
-def extract_fenced_block(text, fence_tag):
-    if fence_tag:
-        pattern = r"```%s\s*(.*?)```" % re.escape(fence_tag)
-    else:
-        pattern = r"```\s*(.*?)```"
-    match = re.search(pattern, text, re.DOTALL)
-    if not match:
-        return None
-    return match.group(1)
-
-
-def extract_balanced_from_text(text):
-    for start in range(len(text)):
-        if text[start] != "{":
-            continue
-        end = find_balanced_json(text, start)
-        if end is None:
-            continue
-        candidate = text[start : end + 1]
-        return candidate
-    return None
-
-
-def find_balanced_json(text, start_idx):
-    depth = 0
-    in_string = False
-    escape = False
-    for i in range(start_idx, len(text)):
-        ch = text[i]
-        if in_string:
-            if escape:
-                escape = False
-            elif ch == "\\":
-                escape = True
-            elif ch == "\"":
-                in_string = False
-            continue
-        if ch == "\"":
-            in_string = True
-        elif ch == "{":
-            depth += 1
-        elif ch == "}":
-            depth -= 1
-            if depth == 0:
-                return i
-    return None
-
-
-def fix_mismatched_brackets(text):
-    chars = list(text)
-    stack = []
-    in_string = False
-    escape = False
-    changes = []
-    for i, ch in enumerate(chars):
-        if in_string:
-            if escape:
-                escape = False
-            elif ch == "\\":
-                escape = True
-            elif ch == "\"":
-                in_string = False
-            continue
-        if ch == "\"":
-            in_string = True
-            continue
-        if ch in "{[":
-            stack.append(ch)
-            continue
-        if ch in "}]":
-            if not stack:
-                continue
-            expected = "}" if stack[-1] == "{" else "]"
-            if ch != expected:
-                changes.append({"pos": i, "from": ch, "to": expected})
-                chars[i] = expected
-            stack.pop()
-    return "".join(chars), changes
-
-
-def repair_json_text(text):
-    cleaned = text.strip().replace("\ufeff", "")
-    if "\u201c" in cleaned or "\u201d" in cleaned:
-        cleaned = cleaned.replace("\u201c", "\"").replace("\u201d", "\"")
-    if "\u2018" in cleaned or "\u2019" in cleaned:
-        cleaned = cleaned.replace("\u2018", "'").replace("\u2019", "'")
-    cleaned = re.sub(r",(\s*[}\]])", r"\\1", cleaned)
-    cleaned, bracket_changes = fix_mismatched_brackets(cleaned)
-    return cleaned, bracket_changes
+        return min(fenced, key=lambda span: span["tag"] != "json")["text"]
+    return spans[0]["text"] if spans else None
 
 
 def parse_log(log_path):
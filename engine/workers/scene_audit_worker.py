@@ -5,6 +5,8 @@ import os
 import re
 import time
 
+from fs_snapshot import FsSnapshot
+
 ROOT_PATH = os.path.dirname(os.path.abspath(__file__))
 FILMSETS_PATH = os.path.join(ROOT_PATH, "filmsets")
 DEFAULT_CONFIG = os.path.join(ROOT_PATH, "scene_audit_config.json")
@@ -95,11 +97,11 @@ def load_config(path):
         return {}
 
 
-def apply_patterns(patterns, values):
+def apply_patterns(patterns, values, fs=None):
     matches = []
     for pattern in patterns:
         resolved = pattern.format(**values)
-        matches.extend(glob.glob(resolved))
+        matches.extend(fs.glob(resolved) if fs else glob.glob(resolved))
     return sorted(set(matches))
 
 
@@ -134,7 +136,7 @@ def resolve_requirements(regie, defaults):
     }
 
 
-def audit_scene(chapter, scene_id, block, config):
+def audit_scene(chapter, scene_id, block, config, fs=None):
     scene_dot, scene_tag = normalize_scene(scene_id)
     media_root = config.get("media_root", "filmsets/{chapter}/Media").format(chapter=chapter)
     patterns = config.get("patterns", {})
@@ -155,7 +157,7 @@ def audit_scene(chapter, scene_id, block, config):
         if not needed:
             found[key] = []
             continue
-        hits = apply_patterns(patterns.get(key, []), values)
+        hits = apply_patterns(patterns.get(key, []), values, fs)
         found[key] = hits
         if not hits:
             missing.append(key)
@@ -174,6 +176,16 @@ def audit_scene(chapter, scene_id, block, config):
     }
 
 
+def audit_chapter(chapter, config, fs=None):
+    """Scene audit results for a chapter, or None when it has no screenplay."""
+    fs = fs or FsSnapshot()
+    script_path = os.path.join(FILMSETS_PATH, chapter, "DREHBUCH_HOLLYWOOD.md")
+    if not fs.exists(script_path):
+        return None
+    scenes = split_scenes(read_text(script_path))
+    return [audit_scene(chapter, scene_id, block, config, fs) for scene_id, block in scenes]
+
+
 def write_outputs(chapter_path, results):
     audit_path = os.path.join(chapter_path, "scene_audit.json")
     summary_path = os.path.join(chapter_path, "scene_audit_summary.md")
@@ -201,15 +213,13 @@ def main():
 
     config = load_config(args.config)
     chapters = get_chapters(args.chapter)
+    fs = FsSnapshot()
 
     for chapter in chapters:
         chapter_path = os.path.join(FILMSETS_PATH, chapter)
-        script_path = os.path.join(chapter_path, "DREHBUCH_HOLLYWOOD.md")
-        if not os.path.exists(script_path):
+        results = audit_chapter(chapter, config, fs)
+        if results is None:
             continue
-        content = read_text(script_path)
-        scenes = split_scenes(content)
-        results = [audit_scene(chapter, scene_id, block, config) for scene_id, block in scenes]
 
         if args.dry_run:
             print(f"{chapter}: {len(results)} scenes audited")
@@ -1,8 +1,12 @@
 import argparse
 import json
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+from filmsets_catalog import filter_entries, load_catalog, story_cache_path
+from json_blocks import scan_pairs
 from visionexe_paths import load_story_config, resolve_path
 
 
@@ -12,6 +16,10 @@ SCENE_HEADER_RE = re.compile(
 )
 CHAPTER_RE = re.compile(r"chapter_(\d+)", re.IGNORECASE)
 
+# Bump when extract_regie_blocks/extract_json_after_marker output changes; invalidates the parse cache.
+PARSER_VERSION = 1
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
 
 def parse_timecode(value: str):
     if not value:
@@ -38,32 +46,13 @@ def extract_json_after_marker(text: str, marker: str):
     start = text.find("{", idx)
     if start == -1:
         return None
-    depth = 0
-    in_string = False
-    escape = False
-    for i in range(start, len(text)):
-        ch = text[i]
-        if in_string:
-            if escape:
-                escape = False
-            elif ch == "\\":
-                escape = True
-            elif ch == "\"":
-                in_string = False
-            continue
-        if ch == "\"":
-            in_string = True
-        elif ch == "{":
-            depth += 1
-        elif ch == "}":
-            depth -= 1
-            if depth == 0:
-                raw = text[start:i + 1]
-                try:
-                    return json.loads(raw)
-                except json.JSONDecodeError:
-                    return None
-    return None
+    span = scan_pairs(text, start, limit=1)[0]
+    if not span[3]:
+        return None
+    try:
+        return json.loads(text[start:span[1]])
+    except json.JSONDecodeError:
+        return None
 
 
 def extract_first_line(text: str, marker: str):
@@ -117,6 +106,41 @@ def extract_chapter_number(path: Path):
         return None
 
 
+def parse_screenplay(path_str: str) -> dict:
+    text = Path(path_str).read_text(encoding="utf-8")
+    return {
+        "chapter": extract_chapter_number(Path(path_str)),
+        "narrator_text": extract_first_line(text, "NARRATOR_TEXT:"),
+        "monologue_json": extract_json_after_marker(text, "MONOLOGUE_JSON"),
+        "scenes": extract_regie_blocks(text),
+    }
+
+
+def file_fingerprint(stat) -> list:
+    return [stat.st_size, stat.st_mtime_ns, PARSER_VERSION]
+
+
+def load_parse_cache(path: Path | None) -> dict:
+    if not path or not path.exists():
+        return {}
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            payload = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+    if payload.get("parser_version") != PARSER_VERSION:
+        return {}
+    return payload.get("files") or {}
+
+
+def save_parse_cache(path: Path, files: dict):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
+        json.dump({"parser_version": PARSER_VERSION, "files": files}, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
 def main():
     parser = argparse.ArgumentParser(description="Build scene_instructions.jsonl from screenplay REGIE_JSON blocks.")
     parser.add_argument("--story-root", help="Story root path (defaults to engine_config default_story_root).")
@@ -124,6 +148,9 @@ def main():
     parser.add_argument("--filmsets-root", help="Optional filmsets root path override.")
     parser.add_argument("--chapter", help="Limit to a chapter number (e.g. 18).")
     parser.add_argument("--output", help="Output JSONL path.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Process pool size for uncached screenplays (0/1 = serial).")
+    parser.add_argument("--parse-cache", help="Parse cache path (default: <data_root>/cache/scene_instruction_parse_cache.json).")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore and do not write the parse cache.")
     args = parser.parse_args()
 
     story_config, _, repo_root = load_story_config(
@@ -142,34 +169,67 @@ def main():
         if digits:
             chapter_filter = int(digits)
 
-    records = []
-    for path in filmsets_root.rglob("DREHBUCH_HOLLYWOOD.md"):
+    catalog_cache = story_cache_path(story_config, repo_root)
+    parse_cache_path = resolve_path(args.parse_cache, repo_root) if args.parse_cache else None
+    if not parse_cache_path and catalog_cache:
+        parse_cache_path = catalog_cache.parent / "scene_instruction_parse_cache.json"
+    parse_cache = {} if args.no_cache else load_parse_cache(parse_cache_path)
+
+    catalog = load_catalog(filmsets_root, cache_path=catalog_cache)
+    screenplays = []
+    for entry in filter_entries(catalog, name="DREHBUCH_HOLLYWOOD.md"):
+        path = Path(entry["path"])
         chapter = extract_chapter_number(path)
         if chapter_filter and chapter != chapter_filter:
             continue
-        text = path.read_text(encoding="utf-8")
-        narrator_text = extract_first_line(text, "NARRATOR_TEXT:")
-        monologue_json = extract_json_after_marker(text, "MONOLOGUE_JSON")
+        try:
+            # Re-stat the screenplay itself: in-place edits do not change the directory mtime.
+            stat = path.stat()
+        except OSError:
+            continue
+        screenplays.append((chapter or 0, str(path), file_fingerprint(stat)))
+    screenplays.sort()
+
+    parsed = {}
+    pending = []
+    for _, path_str, fingerprint in screenplays:
+        cached = parse_cache.get(path_str)
+        if cached and cached.get("fingerprint") == fingerprint:
+            parsed[path_str] = cached["result"]
+        else:
+            pending.append(path_str)
+
+    if pending:
+        if args.workers > 1 and len(pending) > 1:
+            with ProcessPoolExecutor(max_workers=min(args.workers, len(pending))) as pool:
+                results = pool.map(parse_screenplay, pending)
+                parsed.update(zip(pending, results))
+        else:
+            parsed.update((path_str, parse_screenplay(path_str)) for path_str in pending)
+
+    segment_padding = int(story_config.get("segment_index_padding", 3))
+    scene_padding = int(story_config.get("scene_index_padding", 3))
+    segment_label_name = story_config.get("segment_label", "segment")
+    scene_label_name = story_config.get("scene_label", "scene")
 
-        chapter_record = {
+    records = []
+    for _, path_str, fingerprint in screenplays:
+        result = parsed[path_str]
+        parse_cache[path_str] = {"fingerprint": fingerprint, "result": result}
+        chapter = result.get("chapter")
+        records.append({
             "record_type": "chapter",
             "chapter": chapter,
-            "source_path": str(path),
-            "narrator_text": narrator_text,
-            "monologue_json": monologue_json,
-        }
-        records.append(chapter_record)
-
-        scenes = extract_regie_blocks(text)
-        for scene in scenes:
+            "source_path": path_str,
+            "narrator_text": result.get("narrator_text"),
+            "monologue_json": result.get("monologue_json"),
+        })
+
+        for scene in result.get("scenes") or []:
             segment_label = ""
             scene_label = ""
             segment_index = scene.get("segment_index")
             scene_index = scene.get("scene_index")
-            segment_padding = int(story_config.get("segment_index_padding", 3))
-            scene_padding = int(story_config.get("scene_index_padding", 3))
-            segment_label_name = story_config.get("segment_label", "segment")
-            scene_label_name = story_config.get("scene_label", "scene")
             if segment_index is not None:
                 segment_label = f"{segment_label_name}_{segment_index:0{segment_padding}d}"
             if scene_index is not None:
@@ -204,16 +264,25 @@ def main():
                 "start_image_keywords": start_image_keywords,
                 "video_plan": video_plan,
                 "regie": regie,
-                "source_path": str(path),
+                "source_path": path_str,
             })
 
+    if parse_cache_path and not args.no_cache:
+        if chapter_filter is None:
+            live_paths = {path_str for _, path_str, _ in screenplays}
+            parse_cache = {key: value for key, value in parse_cache.items() if key in live_paths}
+        save_parse_cache(parse_cache_path, parse_cache)
+
     output_path = Path(output_path)
     output_path.parent.mkdir(parents=True, exist_ok=True)
     with output_path.open("w", encoding="utf-8") as f:
         for record in records:
             f.write(json.dumps(record, ensure_ascii=False) + "\n")
 
-    print(f"Wrote scene instructions: {output_path} ({len(records)} records)")
+    print(
+        f"Wrote scene instructions: {output_path} ({len(records)} records, "
+        f"{len(pending)} of {len(screenplays)} screenplays parsed)"
+    )
 
 
 if __name__ == "__main__":
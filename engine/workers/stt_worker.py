@@ -1,10 +1,24 @@
 import argparse
+import dataclasses
 import json
 import os
 import time
+from concurrent.futures import ProcessPoolExecutor
 from difflib import SequenceMatcher
 
+try:
+    from rapidfuzz.distance import Levenshtein as _rf_levenshtein
+except ImportError:
+    _rf_levenshtein = None
+
 SUPPORTED_EXTS = (".wav", ".mp3", ".m4a", ".flac", ".ogg", ".aac")
+BACKENDS = ("whisper", "faster-whisper")
+# Segment fields kept in the JSON (the openai-whisper layout); faster-whisper segments are mapped onto them.
+SEGMENT_KEYS = ("id", "seek", "start", "end", "text", "tokens", "temperature", "avg_logprob",
+                "compression_ratio", "no_speech_prob")
+
+# Per-process model, loaded once by init_worker and reused for every file of that worker.
+_WORKER = {}
 
 
 def normalize_text(text: str) -> str:
@@ -12,24 +26,39 @@ def normalize_text(text: str) -> str:
 
 
 def levenshtein_distance(ref_words, hyp_words):
-    rows = len(ref_words) + 1
-    cols = len(hyp_words) + 1
-    matrix = [[0] * cols for _ in range(rows)]
-
-    for i in range(rows):
-        matrix[i][0] = i
-    for j in range(cols):
-        matrix[0][j] = j
-
-    for i in range(1, rows):
-        for j in range(1, cols):
-            cost = 0 if ref_words[i - 1] == hyp_words[j - 1] else 1
-            matrix[i][j] = min(
-                matrix[i - 1][j] + 1,
-                matrix[i][j - 1] + 1,
-                matrix[i - 1][j - 1] + cost,
-            )
-    return matrix[-1][-1]
+    """Word-level edit distance; rapidfuzz (C) when installed, else a bit-parallel scan in O(min(n, m)) memory.
+
+    The fallback is Myers/Hyyroe's bit-vector algorithm: one column of the DP matrix is kept as the
+    vertical +1/-1 deltas of the shorter sequence packed into two Python ints, so each word of the longer
+    sequence costs a handful of big-int operations instead of a Python loop over the shorter one.
+    """
+    if _rf_levenshtein is not None:
+        return _rf_levenshtein.distance(ref_words, hyp_words)
+    if len(ref_words) < len(hyp_words):
+        ref_words, hyp_words = hyp_words, ref_words
+    if not hyp_words:
+        return len(ref_words)
+    positions = {}
+    for idx, word in enumerate(hyp_words):
+        positions[word] = positions.get(word, 0) | (1 << idx)
+    size = len(hyp_words)
+    mask = (1 << size) - 1
+    top = 1 << (size - 1)
+    plus, minus, score = mask, 0, size
+    for word in ref_words:
+        match = positions.get(word, 0)
+        diagonal = ((((match & plus) + plus) ^ plus) | match | minus) & mask
+        h_plus = (minus | ~(diagonal | plus)) & mask
+        h_minus = plus & diagonal
+        if h_plus & top:
+            score += 1
+        elif h_minus & top:
+            score -= 1
+        h_plus = ((h_plus << 1) | 1) & mask
+        h_minus = (h_minus << 1) & mask
+        plus = (h_minus | ~(diagonal | h_plus)) & mask
+        minus = h_plus & diagonal
+    return score
 
 
 def compute_metrics(reference: str, hypothesis: str) -> dict:
@@ -48,11 +77,22 @@ def compute_metrics(reference: str, hypothesis: str) -> dict:
     }
 
 
-def load_model(model_name: str, device: str):
+def load_model(model_name: str, device: str, backend: str = "whisper", compute_type: str | None = None,
+               cpu_threads: int = 0):
+    if backend == "faster-whisper":
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError as exc:
+            raise RuntimeError("faster-whisper is not installed. pip install faster-whisper") from exc
+        compute_type = compute_type or ("float16" if device == "cuda" else "int8")
+        return WhisperModel(model_name, device=device, compute_type=compute_type, cpu_threads=cpu_threads)
     try:
         import whisper
     except ImportError as exc:
         raise RuntimeError("whisper is not installed. pip install openai-whisper") from exc
+    if cpu_threads and device == "cpu":
+        import torch
+        torch.set_num_threads(cpu_threads)
     return whisper.load_model(model_name, device=device)
 
 
@@ -62,6 +102,11 @@ def detect_device(preferred: str) -> str:
     try:
         import torch
         return "cuda" if torch.cuda.is_available() else "cpu"
+    except Exception:
+        pass
+    try:
+        import ctranslate2
+        return "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
     except Exception:
         return "cpu"
 
@@ -76,6 +121,47 @@ def transcribe(model, audio_path: str, language: str | None, device: str) -> dic
     return result
 
 
+def segment_dict(segment) -> dict:
+    if dataclasses.is_dataclass(segment):
+        data = dataclasses.asdict(segment)
+    elif hasattr(segment, "_asdict"):
+        data = segment._asdict()
+    else:
+        data = dict(segment)
+    return {key: data[key] for key in SEGMENT_KEYS if key in data}
+
+
+def transcribe_faster(model, audio_path: str, language: str | None, batch_size: int = 8, vad: bool = True) -> dict:
+    """faster-whisper (CTranslate2) transcription in the openai-whisper result layout.
+
+    With batch_size > 1 the audio is cut into speech chunks by Silero VAD and the chunks are decoded through
+    the model in batches (BatchedInferencePipeline); older faster-whisper versions fall back to sequential
+    decoding with the VAD filter.
+    """
+    options = {"language": language} if language else {}
+    pipeline = None
+    if batch_size > 1:
+        try:
+            from faster_whisper import BatchedInferencePipeline
+        except ImportError:
+            BatchedInferencePipeline = None
+        if BatchedInferencePipeline is not None:
+            pipeline = _WORKER.get("pipeline")
+            if pipeline is None or pipeline.model is not model:
+                pipeline = BatchedInferencePipeline(model=model)
+                _WORKER["pipeline"] = pipeline
+    if pipeline is not None:
+        segments, info = pipeline.transcribe(audio_path, batch_size=batch_size, **options)
+    else:
+        segments, info = model.transcribe(audio_path, vad_filter=vad, **options)
+    segments = [segment_dict(segment) for segment in segments]
+    return {
+        "text": "".join(segment.get("text", "") for segment in segments),
+        "language": getattr(info, "language", None),
+        "segments": segments,
+    }
+
+
 def iter_audio_files(audio_dir: str):
     for name in sorted(os.listdir(audio_dir)):
         if name.lower().endswith(SUPPORTED_EXTS):
@@ -87,6 +173,99 @@ def write_output(payload: dict, output_path: str):
         json.dump(payload, handle, indent=2)
 
 
+def output_path_for(audio_path: str, output_dir: str, suffix: str = "_stt.json") -> str:
+    base = os.path.splitext(os.path.basename(audio_path))[0]
+    return os.path.join(output_dir, f"{base}{suffix}")
+
+
+def is_up_to_date(audio_path: str, output_path: str) -> bool:
+    """True when the _stt.json exists and is newer than the audio."""
+    try:
+        return os.stat(output_path).st_mtime_ns >= os.stat(audio_path).st_mtime_ns
+    except OSError:
+        return False
+
+
+def load_existing(output_path: str) -> dict | None:
+    try:
+        with open(output_path, "r", encoding="utf-8") as handle:
+            payload = json.load(handle)
+    except (OSError, json.JSONDecodeError):
+        return None
+    return payload if isinstance(payload, dict) else None
+
+
+def init_worker(settings: dict) -> None:
+    _WORKER["settings"] = settings
+    _WORKER["model"] = load_model(
+        settings["model"],
+        settings["device"],
+        backend=settings["backend"],
+        compute_type=settings.get("compute_type"),
+        cpu_threads=settings.get("cpu_threads") or 0,
+    )
+
+
+def process_file(audio_path: str) -> tuple[str, str, str]:
+    """Transcribe one file with this process's model and write its JSON -> (audio, status, output_path)."""
+    settings = _WORKER["settings"]
+    model = _WORKER["model"]
+    reference = settings.get("reference")
+    output_path = output_path_for(audio_path, settings["output_dir"])
+    try:
+        if settings["backend"] == "faster-whisper":
+            result = transcribe_faster(model, audio_path, settings.get("language"), settings.get("batch_size") or 1,
+                                       vad=settings.get("vad", True))
+        else:
+            result = transcribe(model, audio_path, settings.get("language"), settings["device"])
+    except Exception as exc:  # pylint: disable=broad-except
+        return audio_path, f"error: {type(exc).__name__}: {exc}", output_path
+    transcript = (result.get("text") or "").strip()
+    metrics = compute_metrics(reference, transcript) if reference else None
+
+    payload = {
+        "generated_at": int(time.time()),
+        "audio": audio_path,
+        "model": settings["model"],
+        "backend": settings["backend"],
+        "device": settings["device"],
+        "language": result.get("language") or settings.get("language"),
+        "text": transcript,
+        "segments": result.get("segments", []),
+    }
+    if metrics:
+        payload["metrics"] = metrics
+    if reference:
+        payload["reference"] = reference
+
+    write_output(payload, output_path)
+    if settings.get("save_text"):
+        with open(output_path_for(audio_path, settings["output_dir"], "_stt.txt"), "w", encoding="utf-8") as handle:
+            handle.write(transcript)
+    return audio_path, "transcribed", output_path
+
+
+def refresh_metrics(output_path: str, payload: dict, reference: str | None) -> bool:
+    """Re-score a skipped file's transcript against the current reference; True if its JSON changed."""
+    if not reference or payload.get("reference") == reference:
+        return False
+    payload["metrics"] = compute_metrics(reference, payload.get("text") or "")
+    payload["reference"] = reference
+    write_output(payload, output_path)
+    return True
+
+
+def run_batch(audio_files: list, settings: dict, workers: int = 1):
+    """Yield (audio, status, output_path) in input order; each worker process loads the model once."""
+    if workers > 1 and len(audio_files) > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(settings,)) as pool:
+            yield from pool.map(process_file, audio_files)
+        return
+    init_worker(settings)
+    for audio_path in audio_files:
+        yield process_file(audio_path)
+
+
 def main():
     parser = argparse.ArgumentParser(description="Transcribe audio with Whisper and compute similarity/WER.")
     parser.add_argument("--audio", help="Audio file path")
@@ -98,6 +277,16 @@ def main():
     parser.add_argument("--language", help="Language code override (e.g. de)")
     parser.add_argument("--device", help="Device override (cuda/cpu)")
     parser.add_argument("--save-text", action="store_true", help="Write transcript text file alongside JSON")
+    parser.add_argument("--backend", choices=BACKENDS, default="whisper",
+                        help="openai-whisper or faster-whisper (CTranslate2, int8 on CPU)")
+    parser.add_argument("--compute-type", help="faster-whisper compute type (default: int8 on cpu, float16 on cuda)")
+    parser.add_argument("--batch-size", type=int, default=8,
+                        help="faster-whisper: VAD speech chunks decoded per batch (1 = sequential)")
+    parser.add_argument("--no-vad", action="store_true", help="faster-whisper: disable the VAD filter (batch size 1)")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes, each with its own model")
+    parser.add_argument("--cpu-threads", type=int, default=0,
+                        help="Threads per worker on CPU (default: cores / workers)")
+    parser.add_argument("--force", action="store_true", help="Re-transcribe files whose _stt.json is newer than the audio")
     args = parser.parse_args()
 
     if not args.audio and not args.audio_dir:
@@ -111,9 +300,6 @@ def main():
         except OSError:
             reference = reference or ""
 
-    device = detect_device(args.device)
-    model = load_model(args.model, device)
-
     if args.audio_dir:
         audio_files = list(iter_audio_files(args.audio_dir))
     else:
@@ -122,33 +308,47 @@ def main():
     output_dir = args.output_dir or (args.audio_dir if args.audio_dir else os.path.dirname(args.audio) or ".")
     os.makedirs(output_dir, exist_ok=True)
 
+    pending = []
     for audio_path in audio_files:
-        result = transcribe(model, audio_path, args.language, device)
-        transcript = (result.get("text") or "").strip()
-        metrics = compute_metrics(reference, transcript) if reference else None
-
-        payload = {
-            "generated_at": int(time.time()),
-            "audio": audio_path,
-            "model": args.model,
-            "device": device,
-            "language": result.get("language") or args.language,
-            "text": transcript,
-            "segments": result.get("segments", []),
-        }
-        if metrics:
-            payload["metrics"] = metrics
-        if reference:
-            payload["reference"] = reference
-
-        base = os.path.splitext(os.path.basename(audio_path))[0]
-        output_path = os.path.join(output_dir, f"{base}_stt.json")
-        write_output(payload, output_path)
-        if args.save_text:
-            text_path = os.path.join(output_dir, f"{base}_stt.txt")
-            with open(text_path, "w", encoding="utf-8") as handle:
-                handle.write(transcript)
-        print(f"Wrote {output_path}")
+        output_path = output_path_for(audio_path, output_dir)
+        existing = None if args.force or not is_up_to_date(audio_path, output_path) else load_existing(output_path)
+        # Only transcripts from the same model/backend count as done.
+        if existing and existing.get("model") == args.model and existing.get("backend", "whisper") == args.backend:
+            status = "metrics updated" if refresh_metrics(output_path, existing, reference) else "up to date"
+            print(f"Skipped {output_path} ({status})")
+            continue
+        pending.append(audio_path)
+    if not pending:
+        return
+
+    device = detect_device(args.device)
+    workers = max(1, min(args.workers, len(pending)))
+    cpu_threads = args.cpu_threads
+    if not cpu_threads and device == "cpu" and workers > 1:
+        cpu_threads = max(1, (os.cpu_count() or 1) // workers)
+    settings = {
+        "backend": args.backend,
+        "model": args.model,
+        "device": device,
+        "compute_type": args.compute_type,
+        "cpu_threads": cpu_threads,
+        "language": args.language,
+        "batch_size": 1 if args.no_vad else args.batch_size,
+        "vad": not args.no_vad,
+        "reference": reference,
+        "save_text": args.save_text,
+        "output_dir": output_dir,
+    }
+
+    failed = 0
+    for audio_path, status, output_path in run_batch(pending, settings, workers=workers):
+        if status == "transcribed":
+            print(f"Wrote {output_path}")
+        else:
+            failed += 1
+            print(f"Failed {audio_path}: {status}")
+    if failed:
+        raise SystemExit(f"{failed} of {len(pending)} files failed.")
 
 
 if __name__ == "__main__":
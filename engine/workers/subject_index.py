@@ -0,0 +1,694 @@
+import argparse
+import contextlib
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+from visionexe_paths import load_story_config, resolve_path
+
+INDEX_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS subjects (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    type TEXT,
+    occurrence_count INTEGER,
+    first_chapter INTEGER,
+    last_chapter INTEGER,
+    is_dynamic INTEGER,
+    state_policy TEXT,
+    aliases TEXT,
+    roles TEXT,
+    visual_traits TEXT,
+    changes TEXT,
+    notes TEXT,
+    profile TEXT
+);
+CREATE INDEX IF NOT EXISTS subjects_type ON subjects(type);
+CREATE INDEX IF NOT EXISTS subjects_name ON subjects(name COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS subject_states (
+    subject_id TEXT,
+    state_id TEXT,
+    label TEXT,
+    chapter_start INTEGER,
+    chapter_end INTEGER,
+    segment_labels TEXT,
+    scene_labels TEXT,
+    source_ids TEXT,
+    notes TEXT,
+    PRIMARY KEY (subject_id, state_id)
+);
+CREATE TABLE IF NOT EXISTS occurrences (
+    subject_id TEXT,
+    source_id TEXT,
+    chapter INTEGER,
+    segment_label TEXT,
+    segment_type TEXT,
+    scene_label TEXT,
+    source_path TEXT
+);
+CREATE INDEX IF NOT EXISTS occurrences_subject ON occurrences(subject_id);
+CREATE INDEX IF NOT EXISTS occurrences_location ON occurrences(chapter, segment_label, scene_label);
+CREATE TABLE IF NOT EXISTS scenes (
+    scene_id TEXT,
+    chapter INTEGER,
+    segment_label TEXT,
+    segment_type TEXT,
+    title TEXT,
+    location TEXT,
+    action TEXT,
+    actors_involved TEXT,
+    source_id TEXT,
+    source_path TEXT
+);
+CREATE INDEX IF NOT EXISTS scenes_id ON scenes(scene_id);
+CREATE INDEX IF NOT EXISTS scenes_chapter ON scenes(chapter, segment_label);
+CREATE INDEX IF NOT EXISTS scenes_location ON scenes(location COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS environment_route (
+    sequence INTEGER,
+    chapter INTEGER,
+    segment_label TEXT,
+    scene_id TEXT,
+    location TEXT
+);
+CREATE INDEX IF NOT EXISTS environment_route_location ON environment_route(location COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS chapter_instructions (
+    chapter INTEGER,
+    narrator_text TEXT,
+    monologue_json TEXT,
+    source_path TEXT
+);
+CREATE INDEX IF NOT EXISTS chapter_instructions_chapter ON chapter_instructions(chapter);
+CREATE TABLE IF NOT EXISTS scene_instructions (
+    scene_id TEXT,
+    chapter INTEGER,
+    act INTEGER,
+    scene_number TEXT,
+    segment_index INTEGER,
+    scene_index INTEGER,
+    segment_label TEXT,
+    scene_label TEXT,
+    title TEXT,
+    timecode TEXT,
+    environment TEXT,
+    director_intent TEXT,
+    start_image_keywords TEXT,
+    video_plan TEXT,
+    regie TEXT,
+    source_path TEXT
+);
+CREATE INDEX IF NOT EXISTS scene_instructions_id ON scene_instructions(scene_id);
+CREATE INDEX IF NOT EXISTS scene_instructions_chapter ON scene_instructions(chapter, scene_number);
+CREATE INDEX IF NOT EXISTS scene_instructions_environment ON scene_instructions(environment COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS regie_actors (
+    scene_id TEXT,
+    chapter INTEGER,
+    scene_number TEXT,
+    name TEXT,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS regie_actors_scene ON regie_actors(chapter, scene_number);
+CREATE INDEX IF NOT EXISTS regie_actors_name ON regie_actors(name COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS regie_props (
+    scene_id TEXT,
+    chapter INTEGER,
+    scene_number TEXT,
+    name TEXT,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS regie_props_scene ON regie_props(chapter, scene_number);
+CREATE INDEX IF NOT EXISTS regie_props_name ON regie_props(name COLLATE NOCASE);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS subjects_fts USING fts5(
+    id UNINDEXED, name, aliases, roles, visual_traits, changes, notes
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS scenes_fts USING fts5(
+    scene_id UNINDEXED, chapter UNINDEXED, source UNINDEXED, title, environment, actors, props, body
+);
+"""
+
+
+def load_json(path: Path):
+    with path.open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def iter_jsonl(path: Path):
+    if not path or not path.exists():
+        return
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def to_json(value):
+    if value is None:
+        return None
+    return json.dumps(value, ensure_ascii=False)
+
+
+def to_int(value):
+    if value in ("", None):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def join_text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, list):
+        return " ".join(join_text(item) for item in value)
+    if isinstance(value, dict):
+        return " ".join(join_text(item) for item in value.values())
+    return str(value)
+
+
+def entry_name(item):
+    if isinstance(item, dict):
+        return str(item.get("name") or item.get("id") or "").strip()
+    return str(item or "").strip()
+
+
+def source_fingerprint(paths: dict) -> str:
+    parts = {"version": INDEX_VERSION}
+    for key, path in sorted(paths.items()):
+        if path and Path(path).exists():
+            stat = Path(path).stat()
+            parts[key] = [str(path), stat.st_size, stat.st_mtime_ns]
+        else:
+            parts[key] = None
+    return json.dumps(parts, sort_keys=True)
+
+
+def fts_available(conn: sqlite3.Connection) -> bool:
+    try:
+        conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS temp.fts_probe USING fts5(x)")
+        conn.execute("DROP TABLE temp.fts_probe")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def load_registry(path: Path) -> list:
+    if not path or not path.exists():
+        return []
+    payload = load_json(path)
+    if isinstance(payload, dict):
+        payload = payload.get("subjects") or []
+    return payload if isinstance(payload, list) else []
+
+
+def insert_subjects(conn, registry_path: Path, profiles_path: Path, use_fts: bool) -> int:
+    subjects = {}
+    for item in load_registry(registry_path):
+        if isinstance(item, dict) and item.get("id"):
+            subjects[item["id"]] = dict(item)
+    profiles = {}
+    for profile in iter_jsonl(profiles_path):
+        if isinstance(profile, dict) and profile.get("id"):
+            profiles[profile["id"]] = profile
+            subjects.setdefault(profile["id"], {}).update({
+                key: profile.get(key)
+                for key in ("id", "name", "type", "occurrence_count", "is_dynamic")
+                if key in profile
+            })
+
+    rows = []
+    state_rows = []
+    fts_rows = []
+    for subject_id, item in subjects.items():
+        profile = profiles.get(subject_id, {})
+        rows.append((
+            subject_id,
+            item.get("name"),
+            item.get("type"),
+            to_int(item.get("occurrence_count")),
+            to_int(item.get("first_chapter")),
+            to_int(item.get("last_chapter")),
+            1 if item.get("is_dynamic") else 0,
+            profile.get("state_policy"),
+            to_json(profile.get("aliases") or []),
+            to_json(profile.get("roles") or []),
+            to_json(profile.get("visual_traits") or []),
+            to_json(profile.get("changes") or []),
+            to_json(profile.get("notes") or []),
+            to_json(profile) if profile else None,
+        ))
+        for state in profile.get("states") or []:
+            if not isinstance(state, dict):
+                continue
+            state_rows.append((
+                subject_id,
+                state.get("state_id"),
+                state.get("label"),
+                to_int(state.get("chapter_start")),
+                to_int(state.get("chapter_end")),
+                to_json(state.get("segment_labels") or []),
+                to_json(state.get("scene_labels") or []),
+                to_json(state.get("source_ids") or []),
+                to_json(state.get("notes") or []),
+            ))
+        fts_rows.append((
+            subject_id,
+            item.get("name") or "",
+            join_text(profile.get("aliases")),
+            join_text(profile.get("roles")),
+            join_text(profile.get("visual_traits")),
+            join_text(profile.get("changes")),
+            join_text(profile.get("notes")),
+        ))
+
+    conn.executemany("INSERT OR REPLACE INTO subjects VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?)", rows)
+    conn.executemany("INSERT OR REPLACE INTO subject_states VALUES (?,?,?,?,?,?,?,?,?)", state_rows)
+    if use_fts:
+        conn.executemany("INSERT INTO subjects_fts VALUES (?,?,?,?,?,?,?)", fts_rows)
+    return len(rows)
+
+
+def insert_occurrences(conn, occurrences_path: Path) -> int:
+    rows = (
+        (
+            occ.get("subject_id"),
+            occ.get("source_id"),
+            to_int(occ.get("chapter")),
+            occ.get("segment_label"),
+            occ.get("segment_type"),
+            occ.get("scene_label"),
+            occ.get("source_path"),
+        )
+        for occ in iter_jsonl(occurrences_path)
+        if isinstance(occ, dict)
+    )
+    cursor = conn.executemany("INSERT INTO occurrences VALUES (?,?,?,?,?,?,?)", rows)
+    return cursor.rowcount
+
+
+def insert_scenes(conn, scenes_path: Path, env_route_path: Path, use_fts: bool) -> int:
+    count = 0
+    for scene in iter_jsonl(scenes_path):
+        if not isinstance(scene, dict):
+            continue
+        conn.execute("INSERT INTO scenes VALUES (?,?,?,?,?,?,?,?,?,?)", (
+            scene.get("scene_id"),
+            to_int(scene.get("chapter")),
+            scene.get("segment_label"),
+            scene.get("segment_type"),
+            scene.get("title"),
+            scene.get("location"),
+            to_json(scene.get("action")),
+            to_json(scene.get("actors_involved")),
+            scene.get("source_id"),
+            scene.get("source_path"),
+        ))
+        if use_fts:
+            conn.execute("INSERT INTO scenes_fts VALUES (?,?,?,?,?,?,?,?)", (
+                scene.get("scene_id"),
+                to_int(scene.get("chapter")),
+                "scenes",
+                scene.get("title") or "",
+                scene.get("location") or "",
+                join_text(scene.get("actors_involved")),
+                "",
+                join_text(scene.get("action")),
+            ))
+        count += 1
+    route_rows = (
+        (
+            to_int(entry.get("sequence")),
+            to_int(entry.get("chapter")),
+            entry.get("segment_label"),
+            entry.get("scene_id"),
+            entry.get("location"),
+        )
+        for entry in iter_jsonl(env_route_path)
+        if isinstance(entry, dict)
+    )
+    conn.executemany("INSERT INTO environment_route VALUES (?,?,?,?,?)", route_rows)
+    return count
+
+
+def insert_scene_instructions(conn, instructions_path: Path, use_fts: bool) -> int:
+    count = 0
+    for record in iter_jsonl(instructions_path):
+        if not isinstance(record, dict):
+            continue
+        chapter = to_int(record.get("chapter"))
+        if record.get("record_type") == "chapter":
+            conn.execute("INSERT INTO chapter_instructions VALUES (?,?,?,?)", (
+                chapter,
+                record.get("narrator_text"),
+                to_json(record.get("monologue_json")),
+                record.get("source_path"),
+            ))
+            continue
+        scene_id = record.get("scene_id")
+        scene_number = record.get("scene_number")
+        environment = record.get("environment") if isinstance(record.get("environment"), str) else join_text(record.get("environment"))
+        conn.execute("INSERT INTO scene_instructions VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)", (
+            scene_id,
+            chapter,
+            to_int(record.get("act")),
+            scene_number,
+            to_int(record.get("segment_index")),
+            to_int(record.get("scene_index")),
+            record.get("segment_label"),
+            record.get("scene_label"),
+            record.get("title"),
+            record.get("timecode"),
+            environment,
+            join_text(record.get("director_intent")),
+            to_json(record.get("start_image_keywords")),
+            to_json(record.get("video_plan")),
+            to_json(record.get("regie")),
+            record.get("source_path"),
+        ))
+        actors = record.get("actors") if isinstance(record.get("actors"), list) else []
+        props = record.get("props") if isinstance(record.get("props"), list) else []
+        conn.executemany("INSERT INTO regie_actors VALUES (?,?,?,?,?)", [
+            (scene_id, chapter, scene_number, entry_name(actor), to_json(actor))
+            for actor in actors
+            if entry_name(actor)
+        ])
+        conn.executemany("INSERT INTO regie_props VALUES (?,?,?,?,?)", [
+            (scene_id, chapter, scene_number, entry_name(prop), to_json(prop))
+            for prop in props
+            if entry_name(prop)
+        ])
+        if use_fts:
+            conn.execute("INSERT INTO scenes_fts VALUES (?,?,?,?,?,?,?,?)", (
+                scene_id,
+                chapter,
+                "scene_instructions",
+                record.get("title") or "",
+                environment or "",
+                " ".join(entry_name(actor) for actor in actors),
+                " ".join(entry_name(prop) for prop in props),
+                " ".join([
+                    join_text(record.get("director_intent")),
+                    join_text(record.get("start_image_keywords")),
+                ]),
+            ))
+        count += 1
+    return count
+
+
+def resolve_sources(story_config: dict, repo_root: Path, overrides: dict | None = None) -> dict:
+    overrides = overrides or {}
+    subjects_root = resolve_path(story_config.get("subjects_root"), repo_root)
+    instructions = story_config.get("scene_instructions_path") or f"{subjects_root}/scene_instructions.jsonl"
+    sources = {
+        "registry": subjects_root / "registry.json",
+        "profiles": subjects_root / "profiles.jsonl",
+        "occurrences": subjects_root / "occurrences.jsonl",
+        "scenes": subjects_root / "scenes.jsonl",
+        "environment_route": subjects_root / "environment_route.jsonl",
+        "scene_instructions": resolve_path(instructions, repo_root),
+    }
+    for key, value in overrides.items():
+        if value:
+            sources[key] = resolve_path(value, repo_root)
+    return sources
+
+
+def default_index_path(story_config: dict, repo_root: Path) -> Path:
+    subjects_root = resolve_path(story_config.get("subjects_root"), repo_root)
+    return subjects_root / "subject_index.sqlite"
+
+
+def build_index(db_path: Path, sources: dict, force: bool = False) -> dict:
+    """Materialize the subject/scene flat files into one SQLite file.
+
+    The build is skipped when the recorded source fingerprint (path, size, mtime) is unchanged.
+    A new database is written next to the target and swapped in, so readers never see a partial index.
+    """
+    db_path = Path(db_path)
+    fingerprint = source_fingerprint(sources)
+    if db_path.exists() and not force:
+        try:
+            # closing(): the connection must be gone before os.replace() on Windows.
+            with contextlib.closing(sqlite3.connect(str(db_path))) as conn:
+                row = conn.execute("SELECT value FROM meta WHERE key = 'fingerprint'").fetchone()
+            if row and row[0] == fingerprint:
+                return {"status": "up_to_date", "path": str(db_path)}
+        except sqlite3.DatabaseError:
+            pass
+
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = db_path.with_name(db_path.name + ".tmp")
+    if tmp_path.exists():
+        tmp_path.unlink()
+    conn = sqlite3.connect(str(tmp_path))
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.executescript(SCHEMA)
+        use_fts = fts_available(conn)
+        if use_fts:
+            conn.executescript(FTS_SCHEMA)
+        with conn:
+            counts = {
+                "subjects": insert_subjects(conn, sources.get("registry"), sources.get("profiles"), use_fts),
+                "occurrences": insert_occurrences(conn, sources.get("occurrences")),
+                "scenes": insert_scenes(conn, sources.get("scenes"), sources.get("environment_route"), use_fts),
+                "scene_instructions": insert_scene_instructions(conn, sources.get("scene_instructions"), use_fts),
+            }
+            conn.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)", [
+                ("fingerprint", fingerprint),
+                ("version", str(INDEX_VERSION)),
+                ("fts", "1" if use_fts else "0"),
+                ("built_at", time.strftime("%Y-%m-%d %H:%M:%S")),
+            ])
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+    os.replace(tmp_path, db_path)
+    return {"status": "built", "path": str(db_path), "fts": use_fts, "counts": counts}
+
+
+def open_index(db_path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(f"file:{Path(db_path).as_posix()}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def rows_to_dicts(rows) -> list[dict]:
+    return [dict(row) for row in rows]
+
+
+def has_fts(conn: sqlite3.Connection) -> bool:
+    row = conn.execute("SELECT value FROM meta WHERE key = 'fts'").fetchone()
+    return bool(row and row[0] == "1")
+
+
+def fts_query(text: str) -> str:
+    terms = [term.replace('"', '""') for term in str(text or "").split() if term]
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def get_subject(conn, subject_id: str) -> dict | None:
+    row = conn.execute("SELECT * FROM subjects WHERE id = ?", (subject_id,)).fetchone()
+    if not row:
+        return None
+    subject = dict(row)
+    for key in ("aliases", "roles", "visual_traits", "changes", "notes", "profile"):
+        subject[key] = json.loads(subject[key]) if subject.get(key) else None
+    subject["states"] = rows_to_dicts(conn.execute(
+        "SELECT * FROM subject_states WHERE subject_id = ? ORDER BY rowid", (subject_id,)
+    ))
+    for state in subject["states"]:
+        for key in ("segment_labels", "scene_labels", "source_ids", "notes"):
+            state[key] = json.loads(state[key]) if state.get(key) else []
+    return subject
+
+
+def search_subjects(conn, text: str = "", subject_type: str = "", limit: int = 50) -> list[dict]:
+    params = []
+    if text and has_fts(conn):
+        sql = (
+            "SELECT s.id, s.name, s.type, s.occurrence_count, s.is_dynamic FROM subjects_fts f "
+            "JOIN subjects s ON s.id = f.id WHERE subjects_fts MATCH ?"
+        )
+        params.append(fts_query(text))
+    else:
+        sql = "SELECT id, name, type, occurrence_count, is_dynamic FROM subjects WHERE 1 = 1"
+        if text:
+            sql += " AND (id LIKE ? OR name LIKE ?)"
+            params.extend([f"%{text}%", f"%{text}%"])
+    if subject_type:
+        sql += " AND type = ?"
+        params.append(subject_type)
+    sql += " LIMIT ?"
+    params.append(int(limit))
+    return rows_to_dicts(conn.execute(sql, params))
+
+
+def subject_occurrences(conn, subject_id: str, limit: int = 0) -> list[dict]:
+    sql = "SELECT * FROM occurrences WHERE subject_id = ? ORDER BY chapter, segment_label, scene_label"
+    params = [subject_id]
+    if limit:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+    return rows_to_dicts(conn.execute(sql, params))
+
+
+def subjects_in_chapter(conn, chapter: int, segment_label: str = "", scene_label: str = "") -> list[dict]:
+    sql = (
+        "SELECT DISTINCT s.id, s.name, s.type FROM occurrences o JOIN subjects s ON s.id = o.subject_id "
+        "WHERE o.chapter = ?"
+    )
+    params = [int(chapter)]
+    if segment_label:
+        sql += " AND o.segment_label = ?"
+        params.append(segment_label)
+    if scene_label:
+        sql += " AND o.scene_label = ?"
+        params.append(scene_label)
+    return rows_to_dicts(conn.execute(sql + " ORDER BY s.type, s.id", params))
+
+
+def scene_actors(conn, chapter: int, scene_number: str) -> list[dict]:
+    rows = conn.execute(
+        "SELECT scene_id, name, data FROM regie_actors WHERE chapter = ? AND scene_number = ? ORDER BY rowid",
+        (int(chapter), str(scene_number)),
+    )
+    return [{"scene_id": row["scene_id"], "name": row["name"], "data": json.loads(row["data"])} for row in rows]
+
+
+def scene_props(conn, chapter: int, scene_number: str) -> list[dict]:
+    rows = conn.execute(
+        "SELECT scene_id, name, data FROM regie_props WHERE chapter = ? AND scene_number = ? ORDER BY rowid",
+        (int(chapter), str(scene_number)),
+    )
+    return [{"scene_id": row["scene_id"], "name": row["name"], "data": json.loads(row["data"])} for row in rows]
+
+
+def get_scene_instruction(conn, scene_id: str) -> dict | None:
+    row = conn.execute("SELECT * FROM scene_instructions WHERE scene_id = ?", (scene_id,)).fetchone()
+    if not row:
+        return None
+    record = dict(row)
+    for key in ("start_image_keywords", "video_plan", "regie"):
+        record[key] = json.loads(record[key]) if record.get(key) else None
+    return record
+
+
+def scenes_with_environment(conn, environment: str) -> list[dict]:
+    """Scenes whose REGIE environment or analysis location matches (case-insensitive)."""
+    rows = conn.execute(
+        "SELECT scene_id, chapter, segment_label, scene_number, title, environment AS location, "
+        "'scene_instructions' AS source FROM scene_instructions WHERE environment = ? COLLATE NOCASE "
+        "UNION ALL "
+        "SELECT scene_id, chapter, segment_label, NULL, title, location, 'scenes' AS source "
+        "FROM scenes WHERE location = ? COLLATE NOCASE "
+        "ORDER BY chapter",
+        (environment, environment),
+    )
+    return rows_to_dicts(rows)
+
+
+def scenes_with_subject(conn, name: str) -> list[dict]:
+    rows = conn.execute(
+        "SELECT DISTINCT scene_id, chapter, scene_number, 'actor' AS role FROM regie_actors WHERE name = ? COLLATE NOCASE "
+        "UNION "
+        "SELECT DISTINCT scene_id, chapter, scene_number, 'prop' AS role FROM regie_props WHERE name = ? COLLATE NOCASE "
+        "ORDER BY chapter, scene_number",
+        (name, name),
+    )
+    return rows_to_dicts(rows)
+
+
+def search_scenes(conn, text: str, chapter: int | None = None, limit: int = 50) -> list[dict]:
+    if not has_fts(conn):
+        pattern = f"%{text}%"
+        sql = (
+            "SELECT scene_id, chapter, title, environment, 'scene_instructions' AS source FROM scene_instructions "
+            "WHERE (title LIKE ? OR director_intent LIKE ? OR environment LIKE ?)"
+        )
+        params = [pattern, pattern, pattern]
+        if chapter is not None:
+            sql += " AND chapter = ?"
+            params.append(int(chapter))
+        return rows_to_dicts(conn.execute(sql + " LIMIT ?", params + [int(limit)]))
+    sql = "SELECT scene_id, chapter, source, title, environment FROM scenes_fts WHERE scenes_fts MATCH ?"
+    params = [fts_query(text)]
+    if chapter is not None:
+        sql += " AND chapter = ?"
+        params.append(int(chapter))
+    sql += " ORDER BY rank LIMIT ?"
+    params.append(int(limit))
+    return rows_to_dicts(conn.execute(sql, params))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the per-story SQLite subject/scene index.")
+    parser.add_argument("--story-root", help="Story root path (defaults to engine_config default_story_root).")
+    parser.add_argument("--story-config", help="Path to story_config.json (overrides story-root).")
+    parser.add_argument("--db", help="Index path (default: <subjects_root>/subject_index.sqlite).")
+    parser.add_argument("--scene-instructions", help="Override scene_instructions.jsonl path.")
+    parser.add_argument("--force", action="store_true", help="Rebuild even if the sources are unchanged.")
+    parser.add_argument("--search", help="Full-text search over subjects.")
+    parser.add_argument("--search-scenes", help="Full-text search over scenes and scene instructions.")
+    parser.add_argument("--subject", help="Print one subject with states and occurrences.")
+    parser.add_argument("--environment", help="List scenes using an environment/location.")
+    parser.add_argument("--chapter", type=int, help="Chapter for --scene / --search-scenes.")
+    parser.add_argument("--scene", help="Scene number (e.g. 1.3) to list REGIE actors/props for --chapter.")
+    args = parser.parse_args()
+
+    story_config, _, repo_root = load_story_config(
+        story_root=args.story_root,
+        story_config_path=args.story_config,
+    )
+    db_path = resolve_path(args.db, repo_root) if args.db else default_index_path(story_config, repo_root)
+    sources = resolve_sources(story_config, repo_root, {"scene_instructions": args.scene_instructions})
+    result = build_index(db_path, sources, force=args.force)
+    if result["status"] == "built":
+        print(f"Wrote subject index: {db_path} {json.dumps(result['counts'])}")
+    else:
+        print(f"Subject index up to date: {db_path}")
+
+    queries = [args.search, args.search_scenes, args.subject, args.environment, args.scene]
+    if not any(queries):
+        return
+    conn = open_index(db_path)
+    try:
+        payload = {}
+        if args.search:
+            payload["subjects"] = search_subjects(conn, args.search)
+        if args.search_scenes:
+            payload["scenes"] = search_scenes(conn, args.search_scenes, chapter=args.chapter)
+        if args.subject:
+            subject = get_subject(conn, args.subject)
+            if subject:
+                subject["occurrences"] = subject_occurrences(conn, args.subject, limit=50)
+            payload["subject"] = subject
+        if args.environment:
+            payload["environment_scenes"] = scenes_with_environment(conn, args.environment)
+        if args.scene:
+            if args.chapter is None:
+                raise SystemExit("--scene requires --chapter.")
+            payload["actors"] = scene_actors(conn, args.chapter, args.scene)
+            payload["props"] = scene_props(conn, args.chapter, args.scene)
+        print(json.dumps(payload, ensure_ascii=False, indent=2))
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,10 +3,11 @@ import json
 import re
 from pathlib import Path
 
+from columnar_store import SUBJECT_OCCURRENCE_COLUMNS, write_columnar
+from json_blocks import extract_json_values
 from visionexe_paths import ensure_dir, load_story_config, resolve_path
 
 
-JSON_BLOCK_RE = re.compile(r"```(?:json)?\s*([\[{].*?[\]}])\s*```", re.DOTALL | re.IGNORECASE)
 
 TYPE_PREFIX = {
     "character": "CHAR",
@@ -39,39 +40,6 @@ def load_jsonl(path: Path):
     return items
 
 
-def extract_json_blocks(text):
-    blocks = []
-    if not text:
-        return blocks
-    for match in JSON_BLOCK_RE.finditer(text):
-        raw = match.group(1)
-        try:
-            blocks.append(json.loads(raw))
-        except json.JSONDecodeError:
-            continue
-    if blocks:
-        return blocks
-    stripped = text.strip()
-    if not stripped:
-        return blocks
-    try:
-        blocks.append(json.loads(stripped))
-        return blocks
-    except json.JSONDecodeError:
-        pass
-    decoder = json.JSONDecoder()
-    for idx, ch in enumerate(stripped):
-        if ch not in "{[":
-            continue
-        try:
-            payload, _ = decoder.raw_decode(stripped[idx:])
-            blocks.append(payload)
-            return blocks
-        except json.JSONDecodeError:
-            continue
-    return blocks
-
-
 def slugify(value: str) -> str:
     value = value.strip().upper()
     value = re.sub(r"[^A-Z0-9]+", "_", value)
@@ -161,6 +129,7 @@ def main():
     parser.add_argument("--registry-out", help="Output registry.json path.")
     parser.add_argument("--profiles-out", help="Output profiles.jsonl path.")
     parser.add_argument("--occurrences-out", help="Output occurrences.jsonl path.")
+    parser.add_argument("--columnar-out", help="Optional columnar occurrences path (.parquet or .arrow).")
     parser.add_argument("--scenes-out", help="Output scenes.jsonl path.")
     parser.add_argument("--dynamic-out", help="Output dynamic_subjects.json path.")
     parser.add_argument("--env-route-out", help="Output environment_route.jsonl path.")
@@ -231,7 +200,7 @@ def main():
     for record in records:
         blocks = record.get("analysis_blocks") or []
         if not blocks and record.get("raw_content"):
-            blocks = extract_json_blocks(record.get("raw_content", ""))
+            blocks = extract_json_values(record.get("raw_content", ""))
 
         for block in blocks:
             if not isinstance(block, dict):
@@ -523,6 +492,10 @@ def main():
         for item in occurrences:
             f.write(json.dumps(item, ensure_ascii=False) + "\n")
 
+    columnar_out = resolve_path(args.columnar_out, repo_root) if args.columnar_out else None
+    if columnar_out:
+        write_columnar(columnar_out, occurrences, SUBJECT_OCCURRENCE_COLUMNS)
+
     with scenes_out.open("w", encoding="utf-8") as f:
         for scene in scenes:
             f.write(json.dumps(scene, ensure_ascii=False) + "\n")
@@ -537,6 +510,8 @@ def main():
     print(f"Wrote registry: {registry_out}")
     print(f"Wrote profiles: {profiles_out}")
     print(f"Wrote occurrences: {occurrences_out}")
+    if columnar_out:
+        print(f"Wrote columnar occurrences: {columnar_out}")
     print(f"Wrote scenes: {scenes_out}")
     print(f"Wrote environment route: {env_route_out}")
     print(f"Wrote dynamic subjects: {dynamic_out}")
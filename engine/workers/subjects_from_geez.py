@@ -1,8 +1,15 @@
 import argparse
 import json
+import re
 import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from functools import lru_cache
+from itertools import repeat
 from pathlib import Path
 
+from columnar_store import GEEZ_OCCURRENCE_COLUMNS, ColumnarWriter
 from visionexe_paths import ensure_dir, load_story_config, resolve_path
 
 ETHIOPIC_RANGES = (
@@ -25,17 +32,37 @@ def is_ethiopic_letter(ch: str) -> bool:
     return True
 
 
+def build_letter_class() -> str:
+    excluded = sorted(ETHIOPIC_PUNCT | ETHIOPIC_NUMERALS)
+    parts = []
+    for start, end in ETHIOPIC_RANGES:
+        code = start
+        while code <= end:
+            if code in excluded:
+                code += 1
+                continue
+            run_end = code
+            while run_end + 1 <= end and run_end + 1 not in excluded:
+                run_end += 1
+            parts.append(f"{chr(code)}-{chr(run_end)}" if run_end > code else chr(code))
+            code = run_end + 1
+    return "[" + "".join(parts) + "]"
+
+
+ETHIOPIC_LETTER_CLASS = build_letter_class()
+
+
+@lru_cache(maxsize=None)
+def token_pattern(min_len: int) -> re.Pattern:
+    return re.compile(f"{ETHIOPIC_LETTER_CLASS}{{{max(1, min_len)},}}")
+
+
+def tokenize(text: str, min_len: int) -> list[str]:
+    return token_pattern(min_len).findall(text or "")
+
+
 def iter_tokens(text: str, min_len: int):
-    buffer = []
-    for ch in text:
-        if is_ethiopic_letter(ch):
-            buffer.append(ch)
-            continue
-        if len(buffer) >= min_len:
-            yield "".join(buffer)
-        buffer = []
-    if len(buffer) >= min_len:
-        yield "".join(buffer)
+    yield from tokenize(text, min_len)
 
 
 def load_stoplist(path: Path | None) -> set[str]:
@@ -62,6 +89,154 @@ def parse_chapter_from_name(path: Path) -> int | None:
         return None
 
 
+def build_source_id(chapter, verse) -> str:
+    return f"geez_{int(chapter):03d}_{int(verse):03d}" if chapter and verse else ""
+
+
+def scan_verse_file(verse_path: Path, min_len: int, stoplist: set[str]) -> list[tuple]:
+    """Tokenize one chapter file into (chapter, verse, text, token_count, kept) tuples.
+
+    `kept` holds (token_index, token) pairs that survived the stoplist, in verse order.
+    """
+    chapter = parse_chapter_from_name(verse_path)
+    verses = []
+    with verse_path.open("r", encoding="utf-8") as handle:
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            verse_text = record.get("text", "")
+            tokens = tokenize(verse_text, min_len)
+            if stoplist:
+                kept = [(index, token) for index, token in enumerate(tokens) if token not in stoplist]
+            else:
+                kept = list(enumerate(tokens))
+            verses.append((record.get("chapter") or chapter, record.get("verse"), verse_text, len(tokens), kept))
+    return verses
+
+
+def new_stats() -> dict:
+    return {"counts": Counter(), "chapters": {}, "verses": {}, "samples": {}}
+
+
+def aggregate_verses(verses: list[tuple], max_samples: int, max_sample_chars: int) -> dict:
+    stats = new_stats()
+    counts = stats["counts"]
+    chapters = stats["chapters"]
+    verse_sets = stats["verses"]
+    samples = stats["samples"]
+    full = set()
+    for verse_chapter, verse_number, verse_text, _, kept in verses:
+        if not kept:
+            continue
+        tokens = [token for _, token in kept]
+        counts.update(tokens)
+        unique = set(tokens)
+        if verse_chapter:
+            chapter_value = int(verse_chapter)
+            for token in unique:
+                chapters.setdefault(token, set()).add(chapter_value)
+            if verse_number:
+                verse_key = f"{chapter_value}:{int(verse_number)}"
+                for token in unique:
+                    verse_sets.setdefault(token, set()).add(verse_key)
+        if max_samples <= 0 or unique <= full:
+            continue
+        sample_text = verse_text
+        if max_sample_chars and len(sample_text) > max_sample_chars:
+            sample_text = sample_text[:max_sample_chars].rstrip() + "..."
+        sample = {
+            "chapter": int(verse_chapter) if verse_chapter else None,
+            "verse": int(verse_number) if verse_number else None,
+            "text": sample_text,
+            "source_id": build_source_id(verse_chapter, verse_number),
+        }
+        # Every occurrence contributes a sample until the cap, so repeats within a verse count too.
+        for token in tokens:
+            if token in full:
+                continue
+            token_samples = samples.setdefault(token, [])
+            token_samples.append(dict(sample))
+            if len(token_samples) >= max_samples:
+                full.add(token)
+    return stats
+
+
+def merge_stats(target: dict, stats: dict, max_samples: int):
+    target["counts"].update(stats["counts"])
+    for key in ("chapters", "verses"):
+        merged = target[key]
+        for token, values in stats[key].items():
+            existing = merged.get(token)
+            if existing is None:
+                merged[token] = set(values)
+            else:
+                existing.update(values)
+    for token, token_samples in stats["samples"].items():
+        existing = target["samples"].setdefault(token, [])
+        room = max_samples - len(existing)
+        if room > 0:
+            existing.extend(token_samples[:room])
+
+
+def truncate_verses(verses: list[tuple], limit: int) -> list[tuple]:
+    truncated = []
+    remaining = limit
+    for entry in verses:
+        if remaining <= 0:
+            break
+        kept = entry[4]
+        if len(kept) > remaining:
+            entry = entry[:4] + (kept[:remaining],)
+        truncated.append(entry)
+        remaining -= len(entry[4])
+    return truncated
+
+
+def iter_occurrences(verse_path: Path, verses: list[tuple]):
+    source_path = str(verse_path)
+    for verse_chapter, verse_number, verse_text, token_count, kept in verses:
+        source_id = build_source_id(verse_chapter, verse_number)
+        chapter_value = int(verse_chapter) if verse_chapter else None
+        verse_value = int(verse_number) if verse_number else None
+        for token_index, token in kept:
+            yield {
+                "token": token,
+                "chapter": chapter_value,
+                "verse": verse_value,
+                "token_index": token_index,
+                "token_count": token_count,
+                "source_id": source_id,
+                "source_path": source_path,
+                "verse_text": verse_text,
+                "language": "geez",
+            }
+
+
+def process_verse_file(verse_path: Path, min_len: int, stoplist: set[str], max_samples: int, max_sample_chars: int):
+    verses = scan_verse_file(verse_path, min_len, stoplist)
+    return verse_path, verses, aggregate_verses(verses, max_samples, max_sample_chars)
+
+
+def iter_chapter_results(verse_files, min_len, stoplist, max_samples, max_sample_chars, workers=0):
+    """Yield (path, verses, stats) per chapter file in input order, optionally from a process pool."""
+    if workers and workers > 1 and len(verse_files) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            yield from pool.map(
+                process_verse_file,
+                verse_files,
+                repeat(min_len),
+                repeat(stoplist),
+                repeat(max_samples),
+                repeat(max_sample_chars),
+                chunksize=max(1, len(verse_files) // (workers * 4)),
+            )
+        return
+    for verse_path in verse_files:
+        yield process_verse_file(verse_path, min_len, stoplist, max_samples, max_sample_chars)
+
+
 def main():
     parser = argparse.ArgumentParser(description="Extract Ge'ez subject candidates from verse JSONL.")
     parser.add_argument("--story-root", help="Story root path (defaults to engine_config default_story_root).")
@@ -72,8 +247,11 @@ def main():
     parser.add_argument("--max-samples", type=int, default=4, help="Max samples per candidate.")
     parser.add_argument("--max-sample-chars", type=int, default=240, help="Max chars stored in sample text.")
     parser.add_argument("--max-occurrences", type=int, default=0, help="Stop after N occurrences (0 = no limit).")
+    parser.add_argument("--workers", type=int, default=0, help="Process pool size for chapter files (0/1 = serial).")
     parser.add_argument("--candidates-out", help="Output candidates JSON path.")
     parser.add_argument("--occurrences-out", help="Output occurrences JSONL path.")
+    parser.add_argument("--columnar-out", help="Optional columnar occurrences path (.parquet or .arrow).")
+    parser.add_argument("--columnar-only", action="store_true", help="Skip the occurrences JSONL when --columnar-out is set.")
     args = parser.parse_args()
 
     story_config, _, repo_root = load_story_config(
@@ -108,83 +286,59 @@ def main():
     if not verse_files:
         raise SystemExit(f"No verse files found under: {geez_root}")
 
-    candidate_map = {}
+    columnar_out = resolve_path(args.columnar_out, repo_root) if args.columnar_out else None
+    if args.columnar_only and not columnar_out:
+        raise SystemExit("--columnar-only requires --columnar-out.")
+    columnar_writer = ColumnarWriter(columnar_out, GEEZ_OCCURRENCE_COLUMNS) if columnar_out else None
+    write_jsonl = not (args.columnar_only and columnar_writer)
+
+    candidate_map = new_stats()
     occurrence_total = 0
     verse_total = 0
 
-    with occurrences_out.open("w", encoding="utf-8") as occ_handle:
-        for verse_path in verse_files:
-            chapter = parse_chapter_from_name(verse_path)
-            with verse_path.open("r", encoding="utf-8") as handle:
-                for line in handle:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    record = json.loads(line)
-                    verse_total += 1
-                    verse_chapter = record.get("chapter") or chapter
-                    verse_number = record.get("verse")
-                    verse_text = record.get("text", "")
-
-                    tokens = list(iter_tokens(verse_text, args.min_len))
-                    for token_index, token in enumerate(tokens):
-                        if token in stoplist:
-                            continue
-                        occurrence_total += 1
-                        if args.max_occurrences and occurrence_total > args.max_occurrences:
-                            break
-
-                        source_id = f"geez_{int(verse_chapter):03d}_{int(verse_number):03d}" if verse_chapter and verse_number else ""
-                        occ = {
-                            "token": token,
-                            "chapter": int(verse_chapter) if verse_chapter else None,
-                            "verse": int(verse_number) if verse_number else None,
-                            "token_index": token_index,
-                            "token_count": len(tokens),
-                            "source_id": source_id,
-                            "source_path": str(verse_path),
-                            "verse_text": verse_text,
-                            "language": "geez",
-                        }
-                        occ_handle.write(json.dumps(occ, ensure_ascii=False) + "\n")
-
-                        data = candidate_map.setdefault(token, {
-                            "count": 0,
-                            "chapters": set(),
-                            "verses": set(),
-                            "samples": [],
-                        })
-                        data["count"] += 1
-                        if verse_chapter:
-                            data["chapters"].add(int(verse_chapter))
-                        if verse_chapter and verse_number:
-                            data["verses"].add(f"{int(verse_chapter)}:{int(verse_number)}")
-
-                        if len(data["samples"]) < args.max_samples:
-                            sample_text = verse_text
-                            if args.max_sample_chars and len(sample_text) > args.max_sample_chars:
-                                sample_text = sample_text[: args.max_sample_chars].rstrip() + "..."
-                            data["samples"].append({
-                                "chapter": int(verse_chapter) if verse_chapter else None,
-                                "verse": int(verse_number) if verse_number else None,
-                                "text": sample_text,
-                                "source_id": source_id,
-                            })
-
-                    if args.max_occurrences and occurrence_total >= args.max_occurrences:
-                        break
+    with ExitStack() as stack:
+        occ_handle = stack.enter_context(occurrences_out.open("w", encoding="utf-8")) if write_jsonl else None
+        if columnar_writer:
+            stack.enter_context(columnar_writer)
+        for verse_path, verses, stats in iter_chapter_results(
+            verse_files,
+            args.min_len,
+            stoplist,
+            args.max_samples,
+            args.max_sample_chars,
+            args.workers,
+        ):
+            chapter_occurrences = sum(len(entry[4]) for entry in verses)
+            if args.max_occurrences and occurrence_total + chapter_occurrences >= args.max_occurrences:
+                verses = truncate_verses(verses, args.max_occurrences - occurrence_total)
+                stats = aggregate_verses(verses, args.max_samples, args.max_sample_chars)
+                chapter_occurrences = sum(len(entry[4]) for entry in verses)
+
+            verse_total += len(verses)
+            occurrence_total += chapter_occurrences
+            merge_stats(candidate_map, stats, args.max_samples)
+
+            for occ in iter_occurrences(verse_path, verses):
+                if occ_handle:
+                    occ_handle.write(json.dumps(occ, ensure_ascii=False) + "\n")
+                if columnar_writer:
+                    columnar_writer.write(occ)
+            if columnar_writer:
+                # One row group per chapter keeps chapter filters cheap.
+                columnar_writer.flush()
             if args.max_occurrences and occurrence_total >= args.max_occurrences:
                 break
 
     candidates = []
-    for token, data in candidate_map.items():
+    for token, count in candidate_map["counts"].items():
+        chapters = candidate_map["chapters"].get(token, set())
         candidates.append({
             "token": token,
-            "count": data["count"],
-            "chapter_count": len(data["chapters"]),
-            "verse_count": len(data["verses"]),
-            "chapters": sorted(data["chapters"]),
-            "samples": data["samples"],
+            "count": count,
+            "chapter_count": len(chapters),
+            "verse_count": len(candidate_map["verses"].get(token, ())),
+            "chapters": sorted(chapters),
+            "samples": candidate_map["samples"].get(token, []),
         })
 
     candidates.sort(key=lambda item: (-item["count"], item["token"]))
@@ -206,7 +360,10 @@ def main():
     candidates_out.write_text(json.dumps(payload, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
 
     print(f"Wrote candidates: {candidates_out}")
-    print(f"Wrote occurrences: {occurrences_out}")
+    if write_jsonl:
+        print(f"Wrote occurrences: {occurrences_out}")
+    if columnar_writer:
+        print(f"Wrote columnar occurrences: {columnar_out} ({columnar_writer.row_count} rows)")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,90 @@
+GRAM = 3
+# Below this many keys a plain `key in text` loop (C substring search) beats building text n-grams.
+LINEAR_LIMIT = 256
+
+
+def text_grams(text: str, size: int = GRAM):
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+class SubstringIndex:
+    """N-gram inverted index over short keys (asset ids, names, slugs, LoRA file names).
+
+    `occurring_in(text)` returns keys that are substrings of `text`, `containing(token)` the keys
+    that contain `token`. Candidates are always verified with `in`, so results equal the nested
+    substring loops they replace; ids come back in insertion order.
+    """
+
+    def __init__(self, items=()):
+        self.keys = []
+        self.values = []
+        self.key_ids = {}
+        self.postings = {}
+        self.short_ids = []
+        self._anchors = None
+        for key, value in items:
+            self.add(key, value)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, key: str, value=None) -> int | None:
+        if not key:
+            return None
+        key_id = self.key_ids.get(key)
+        if key_id is None:
+            key_id = len(self.keys)
+            self.key_ids[key] = key_id
+            self.keys.append(key)
+            self.values.append([])
+            if len(key) < GRAM:
+                self.short_ids.append(key_id)
+            for gram in text_grams(key):
+                self.postings.setdefault(gram, []).append(key_id)
+            self._anchors = None
+        self.values[key_id].append(value)
+        return key_id
+
+    def _build_anchors(self) -> dict:
+        # Each key is filed under its rarest n-gram: a text can only contain the key if it
+        # contains that n-gram, and rare anchors keep the candidate lists short.
+        anchors = {}
+        for key_id, key in enumerate(self.keys):
+            if len(key) < GRAM:
+                continue
+            gram = min(text_grams(key), key=lambda item: (len(self.postings[item]), item))
+            anchors.setdefault(gram, []).append(key_id)
+        return anchors
+
+    def occurring_in(self, text: str) -> list[int]:
+        if not text or not self.keys:
+            return []
+        if len(self.keys) <= LINEAR_LIMIT:
+            return [key_id for key_id, key in enumerate(self.keys) if key in text]
+        if self._anchors is None:
+            self._anchors = self._build_anchors()
+        found = [key_id for key_id in self.short_ids if self.keys[key_id] in text]
+        for gram in self._anchors.keys() & text_grams(text):
+            found.extend(key_id for key_id in self._anchors[gram] if self.keys[key_id] in text)
+        return sorted(found)
+
+    def containing(self, token: str) -> list[int]:
+        if not token or not self.keys:
+            return []
+        if len(token) < GRAM or len(self.keys) <= LINEAR_LIMIT:
+            return [key_id for key_id, key in enumerate(self.keys) if token in key]
+        candidates = None
+        for gram in text_grams(token):
+            posting = self.postings.get(gram)
+            if not posting:
+                return []
+            if candidates is None or len(posting) < len(candidates):
+                candidates = posting
+        return [key_id for key_id in candidates if token in self.keys[key_id]]
+
+    def related(self, token: str) -> list[int]:
+        """Keys that contain `token` or are contained in it."""
+        return sorted(set(self.containing(token)) | set(self.occurring_in(token)))
+
+    def payloads(self, key_ids) -> list:
+        return [value for key_id in key_ids for value in self.values[key_id]]
@@ -1,14 +1,24 @@
 import argparse
+import hashlib
 import json
 import os
+import queue
 import shutil
+import threading
 import time
 from datetime import datetime
 
 from gradio_client import Client, handle_file
 
+from visionexe_paths import load_engine_config, resolve_path, resolve_repo_root
+
 IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".webp")
 WSL_PREFIX = "\\\\wsl.localhost\\"
+API_NAME = "/generate_lora"
+LORA_CATEGORY = "lora"
+# Bump when the fingerprint layout changes (forces one retrain of everything).
+FINGERPRINT_VERSION = 1
+LOG_LOCK = threading.Lock()
 
 
 def clean_filename(name):
@@ -63,15 +73,6 @@ def translate_wsl_path(path, wsl_root):
     return path
 
 
-def wait_for_path(path, timeout_sec, poll_sec):
-    deadline = time.time() + timeout_sec
-    while time.time() < deadline:
-        if os.path.exists(path):
-            return path
-        time.sleep(poll_sec)
-    return None
-
-
 def find_latest_safetensor(root_dir, since_ts):
     if not root_dir or not os.path.isdir(root_dir):
         return None
@@ -91,16 +92,6 @@ def find_latest_safetensor(root_dir, since_ts):
     return newest
 
 
-def wait_for_remote_output(root_dir, since_ts, timeout_sec, poll_sec):
-    deadline = time.time() + timeout_sec
-    while time.time() < deadline:
-        candidate = find_latest_safetensor(root_dir, since_ts)
-        if candidate:
-            return candidate
-        time.sleep(poll_sec)
-    return None
-
-
 def save_lora_file(source_path, out_path, copy_only=False):
     if not source_path or not os.path.exists(source_path):
         return False
@@ -115,156 +106,323 @@ def save_lora_file(source_path, out_path, copy_only=False):
     return True
 
 
+def file_digest(path, hash_cache):
+    """sha256 of a file, reused from hash_cache while size and mtime are unchanged."""
+    stat = os.stat(path)
+    key = os.path.normcase(os.path.abspath(path))
+    cached = hash_cache.get(key)
+    if cached and cached.get("size") == stat.st_size and cached.get("mtime") == stat.st_mtime:
+        return cached["sha256"]
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    hash_cache[key] = {"size": stat.st_size, "mtime": stat.st_mtime, "sha256": digest.hexdigest()}
+    return hash_cache[key]["sha256"]
+
+
+def dataset_fingerprint(image_files, caption, params, hash_cache):
+    """Content fingerprint of a training set: image hashes (order/name independent), caption and trainer params."""
+    payload = {
+        "version": FINGERPRINT_VERSION,
+        "images": sorted(file_digest(path, hash_cache) for path in image_files),
+        "caption": caption,
+        "params": params,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def load_json_file(path, default):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def save_json_file(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def load_trained_fingerprints(log_file):
+    """Output path -> fingerprint of its last successful (or adopted) run in the JSONL run log."""
+    fingerprints = {}
+    if not os.path.exists(log_file):
+        return fingerprints
+    with open(log_file, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if entry.get("status") in ("ok", "adopted") and entry.get("fingerprint") and entry.get("output"):
+                fingerprints[os.path.normcase(entry["output"])] = entry["fingerprint"]
+    return fingerprints
+
+
 def log_entry(log_file, entry):
-    with open(log_file, "a", encoding="utf-8") as f:
-        f.write(json.dumps(entry, ensure_ascii=True) + "\n")
+    with LOG_LOCK:
+        with open(log_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=True) + "\n")
+
+
+def load_lora_servers(workspaces_path):
+    """Gradio trainers of the 'lora' workspaces: [{"id", "url", "wsl_root"}]."""
+    config = load_json_file(workspaces_path, {}) if workspaces_path else {}
+    servers = []
+    for ws in config.get("workspaces", []) or []:
+        if ws.get("category") != LORA_CATEGORY:
+            continue
+        wsl_root = f"\\\\wsl.localhost\\{ws['distro']}" if ws.get("host") == "wsl" and ws.get("distro") else ""
+        for api in ws.get("apis", []) or []:
+            if api.get("type") == "gradio" and api.get("base_url"):
+                servers.append({"id": f"{ws.get('id')}:{api.get('id')}", "url": api["base_url"], "wsl_root": wsl_root})
+    return servers
+
+
+def resolve_servers(args):
+    if args.servers:
+        urls = [url.strip() for url in args.servers.split(",") if url.strip()]
+        return [{"id": url, "url": url, "wsl_root": args.wsl_root} for url in urls]
+    workspaces_path = args.workspaces
+    if workspaces_path is None:
+        try:
+            workspaces_path = resolve_path(load_engine_config().get("workspaces_path"), resolve_repo_root())
+        except (OSError, ValueError):
+            workspaces_path = None
+    servers = load_lora_servers(str(workspaces_path)) if workspaces_path else []
+    if args.wsl_root:
+        for server in servers:
+            server["wsl_root"] = args.wsl_root
+    return servers or [{"id": args.server, "url": args.server, "wsl_root": args.wsl_root}]
+
+
+def plan_job(folder, input_root, output_root, mode, caption_template):
+    rel = os.path.relpath(folder, input_root)
+    parts = rel.split(os.sep)
+    actor = parts[0] if parts else "unknown"
+    phase = "_".join(parts[1:]) if len(parts) > 1 else "default"
+    category = "actor"
+    prop_name = ""
+    if mode == "env":
+        category = "environment"
+        actor = clean_filename(rel.replace(os.sep, "_"))
+        phase = "environment"
+    elif len(parts) > 2 and parts[1].lower() == "props":
+        category = "prop"
+        prop_name = "_".join(parts[2:])
+        phase = f"prop_{prop_name}"
+
+    safe_actor = clean_filename(actor)
+    safe_phase = clean_filename(phase)
+    if category == "environment":
+        out_dir = output_root
+        out_name = f"env__{safe_actor}.safetensors"
+    else:
+        out_dir = os.path.join(output_root, safe_actor)
+        if category == "prop" and prop_name:
+            safe_prop = clean_filename(prop_name)
+            out_name = f"prop__{safe_prop}__{safe_actor}.safetensors"
+        else:
+            out_name = f"{safe_actor}__{safe_phase}.safetensors"
+
+    image_files = [
+        os.path.join(folder, f)
+        for f in sorted(os.listdir(folder))
+        if f.lower().endswith(IMAGE_EXTS)
+    ]
+    return {
+        "actor": actor,
+        "phase": phase,
+        "folder": folder,
+        "out_name": out_name,
+        "output": os.path.join(out_dir, out_name),
+        "caption": build_caption(caption_template, actor, phase),
+        "images": image_files,
+    }
+
+
+def resolve_output(result, server, job_start, remote_output_root):
+    """(local path, movable) of the trained LoRA, taken from the server response (no waiting on the filesystem)."""
+    lora_path = result[0] if isinstance(result, (list, tuple)) and result else result
+    download_path = result[1] if isinstance(result, (list, tuple)) and len(result) > 1 else None
+    # The download is a client-side copy and may be moved; the server's own file is only ever copied.
+    for value, movable in ((download_path, True), (lora_path, False)):
+        local_path = translate_wsl_path(normalize_download_path(value), server["wsl_root"])
+        if local_path and os.path.exists(local_path):
+            return local_path, movable
+    if remote_output_root:
+        # Responses without a usable path: the newest LoRA written since the job started.
+        return find_latest_safetensor(remote_output_root, job_start), False
+    return None, False
+
+
+def train_job(client, server, job, args):
+    entry = {
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "actor": job["actor"],
+        "phase": job["phase"],
+        "folder": job["folder"],
+        "output": job["output"],
+        "status": "started",
+        "count": len(job["images"]),
+        "fingerprint": job["fingerprint"],
+        "server": server["url"],
+    }
+    log_entry(args.log_file, entry)
+    job_start = time.time()
+    try:
+        # Inside the try: an image removed since planning fails this job, not the server's worker thread.
+        input_images = [{"image": handle_file(p), "caption": job["caption"]} for p in job["images"]]
+        result = client.predict(input_images=input_images, api_name=API_NAME)
+        source_path, movable = resolve_output(result, server, job_start, args.remote_output_root)
+        lora_path = normalize_download_path(result[0]) if isinstance(result, (list, tuple)) and result else None
+        saved = save_lora_file(source_path, job["output"], copy_only=args.copy_only or not movable)
+        entry.update({
+            "status": "ok" if saved else "error",
+            "remote_path": lora_path,
+            "seconds": round(time.time() - job_start, 1),
+        })
+        if not saved:
+            entry["error"] = "output not found in server response"
+    except Exception as e:
+        entry.update({"status": "error", "error": str(e)})
+    log_entry(args.log_file, entry)
+    return entry
+
+
+def run_queue(jobs, servers, args):
+    """One worker thread per trainer server; each pulls the next job when its server is free."""
+    pending = queue.Queue()
+    for idx, job in enumerate(jobs, start=1):
+        pending.put((idx, job))
+    counts = {"ok": 0, "error": 0}
+    counts_lock = threading.Lock()
+
+    def worker(server):
+        try:
+            client = Client(server["url"])
+        except Exception as e:
+            print(f"[{server['id']}] Server not reachable: {e}")
+            return
+        while True:
+            try:
+                idx, job = pending.get_nowait()
+            except queue.Empty:
+                return
+            print(f"[{idx}/{len(jobs)}] TRAIN @ {server['id']}: {job['actor']} / {job['phase']} ({len(job['images'])} imgs, {job['reason']})")
+            entry = train_job(client, server, job, args)
+            if entry["status"] == "ok":
+                print(f"  -> Saved: {job['output']} ({entry['seconds']}s)")
+            else:
+                print(f"  [ERR] {job['out_name']}: {entry.get('error')}")
+            with counts_lock:
+                counts[entry["status"]] += 1
+            time.sleep(args.sleep)
+
+    threads = [threading.Thread(target=worker, args=(server,), daemon=True) for server in servers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    counts["error"] += pending.qsize()
+    return counts
 
 
 def main():
     parser = argparse.ArgumentParser(description="Queue LoRA training jobs via Gradio API.")
-    parser.add_argument("--server", default="http://127.0.0.1:7860", help="Gradio server URL")
+    parser.add_argument("--server", default="http://127.0.0.1:7860", help="Gradio server URL (fallback when no workspace trainer is found)")
+    parser.add_argument("--servers", default="", help="Comma-separated Gradio trainer URLs (overrides workspaces.json)")
+    parser.add_argument("--workspaces", default=None, help="workspaces.json path (default: engine_config workspaces_path)")
     parser.add_argument("--input-root", default=r"C:\Users\sasch\henoch\produced_assets\lora_training\actors")
     parser.add_argument("--output-root", default=r"C:\Users\sasch\henoch\produced_assets\lora_training\loras")
     parser.add_argument("--mode", choices=["auto", "actor", "env"], default="auto", help="Training mode")
     parser.add_argument("--min-images", type=int, default=8, help="Minimum images required to train")
     parser.add_argument("--limit", type=int, default=0, help="Limit number of jobs (0 = all)")
-    parser.add_argument("--sleep", type=float, default=1.0, help="Seconds to sleep between jobs")
-    parser.add_argument("--poll-seconds", type=float, default=2.0, help="Polling interval for output files")
-    parser.add_argument("--timeout-seconds", type=float, default=600.0, help="Wait timeout for output files")
-    parser.add_argument("--remote-output-root", default="", help="Optional remote output directory to poll")
-    parser.add_argument("--wsl-root", default="", help="WSL UNC root (e.g. \\\\wsl.localhost\\Ubuntu22Old)")
+    parser.add_argument("--sleep", type=float, default=1.0, help="Seconds a server rests between jobs")
+    parser.add_argument("--remote-output-root", default="", help="Fallback output directory when a response has no usable path (single server only)")
+    parser.add_argument("--wsl-root", default="", help="WSL UNC root (e.g. \\\\wsl.localhost\\Ubuntu22Old); default from the workspace distro")
     parser.add_argument("--copy-only", action="store_true", help="Copy output instead of moving")
     parser.add_argument("--dry-run", action="store_true", help="List jobs without training")
-    parser.add_argument("--overwrite", action="store_true", help="Overwrite existing LoRA files")
+    parser.add_argument("--overwrite", action="store_true", help="Retrain even if the dataset fingerprint is unchanged")
     parser.add_argument("--caption-template", default="{actor} {phase}", help="Caption template")
+    parser.add_argument("--trainer-tag", default="", help="Extra fingerprint input; change it to retrain after a trainer update")
     parser.add_argument("--log-file", default=r"C:\Users\sasch\henoch\lora_training_runs.jsonl")
+    parser.add_argument("--hash-cache", default="", help="Image hash cache (default: <log-file>_hashes.json)")
     args = parser.parse_args()
 
     input_root = os.path.abspath(args.input_root)
     output_root = os.path.abspath(args.output_root)
     os.makedirs(output_root, exist_ok=True)
     mode = resolve_mode(input_root, args.mode)
+    hash_cache_path = args.hash_cache or os.path.splitext(args.log_file)[0] + "_hashes.json"
+    hash_cache = load_json_file(hash_cache_path, {})
+    trained = load_trained_fingerprints(args.log_file)
+    params = {"api_name": API_NAME, "mode": mode, "trainer_tag": args.trainer_tag}
 
     leaf_dirs = list_leaf_image_dirs(input_root)
-    if args.limit > 0:
-        leaf_dirs = leaf_dirs[: args.limit]
-
     print(f"Found {len(leaf_dirs)} training folders.")
-    if args.dry_run:
-        for d in leaf_dirs:
-            print(d)
-        return
-
-    client = Client(args.server)
 
-    success = 0
+    jobs = []
     skipped = 0
-    failed = 0
-
-    for idx, folder in enumerate(leaf_dirs, start=1):
-        rel = os.path.relpath(folder, input_root)
-        parts = rel.split(os.sep)
-        actor = parts[0] if parts else "unknown"
-        phase = "_".join(parts[1:]) if len(parts) > 1 else "default"
-        category = "actor"
-        prop_name = ""
-        if mode == "env":
-            category = "environment"
-            actor = clean_filename(rel.replace(os.sep, "_"))
-            phase = "environment"
-        elif len(parts) > 2 and parts[1].lower() == "props":
-            category = "prop"
-            prop_name = "_".join(parts[2:])
-            phase = f"prop_{prop_name}"
-
-        safe_actor = clean_filename(actor)
-        safe_phase = clean_filename(phase)
-        if category == "environment":
-            out_dir = output_root
-            out_name = f"env__{safe_actor}.safetensors"
-        else:
-            out_dir = os.path.join(output_root, safe_actor)
-            os.makedirs(out_dir, exist_ok=True)
-            if category == "prop" and prop_name:
-                safe_prop = clean_filename(prop_name)
-                out_name = f"prop__{safe_prop}__{safe_actor}.safetensors"
-            else:
-                out_name = f"{safe_actor}__{safe_phase}.safetensors"
-        out_path = os.path.join(out_dir, out_name)
-
-        if os.path.exists(out_path) and not args.overwrite:
-            print(f"[{idx}/{len(leaf_dirs)}] SKIP (exists): {out_name}")
+    for folder in leaf_dirs:
+        job = plan_job(folder, input_root, output_root, mode, args.caption_template)
+        if len(job["images"]) < args.min_images:
+            print(f"SKIP (not enough images): {folder}")
             skipped += 1
             continue
+        job["fingerprint"] = dataset_fingerprint(job["images"], job["caption"], params, hash_cache)
+        previous = trained.get(os.path.normcase(job["output"]))
+        exists = os.path.exists(job["output"])
+        if exists and not args.overwrite:
+            if previous == job["fingerprint"]:
+                skipped += 1
+                continue
+            if previous is None:
+                # Trained before fingerprints were logged: adopt the current dataset as its baseline.
+                if not args.dry_run:
+                    log_entry(args.log_file, {
+                        "timestamp": datetime.utcnow().isoformat() + "Z",
+                        "actor": job["actor"],
+                        "phase": job["phase"],
+                        "folder": folder,
+                        "output": job["output"],
+                        "status": "adopted",
+                        "count": len(job["images"]),
+                        "fingerprint": job["fingerprint"],
+                    })
+                print(f"SKIP (exists, fingerprint adopted): {job['out_name']}")
+                skipped += 1
+                continue
+        job["reason"] = "overwrite" if args.overwrite and exists else "changed" if exists else "new"
+        jobs.append(job)
+    save_json_file(hash_cache_path, hash_cache)
 
-        image_files = [
-            os.path.join(folder, f)
-            for f in sorted(os.listdir(folder))
-            if f.lower().endswith(IMAGE_EXTS)
-        ]
-        if len(image_files) < args.min_images:
-            print(f"[{idx}/{len(leaf_dirs)}] SKIP (not enough images): {folder}")
-            skipped += 1
-            continue
-
-        caption = build_caption(args.caption_template, actor, phase)
-        input_images = [{"image": handle_file(p), "caption": caption} for p in image_files]
-
-        print(f"[{idx}/{len(leaf_dirs)}] TRAIN: {actor} / {phase} ({len(image_files)} imgs)")
-        entry = {
-            "timestamp": datetime.utcnow().isoformat() + "Z",
-            "actor": actor,
-            "phase": phase,
-            "folder": folder,
-            "output": out_path,
-            "status": "started",
-            "count": len(image_files),
-        }
-        log_entry(args.log_file, entry)
-        job_start = time.time()
-
-        try:
-            result = client.predict(input_images=input_images, api_name="/generate_lora")
-            lora_path, download_path = result[0], result[1]
-            local_path = normalize_download_path(download_path)
-            local_path = translate_wsl_path(local_path, args.wsl_root)
-            saved = False
-
-            if local_path:
-                candidate = wait_for_path(local_path, args.timeout_seconds, args.poll_seconds)
-                if candidate:
-                    saved = save_lora_file(candidate, out_path, copy_only=args.copy_only)
-
-            if not saved and args.remote_output_root:
-                remote_path = wait_for_remote_output(
-                    args.remote_output_root,
-                    job_start,
-                    args.timeout_seconds,
-                    args.poll_seconds
-                )
-                if remote_path:
-                    saved = save_lora_file(remote_path, out_path, copy_only=True)
-
-            if saved:
-                print(f"  -> Saved: {out_path}")
-                entry.update({"status": "ok", "remote_path": lora_path})
-                log_entry(args.log_file, entry)
-                success += 1
-            else:
-                print("  [ERR] Output file not found. Check server output or remote output dir.")
-                entry.update({"status": "error", "remote_path": lora_path})
-                log_entry(args.log_file, entry)
-                failed += 1
-        except Exception as e:
-            print(f"  [ERR] Training failed: {e}")
-            entry.update({"status": "error", "error": str(e)})
-            log_entry(args.log_file, entry)
-            failed += 1
+    if args.limit > 0:
+        jobs = jobs[: args.limit]
+    print(f"{len(jobs)} jobs to train, {skipped} skipped.")
+    if args.dry_run:
+        for job in jobs:
+            print(f"{job['reason']:>9}: {job['folder']} -> {job['out_name']}")
+        return
+    if not jobs:
+        return
 
-        time.sleep(args.sleep)
+    servers = resolve_servers(args)
+    print(f"Trainers: {', '.join(server['url'] for server in servers)}")
+    if args.remote_output_root and len(servers) > 1:
+        # "Newest LoRA since the job started" can be another server's job; responses carry no output name to match.
+        print("WARN: --remote-output-root ignored with more than one trainer server.")
+        args.remote_output_root = ""
+    for job in jobs:
+        os.makedirs(os.path.dirname(job["output"]), exist_ok=True)
+    counts = run_queue(jobs, servers, args)
 
     print("\n--- DONE ---")
-    print(f"Success: {success}, Skipped: {skipped}, Failed: {failed}")
+    print(f"Success: {counts['ok']}, Skipped: {skipped}, Failed: {counts['error']}")
 
 
 if __name__ == "__main__":
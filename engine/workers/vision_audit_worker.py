@@ -1,10 +1,14 @@
 import argparse
 import base64
+import hashlib
 import json
 import os
 import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 
+from json_blocks import first_json_value
 from rag_utils import request_json
 
 ROOT_PATH = os.path.dirname(os.path.abspath(__file__))
@@ -19,6 +23,10 @@ IMAGE_MIME = {
     ".webp": "image/webp"
 }
 COMPONENT_KEYS = ("actor_raw", "env_base", "prop_image")
+PROXY_FORMATS = {"jpeg": (".jpg", "JPEG", "image/jpeg"), "webp": (".webp", "WEBP", "image/webp")}
+RETRY_STATUS = (408, 429, 500, 502, 503, 504)
+
+_PIL_WARNED = threading.Event()
 
 
 def load_json(path):
@@ -46,7 +54,15 @@ def load_config(path):
         "summary_filename": config.get("summary_filename", "vision_audit_summary.md"),
         "image_max_mb": float(config.get("image_max_mb", 6)),
         "include_components": bool(config.get("include_components", False)),
-        "system_prompt": config.get("system_prompt", "")
+        "system_prompt": config.get("system_prompt", ""),
+        "concurrency": int(config.get("concurrency", 4)),
+        "retries": int(config.get("retries", 3)),
+        "backoff_sec": float(config.get("backoff_sec", 2.0)),
+        # Proxies: images are downscaled to the model's input size before upload (0 disables).
+        "proxy_max_side": int(config.get("proxy_max_side", 1568)),
+        "proxy_format": str(config.get("proxy_format", "jpeg")).lower(),
+        "proxy_quality": int(config.get("proxy_quality", 85)),
+        "proxy_cache_dir": config.get("proxy_cache_dir", "data/cache/vision_proxies")
     }
 
 
@@ -186,41 +202,79 @@ def build_queue(chapter, scene_entries, scene_audit_index, config, scene_filter=
     return queue_path, jobs
 
 
-def encode_image(path, max_mb):
-    size_mb = os.path.getsize(path) / (1024 * 1024)
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def image_proxy(path, config):
+    """Downscaled JPEG/WebP copy of `path` (longest side <= proxy_max_side), cached by source hash.
+
+    Returns (proxy_path, mime), or None when proxies are off or Pillow is not installed.
+    """
+    max_side = config.get("proxy_max_side", 0)
+    if max_side <= 0:
+        return None
+    try:
+        from PIL import Image, ImageFile
+    except ImportError:
+        if not _PIL_WARNED.is_set():
+            _PIL_WARNED.set()
+            print("Pillow not installed; uploading original images (pip install pillow).")
+        return None
+    ext, pil_format, mime = PROXY_FORMATS.get(config.get("proxy_format"), PROXY_FORMATS["jpeg"])
+    quality = config.get("proxy_quality", 85)
+    cache_dir = os.path.join(ROOT_PATH, config.get("proxy_cache_dir") or "data/cache/vision_proxies")
+    proxy_path = os.path.join(cache_dir, f"{file_sha256(path)}_{max_side}_q{quality}{ext}")
+    if os.path.exists(proxy_path):
+        return proxy_path, mime
+    os.makedirs(cache_dir, exist_ok=True)
+    ImageFile.LOAD_TRUNCATED_IMAGES = True
+    with Image.open(path) as img:
+        img.draft("RGB", (max_side, max_side))
+        img = img.convert("RGB")
+        img.thumbnail((max_side, max_side), Image.LANCZOS)
+        # Unique tmp name: two jobs may share a component image.
+        tmp_path = f"{proxy_path}.{threading.get_ident()}.tmp"
+        img.save(tmp_path, format=pil_format, quality=quality)
+    os.replace(tmp_path, proxy_path)
+    return proxy_path, mime
+
+
+def encode_image(path, max_mb, config=None, stats=None):
+    proxy = image_proxy(path, config) if config else None
+    if proxy:
+        upload_path, mime = proxy
+    else:
+        upload_path, mime = path, IMAGE_MIME.get(os.path.splitext(path)[1].lower(), "image/png")
+    size = os.path.getsize(upload_path)
+    size_mb = size / (1024 * 1024)
     if size_mb > max_mb:
         raise RuntimeError(f"Image too large ({size_mb:.2f} MB) for audit: {path}")
-    ext = os.path.splitext(path)[1].lower()
-    mime = IMAGE_MIME.get(ext, "image/png")
-    with open(path, "rb") as handle:
+    if stats is not None:
+        with stats["lock"]:
+            stats["source_bytes"] += os.path.getsize(path)
+            stats["upload_bytes"] += size
+    with open(upload_path, "rb") as handle:
         encoded = base64.b64encode(handle.read()).decode("ascii")
     return f"data:{mime};base64,{encoded}"
 
 
 def parse_json_response(text):
-    if not text:
-        return None
-    try:
-        return json.loads(text)
-    except json.JSONDecodeError:
-        pass
-    match = re.search(r"\{.*\}", text, re.DOTALL)
-    if match:
-        try:
-            return json.loads(match.group(0))
-        except json.JSONDecodeError:
-            return None
-    return None
+    return first_json_value(text)
 
 
-def send_job(job, config):
+def send_job(job, config, stats=None):
     headers = {"Content-Type": "application/json"}
     if config["api_key"]:
         headers["Authorization"] = f"Bearer {config['api_key']}"
 
     content = [
         {"type": "text", "text": f"Action: {job['action']}\nPrompt: {job['prompt']}"},
-        {"type": "image_url", "image_url": {"url": encode_image(job["composite_path"], config["image_max_mb"])}}
+        {"type": "image_url", "image_url": {"url": encode_image(job["composite_path"], config["image_max_mb"], config, stats)}}
     ]
     if config.get("include_components"):
         for key in COMPONENT_KEYS:
@@ -231,7 +285,7 @@ def send_job(job, config):
                 content.append({"type": "text", "text": f"{key}:"})
                 content.append({
                     "type": "image_url",
-                    "image_url": {"url": encode_image(paths[0], config["image_max_mb"])}
+                    "image_url": {"url": encode_image(paths[0], config["image_max_mb"], config, stats)}
                 })
             except RuntimeError as exc:
                 content.append({"type": "text", "text": f"{key}: skipped ({exc})"})
@@ -244,10 +298,52 @@ def send_job(job, config):
         ],
         "max_tokens": config["max_tokens"]
     }
-    status, data = request_json("POST", config["endpoint"], payload=payload, headers=headers, timeout=config["timeout_sec"])
-    if status < 200 or status >= 300:
-        raise RuntimeError(f"Vision API error {status}: {data}")
-    return data
+    attempts = max(0, config.get("retries", 0)) + 1
+    for attempt in range(attempts):
+        if attempt:
+            time.sleep(config.get("backoff_sec", 2.0) * (2 ** (attempt - 1)))
+        try:
+            status, data = request_json("POST", config["endpoint"], payload=payload, headers=headers, timeout=config["timeout_sec"])
+        except OSError as exc:
+            # Connection errors and timeouts are retried like 5xx responses.
+            if attempt + 1 < attempts:
+                continue
+            raise RuntimeError(f"Vision API unreachable: {exc}") from exc
+        if 200 <= status < 300:
+            return data
+        if status not in RETRY_STATUS or attempt + 1 == attempts:
+            raise RuntimeError(f"Vision API error {status}: {data}")
+    raise RuntimeError("Vision API: no attempts made.")
+
+
+def audit_job(job, config, stats=None):
+    try:
+        response = send_job(job, config, stats)
+        content = ""
+        if isinstance(response, dict):
+            choices = response.get("choices")
+            if choices:
+                content = choices[0].get("message", {}).get("content", "")
+        parsed = parse_json_response(content)
+        return {
+            "chapter": job["chapter"],
+            "scene": job["scene"],
+            "scene_tag": job["scene_tag"],
+            "status": parsed.get("pass") if isinstance(parsed, dict) else "review",
+            "score": parsed.get("score") if isinstance(parsed, dict) else None,
+            "issues": parsed.get("issues") if isinstance(parsed, dict) else [],
+            "notes": parsed.get("notes") if isinstance(parsed, dict) else content,
+            "raw": response
+        }
+    except Exception as exc:
+        return {
+            "chapter": job["chapter"],
+            "scene": job["scene"],
+            "scene_tag": job["scene_tag"],
+            "status": "error",
+            "notes": str(exc),
+            "raw": None
+        }
 
 
 def write_results(chapter, jobs, responses, config):
@@ -279,11 +375,21 @@ def main():
     parser.add_argument("--config", default=DEFAULT_CONFIG, help="Config JSON path")
     parser.add_argument("--send", action="store_true", help="Send to vision endpoint if configured")
     parser.add_argument("--dry-run", action="store_true", help="Only build queue")
+    parser.add_argument("--concurrency", type=int, help="Parallel requests (overrides config concurrency)")
+    parser.add_argument("--retries", type=int, help="Retries on 429/5xx/connection errors (overrides config)")
+    parser.add_argument("--max-side", type=int, help="Proxy longest side in px, 0 uploads originals (overrides config)")
     args = parser.parse_args()
 
     config = load_config(args.config)
+    if args.concurrency is not None:
+        config["concurrency"] = args.concurrency
+    if args.retries is not None:
+        config["retries"] = args.retries
+    if args.max_side is not None:
+        config["proxy_max_side"] = args.max_side
     chapters = get_chapters(args.chapter)
 
+    queued = []
     for chapter in chapters:
         chapter_path = os.path.join(FILMSETS_PATH, chapter)
         script_path = os.path.join(chapter_path, "DREHBUCH_HOLLYWOOD.md")
@@ -294,43 +400,29 @@ def main():
         scene_audit_index = load_scene_audit(chapter_path)
         queue_path, jobs = build_queue(chapter, scenes, scene_audit_index, config, args.scene)
         print(f"{chapter}: queued {len(jobs)} jobs -> {queue_path}")
-
-        if args.dry_run or not args.send:
-            continue
-        if not config["endpoint"] or not config["model"] or not config["enabled"]:
-            print("Vision endpoint not configured/enabled; skipping send.")
-            continue
-
-        responses = []
-        for job in jobs:
-            try:
-                response = send_job(job, config)
-                content = ""
-                if isinstance(response, dict):
-                    choices = response.get("choices")
-                    if choices:
-                        content = choices[0].get("message", {}).get("content", "")
-                parsed = parse_json_response(content)
-                responses.append({
-                    "chapter": job["chapter"],
-                    "scene": job["scene"],
-                    "scene_tag": job["scene_tag"],
-                    "status": parsed.get("pass") if isinstance(parsed, dict) else "review",
-                    "score": parsed.get("score") if isinstance(parsed, dict) else None,
-                    "issues": parsed.get("issues") if isinstance(parsed, dict) else [],
-                    "notes": parsed.get("notes") if isinstance(parsed, dict) else content,
-                    "raw": response
-                })
-            except Exception as exc:
-                responses.append({
-                    "chapter": job["chapter"],
-                    "scene": job["scene"],
-                    "scene_tag": job["scene_tag"],
-                    "status": "error",
-                    "notes": str(exc),
-                    "raw": None
-                })
-        write_results(chapter, jobs, responses, config)
+        queued.append((chapter, jobs))
+
+    if args.dry_run or not args.send:
+        return
+    if not config["endpoint"] or not config["model"] or not config["enabled"]:
+        print("Vision endpoint not configured/enabled; skipping send.")
+        return
+
+    # All chapters share one pool; results are written per chapter in queue order.
+    all_jobs = [job for _, jobs in queued for job in jobs]
+    stats = {"lock": threading.Lock(), "source_bytes": 0, "upload_bytes": 0}
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, config["concurrency"])) as pool:
+        responses = list(pool.map(lambda job: audit_job(job, config, stats), all_jobs))
+    offset = 0
+    for chapter, jobs in queued:
+        write_results(chapter, jobs, responses[offset:offset + len(jobs)], config)
+        offset += len(jobs)
+    errors = sum(1 for item in responses if item["status"] == "error")
+    print(
+        f"Sent {len(all_jobs)} jobs in {time.perf_counter() - started:.1f}s ({errors} errors); "
+        f"uploaded {stats['upload_bytes'] / 1e6:.1f} MB of {stats['source_bytes'] / 1e6:.1f} MB source images."
+    )
 
 
 if __name__ == "__main__":
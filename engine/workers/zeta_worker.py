@@ -1,12 +1,15 @@
 import os
 import json
 import argparse
+import hashlib
+import struct
 import time
 import uuid
 import wave
 import shutil
 import urllib.request
 import urllib.error
+from concurrent.futures import ThreadPoolExecutor
 
 DEFAULT_ENDPOINT = "http://127.0.0.1:7861"
 DEFAULT_MODEL_ID = "stabilityai/stable-audio-open-1.0"
@@ -16,6 +19,9 @@ DEFAULT_CFG_SCALE_SRC = 1.0
 DEFAULT_CFG_SCALE_TAR = 12.0
 DEFAULT_T_START = 45.0
 DEFAULT_TIMEOUT_SEC = 900
+DEFAULT_CROSSFADE_SEC = 0.25
+# Step outputs keyed by (input audio, edit params), next to the output.
+CACHE_DIRNAME = ".zeta_cache"
 
 
 def load_payload(path):
@@ -253,6 +259,191 @@ def build_step_output(output_path, index, total):
     return f"{root}_step{index + 1:02d}{ext}"
 
 
+def edit_span(edit, duration_sec):
+    """(start_sec, end_sec) of an edit with a start and a duration, else None (the edit covers the whole track)."""
+    if not isinstance(edit, dict):
+        return None
+    start = parse_timestamp(edit.get("t_start_sec"))
+    if start is None:
+        start = parse_timestamp(edit.get("timestamp"))
+    length = parse_timestamp(edit.get("duration"))
+    if start is None or not length or length <= 0:
+        return None
+    end = start + length
+    if duration_sec:
+        end = min(end, duration_sec)
+    if end <= start:
+        return None
+    return start, end
+
+
+def plan_stages(steps, crossfade_sec, parallel):
+    """Group consecutive edits into stages: edits with disjoint time spans (crossfade margins included)
+    share a stage and run side by side on the same input; whole-track edits always get a stage of their own.
+
+    With parallel <= 1 every edit is its own stage (the plain sequential chain).
+    """
+    stages = []
+    group = []
+    for step in steps:
+        span = step["span"]
+        if parallel > 1 and span is not None and len(group) < parallel and all(
+            span[0] - crossfade_sec >= other["span"][1] + crossfade_sec
+            or other["span"][0] - crossfade_sec >= span[1] + crossfade_sec
+            for other in group
+        ):
+            group.append(step)
+            continue
+        if group:
+            stages.append(group)
+            group = []
+        if parallel > 1 and span is not None:
+            group = [step]
+        else:
+            stages.append([step])
+    if group:
+        stages.append(group)
+    return stages
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def step_key(input_key, payload, endpoint):
+    """Cache key of one edit: its input (digest of the base track or the previous key) plus every edit parameter."""
+    params = dict(payload)
+    params["data"] = list(payload["data"][1:])
+    text = json.dumps({"input": input_key, "endpoint": endpoint, "params": params}, sort_keys=True)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+def require_numpy():
+    try:
+        import numpy
+    except ImportError as exc:
+        raise RuntimeError("numpy is not installed. pip install numpy") from exc
+    return numpy
+
+
+def read_wav(path):
+    """PCM (16/24/32 bit) or float32 WAV -> (float64 samples (frames, channels), rate, (format, bits))."""
+    np = require_numpy()
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        raise ValueError(f"Keine WAV Datei: {path}")
+    pos = 12
+    fmt = None
+    pcm = None
+    while pos + 8 <= len(data):
+        chunk_id = data[pos:pos + 4]
+        size = struct.unpack("<I", data[pos + 4:pos + 8])[0]
+        body = data[pos + 8:pos + 8 + size]
+        if chunk_id == b"fmt ":
+            fmt = struct.unpack("<HHIIHH", body[:16])
+            if fmt[0] == 0xFFFE and len(body) >= 26:
+                # WAVE_FORMAT_EXTENSIBLE: the real format is the first field of the sub-format GUID.
+                fmt = (struct.unpack("<H", body[24:26])[0],) + fmt[1:]
+        elif chunk_id == b"data":
+            pcm = body
+        pos += 8 + size + (size & 1)
+    if fmt is None or pcm is None:
+        raise ValueError(f"WAV ohne fmt/data: {path}")
+    format_code, channels, rate, _, _, bits = fmt
+    width = bits // 8
+    usable = len(pcm) - len(pcm) % (width * channels)
+    if format_code == 3 and bits == 32:
+        samples = np.frombuffer(pcm[:usable], dtype="<f4").astype(np.float64)
+    elif format_code == 1 and bits in (16, 32):
+        samples = np.frombuffer(pcm[:usable], dtype=f"<i{width}").astype(np.float64) / float(1 << (bits - 1))
+    elif format_code == 1 and bits == 24:
+        raw = np.frombuffer(pcm[:usable], dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        values = raw[:, 0] | (raw[:, 1] << 8) | (raw[:, 2] << 16)
+        values = np.where(values >= 1 << 23, values - (1 << 24), values)
+        samples = values.astype(np.float64) / float(1 << 23)
+    else:
+        raise ValueError(f"WAV Format nicht unterstuetzt ({format_code}, {bits} bit): {path}")
+    return samples.reshape(-1, channels), rate, (format_code, bits)
+
+
+def write_wav(path, samples, rate, sample_format):
+    np = require_numpy()
+    format_code, bits = sample_format
+    channels = samples.shape[1]
+    if format_code == 3:
+        pcm = samples.astype("<f4").tobytes()
+    else:
+        scale = float(1 << (bits - 1))
+        ints = np.clip(np.round(samples * scale), -scale, scale - 1).astype(np.int64)
+        if bits == 24:
+            flat = ints.reshape(-1)
+            pcm = np.stack([flat & 0xFF, (flat >> 8) & 0xFF, (flat >> 16) & 0xFF], axis=1).astype(np.uint8).tobytes()
+        else:
+            pcm = ints.astype(f"<i{bits // 8}").tobytes()
+    block = channels * bits // 8
+    header = b"RIFF" + struct.pack("<I", 36 + len(pcm)) + b"WAVE"
+    header += b"fmt " + struct.pack("<IHHIIHH", 16, format_code, channels, rate, rate * block, block, bits)
+    header += b"data" + struct.pack("<I", len(pcm))
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(pcm)
+    os.replace(tmp_path, path)
+
+
+def splice_edits(base_path, edited, crossfade_sec, output_path):
+    """Mix each edited track into the base only inside its span, with linear crossfades of crossfade_sec at both ends.
+
+    `edited` is a list of (path, (start_sec, end_sec)); spans (plus fades) must not overlap.
+    """
+    np = require_numpy()
+    base, rate, sample_format = read_wav(base_path)
+    result = base.copy()
+    frames = len(base)
+    fade = int(round(crossfade_sec * rate))
+    for path, (start_sec, end_sec) in edited:
+        samples, edit_rate, _ = read_wav(path)
+        if edit_rate != rate or samples.shape[1] != base.shape[1]:
+            raise ValueError(
+                f"Edit {path} hat {edit_rate} Hz/{samples.shape[1]} Kanaele, Base {rate} Hz/{base.shape[1]}."
+            )
+        if len(samples) < frames:
+            samples = np.concatenate([samples, base[len(samples):]])
+        start = int(round(start_sec * rate))
+        end = min(frames, int(round(end_sec * rate)))
+        lo = max(0, start - fade)
+        hi = min(frames, end + fade)
+        positions = np.arange(lo, hi, dtype=np.float64)
+        weight = np.ones(hi - lo)
+        if fade:
+            weight = np.minimum(weight, np.clip((positions - (start - fade)) / fade, 0.0, 1.0))
+            weight = np.minimum(weight, np.clip(((end + fade) - positions) / fade, 0.0, 1.0))
+        weight = weight[:, None]
+        result[lo:hi] = result[lo:hi] * (1.0 - weight) + samples[lo:hi] * weight
+    write_wav(output_path, result, rate, sample_format)
+    return output_path
+
+
+def run_edit(endpoint, payload, use_queue, timeout_sec, cache_path):
+    """One ZETA call; a local output is copied to cache_path. Returns the usable output path or None."""
+    result_data = call_predict(endpoint, payload, use_queue, timeout_sec)
+    output_candidate = extract_output_path(result_data)
+    if output_candidate and os.path.exists(output_candidate):
+        if cache_path:
+            shutil.copy(output_candidate, cache_path + ".tmp")
+            os.replace(cache_path + ".tmp", cache_path)
+            return cache_path
+        return output_candidate
+    if output_candidate:
+        print(f"ZETA Output: {output_candidate}")
+    return output_candidate
+
+
 def run(
     base_track,
     edits_file,
@@ -274,6 +465,10 @@ def run(
     include_spot,
     sort_edits,
     dry_run,
+    parallel=1,
+    crossfade_sec=DEFAULT_CROSSFADE_SEC,
+    use_cache=True,
+    cache_dir=None,
 ):
     if not os.path.exists(base_track):
         print(f"Fehler: Base track nicht gefunden: {base_track}")
@@ -295,65 +490,145 @@ def run(
         edits = edits[:max_edits]
 
     duration_sec = get_audio_duration_sec(base_track) or 60.0
-    current_audio = base_track
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
 
     if sort_edits and duration_sec:
         edits = sorted(edits, key=lambda e: compute_sort_value(e, duration_sec, default_t_start))
 
+    planned = []
     for idx, edit in enumerate(edits):
         target_prompt = ""
+        edit_cfg_scale_tar = cfg_scale_tar
         if isinstance(edit, dict):
             target_prompt = edit.get("prompt", "")
             if edit.get("guidance") is not None:
                 try:
-                    cfg_scale_tar = float(edit.get("guidance"))
+                    edit_cfg_scale_tar = float(edit.get("guidance"))
                 except (TypeError, ValueError):
                     pass
         if not target_prompt:
             print(f"Warnung: Edit {idx + 1} ohne Prompt. Ueberspringe.")
             continue
+        planned.append({
+            "index": idx,
+            "prompt": target_prompt,
+            "cfg_scale_tar": edit_cfg_scale_tar,
+            "t_start": compute_t_start_percent(edit, duration_sec, default_t_start),
+            "span": edit_span(edit, duration_sec),
+        })
+    if not planned:
+        print("Warnung: Keine edits mit Prompt.")
+        return
 
-        t_start = compute_t_start_percent(edit, duration_sec, default_t_start)
-        payload = build_payload(
-            audio_path=current_audio,
+    def edit_payload(step, audio_path):
+        return build_payload(
+            audio_path=audio_path,
             model_id=model_id,
             do_inversion=do_inversion,
             source_prompt=source_prompt,
-            target_prompt=target_prompt,
+            target_prompt=step["prompt"],
             steps=steps,
             cfg_scale_src=cfg_scale_src,
-            cfg_scale_tar=cfg_scale_tar,
-            t_start=t_start,
+            cfg_scale_tar=step["cfg_scale_tar"],
+            t_start=step["t_start"],
             randomize_seed=randomize_seed,
             save_compute=save_compute,
             fn_index=fn_index,
         )
 
-        step_output = build_step_output(output_path, idx, len(edits))
+    stages = plan_stages(planned, crossfade_sec, parallel)
+    cache_dir = cache_dir or os.path.join(os.path.dirname(output_path) or ".", CACHE_DIRNAME)
+    if use_cache and not dry_run:
+        os.makedirs(cache_dir, exist_ok=True)
+    current_audio = base_track
+    current_key = file_digest(base_track)
+    ext = os.path.splitext(output_path)[1] or ".wav"
+
+    for stage_idx, stage in enumerate(stages):
+        stage_output = build_step_output(output_path, stage_idx, len(stages))
+        jobs = []
+        for step in stage:
+            step_payload = edit_payload(step, current_audio)
+            key = step_key(current_key, step_payload, endpoint)
+            cache_path = os.path.join(cache_dir, f"{key}{ext}") if use_cache else None
+            jobs.append((step, step_payload, key, cache_path))
+
         if dry_run:
-            print(f"Edit {idx + 1}/{len(edits)} -> {step_output}")
-            print(json.dumps(payload, indent=2))
-            current_audio = step_output
+            mode = "parallel" if len(stage) > 1 else "seq"
+            print(f"Stage {stage_idx + 1}/{len(stages)} ({mode}, {len(stage)} edits) -> {stage_output}")
+            for step, step_payload, key, cache_path in jobs:
+                cached = " [cache]" if cache_path and os.path.exists(cache_path) else ""
+                print(f"  Edit {step['index'] + 1} span={step['span']} key={key}{cached}")
+                print(json.dumps(step_payload, indent=2))
+            current_audio = stage_output
+            current_key = hashlib.sha256("|".join(job[2] for job in jobs).encode("utf-8")).hexdigest()[:32]
             continue
 
+        results = {}
+        todo = []
+        for job in jobs:
+            cache_path = job[3]
+            if cache_path and os.path.exists(cache_path):
+                results[job[2]] = cache_path
+                print(f"Cache: Edit {job[0]['index'] + 1} ({job[2]})")
+            else:
+                todo.append(job)
         try:
-            result_data = call_predict(endpoint, payload, use_queue, timeout_sec)
+            if len(todo) > 1:
+                with ThreadPoolExecutor(max_workers=len(todo)) as pool:
+                    outputs = list(pool.map(
+                        lambda job: run_edit(endpoint, job[1], use_queue, timeout_sec, job[3]), todo
+                    ))
+            else:
+                outputs = [run_edit(endpoint, job[1], use_queue, timeout_sec, job[3]) for job in todo]
         except (urllib.error.URLError, urllib.error.HTTPError) as exc:
             print(f"ZETA API Fehler: {exc}")
             return
+        for job, output in zip(todo, outputs):
+            if not output:
+                print("Warnung: Kein Output vom ZETA Endpoint.")
+                return
+            results[job[2]] = output
+
+        if len(stage) == 1:
+            output = results[jobs[0][2]]
+            if os.path.exists(output):
+                shutil.copy(output, stage_output)
+                current_audio = stage_output
+                print(f"Saved: {stage_output}")
+            else:
+                # Remote-only output path (server on another filesystem): chain on it as before.
+                current_audio = output
+            current_key = jobs[0][2]
+            continue
 
-        output_candidate = extract_output_path(result_data)
-        if output_candidate and os.path.exists(output_candidate):
-            shutil.copy(output_candidate, step_output)
-            current_audio = step_output
-            print(f"Saved: {step_output}")
-        elif output_candidate:
-            print(f"ZETA Output: {output_candidate}")
-            current_audio = output_candidate
+        stage_key = hashlib.sha256(
+            ("|".join(job[2] for job in jobs) + f"|xfade={crossfade_sec}").encode("utf-8")
+        ).hexdigest()[:32]
+        merged_cache = os.path.join(cache_dir, f"{stage_key}{ext}") if use_cache else None
+        if merged_cache and os.path.exists(merged_cache):
+            shutil.copy(merged_cache, stage_output)
         else:
-            print("Warnung: Kein Output vom ZETA Endpoint.")
-            return
+            missing = [results[job[2]] for job in jobs if not os.path.exists(results[job[2]])]
+            if missing:
+                print(f"Fehler: Parallel-Edits brauchen lokale Outputs, {missing[0]} fehlt. Mit --parallel 1 ausfuehren.")
+                return
+            try:
+                splice_edits(
+                    current_audio,
+                    [(results[job[2]], job[0]["span"]) for job in jobs],
+                    crossfade_sec,
+                    stage_output,
+                )
+            except (RuntimeError, ValueError) as exc:
+                print(f"Fehler beim Zusammenfuehren: {exc}")
+                return
+            if merged_cache:
+                shutil.copy(stage_output, merged_cache)
+        spans = ", ".join(f"{job[0]['span'][0]:.1f}-{job[0]['span'][1]:.1f}s" for job in jobs)
+        print(f"Saved: {stage_output} ({len(jobs)} edits parallel: {spans})")
+        current_audio = stage_output
+        current_key = stage_key
 
 
 if __name__ == "__main__":
@@ -378,6 +653,12 @@ if __name__ == "__main__":
     parser.add_argument("--no-spot", action="store_true")
     parser.add_argument("--no-sort", action="store_true")
     parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--parallel", type=int, default=1,
+                        help="Max edits with disjoint time spans run side by side on the same input (1 = chain)")
+    parser.add_argument("--crossfade-sec", type=float, default=DEFAULT_CROSSFADE_SEC,
+                        help="Crossfade at both ends of a parallel edit's span")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore cached step outputs")
+    parser.add_argument("--cache-dir", help=f"Step cache directory (default: <output dir>/{CACHE_DIRNAME})")
     args = parser.parse_args()
 
     run(
@@ -401,4 +682,8 @@ if __name__ == "__main__":
         include_spot=not args.no_spot,
         sort_edits=not args.no_sort,
         dry_run=args.dry_run,
+        parallel=args.parallel,
+        crossfade_sec=args.crossfade_sec,
+        use_cache=not args.no_cache,
+        cache_dir=args.cache_dir,
     )